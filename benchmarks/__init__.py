@@ -0,0 +1,7 @@
+"""
+Benchmarks for the Word Document Server.
+
+- ``benchmarks.corpus`` generates deterministic synthetic documents.
+- ``benchmarks.run`` times each tool against them (p50/p99, throughput, peak RSS).
+- ``benchmarks/import_time.py`` measures server cold start.
+"""
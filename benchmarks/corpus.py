@@ -0,0 +1,222 @@
+"""
+Deterministic synthetic .docx corpus for benchmarks.
+
+Every corpus document is generated from a fixed seed, so the same name always
+produces the same content (zip timestamps aside) on every machine. Documents
+are cached in a corpus directory and only regenerated when missing.
+
+    python -m benchmarks.corpus --sizes small,medium --out /tmp/corpus
+"""
+import argparse
+import io
+import os
+import random
+import struct
+import tempfile
+import zlib
+from collections import namedtuple
+from datetime import datetime
+
+# Bump when the generators change so that cached corpora are rebuilt
+CORPUS_VERSION = 1
+
+DEFAULT_CORPUS_DIR = os.path.join(tempfile.gettempdir(), "word-mcp-bench-corpus")
+
+# name: generator, keyword arguments, size class
+Shape = namedtuple("Shape", ["name", "kind", "params", "size"])
+
+SHAPES = [
+    Shape("paragraphs-1k", "paragraphs", {"paragraphs": 1000}, "small"),
+    Shape("tables-wide", "tables", {"tables": 5, "rows": 30, "cols": 30}, "small"),
+    Shape("images-50", "images", {"images": 50}, "small"),
+    Shape("sections-50", "sections", {"sections": 50, "paragraphs_per_section": 10}, "small"),
+    Shape("paragraphs-50k", "paragraphs", {"paragraphs": 50000}, "medium"),
+    Shape("tables-wide-large", "tables", {"tables": 20, "rows": 100, "cols": 60}, "medium"),
+    Shape("images-300", "images", {"images": 300}, "medium"),
+    Shape("sections-500", "sections", {"sections": 500, "paragraphs_per_section": 20}, "medium"),
+    Shape("paragraphs-500k", "paragraphs", {"paragraphs": 500000}, "large"),
+]
+
+SIZES = ("small", "medium", "large")
+
+_WORDS = (
+    "lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod tempor "
+    "incididunt ut labore et dolore magna aliqua alpha beta gamma delta report "
+    "analysis chapter section figure table result method data system process "
+    "was written were reviewed is tested are measured been approved"
+).split()
+
+_FIXED_DATE = datetime(2024, 1, 1)
+
+
+def _sentence(rng: random.Random, min_words: int = 6, max_words: int = 30) -> str:
+    words = [rng.choice(_WORDS) for _ in range(rng.randint(min_words, max_words))]
+    return " ".join(words).capitalize() + "."
+
+
+def _paragraph_text(rng: random.Random) -> str:
+    return " ".join(_sentence(rng) for _ in range(rng.randint(1, 4)))
+
+
+def png_bytes(seed: int, width: int = 96, height: int = 96) -> bytes:
+    """Return a deterministic RGB PNG image that differs for every seed."""
+    rng = random.Random(seed)
+
+    def chunk(kind, data):
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+    rows = b"".join(b"\x00" + bytes(rng.getrandbits(8) for _ in range(width * 3)) for _ in range(height))
+    return (b"\x89PNG\r\n\x1a\n"
+            + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+            + chunk(b"IDAT", zlib.compress(rows))
+            + chunk(b"IEND", b""))
+
+
+class _BodyWriter:
+    """Appends paragraphs straight to the body XML.
+
+    python-docx's add_paragraph is fine for thousands of paragraphs but far too
+    slow for hundreds of thousands, so large documents are built from element
+    templates instead.
+    """
+
+    def __init__(self, doc):
+        from docx.oxml import OxmlElement
+        from docx.oxml.ns import qn
+        self._make = OxmlElement
+        self._qn = qn
+        self._body = doc.element.body
+        self._sectPr = self._body.find(qn("w:sectPr"))
+
+    def paragraph(self, text: str, style_id: str = None) -> None:
+        p = self._make("w:p")
+        if style_id:
+            pPr = self._make("w:pPr")
+            pStyle = self._make("w:pStyle")
+            pStyle.set(self._qn("w:val"), style_id)
+            pPr.append(pStyle)
+            p.append(pPr)
+        r = self._make("w:r")
+        t = self._make("w:t")
+        t.text = text
+        t.set("{http://www.w3.org/XML/1998/namespace}space", "preserve")
+        r.append(t)
+        p.append(r)
+        if self._sectPr is not None:
+            self._sectPr.addprevious(p)
+        else:
+            self._body.append(p)
+
+
+def _new_document(title: str):
+    from docx import Document
+    doc = Document()
+    props = doc.core_properties
+    props.title = title
+    props.author = "benchmarks"
+    props.created = props.modified = _FIXED_DATE
+    props.revision = 1
+    return doc
+
+
+def _paragraphs(doc, rng, paragraphs: int) -> None:
+    writer = _BodyWriter(doc)
+    for i in range(paragraphs):
+        if i % 50 == 0:
+            level = 1 if i % 500 == 0 else 2
+            writer.paragraph(f"Heading {i // 50}: {_sentence(rng, 2, 6)}", f"Heading{level}")
+        else:
+            writer.paragraph(_paragraph_text(rng))
+
+
+def _tables(doc, rng, tables: int, rows: int, cols: int) -> None:
+    for t in range(tables):
+        doc.add_heading(f"Table {t + 1}", level=2)
+        table = doc.add_table(rows=rows, cols=cols)
+        for row in table.rows:
+            for cell in row.cells:
+                cell.text = rng.choice(_WORDS)
+        doc.add_paragraph(_paragraph_text(rng))
+
+
+def _images(doc, rng, images: int) -> None:
+    from docx.shared import Inches
+    for i in range(images):
+        doc.add_paragraph(_sentence(rng))
+        doc.add_picture(io.BytesIO(png_bytes(i)), width=Inches(1))
+
+
+def _sections(doc, rng, sections: int, paragraphs_per_section: int) -> None:
+    from docx.enum.section import WD_SECTION
+    writer = _BodyWriter(doc)
+    for s in range(sections):
+        if s:
+            section = doc.add_section(WD_SECTION.NEW_PAGE)
+            writer = _BodyWriter(doc)
+            if s % 10 == 0:
+                section.header.is_linked_to_previous = False
+                section.header.paragraphs[0].text = f"Part {s // 10}"
+        writer.paragraph(f"Section {s + 1}", "Heading1")
+        for _ in range(paragraphs_per_section):
+            writer.paragraph(_paragraph_text(rng))
+
+
+_GENERATORS = {
+    "paragraphs": _paragraphs,
+    "tables": _tables,
+    "images": _images,
+    "sections": _sections,
+}
+
+
+def generate(shape: Shape, path: str) -> str:
+    """Write the document for ``shape`` to ``path``."""
+    doc = _new_document(shape.name)
+    rng = random.Random(f"{shape.name}:{CORPUS_VERSION}")
+    _GENERATORS[shape.kind](doc, rng, **shape.params)
+    tmp_path = path + ".partial"
+    doc.save(tmp_path)
+    os.replace(tmp_path, path)
+    return path
+
+
+def shapes_for(sizes) -> list:
+    """Return the corpus shapes of the given size classes."""
+    return [shape for shape in SHAPES if shape.size in sizes]
+
+
+def ensure_corpus(sizes=("small",), corpus_dir: str = DEFAULT_CORPUS_DIR, names=None) -> dict:
+    """
+    Generate any missing corpus documents.
+
+    Args:
+        sizes: Size classes to include ("small", "medium", "large")
+        corpus_dir: Directory holding the generated documents
+        names: Optional list of shape names to restrict to
+
+    Returns:
+        Dict of shape name -> document path
+    """
+    os.makedirs(corpus_dir, exist_ok=True)
+    paths = {}
+    for shape in shapes_for(sizes):
+        if names and shape.name not in names:
+            continue
+        path = os.path.join(corpus_dir, f"{shape.name}.v{CORPUS_VERSION}.docx")
+        if not os.path.exists(path):
+            generate(shape, path)
+        paths[shape.name] = path
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate the benchmark corpus")
+    parser.add_argument("--sizes", default="small", help="Comma-separated size classes: small,medium,large")
+    parser.add_argument("--out", default=DEFAULT_CORPUS_DIR, help="Corpus directory")
+    args = parser.parse_args()
+    for name, path in ensure_corpus(args.sizes.split(","), args.out).items():
+        print(f"{name:<20} {os.path.getsize(path) / 1024:>10.1f} KiB  {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Measure server cold-start time with lazy and eager tool imports.
+
+Each sample starts a fresh interpreter that imports the server and registers
+every tool, which is what an MCP client pays before the first request can be
+served. The "server" column excludes interpreter start-up and the MCP SDK
+import, which are the same in both modes. Run from the repository root:
+
+    python benchmarks/import_time.py --runs 10
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs in the child: time the MCP SDK import separately from the server's own
+# start-up, since the former does not depend on how tools are registered.
+CHILD = """
+import time
+t0 = time.perf_counter()
+import mcp.server.fastmcp
+t1 = time.perf_counter()
+from word_document_server import main
+main.register_tools()
+t2 = time.perf_counter()
+print(t1 - t0, t2 - t1)
+"""
+
+
+def sample(env: dict) -> tuple:
+    start = time.perf_counter()
+    out = subprocess.run([sys.executable, "-c", CHILD], env=env, check=True,
+                         capture_output=True, text=True).stdout
+    total = time.perf_counter() - start
+    sdk, server = (float(value) for value in out.split())
+    return total, sdk, server
+
+
+def measure(runs: int, eager: bool) -> list:
+    env = {**os.environ, "PYTHONPATH": REPO_ROOT, "WORD_MCP_EAGER_TOOLS": "1" if eager else "0"}
+    sample(env)  # warm the filesystem and bytecode caches
+    return [sample(env) for _ in range(runs)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10, help="Samples per configuration")
+    args = parser.parse_args()
+
+    print(f"{'configuration':<32} {'process ms':>11} {'mcp sdk ms':>11} {'server ms':>10}")
+    for name, eager in (("eager (WORD_MCP_EAGER_TOOLS=1)", True), ("lazy (default)", False)):
+        samples = measure(args.runs, eager)
+        medians = [statistics.median(column) * 1000 for column in zip(*samples)]
+        print(f"{name:<32} {medians[0]:>11.1f} {medians[1]:>11.1f} {medians[2]:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,311 @@
+"""
+Benchmark runner for the Word Document Server tools.
+
+Each (corpus document, tool) pair runs in its own interpreter so that peak
+RSS and the document cache start fresh. The tool is called ``--iterations``
+times against a scratch copy of the document. The report lists the first
+(cold) call separately from p50/p99 over all calls, together with throughput
+and the peak RSS of the child process. Every registered tool has a scenario,
+except those listed in EXCLUDED.
+
+    python -m benchmarks.run --sizes small --iterations 5
+    python -m benchmarks.run --tools get_document_text,add_paragraph --output base.json
+    python -m benchmarks.run --compare base.json --threshold 1.25
+"""
+import argparse
+import asyncio
+import importlib
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import namedtuple
+
+from benchmarks.corpus import DEFAULT_CORPUS_DIR, SIZES, ensure_corpus, png_bytes
+
+
+# A tool call to benchmark. ``kwargs`` receives the scratch document path and
+# a scratch directory and returns the keyword arguments of one call.
+Scenario = namedtuple("Scenario", ["tool", "module", "kwargs"])
+
+
+def _image(scratch):
+    path = os.path.join(scratch, "bench.png")
+    if not os.path.exists(path):
+        with open(path, "wb") as f:
+            f.write(png_bytes(12345))
+    return path
+
+
+def _fresh_copy(doc, scratch, name):
+    # For tools that cannot run twice on their own output; copied before the timer starts
+    path = os.path.join(scratch, name)
+    shutil.copyfile(doc, path)
+    return path
+
+
+def _encrypted_copy(doc, scratch):
+    import io
+    import msoffcrypto
+
+    path = os.path.join(scratch, "encrypted.docx")
+    with open(doc, "rb") as f:
+        office_file = msoffcrypto.OfficeFile(io.BytesIO(f.read()))
+    office_file.load_key(password="bench")
+    with open(path, "wb") as f:
+        office_file.encrypt(password="bench", outfile=f)
+    return path
+
+
+SCENARIOS = [
+    # Read-only tools
+    Scenario("get_document_info", "document_tools", lambda doc, scratch: {"filename": doc}),
+    Scenario("get_document_text", "document_tools", lambda doc, scratch: {"filename": doc}),
+    Scenario("get_document_outline", "document_tools", lambda doc, scratch: {"filename": doc}),
+    Scenario("get_document_chunks", "document_tools", lambda doc, scratch: {"filename": doc, "max_tokens": 512}),
+    Scenario("get_paragraph_text_from_document", "extended_document_tools",
+             lambda doc, scratch: {"filename": doc, "paragraph_index": 0}),
+    Scenario("find_text_in_document", "extended_document_tools",
+             lambda doc, scratch: {"filename": doc, "text_to_find": "delta"}),
+    Scenario("extract_text", "qa_tools", lambda doc, scratch: {"filename": doc}),
+    Scenario("check_sentence_length", "qa_tools", lambda doc, scratch: {"filename": doc, "max_chars": 120}),
+    Scenario("check_passive_voice", "qa_tools", lambda doc, scratch: {"filename": doc}),
+    Scenario("copy_document", "document_tools",
+             lambda doc, scratch: {"source_filename": doc,
+                                   "destination_filename": os.path.join(scratch, "copy.docx")}),
+    Scenario("create_document", "document_tools",
+             lambda doc, scratch: {"filename": os.path.join(scratch, "created.docx"), "title": "Bench"}),
+    Scenario("merge_documents", "document_tools",
+             lambda doc, scratch: {"target_filename": os.path.join(scratch, "merged.docx"),
+                                   "source_filenames": [doc, doc]}),
+    Scenario("list_available_documents", "document_tools",
+             lambda doc, scratch: {"directory": scratch, "sort_by": "title"}),
+    Scenario("search_documents", "document_tools", lambda doc, scratch: {"directory": scratch, "query": "delta"}),
+    Scenario("flush_document", "document_tools", lambda doc, scratch: {"filename": doc}),
+    Scenario("get_server_stats", "document_tools", lambda doc, scratch: {}),
+    Scenario("verify_document", "protection_tools", lambda doc, scratch: {"filename": doc}),
+    Scenario("generate_list_of_tables", "caption_tools", lambda doc, scratch: {"filename": doc}),
+    # Editing tools
+    Scenario("add_paragraph", "content_tools", lambda doc, scratch: {"filename": doc, "text": "Benchmark paragraph."}),
+    Scenario("add_heading", "content_tools", lambda doc, scratch: {"filename": doc, "text": "Benchmark", "level": 2}),
+    Scenario("add_table", "content_tools", lambda doc, scratch: {"filename": doc, "rows": 5, "cols": 5}),
+    Scenario("add_picture", "content_tools",
+             lambda doc, scratch: {"filename": doc, "image_path": _image(scratch), "width": 1.0}),
+    Scenario("add_page_break", "content_tools", lambda doc, scratch: {"filename": doc}),
+    Scenario("add_table_of_contents", "content_tools", lambda doc, scratch: {"filename": doc}),
+    Scenario("delete_paragraph", "content_tools", lambda doc, scratch: {"filename": doc, "paragraph_index": 1}),
+    Scenario("search_and_replace", "content_tools",
+             lambda doc, scratch: {"filename": doc, "find_text": "delta", "replace_text": "delta"}),
+    Scenario("search_and_replace_many", "content_tools",
+             lambda doc, scratch: {"filename": doc,
+                                   "replacements": {f"term{i:03d}": f"term{i:03d}" for i in range(500)}}),
+    Scenario("apply_operations", "batch_tools",
+             lambda doc, scratch: {"filename": doc, "ops": [
+                 {"type": "heading", "text": "Batch", "level": 2},
+                 {"type": "paragraph", "text": "Batch paragraph."},
+                 {"type": "page_break"}]}),
+    Scenario("format_text", "format_tools",
+             lambda doc, scratch: {"filename": doc, "paragraph_index": 1, "start_pos": 0, "end_pos": 3,
+                                   "bold": True}),
+    Scenario("create_custom_style", "format_tools",
+             lambda doc, scratch: {"filename": doc, "style_name": "Bench", "bold": True, "font_size": 12}),
+    Scenario("format_table", "format_tools",
+             lambda doc, scratch: {"filename": doc, "table_index": 0, "has_header_row": True,
+                                   "border_style": "single"}),
+    Scenario("protect_document", "protection_tools",
+             lambda doc, scratch: {"filename": _fresh_copy(doc, scratch, "protected.docx"), "password": "bench"}),
+    Scenario("unprotect_document", "protection_tools",
+             lambda doc, scratch: {"filename": _encrypted_copy(doc, scratch), "password": "bench"}),
+    Scenario("add_restricted_editing", "protection_tools",
+             lambda doc, scratch: {"filename": doc, "password": "bench", "editable_sections": ["Summary"]}),
+    Scenario("add_digital_signature", "protection_tools",
+             lambda doc, scratch: {"filename": doc, "signer_name": "Bench", "reason": "Review"}),
+    Scenario("add_footnote_to_document", "footnote_tools",
+             lambda doc, scratch: {"filename": doc, "paragraph_index": 1, "footnote_text": "Note."}),
+    Scenario("add_endnote_to_document", "footnote_tools",
+             lambda doc, scratch: {"filename": doc, "paragraph_index": 1, "endnote_text": "Note."}),
+    Scenario("convert_footnotes_to_endnotes_in_document", "footnote_tools", lambda doc, scratch: {"filename": doc}),
+    Scenario("customize_footnote_style", "footnote_tools",
+             lambda doc, scratch: {"filename": doc, "numbering_format": "i, ii, iii", "font_size": 9}),
+    Scenario("apply_template", "template_tools",
+             lambda doc, scratch: {"template_path": doc,
+                                   "destination_path": os.path.join(scratch, "from-template.docx")}),
+    Scenario("set_page_size", "template_tools", lambda doc, scratch: {"filename": doc, "width": 8.5, "height": 11}),
+    Scenario("add_section_break", "template_tools", lambda doc, scratch: {"filename": doc}),
+    Scenario("insert_header", "header_tools", lambda doc, scratch: {"filename": doc, "text": "Header"}),
+    Scenario("insert_footer", "header_tools", lambda doc, scratch: {"filename": doc, "text": "Footer"}),
+    Scenario("new_chapter", "chapter_tools", lambda doc, scratch: {"filename": doc, "title": "Chapter"}),
+    Scenario("add_code_block", "code_tools",
+             lambda doc, scratch: {"filename": doc, "code_text": "print('hello')\nprint('world')"}),
+    Scenario("add_title_page", "book_tools", lambda doc, scratch: {"filename": doc, "title": "Title"}),
+    Scenario("add_copyright_page", "book_tools", lambda doc, scratch: {"filename": doc, "text": "(c) Bench"}),
+    Scenario("add_front_matter", "book_tools",
+             lambda doc, scratch: {"filename": doc, "section": "Preface", "text": "Preface text."}),
+    Scenario("insert_toc_placeholder", "navigation_tools", lambda doc, scratch: {"filename": doc}),
+    Scenario("bookmark", "navigation_tools", lambda doc, scratch: {"filename": doc, "bookmark_name": "bench"}),
+    Scenario("insert_hyperlink", "navigation_tools",
+             lambda doc, scratch: {"filename": doc, "bookmark_name": "bench", "display_text": "See bench"}),
+    Scenario("insert_caption", "caption_tools",
+             lambda doc, scratch: {"filename": doc, "object_type": "Figure", "text": "Caption"}),
+    Scenario("generate_list_of_figures", "caption_tools", lambda doc, scratch: {"filename": doc}),
+    Scenario("set_core_properties", "export_tools", lambda doc, scratch: {"filename": doc, "title": "Bench"}),
+]
+
+SCENARIOS_BY_TOOL = {scenario.tool: scenario for scenario in SCENARIOS}
+
+# Tools without a scenario, and why
+EXCLUDED = {
+    "convert_to_pdf": "time is spent in LibreOffice or Microsoft Word, outside the server",
+    "to_pdf": "time is spent in Pandoc and the PDF engine, outside the server",
+    "to_epub": "time is spent in Pandoc, outside the server",
+    "build_book": "runs a manifest of other tools, each of which has its own scenario",
+}
+
+
+def _peak_rss_kib() -> int:
+    try:
+        import resource
+    except ImportError:  # Windows
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and KiB elsewhere
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def run_scenario(tool: str, document: str, iterations: int) -> dict:
+    """
+    Call one tool ``iterations`` times against a scratch copy of ``document``.
+
+    Returns:
+        Dict with per-call latencies in milliseconds, the last response and peak RSS
+    """
+    scenario = SCENARIOS_BY_TOOL[tool]
+    func = getattr(importlib.import_module(f"word_document_server.tools.{scenario.module}"), tool)
+    with tempfile.TemporaryDirectory(prefix="word-mcp-bench-") as scratch:
+        doc = os.path.join(scratch, os.path.basename(document))
+        shutil.copyfile(document, doc)
+        latencies = []
+        result = None
+        loop = asyncio.new_event_loop()
+        try:
+            for _ in range(iterations):
+                kwargs = scenario.kwargs(doc, scratch)
+                start = time.perf_counter()
+                result = loop.run_until_complete(func(**kwargs))
+                latencies.append((time.perf_counter() - start) * 1000)
+        finally:
+            loop.close()
+    return {
+        "latencies_ms": latencies,
+        "response": str(result)[:200],
+        "peak_rss_kib": _peak_rss_kib(),
+    }
+
+
+def _percentile(values, q):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(q * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(raw: dict) -> dict:
+    latencies = raw["latencies_ms"]
+    total = sum(latencies)
+    return {
+        "first_ms": round(latencies[0], 3),
+        "p50_ms": round(statistics.median(latencies), 3),
+        "p99_ms": round(_percentile(latencies, 0.99), 3),
+        "throughput_per_s": round(len(latencies) / (total / 1000), 3) if total else 0.0,
+        "peak_rss_mib": round(raw["peak_rss_kib"] / 1024, 1),
+        "response": raw["response"],
+    }
+
+
+def _run_child(tool: str, document: str, iterations: int, timeout: float) -> dict:
+    cmd = [sys.executable, "-m", "benchmarks.run", "--child", tool, document, "--iterations", str(iterations)]
+    repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = {**os.environ, "PYTHONPATH": repo_root + os.pathsep + os.environ.get("PYTHONPATH", "")}
+    # On-disk caches (search index, chunks, metadata) start empty, like the document cache
+    with tempfile.TemporaryDirectory(prefix="word-mcp-bench-cache-") as cache:
+        env["WORD_MCP_CACHE_DIR"] = cache
+        proc = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout, cwd=repo_root, env=env)
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "child failed")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    """Return (corpus, tool, baseline p50, current p50) for every p50 regression beyond ``threshold``."""
+    regressions = []
+    for corpus, tools in results.items():
+        for tool, current in tools.items():
+            before = baseline.get(corpus, {}).get(tool)
+            if not before or "p50_ms" not in before or "p50_ms" not in current:
+                continue
+            if current["p50_ms"] > before["p50_ms"] * threshold:
+                regressions.append((corpus, tool, before["p50_ms"], current["p50_ms"]))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Word Document Server tools")
+    parser.add_argument("--sizes", default="small", help=f"Comma-separated corpus size classes from {SIZES}")
+    parser.add_argument("--corpus", default="", help="Comma-separated corpus document names (default: all)")
+    parser.add_argument("--corpus-dir", default=DEFAULT_CORPUS_DIR, help="Where generated documents are kept")
+    parser.add_argument("--tools", default="", help="Comma-separated tool names (default: all)")
+    parser.add_argument("--iterations", type=int, default=5, help="Calls per tool and document")
+    parser.add_argument("--timeout", type=float, default=1800, help="Seconds allowed per tool and document")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--compare", help="Baseline JSON from an earlier --output run")
+    parser.add_argument("--threshold", type=float, default=1.25,
+                        help="Report a regression when p50 exceeds baseline p50 by this factor")
+    parser.add_argument("--child", nargs=2, metavar=("TOOL", "DOCUMENT"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_scenario(args.child[0], args.child[1], args.iterations)))
+        return 0
+
+    tools = [t for t in args.tools.split(",") if t] or [s.tool for s in SCENARIOS]
+    unknown = [t for t in tools if t not in SCENARIOS_BY_TOOL]
+    if unknown:
+        parser.error(f"unknown tools: {', '.join(unknown)}")
+    names = [n for n in args.corpus.split(",") if n] or None
+    corpus = ensure_corpus(args.sizes.split(","), args.corpus_dir, names)
+
+    results = {}
+    header = f"{'corpus':<20} {'tool':<34} {'first ms':>10} {'p50 ms':>10} {'p99 ms':>10} {'ops/s':>8} {'rss MiB':>8}"
+    print(header)
+    print("-" * len(header))
+    for name, document in corpus.items():
+        results[name] = {}
+        for tool in tools:
+            try:
+                summary = summarize(_run_child(tool, document, args.iterations, args.timeout))
+                print(f"{name:<20} {tool:<34} {summary['first_ms']:>10.1f} {summary['p50_ms']:>10.1f} "
+                      f"{summary['p99_ms']:>10.1f} {summary['throughput_per_s']:>8.2f} {summary['peak_rss_mib']:>8.1f}")
+            except (RuntimeError, subprocess.TimeoutExpired) as e:
+                summary = {"error": str(e)}
+                print(f"{name:<20} {tool:<34} error: {e}")
+            results[name][tool] = summary
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        for corpus_name, tool, before, after in regressions:
+            print(f"REGRESSION {corpus_name} {tool}: p50 {before:.1f} ms -> {after:.1f} ms")
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,72 @@
+import asyncio
+import json
+
+import pytest
+
+pytest.importorskip("docx.document")
+from docx import Document
+
+from word_document_server.tools import batch_tools
+
+
+def test_apply_operations_saves_once_with_per_op_results(tmp_path):
+    path = str(tmp_path / "batch.docx")
+    Document().save(path)
+    ops = [
+        {"type": "heading", "text": "Title", "level": 1},
+        {"type": "paragraph", "text": "Hello world"},
+        {"type": "heading", "text": "Bad", "level": 12},
+        {"type": "table", "rows": 1, "cols": 2, "data": [["a", "b"]]},
+        {"type": "replace", "find_text": "world", "replace_text": "there"},
+        {"type": "format", "paragraph_index": 1, "start_pos": 0, "end_pos": 5, "bold": True},
+        {"type": "unknown"},
+    ]
+    result = json.loads(asyncio.run(batch_tools.apply_operations(path, ops)))
+    assert result["applied"] == 5
+    assert [r["success"] for r in result["results"]] == [True, True, False, True, True, True, False]
+
+    doc = Document(path)
+    assert [p.text for p in doc.paragraphs] == ["Title", "Hello there"]
+    assert any(run.bold and run.text == "Hello" for run in doc.paragraphs[1].runs)
+    assert len(doc.tables) == 1
+
+
+def test_apply_operations_stop_on_error(tmp_path):
+    path = str(tmp_path / "batch.docx")
+    Document().save(path)
+    ops = [{"type": "page_break"}, {"type": "picture", "image_path": "missing.png"}, {"type": "paragraph", "text": "x"}]
+    result = json.loads(asyncio.run(batch_tools.apply_operations(path, ops, stop_on_error=True)))
+    assert result["applied"] == 1
+    assert result["skipped"] == 1
+
+
+@pytest.mark.parametrize("deferred", [False, True])
+def test_operation_that_fails_part_way_is_rolled_back(tmp_path, deferred):
+    from word_document_server.utils import document_cache
+
+    path = str(tmp_path / "batch.docx")
+    doc = Document()
+    doc.add_paragraph("Existing")
+    doc.save(path)
+    document_cache.clear_cache()
+    document_cache.configure_write_behind(deferred, flush_idle_seconds=60, max_dirty_seconds=60)
+    try:
+        asyncio.run(batch_tools.apply_operations(path, [{"type": "paragraph", "text": "Earlier call"}]))
+        # The table is added before its bad data row raises
+        ops = [{"type": "paragraph", "text": "Kept"},
+               {"type": "table", "rows": 1, "cols": 1, "data": [5]},
+               {"type": "paragraph", "text": "After"}]
+        result = json.loads(asyncio.run(batch_tools.apply_operations(path, ops)))
+        assert [r["success"] for r in result["results"]] == [True, False, True]
+
+        # Nothing was applied: the partial table must not linger in the cached document
+        result = json.loads(asyncio.run(batch_tools.apply_operations(path, [ops[1]])))
+        assert result["saved"] is False
+        document_cache.flush_all_documents()
+    finally:
+        document_cache.configure_write_behind(False)
+        document_cache.clear_cache()
+
+    doc = Document(path)
+    assert [p.text for p in doc.paragraphs] == ["Existing", "Earlier call", "Kept", "After"]
+    assert len(doc.tables) == 0
@@ -0,0 +1,59 @@
+import zipfile
+
+import pytest
+
+pytest.importorskip("docx.document")
+from docx import Document
+
+from benchmarks import corpus
+from benchmarks.run import EXCLUDED, SCENARIOS, SCENARIOS_BY_TOOL, run_scenario, summarize
+
+
+def test_corpus_is_deterministic(tmp_path):
+    shape = corpus.Shape("tiny", "paragraphs", {"paragraphs": 60}, "small")
+    first = corpus.generate(shape, str(tmp_path / "a.docx"))
+    second = corpus.generate(shape, str(tmp_path / "b.docx"))
+    with zipfile.ZipFile(first) as a, zipfile.ZipFile(second) as b:
+        assert a.read("word/document.xml") == b.read("word/document.xml")
+    paragraphs = Document(first).paragraphs
+    assert len(paragraphs) == 60
+    assert paragraphs[0].style.name == "Heading 1"
+
+
+def test_every_scenario_targets_an_existing_tool():
+    import importlib
+    for scenario in SCENARIOS:
+        module = importlib.import_module(f"word_document_server.tools.{scenario.module}")
+        assert hasattr(module, scenario.tool), scenario.tool
+
+
+def test_every_tool_has_a_scenario_or_a_reason(monkeypatch):
+    from word_document_server import main
+    from word_document_server.tools import _EXPORTS
+
+    registered = set()
+    monkeypatch.setattr(main, "_register", lambda name: registered.add(name.rsplit(".", 1)[1]))
+    main.register_tools()
+    tools = registered.union(*_EXPORTS.values())
+    assert sorted(tools - set(SCENARIOS_BY_TOOL) - set(EXCLUDED)) == []
+    assert not set(SCENARIOS_BY_TOOL) & set(EXCLUDED)
+
+
+def test_every_scenario_runs(tmp_path, monkeypatch):
+    monkeypatch.setenv("WORD_MCP_CACHE_DIR", str(tmp_path / "cache"))
+    shape = corpus.Shape("tiny", "sections", {"sections": 2, "paragraphs_per_section": 3}, "small")
+    path = corpus.generate(shape, str(tmp_path / "tiny.docx"))
+    for scenario in SCENARIOS:
+        response = run_scenario(scenario.tool, path, 2)["response"]
+        assert not response.startswith(("Failed", "Error", "Cannot")), (scenario.tool, response)
+
+
+def test_run_scenario(tmp_path):
+    shape = corpus.Shape("tiny", "paragraphs", {"paragraphs": 20}, "small")
+    path = corpus.generate(shape, str(tmp_path / "tiny.docx"))
+    summary = summarize(run_scenario("add_paragraph", path, 3))
+    assert summary["p50_ms"] > 0
+    assert summary["throughput_per_s"] > 0
+    assert "Paragraph added" in summary["response"]
+    # The corpus document itself is never modified
+    assert len(Document(path).paragraphs) == 20
@@ -0,0 +1,93 @@
+import pytest
+
+pytest.importorskip("docx.document")
+from docx import Document
+from docx.text.paragraph import Paragraph
+
+from word_document_server.utils.block_index import get_block_index, get_paragraph
+
+
+def _doc(paragraphs=5, tables=1):
+    doc = Document()
+    for i in range(paragraphs):
+        doc.add_paragraph(f"p{i}")
+    for _ in range(tables):
+        doc.add_table(rows=1, cols=1)
+    return doc
+
+
+def test_index_matches_python_docx_numbering():
+    doc = _doc()
+    doc.tables[0].cell(0, 0).text = "in table"
+    index = get_block_index(doc)
+    assert index.paragraph_count == len(doc.paragraphs)
+    assert index.table_count == len(doc.tables) == 1
+    assert [index.paragraph(i).text for i in range(index.paragraph_count)] == [p.text for p in doc.paragraphs]
+    assert index.table(0).cell(0, 0).text == "in table"
+    assert len(index.blocks) == 6
+    assert get_block_index(doc) is index
+
+
+def test_appends_are_picked_up_incrementally():
+    doc = _doc()
+    index = get_block_index(doc)
+    blocks_before = index.blocks
+    doc.add_paragraph("appended")
+    doc.add_table(rows=1, cols=1)
+    assert get_block_index(doc) is index
+    assert index.blocks is blocks_before
+    assert index.paragraph(index.paragraph_count - 1).text == "appended"
+    assert index.table_count == 2
+
+
+def test_insert_in_the_middle_triggers_rebuild():
+    doc = _doc()
+    index = get_block_index(doc)
+    doc.paragraphs[2].insert_paragraph_before("inserted")
+    assert get_paragraph(doc, 2).text == "inserted"
+    assert get_paragraph(doc, 3).text == "p2"
+    assert get_paragraph(doc, 100) is None
+    assert [index.paragraph(i).text for i in range(index.paragraph_count)] == [p.text for p in doc.paragraphs]
+
+
+def test_delete_in_the_middle_plus_append_triggers_rebuild():
+    doc = _doc(tables=0)
+    index = get_block_index(doc)
+    version = index.version
+    # Same body length and the old tail still attached, but no longer last
+    doc.paragraphs[2]._p.getparent().remove(doc.paragraphs[2]._p)
+    doc.add_paragraph("appended")
+    assert [get_paragraph(doc, i).text for i in range(index.paragraph_count)] == [
+        "p0", "p1", "p3", "p4", "appended"]
+    assert index.version != version
+    assert index.take_added() is None
+
+    doc.add_paragraph("another")
+    assert get_block_index(doc).paragraph(5).text == "another"
+    assert [p.text for p in (Paragraph(e, None) for e in index.take_added())] == ["another"]
+    assert index.take_added() == []
+
+
+def test_remove_keeps_index_current():
+    doc = _doc()
+    index = get_block_index(doc)
+    index.remove(index.paragraphs[1])
+    assert [p.text for p in doc.paragraphs] == ["p0", "p2", "p3", "p4"]
+    assert get_block_index(doc).paragraph(1).text == "p2"
+    doc.add_paragraph("after delete")
+    assert get_block_index(doc).paragraph(index.paragraph_count - 1).text == "after delete"
+
+
+def test_index_does_not_keep_documents_alive():
+    import gc
+    import weakref
+    from word_document_server.utils import block_index
+
+    doc = _doc()
+    get_block_index(doc)
+    ref = weakref.ref(doc)
+    before = len(block_index._indexes)
+    del doc
+    gc.collect()
+    assert ref() is None
+    assert len(block_index._indexes) <= before - 1
@@ -0,0 +1,108 @@
+import asyncio
+import json
+import os
+
+import pytest
+
+pytest.importorskip("docx.document")
+from docx import Document
+
+from word_document_server.utils import chunking, document_cache
+from word_document_server.tools.document_tools import get_document_chunks
+
+
+@pytest.fixture
+def report(tmp_path, monkeypatch):
+    monkeypatch.setenv("WORD_MCP_CACHE_DIR", str(tmp_path / "cache"))
+    path = str(tmp_path / "report.docx")
+    doc = Document()
+    doc.add_paragraph("Preface text.")
+    doc.add_heading("Intro", level=1)
+    doc.add_paragraph("Short introduction.")
+    doc.add_heading("Methods", level=1)
+    doc.add_paragraph("Overview of the methods.")
+    for name in ("Sampling", "Analysis"):
+        doc.add_heading(name, level=2)
+        doc.add_paragraph(" ".join(f"{name} sentence {i}." for i in range(12)))
+    table = doc.add_table(rows=2, cols=2)
+    for r in range(2):
+        for c in range(2):
+            table.cell(r, c).text = f"r{r}c{c}"
+    doc.add_heading("Results", level=1)
+    doc.add_paragraph("Sentence one is here. " * 40)
+    doc.save(path)
+    document_cache.clear_cache()
+    yield path
+    document_cache.clear_cache()
+
+
+def _chunks(path, max_tokens):
+    return json.loads(asyncio.run(get_document_chunks(path, max_tokens)))
+
+
+def test_chunks_follow_headings_and_budget(report):
+    result = _chunks(report, 80)
+    chunks = result["chunks"]
+    assert result["cached"] is False and result["count"] == len(chunks)
+    assert all(chunk["tokens"] <= 80 for chunk in chunks)
+    assert [chunk["heading_path"] for chunk in chunks[:3]] == [[], ["Methods"], ["Methods", "Analysis"]]
+    # Small sections are packed together
+    assert chunks[0]["text"] == "Preface text.\nIntro\nShort introduction." and chunks[0]["paragraphs"] == [0, 2]
+    assert chunks[1]["text"].startswith("Methods\nOverview of the methods.\nSampling\n")
+    analysis = next(chunk for chunk in chunks if chunk["heading_path"] == ["Methods", "Analysis"])
+    assert analysis["text"].endswith("r0c0 | r0c1\nr1c0 | r1c1")
+    # The long Results paragraph is cut at sentence boundaries, its first piece joining the heading
+    results = [chunk for chunk in chunks if chunk["heading_path"] == ["Results"]]
+    assert len(results) == 3 and all(chunk["text"].endswith("here.") for chunk in results)
+    assert results[0]["text"].startswith("Results\nSentence one") and results[0]["paragraphs"] == [9, 10]
+    assert len({chunk["id"] for chunk in chunks}) == len(chunks)
+
+    # With a large budget the whole document is one chunk
+    whole = _chunks(report, 10000)["chunks"]
+    assert len(whole) == 1 and whole[0]["heading_path"] == []
+
+
+def test_split_sections_do_not_absorb_neighbours(report):
+    chunks = _chunks(report, 250)["chunks"]
+    assert [chunk["heading_path"] for chunk in chunks] == [[], ["Results"]]
+    assert chunks[0]["text"].endswith("r1c0 | r1c1")
+
+
+def test_cache_and_stable_ids(report):
+    first = _chunks(report, 80)
+    assert _chunks(report, 80)["cached"] is True
+
+    doc = Document(report)
+    doc.paragraphs[-1].text = "Rewritten results."
+    doc.save(report)
+    second = _chunks(report, 80)
+    assert second["cached"] is False and second["sha1"] != first["sha1"]
+    before = {chunk["id"] for chunk in first["chunks"] if chunk["heading_path"] != ["Results"]}
+    after = {chunk["id"] for chunk in second["chunks"]}
+    assert before <= after
+    assert len(after - before) == 1
+
+
+def test_split_text_and_validation(report):
+    assert chunking._split_text("One two. Three four five six.", 12) == ["One two.", "Three four", "five six."]
+    assert chunking._split_text("abcdefghij", 4) == ["abcd", "efgh", "ij"]
+    assert chunking._split_text("One two. Three four.", 12, 5) == ["One", "two.", "Three four."]
+    assert asyncio.run(get_document_chunks(report, 0)) == "Invalid parameter: max_tokens must be at least 1"
+    assert "does not exist" in asyncio.run(get_document_chunks(report + ".missing.docx"))
+
+
+def test_cache_drops_deleted_files_and_old_budgets(report, tmp_path):
+    copy = str(tmp_path / "copy.docx")
+    Document(report).save(copy)
+    _chunks(copy, 80)
+    os.remove(copy)
+    for max_tokens in range(50, 50 + chunking.MAX_CACHED_BUDGETS + 2):
+        _chunks(report, max_tokens)
+    connection = chunking.connect()
+    try:
+        assert [row[0] for row in connection.execute("SELECT path FROM files")] == [report]
+        budgets = [row[0] for row in connection.execute("SELECT max_tokens FROM chunks ORDER BY max_tokens")]
+    finally:
+        connection.close()
+    assert budgets == list(range(52, 52 + chunking.MAX_CACHED_BUDGETS))
+    assert _chunks(report, 55)["cached"] is True and _chunks(report, 50)["cached"] is False
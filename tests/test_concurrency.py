@@ -0,0 +1,85 @@
+import asyncio
+import inspect
+import threading
+import time
+
+import pytest
+
+from word_document_server.utils import concurrency
+
+
+@pytest.fixture(autouse=True)
+def restore_settings():
+    settings = concurrency.get_concurrency_settings()
+    yield
+    concurrency.configure_concurrency(settings["workers"], settings["tool_limits"])
+
+
+async def sample_tool(filename: str, count: int = 1) -> str:
+    """Sample tool docstring."""
+    time.sleep(0.05)
+    return f"{filename}:{count}:{threading.current_thread().name}"
+
+
+def test_offload_keeps_signature_and_runs_in_worker():
+    concurrency.configure_concurrency(workers=2)
+    wrapped = concurrency.offload(sample_tool)
+    assert wrapped.__name__ == "sample_tool"
+    assert wrapped.__doc__ == "Sample tool docstring."
+    assert inspect.signature(wrapped) == inspect.signature(sample_tool)
+    assert inspect.iscoroutinefunction(wrapped)
+    result = asyncio.run(wrapped("a.docx", count=2))
+    assert result.startswith("a.docx:2:word-mcp-worker")
+
+
+def test_blocking_calls_do_not_stall_the_loop():
+    concurrency.configure_concurrency(workers=4, tool_limits={})
+    all_running, released = threading.Event(), threading.Event()
+    barrier = threading.Barrier(4, action=all_running.set, timeout=5)
+    events = []
+
+    async def blocking_tool(name: str) -> bool:
+        # Returns only once all four calls are running side by side and the
+        # event loop has been able to act in the meantime
+        barrier.wait()
+        return released.wait(5)
+
+    wrapped = concurrency.offload(blocking_tool)
+
+    async def run():
+        calls = asyncio.gather(*(wrapped(str(i)) for i in range(4)))
+        while not all_running.is_set() and not calls.done():
+            await asyncio.sleep(0.001)
+        events.append("heartbeat")
+        released.set()
+        results = await calls
+        events.append("done")
+        return results
+
+    assert asyncio.run(run()) == [True] * 4
+    assert events == ["heartbeat", "done"]
+
+
+def test_per_tool_limit():
+    concurrency.configure_concurrency(workers=4, tool_limits={"limited_tool": 1})
+    active = []
+    peak = []
+
+    async def limited_tool():
+        active.append(1)
+        peak.append(len(active))
+        time.sleep(0.02)
+        active.pop()
+
+    wrapped = concurrency.offload(limited_tool)
+
+    async def run():
+        await asyncio.gather(*(wrapped() for _ in range(4)))
+
+    asyncio.run(run())
+    assert max(peak) == 1
+
+
+def test_parse_tool_limits():
+    assert concurrency.parse_tool_limits("convert_to_pdf=1, to_epub=2,bad,x=0") == {
+        "convert_to_pdf": 1, "to_epub": 2}
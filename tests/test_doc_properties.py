@@ -0,0 +1,95 @@
+import asyncio
+import json
+import zipfile
+from io import BytesIO
+
+import pytest
+
+pytest.importorskip("docx.document")
+from docx import Document
+
+from benchmarks.corpus import png_bytes
+from word_document_server.utils import document_cache
+from word_document_server.tools.document_tools import get_document_info
+from word_document_server.tools.export_tools import set_core_properties
+
+
+@pytest.fixture
+def sample_doc(tmp_path):
+    path = str(tmp_path / "props.docx")
+    doc = Document()
+    doc.core_properties.title = "Annual report"
+    doc.add_paragraph("one two three")
+    doc.add_paragraph("four")
+    doc.add_table(rows=1, cols=1).cell(0, 0).text = "not counted"
+    doc.add_picture(BytesIO(png_bytes(1)))
+    doc.save(path)
+    document_cache.clear_cache()
+    yield path
+    document_cache.clear_cache()
+
+
+def test_info_is_read_from_package_metadata(sample_doc):
+    info = json.loads(asyncio.run(get_document_info(sample_doc)))
+    expected = Document(sample_doc).core_properties
+    assert info["title"] == "Annual report"
+    assert info["author"] == expected.author
+    assert info["created"] == str(expected.created)
+    assert info["revision"] == expected.revision
+    assert (info["word_count"], info["paragraph_count"], info["table_count"]) == (4, 3, 1)
+    # python-docx copies docProps/app.xml from its template and never updates it
+    assert info["page_count"] is None and info["application"] == ""
+
+    stored = json.loads(asyncio.run(get_document_info(sample_doc, include_counts=False)))
+    assert (stored["word_count"], stored["paragraph_count"], stored["table_count"]) == (None, None, None)
+
+
+def test_statistics_saved_by_word_are_reported(sample_doc, tmp_path):
+    path = str(tmp_path / "word.docx")
+    with zipfile.ZipFile(sample_doc) as source, zipfile.ZipFile(path, "w") as target:
+        for item in source.infolist():
+            data = source.read(item)
+            if item.filename == "docProps/app.xml":
+                data = (data.decode().replace("<Pages>1<", "<Pages>3<").replace("<Words>0<", "<Words>1200<")
+                        .replace("Microsoft Macintosh Word", "Microsoft Office Word").encode())
+            target.writestr(item, data)
+    info = json.loads(asyncio.run(get_document_info(path, include_counts=False)))
+    assert (info["page_count"], info["word_count"], info["application"]) == (3, 1200, "Microsoft Office Word")
+    assert json.loads(asyncio.run(get_document_info(path)))["word_count"] == 4
+
+
+def test_set_core_properties_rewrites_only_core_part(sample_doc):
+    with zipfile.ZipFile(sample_doc) as zf:
+        before = {info.filename: (info.CRC, info.compress_size) for info in zf.infolist()}
+
+    result = asyncio.run(set_core_properties(sample_doc, title="Q3 report", author="Finance",
+                                             keywords=["budget", "forecast"]))
+    assert result == f"Metadata updated on {sample_doc}"
+
+    with zipfile.ZipFile(sample_doc) as zf:
+        after = {info.filename: (info.CRC, info.compress_size) for info in zf.infolist()}
+    assert list(after) == list(before)
+    assert [name for name in after if after[name] != before[name]] == ["docProps/core.xml"]
+
+    props = Document(sample_doc).core_properties
+    assert (props.title, props.author, props.keywords) == ("Q3 report", "Finance", "budget, forecast")
+    assert props.subject == ""
+
+
+def test_missing_core_part_is_created(tmp_path):
+    source = str(tmp_path / "source.docx")
+    Document().save(source)
+    path = str(tmp_path / "bare.docx")
+    with zipfile.ZipFile(source) as src, zipfile.ZipFile(path, "w") as dst:
+        for info in src.infolist():
+            data = src.read(info)
+            if info.filename == "docProps/core.xml":
+                continue
+            if info.filename == "_rels/.rels":
+                data = data.replace(b"metadata/core-properties", b"metadata/unused")
+            dst.writestr(info, data)
+
+    assert json.loads(asyncio.run(get_document_info(path)))["title"] == ""
+    asyncio.run(set_core_properties(path, subject="Created"))
+    assert Document(path).core_properties.subject == "Created"
+    assert json.loads(asyncio.run(get_document_info(path)))["subject"] == "Created"
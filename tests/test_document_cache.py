@@ -0,0 +1,193 @@
+import os
+
+import pytest
+
+pytest.importorskip("docx.document")
+from docx import Document
+
+from word_document_server.utils import document_cache
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache():
+    document_cache.configure_cache(64)
+    document_cache.clear_cache()
+    yield
+    document_cache.clear_cache()
+
+
+def _make_doc(path, text="Hello"):
+    doc = Document()
+    doc.add_paragraph(text)
+    doc.save(path)
+    return str(path)
+
+
+def test_repeated_loads_hit_the_cache(tmp_path):
+    path = _make_doc(tmp_path / "a.docx")
+    before = document_cache.get_cache_stats()
+    first = document_cache.load_document(path)
+    second = document_cache.load_document(path)
+    stats = document_cache.get_cache_stats()
+    assert first is second
+    assert stats["misses"] == before["misses"] + 1
+    assert stats["hits"] == before["hits"] + 1
+
+
+def test_external_change_is_detected(tmp_path):
+    path = _make_doc(tmp_path / "a.docx")
+    first = document_cache.load_document(path)
+    _make_doc(path, "Changed on disk with a different size")
+    second = document_cache.load_document(path)
+    assert first is not second
+    assert second.paragraphs[0].text == "Changed on disk with a different size"
+
+
+def test_save_keeps_entry_valid(tmp_path):
+    path = _make_doc(tmp_path / "a.docx")
+    doc = document_cache.load_document(path)
+    doc.add_paragraph("More")
+    document_cache.save_document(doc, path)
+    assert document_cache.load_document(path) is doc
+
+
+def test_lru_eviction_respects_budget(tmp_path):
+    paths = [_make_doc(tmp_path / f"{i}.docx") for i in range(3)]
+    cost = os.path.getsize(paths[0]) * document_cache.PARSED_SIZE_FACTOR
+    document_cache.configure_cache((2 * cost + 1) / (1024 * 1024))
+    for path in paths:
+        document_cache.load_document(path)
+    stats = document_cache.get_cache_stats()
+    assert stats["entries"] == 2
+    assert stats["estimated_bytes"] <= stats["max_bytes"]
+
+
+def test_deferred_save_writes_on_flush(tmp_path):
+    path = _make_doc(tmp_path / "a.docx")
+    document_cache.configure_write_behind(True, flush_idle_seconds=60, max_dirty_seconds=60)
+    try:
+        doc = document_cache.load_document(path)
+        doc.add_paragraph("Deferred")
+        document_cache.save_document(doc, path)
+        assert len(Document(path).paragraphs) == 1
+        assert document_cache.load_document(path) is doc
+
+        assert document_cache.flush_cached_document(path)
+        assert [p.text for p in Document(path).paragraphs] == ["Hello", "Deferred"]
+        assert not document_cache.flush_cached_document(path)
+    finally:
+        document_cache.configure_write_behind(False)
+
+
+def test_deferred_save_respects_max_dirty_age(tmp_path):
+    import time
+
+    path = _make_doc(tmp_path / "a.docx")
+    document_cache.configure_write_behind(True, flush_idle_seconds=60, max_dirty_seconds=0.1)
+    try:
+        doc = document_cache.load_document(path)
+        doc.add_paragraph("Deferred")
+        document_cache.save_document(doc, path)
+        deadline = time.monotonic() + 5
+        while document_cache.get_cache_stats()["dirty_entries"] and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert len(Document(path).paragraphs) == 2
+    finally:
+        document_cache.configure_write_behind(False)
+
+
+def test_failed_edit_rolls_back_to_the_last_save(tmp_path):
+    path = _make_doc(tmp_path / "a.docx")
+    document_cache.configure_write_behind(True, flush_idle_seconds=60, max_dirty_seconds=60)
+    try:
+        doc = document_cache.load_document(path)
+        doc.add_paragraph("Acknowledged")
+        document_cache.save_document(doc, path)
+
+        # A later tool fails half-way through its edit
+        rollbacks = document_cache.get_cache_stats()["rollbacks"]
+        doc = document_cache.load_document(path)
+        body = doc.element.body
+        doc.add_paragraph("Half-applied")
+        doc.core_properties.title = "Half-applied"
+        document_cache.invalidate_document(path)
+
+        doc = document_cache.load_document(path)
+        # Restored in place: python-docx's body proxy still points at the live w:body
+        assert doc.element.body is body and doc._body._element is body
+        assert [p.text for p in doc.paragraphs] == ["Hello", "Acknowledged"]
+        assert doc.core_properties.title != "Half-applied"
+        assert document_cache.get_cache_stats()["rollbacks"] == rollbacks + 1
+        doc.add_paragraph("Next")
+        document_cache.save_document(doc, path)
+        assert document_cache.flush_cached_document(path)
+        assert [p.text for p in Document(path).paragraphs] == ["Hello", "Acknowledged", "Next"]
+    finally:
+        document_cache.configure_write_behind(False)
+
+
+def test_eviction_waits_for_the_document_lock(tmp_path):
+    import threading
+    from word_document_server.utils.locks import document_lock
+
+    path = _make_doc(tmp_path / "a.docx")
+    document_cache.configure_write_behind(True, flush_idle_seconds=60, max_dirty_seconds=60)
+    locked, release = threading.Event(), threading.Event()
+
+    def hold_lock():
+        with document_lock(path):
+            locked.set()
+            release.wait(5)
+
+    holder = threading.Thread(target=hold_lock)
+    try:
+        doc = document_cache.load_document(path)
+        doc.add_paragraph("Deferred")
+        document_cache.save_document(doc, path)
+        holder.start()
+        assert locked.wait(5)
+        # The document is being edited elsewhere: it is neither written nor dropped
+        document_cache.configure_cache(0)
+        assert document_cache.dirty_paths() and len(Document(path).paragraphs) == 1
+        release.set()
+        holder.join()
+        document_cache.configure_cache(0)
+        assert not document_cache.dirty_paths()
+        assert len(Document(path).paragraphs) == 2
+    finally:
+        release.set()
+        document_cache.configure_write_behind(False)
+
+
+def test_saves_do_not_hold_the_cache_lock(tmp_path, monkeypatch):
+    import threading
+
+    path = _make_doc(tmp_path / "a.docx")
+    started, release = threading.Event(), threading.Event()
+    save_package = document_cache.save_package
+
+    def slow_save(doc, target):
+        started.set()
+        release.wait(5)
+        return save_package(doc, target)
+
+    monkeypatch.setattr(document_cache, "save_package", slow_save)
+    document_cache.configure_write_behind(True, flush_idle_seconds=60, max_dirty_seconds=60)
+    try:
+        doc = document_cache.load_document(path)
+        doc.add_paragraph("Deferred")
+        document_cache.save_document(doc, path)
+        flusher = threading.Thread(target=document_cache.flush_cached_document, args=(path,))
+        flusher.start()
+        assert started.wait(5)
+        # Other documents stay usable while the save is in progress
+        other = _make_doc(tmp_path / "b.docx")
+        assert document_cache._lock.acquire(timeout=1)
+        document_cache._lock.release()
+        assert document_cache.load_document(other).paragraphs[0].text == "Hello"
+        release.set()
+        flusher.join()
+        assert not document_cache.dirty_paths()
+    finally:
+        release.set()
+        document_cache.configure_write_behind(False)
@@ -0,0 +1,130 @@
+import asyncio
+import json
+import os
+
+import pytest
+
+pytest.importorskip("docx.document")
+from docx import Document
+
+from word_document_server.utils import document_cache, document_listing
+from word_document_server.tools.document_tools import list_available_documents
+
+
+@pytest.fixture
+def share(tmp_path, monkeypatch):
+    monkeypatch.setenv("WORD_MCP_CACHE_DIR", str(tmp_path / "cache"))
+    root = tmp_path / "share"
+    (root / "contracts").mkdir(parents=True)
+    (root / ".hidden").mkdir()
+    for relative, title, author in [("b.docx", "Beta", "Zed"), ("a.docx", "Alpha", "Yan"),
+                                    ("contracts/c.docx", "Gamma", "Xia"), (".hidden/h.docx", "Hidden", "")]:
+        doc = Document()
+        doc.core_properties.title = title
+        doc.core_properties.author = author
+        doc.save(str(root / relative))
+    (root / "~$a.docx").write_bytes(b"lock")
+    (root / "notes.txt").write_text("x")
+    return str(root)
+
+
+def _list(directory, **kwargs):
+    return json.loads(asyncio.run(list_available_documents(directory, **kwargs)))
+
+
+def test_listing_reports_metadata_and_skips_non_documents(share):
+    listing = _list(share)
+    assert listing["total"] == 2
+    assert [d["path"] for d in listing["documents"]] == ["a.docx", "b.docx"]
+    first = listing["documents"][0]
+    assert (first["title"], first["author"]) == ("Alpha", "Yan")
+    assert first["size"] == os.path.getsize(os.path.join(share, "a.docx"))
+    assert listing["next_cursor"] is None
+
+    recursive = _list(share, recursive=True, sort_by="author")
+    assert [d["path"] for d in recursive["documents"]] == ["contracts/c.docx", "a.docx", "b.docx"]
+    assert [d["path"] for d in _list(share, recursive=True, pattern="contracts/*")["documents"]] == \
+        ["contracts/c.docx"]
+    assert [d["path"] for d in _list(share, recursive=True, pattern="CONTRACTS/C*")["documents"]] == \
+        ["contracts/c.docx"]
+    os.rename(os.path.join(share, "b.docx"), os.path.join(share, "B.DOCX"))
+    assert [d["path"] for d in _list(share)["documents"]] == ["a.docx", "B.DOCX"]
+
+
+def test_cursor_pagination(share):
+    seen = []
+    cursor = None
+    while True:
+        page = _list(share, recursive=True, sort_by="title", descending=True, limit=1, cursor=cursor)
+        assert page["count"] == 1
+        seen.append(page["documents"][0]["title"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert seen == ["Gamma", "Beta", "Alpha"]
+
+    assert asyncio.run(list_available_documents(share, sort_by="size", cursor=cursor or "bad")).startswith(
+        "Invalid parameter")
+    first = _list(share, limit=1)
+    assert "different sort order" in asyncio.run(
+        list_available_documents(share, sort_by="size", limit=1, cursor=first["next_cursor"]))
+    for key in (["a.docx"], [3, "a.docx"], ["a.docx", None]):
+        forged = document_listing.encode_cursor("name", False, key)
+        assert asyncio.run(list_available_documents(share, cursor=forged)) == \
+            "Invalid parameter: cursor is not valid"
+    forged = document_listing.encode_cursor("size", False, [True, "a.docx"])
+    assert asyncio.run(list_available_documents(share, sort_by="size", cursor=forged)) == \
+        "Invalid parameter: cursor is not valid"
+
+
+def test_metadata_is_cached_until_the_file_changes(share):
+    connection = document_listing.connect()
+    try:
+        entries = list(document_listing.walk_documents(share))
+        assert document_listing.load_metadata(connection, entries) == 2
+        entries = list(document_listing.walk_documents(share))
+        assert document_listing.load_metadata(connection, entries) == 0
+
+        doc = Document()
+        doc.core_properties.title = "Alpha 2"
+        doc.save(os.path.join(share, "a.docx"))
+        entries = list(document_listing.walk_documents(share))
+        assert document_listing.load_metadata(connection, entries) == 1
+        assert sorted(entry.metadata[0] for entry in entries) == ["Alpha 2", "Beta"]
+    finally:
+        connection.close()
+
+
+def test_deleted_documents_are_pruned_from_the_cache(share):
+    _list(share, recursive=True, sort_by="title")
+    os.remove(os.path.join(share, "contracts", "c.docx"))
+    assert _list(share)["total"] == 2
+    connection = document_listing.connect()
+    try:
+        paths = [row[0] for row in connection.execute("SELECT path FROM metadata ORDER BY path")]
+    finally:
+        connection.close()
+    assert paths == [os.path.join(share, "a.docx"), os.path.join(share, "b.docx")]
+
+
+def test_pending_write_behind_edits_are_listed(share):
+    document_cache.clear_cache()
+    document_cache.configure_write_behind(True, flush_idle_seconds=60, max_dirty_seconds=60)
+    try:
+        _list(share, sort_by="title")
+        paths = {name: os.path.join(share, *name.split("/")) for name in ("a.docx", "contracts/c.docx")}
+        for name, title in (("a.docx", "Pending"), ("contracts/c.docx", "Nested")):
+            doc = document_cache.load_document(paths[name])
+            doc.core_properties.title = title
+            document_cache.save_document(doc, paths[name])
+        assert len(document_cache.dirty_paths()) == 2
+
+        assert [d["title"] for d in _list(share, sort_by="title")["documents"]] == ["Beta", "Pending"]
+        # Only the documents below the listed directory are written
+        assert document_cache.dirty_paths() == [os.path.normcase(paths["contracts/c.docx"])]
+        assert [d["title"] for d in _list(share, recursive=True, sort_by="title")["documents"]] == [
+            "Beta", "Nested", "Pending"]
+        assert document_cache.dirty_paths() == []
+    finally:
+        document_cache.configure_write_behind(False)
+        document_cache.clear_cache()
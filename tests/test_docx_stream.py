@@ -0,0 +1,41 @@
+import pytest
+
+pytest.importorskip("docx.document")
+from docx import Document
+
+from word_document_server.utils.docx_stream import StreamedTable, iter_body, iter_paragraphs
+
+
+@pytest.fixture
+def sample_doc(tmp_path):
+    doc = Document()
+    doc.add_heading("Title", 1)
+    paragraph = doc.add_paragraph("Hello ")
+    paragraph.add_run("world").bold = True
+    table = doc.add_table(rows=4, cols=2)
+    for i in range(4):
+        for j in range(2):
+            table.cell(i, j).text = f"r{i}c{j}"
+    doc.add_paragraph("After the table")
+    path = str(tmp_path / "sample.docx")
+    doc.save(path)
+    return path
+
+
+def test_top_level_paragraphs_match_python_docx(sample_doc):
+    streamed = [p.text for p in iter_paragraphs(sample_doc) if p.index is not None]
+    assert streamed == [p.text for p in Document(sample_doc).paragraphs]
+
+
+def test_body_order_and_table_summary(sample_doc):
+    blocks = list(iter_body(sample_doc))
+    texts = [b.text for b in blocks if not isinstance(b, StreamedTable)]
+    assert texts[:3] == ["Title", "Hello world", "r0c0"]
+    assert texts[-1] == "After the table"
+    assert blocks[0].style_id == "Heading1"
+
+    table = next(b for b in blocks if isinstance(b, StreamedTable))
+    assert (table.rows, table.columns) == (4, 2)
+    assert table.preview == [["r0c0", "r0c1"], ["r1c0", "r1c1"], ["r2c0", "r2c1"]]
+    cell = next(b for b in blocks if getattr(b, "text", None) == "r3c1")
+    assert (cell.table_index, cell.row, cell.column) == (0, 3, 1)
@@ -0,0 +1,103 @@
+import asyncio
+import json
+
+import pytest
+
+pytest.importorskip("docx.document")
+from docx import Document
+
+from word_document_server.utils import document_cache
+from word_document_server.utils.extended_document_utils import find_text
+from word_document_server.tools.extended_document_tools import find_text_in_document
+
+
+@pytest.fixture
+def doc_path(tmp_path):
+    path = str(tmp_path / "find.docx")
+    doc = Document()
+    doc.add_paragraph("The cat sat on the mat with the other cat.")
+    doc.add_table(rows=1, cols=2).cell(0, 1).text = "A cat in a table"
+    doc.add_paragraph("No felines here.")
+    doc.add_paragraph("Cat " * 40)
+    doc.save(path)
+    document_cache.clear_cache()
+    yield path
+    document_cache.clear_cache()
+
+
+def test_occurrences_in_body_order(doc_path):
+    result = find_text(doc_path, "cat")
+    assert result["total_count"] == 3 and result["truncated"] is False
+    assert [(o.get("paragraph_index"), o.get("location"), o["position"]) for o in result["occurrences"]] == [
+        (0, None, 4), (0, None, 38), (None, "Table 0, Row 0, Column 1", 2)]
+    assert result["occurrences"][0]["context"] == "The cat sat on the mat with the other cat."
+
+    assert find_text(doc_path, "cat", match_case=False)["total_count"] == 43
+    # Whole words may touch punctuation; positions are character offsets
+    assert [o["position"] for o in find_text(doc_path, "cat", whole_word=True)["occurrences"]] == [4, 38, 2]
+    assert find_text(doc_path, "ca", whole_word=True)["total_count"] == 0
+
+
+def test_unicode_case_folding_and_word_boundaries(tmp_path):
+    path = str(tmp_path / "unicode.docx")
+    doc = Document()
+    doc.add_paragraph("ÉCOLE, école; écoles. C++ and C# (C++).")
+    doc.save(path)
+    assert [o["position"] for o in find_text(path, "école", match_case=False, whole_word=True)["occurrences"]] == [
+        0, 7]
+    assert [o["position"] for o in find_text(path, "C++", whole_word=True)["occurrences"]] == [22, 34]
+    assert find_text(path, "a.d")["total_count"] == 0
+
+
+def test_case_insensitive_search_uses_full_case_folding(tmp_path):
+    path = str(tmp_path / "folding.docx")
+    doc = Document()
+    doc.add_paragraph("Die Straße, die STRASSE und die Strasse.")
+    doc.add_paragraph("Maße ohne Straßen")
+    doc.save(path)
+    result = find_text(path, ["STRASSE", "masse"], match_case=False)
+    assert [[(o["paragraph_index"], o["position"]) for o in r["occurrences"]] for r in result["results"]] == [
+        [(0, 4), (0, 16), (0, 32), (1, 10)], [(1, 0)]]
+    assert find_text(path, "strasse", match_case=False, whole_word=True)["total_count"] == 3
+    # A match may not end inside the expansion of a single character
+    assert find_text(path, "MAS", match_case=False)["total_count"] == 0
+    assert find_text(path, "Strasse")["total_count"] == 1
+
+
+def test_max_results_stops_early(doc_path):
+    result = find_text(doc_path, "cat", match_case=False, max_results=2)
+    assert result["total_count"] == 2 and result["truncated"] is True
+    assert find_text(doc_path, "cat", max_results=3)["truncated"] is False
+    assert asyncio.run(find_text_in_document(doc_path, "cat", max_results=0)).startswith("Invalid parameter")
+
+
+def test_compact_mode_shares_contexts(doc_path):
+    response = asyncio.run(find_text_in_document(doc_path, "cat", match_case=False, compact=True))
+    assert "\n" not in response
+    result = json.loads(response)
+    assert result["total_count"] == 43
+    assert [c.get("paragraph_index", c.get("location")) for c in result["contexts"]] == [
+        0, "Table 0, Row 0, Column 1", 2]
+    assert result["contexts"][2]["text"].endswith("...")
+    assert result["occurrences"]["context"][:4] == [0, 0, 1, 2]
+    assert result["occurrences"]["position"][:4] == [4, 38, 2, 0]
+    assert len(result["occurrences"]["position"]) == 43
+
+
+def test_multiple_queries_in_one_scan(doc_path):
+    result = find_text(doc_path, ["cat", "mat", "dog", "cat sat"], max_results=2)
+    assert "query" not in result
+    assert [(r["query"], r["total_count"], r["truncated"]) for r in result["results"]] == [
+        ("cat", 2, True), ("mat", 1, False), ("dog", 0, False), ("cat sat", 1, False)]
+    assert result["results"][1]["occurrences"] == [
+        {"paragraph_index": 0, "position": 19, "context": "The cat sat on the mat with the other cat."}]
+
+    compact = json.loads(asyncio.run(find_text_in_document(doc_path, ["cat", "the"], match_case=False,
+                                                           compact=True)))
+    assert [r["total_count"] for r in compact["results"]] == [43, 4]
+    # Both queries refer to the same shared context for the first paragraph
+    assert compact["results"][1]["occurrences"] == {"context": [0, 0, 0, 0], "position": [0, 15, 28, 33]}
+    assert compact["contexts"][0]["paragraph_index"] == 0
+
+    assert asyncio.run(find_text_in_document(doc_path, [])) == "Search text cannot be empty"
+    assert asyncio.run(find_text_in_document(doc_path, ["cat", 3])).startswith("Invalid parameter")
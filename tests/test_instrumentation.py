@@ -0,0 +1,71 @@
+import asyncio
+import json
+
+import pytest
+
+from word_document_server.utils import instrumentation
+
+
+@pytest.fixture(autouse=True)
+def fresh_stats():
+    instrumentation.reset_tool_stats()
+    yield
+    instrumentation.configure_trace(None)
+    instrumentation.reset_tool_stats()
+
+
+async def sample_tool(name: str) -> str:
+    """Sample tool."""
+    with instrumentation.timed("parse"):
+        pass
+    instrumentation.add_bytes(read=100, written=50)
+    return f"hello {name}"
+
+
+async def failing_tool() -> str:
+    raise RuntimeError("boom")
+
+
+def test_calls_are_recorded():
+    wrapped = instrumentation.instrument(sample_tool)
+    assert wrapped.__name__ == "sample_tool"
+    assert asyncio.run(wrapped("x")) == "hello x"
+    asyncio.run(wrapped("y"))
+
+    stats = instrumentation.get_tool_stats()["tools"]["sample_tool"]
+    assert stats["calls"] == 2
+    assert stats["latency_ms"]["count"] == 2
+    assert stats["parse_ms"]["count"] == 2
+    assert stats["bytes_read"] == 200
+    assert stats["bytes_written"] == 100
+    assert stats["response_bytes"]["max"] == len("hello x")
+
+
+def test_errors_and_trace_file(tmp_path):
+    trace = tmp_path / "trace.jsonl"
+    instrumentation.configure_trace(str(trace))
+    wrapped = instrumentation.instrument(failing_tool)
+    with pytest.raises(RuntimeError):
+        asyncio.run(wrapped())
+
+    assert instrumentation.get_tool_stats()["tools"]["failing_tool"]["errors"] == 1
+    record = json.loads(trace.read_text().splitlines()[0])
+    assert record["tool"] == "failing_tool"
+    assert record["error"] == "RuntimeError"
+
+
+def test_metrics_follow_calls_into_worker_threads():
+    from word_document_server.utils.concurrency import offload
+    wrapped = instrumentation.instrument(offload(sample_tool))
+    asyncio.run(wrapped("z"))
+    stats = instrumentation.get_tool_stats()["tools"]["sample_tool"]
+    assert stats["bytes_read"] == 100
+
+
+def test_histogram_quantiles():
+    hist = instrumentation.Histogram((1, 10, 100))
+    for value in (0.5, 5, 5, 50, 500):
+        hist.add(value)
+    assert hist.quantile(0.5) == 10
+    assert hist.quantile(0.99) == 500
+    assert hist.to_dict()["buckets"] == {"<=1": 1, "<=10": 2, "<=100": 1, ">100": 1}
@@ -0,0 +1,41 @@
+import asyncio
+import inspect
+import subprocess
+import sys
+
+from word_document_server.utils.lazy_tools import lazy_tool
+
+
+def test_stub_matches_real_signature_and_docstring():
+    stub = lazy_tool("word_document_server.tools.content_tools", "add_table")
+    from word_document_server.tools.content_tools import add_table
+    assert stub is not add_table
+    assert stub.__name__ == "add_table"
+    assert stub.__doc__ == add_table.__doc__
+    assert inspect.signature(stub) == inspect.signature(add_table)
+    assert inspect.iscoroutinefunction(stub)
+
+
+def test_multiline_signature():
+    from word_document_server.tools.export_tools import to_epub
+    stub = lazy_tool("word_document_server.tools.export_tools", "to_epub")
+    assert inspect.signature(stub) == inspect.signature(to_epub)
+    assert stub.__doc__ == to_epub.__doc__
+
+
+def test_stub_calls_the_real_tool(tmp_path):
+    stub = lazy_tool("word_document_server.tools.document_tools", "get_document_text")
+    result = asyncio.run(stub(str(tmp_path / "missing.docx")))
+    assert "does not exist" in result
+
+
+def test_registration_does_not_import_tool_modules():
+    code = (
+        "import sys\n"
+        "from word_document_server import main\n"
+        "main.register_tools()\n"
+        "loaded = [m for m in sys.modules if m.startswith(('docx', 'word_document_server.tools.'))]\n"
+        "print(loaded)\n"
+    )
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == "[]"
@@ -0,0 +1,114 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from word_document_server.utils import concurrency, locks
+
+
+def test_readers_share_and_writers_exclude():
+    lock = locks.ReadWriteLock()
+    assert lock.acquire_read()
+    assert lock.acquire_read(timeout=0)
+    assert not lock.acquire_write(timeout=0)
+    lock.release_read()
+    lock.release_read()
+    assert lock.acquire_write(timeout=0)
+    assert not lock.acquire_read(timeout=0)
+    lock.release_write()
+
+
+def test_waiting_writer_blocks_new_readers():
+    lock = locks.ReadWriteLock()
+    lock.acquire_read()
+    acquired = []
+    writer = threading.Thread(target=lambda: acquired.append(lock.acquire_write()))
+    writer.start()
+    time.sleep(0.05)
+    assert not lock.acquire_read(timeout=0)
+    lock.release_read()
+    writer.join(1)
+    assert acquired == [True]
+    lock.release_write()
+    assert lock.acquire_read(timeout=0)
+
+
+def test_tool_lock_paths():
+    async def copy_document(source_filename, destination_filename=None):
+        pass
+
+    async def get_document_text(filename):
+        pass
+
+    async def add_paragraph(filename, text, style=None):
+        pass
+
+    assert locks.tool_lock_paths("copy_document", copy_document, ("a",), {"destination_filename": "b"}) == (
+        ["a.docx"], ["b.docx"])
+    assert locks.tool_lock_paths("get_document_text", get_document_text, ("a.docx",)) == (["a.docx"], [])
+    assert locks.tool_lock_paths("add_paragraph", add_paragraph, ("a", "text")) == ([], ["a.docx"])
+    assert locks.tool_lock_paths("add_paragraph", add_paragraph, ()) == ([], [])
+
+
+def test_concurrent_edits_are_not_lost(tmp_path):
+    pytest.importorskip("docx.document")
+    from docx import Document
+    from word_document_server.tools.content_tools import add_paragraph
+
+    path = str(tmp_path / "shared.docx")
+    Document().save(path)
+    settings = concurrency.get_concurrency_settings()
+    concurrency.configure_concurrency(workers=8)
+    try:
+        wrapped = concurrency.offload(add_paragraph)
+
+        async def run():
+            await asyncio.gather(*(wrapped(path, f"line {i}") for i in range(16)))
+
+        asyncio.run(run())
+    finally:
+        concurrency.configure_concurrency(settings["workers"], settings["tool_limits"])
+
+    texts = {p.text for p in Document(path).paragraphs}
+    assert {f"line {i}" for i in range(16)} <= texts
+
+
+def test_documents_with_pending_edits_are_read_under_an_exclusive_lock(tmp_path):
+    pytest.importorskip("docx.document")
+    from docx import Document
+    from word_document_server.utils import document_cache
+    from word_document_server.tools.document_tools import get_document_text
+
+    path = str(tmp_path / "dirty.docx")
+    Document().save(path)
+    document_cache.clear_cache()
+    document_cache.configure_write_behind(True, flush_idle_seconds=60, max_dirty_seconds=60)
+    try:
+        with locks.tool_locks("get_document_text", get_document_text, (path,)):
+            assert locks.held_lock(path) == "shared"
+
+        doc = document_cache.load_document(path)
+        doc.add_paragraph("Deferred")
+        document_cache.save_document(doc, path)
+        with locks.tool_locks("get_document_text", get_document_text, (path,)):
+            assert locks.held_lock(path) == "exclusive"
+            # Streaming readers write the pending edits before opening the file
+            assert "Deferred" in asyncio.run(get_document_text(path))
+        assert locks.held_lock(path) is None
+        assert not document_cache.dirty_paths()
+
+        # Without any lock held, the flush takes the exclusive lock itself
+        document_cache.save_document(document_cache.load_document(path), path)
+        assert locks.try_lock_exclusive(path)
+        flushed = []
+        flusher = threading.Thread(target=lambda: flushed.append(document_cache.flush_cached_document(path)))
+        flusher.start()
+        time.sleep(0.2)
+        assert flushed == [] and document_cache.dirty_paths()
+        locks.unlock_exclusive(path)
+        flusher.join(5)
+        assert flushed == [True]
+    finally:
+        document_cache.configure_write_behind(False)
+        document_cache.clear_cache()
@@ -0,0 +1,109 @@
+import asyncio
+import zipfile
+from io import BytesIO
+
+import pytest
+
+pytest.importorskip("docx.document")
+from docx import Document
+from docx.opc.constants import RELATIONSHIP_TYPE as RT
+from docx.oxml import parse_xml
+from docx.oxml.ns import qn
+
+from benchmarks.corpus import png_bytes
+from word_document_server.core.merge import DocumentMerger, W_NS, prepare_source
+from word_document_server.utils import document_cache
+from word_document_server.tools.document_tools import merge_documents
+
+
+def _source(path, title, image_seed, note_text=None):
+    doc = Document()
+    doc.add_heading(title, level=1)
+    paragraph = doc.add_paragraph()
+    paragraph.add_run("bold").bold = True
+    doc.add_picture(BytesIO(png_bytes(image_seed)))
+    styles = doc.styles.element
+    styles.append(parse_xml(
+        f'<w:style xmlns:w="{W_NS}" w:type="paragraph" w:styleId="Custom{title}">'
+        f'<w:name w:val="Custom {title}"/><w:basedOn w:val="Normal"/></w:style>'))
+    doc.add_paragraph("styled").style = doc.styles[f"Custom {title}"]
+    listed = doc.add_paragraph("listed")
+    listed._p.get_or_add_pPr().append(parse_xml(
+        f'<w:numPr xmlns:w="{W_NS}"><w:ilvl w:val="0"/><w:numId w:val="3"/></w:numPr>'))
+    hyperlink = doc.part.relate_to("https://example.com", RT.HYPERLINK, is_external=True)
+    paragraph._p.append(parse_xml(
+        f'<w:hyperlink xmlns:w="{W_NS}" xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/'
+        f'relationships" r:id="{hyperlink}"><w:r><w:t>link</w:t></w:r></w:hyperlink>'))
+    if note_text:
+        # Give the source a footnotes part the same way the merger creates one
+        notes = DocumentMerger(doc)._notes_part("footnotes")
+        notes.element.append(parse_xml(
+            f'<w:footnote xmlns:w="{W_NS}" w:id="1"><w:p><w:r><w:t>{note_text}</w:t></w:r></w:p></w:footnote>'))
+        paragraph.add_run()._r.append(parse_xml(f'<w:footnoteReference xmlns:w="{W_NS}" w:id="1"/>'))
+    doc.save(path)
+    return path
+
+
+def test_prepare_source_collects_referenced_parts(tmp_path):
+    path = _source(str(tmp_path / "a.docx"), "A", 1, note_text="note a")
+    payload = prepare_source(path)
+    reltypes = sorted(spec.reltype.rsplit("/", 1)[-1] for spec in payload.rels.values())
+    assert reltypes == ["hyperlink", "image"]
+    assert any(b'CustomA' in style for style in payload.styles)
+    assert list(payload.numbering) == ["3"]
+    assert list(payload.notes["footnotes"][0]) == ["1"]
+
+
+def test_merge_keeps_images_numbering_styles_and_notes(tmp_path):
+    sources = [
+        _source(str(tmp_path / "a.docx"), "A", 1, note_text="note a"),
+        _source(str(tmp_path / "b.docx"), "B", 1, note_text="note b"),
+        _source(str(tmp_path / "c.docx"), "C", 2),
+    ]
+    target = str(tmp_path / "merged.docx")
+    document_cache.clear_cache()
+    result = asyncio.run(merge_documents(target, sources))
+    document_cache.clear_cache()
+    assert result == f"Successfully merged 3 documents into {target}"
+
+    doc = Document(target)
+    texts = [p.text for p in doc.paragraphs]
+    assert [t for t in texts if t in ("A", "B", "C")] == ["A", "B", "C"]
+    assert sum(1 for p in doc.paragraphs for r in p.runs if r.bold and r.text == "bold") == 3
+    assert {"Custom A", "Custom B", "Custom C"} <= {s.name for s in doc.styles}
+    assert len(doc.inline_shapes) == 3
+
+    with zipfile.ZipFile(target) as zf:
+        names = zf.namelist()
+        footnotes = zf.read("word/footnotes.xml").decode()
+    # Sources A and B share the same image, which is stored once
+    assert len([n for n in names if n.startswith("word/media/")]) == 2
+    assert "note a" in footnotes and "note b" in footnotes
+
+    references = [r.get(qn("w:id")) for r in doc.element.body.iter(qn("w:footnoteReference"))]
+    assert len(set(references)) == 2
+    num_ids = [n.get(qn("w:val")) for n in doc.element.body.iter(qn("w:numId"))]
+    assert len(set(num_ids)) == 3
+    doc_pr_ids = [e.get("id") for e in doc.element.body.iter(
+        "{http://schemas.openxmlformats.org/drawingml/2006/wordprocessingDrawing}docPr")]
+    assert len(set(doc_pr_ids)) == 3
+    hyperlinks = [r for r in doc.part.rels.values() if r.reltype == RT.HYPERLINK]
+    assert hyperlinks and all(r.target_ref == "https://example.com" for r in hyperlinks)
+
+
+def test_process_pool_merge_matches_in_process_merge(tmp_path):
+    from word_document_server.core.merge import merge_documents_into
+    from word_document_server.utils import concurrency
+
+    sources = [_source(str(tmp_path / f"s{i}.docx"), f"S{i}", i % 2, note_text=f"note {i}") for i in range(4)]
+    settings = concurrency.get_concurrency_settings()
+    merged = []
+    try:
+        for processes in (0, 2):
+            concurrency.configure_concurrency(processes=processes)
+            doc = Document()
+            assert merge_documents_into(doc, sources, window=1) == 4
+            merged.append(doc.element.body.xml)
+    finally:
+        concurrency.configure_concurrency(processes=settings["processes"])
+    assert merged[0] == merged[1]
@@ -0,0 +1,73 @@
+import os
+import struct
+import zipfile
+import zlib
+
+import pytest
+
+pytest.importorskip("docx.document")
+from docx import Document
+from docx.shared import Inches
+
+from word_document_server.utils.package_writer import save_package
+
+
+def _png(path, width=64, height=64):
+    def chunk(kind, data):
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+    raw = b"".join(b"\x00" + os.urandom(width * 3) for _ in range(height))
+    path.write_bytes(b"\x89PNG\r\n\x1a\n"
+                     + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+                     + chunk(b"IDAT", zlib.compress(raw))
+                     + chunk(b"IEND", b""))
+    return str(path)
+
+
+def _raw_offsets(path):
+    with zipfile.ZipFile(path) as zf:
+        return {info.filename: (info.CRC, info.compress_size) for info in zf.infolist()}
+
+
+def test_unchanged_parts_are_copied(tmp_path):
+    path = str(tmp_path / "pictures.docx")
+    doc = Document()
+    doc.add_paragraph("Before")
+    doc.add_picture(_png(tmp_path / "image.png"), width=Inches(1))
+    doc.save(path)
+    before = _raw_offsets(path)
+
+    doc = Document(path)
+    doc.add_paragraph("After")
+    counts = save_package(doc, path)
+
+    after = _raw_offsets(path)
+    media = [name for name in after if name.startswith("word/media/")]
+    assert media and all(after[name] == before[name] for name in media)
+    assert after["word/document.xml"] != before["word/document.xml"]
+    assert counts["copied"] >= len(media)
+    assert counts["rewritten"] >= 1
+    assert set(after) == set(before)
+
+    reloaded = Document(path)
+    assert [p.text for p in reloaded.paragraphs][-1] == "After"
+    assert len(reloaded.inline_shapes) == 1
+    with zipfile.ZipFile(path) as zf:
+        assert zf.testzip() is None
+
+
+def test_no_changes_copies_everything(tmp_path):
+    path = str(tmp_path / "plain.docx")
+    Document().save(path)
+    doc = Document(path)
+    save_package(doc, path)
+    counts = save_package(doc, path)
+    assert counts["rewritten"] == 0
+    assert [p.text for p in Document(path).paragraphs] == [p.text for p in doc.paragraphs]
+
+
+def test_new_file_is_written_in_full(tmp_path):
+    path = str(tmp_path / "new.docx")
+    counts = save_package(Document(), path)
+    assert counts["copied"] == 0
+    assert os.path.exists(path)
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".tmp")]
@@ -0,0 +1,91 @@
+import asyncio
+import json
+
+import pytest
+
+pytest.importorskip("docx.document")
+from docx import Document
+
+from word_document_server.utils import document_cache
+from word_document_server.utils.pagination import slice_characters, slice_paragraphs
+from word_document_server.tools.document_tools import get_document_outline, get_document_text
+from word_document_server.tools.qa_tools import extract_text
+
+
+@pytest.fixture
+def long_doc(tmp_path):
+    path = str(tmp_path / "long.docx")
+    doc = Document()
+    doc.add_heading("Chapter", level=1)
+    for i in range(1, 10):
+        doc.add_paragraph(f"paragraph {i}" if i != 5 else "")
+        if i == 6:
+            doc.add_table(rows=1, cols=1).cell(0, 0).text = "cell text that is longer than twenty"
+    doc.save(path)
+    document_cache.clear_cache()
+    yield path
+    document_cache.clear_cache()
+
+
+def _pages(tool, path, **kwargs):
+    pages = []
+    cursor = None
+    while True:
+        page = json.loads(asyncio.run(tool(path, cursor=cursor, **kwargs)))
+        pages.append(page)
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return pages
+
+
+def test_slices_stop_reading_once_complete():
+    consumed = []
+
+    def texts():
+        for i in range(1000):
+            consumed.append(i)
+            yield f"p{i}"
+
+    assert slice_paragraphs(texts(), 2, 3) == (["p2", "p3", "p4"], True)
+    assert len(consumed) == 6
+    assert slice_characters(iter(["abc", "de"]), 2, 3) == ("c\nd", True)
+    assert slice_characters(iter(["abc", "de"]), 2, 4) == ("c\nde", False)
+    assert slice_characters(iter(["abc", "de"]), 0, 3) == ("abc", True)
+
+
+@pytest.mark.parametrize("tool", [get_document_text, extract_text])
+@pytest.mark.parametrize("unit,limit", [("paragraphs", 4), ("characters", 7)])
+def test_text_pages_add_up_to_the_full_text(long_doc, tool, unit, limit):
+    full = asyncio.run(tool(long_doc))
+    pages = _pages(tool, long_doc, limit=limit, unit=unit)
+    assert len(pages) > 2
+    assert all(page["count"] <= limit for page in pages)
+    separator = "\n" if unit == "paragraphs" else ""
+    assert separator.join(page["text"] for page in pages) == full
+
+
+def test_outline_pages_and_table_placement(long_doc):
+    full = json.loads(asyncio.run(get_document_outline(long_doc)))
+    assert full["paragraphs"][1] == {"index": 1, "id": full["paragraphs"][1]["id"], "text": "paragraph 1",
+                                     "style": "Normal"}
+    assert full["paragraphs"][0]["style"] == "Heading 1"
+    assert full["tables"][0]["preview"] == [["cell text that is lo..."]]
+    assert "next_cursor" not in full
+
+    pages = _pages(get_document_outline, long_doc, offset=1, limit=3)
+    assert [[p["index"] for p in page["paragraphs"]] for page in pages] == [[1, 2, 3], [4, 5, 6], [7, 8, 9]]
+    # The table follows paragraph 6, so it opens the third page
+    assert [len(page["tables"]) for page in pages] == [0, 0, 1]
+
+
+def test_cursors_are_checked(long_doc):
+    page = json.loads(asyncio.run(get_document_text(long_doc, limit=2)))
+    other = asyncio.run(extract_text(long_doc, cursor=page["next_cursor"]))
+    assert other == "Invalid parameter: cursor was not issued by extract_text"
+    assert asyncio.run(get_document_text(long_doc, limit=0)) == "Invalid parameter: limit must be at least 1"
+    assert asyncio.run(get_document_text(long_doc, limit=2, unit="pages")).startswith("Invalid parameter")
+
+    doc = Document(long_doc)
+    doc.add_paragraph("appended")
+    doc.save(long_doc)
+    assert "has changed" in asyncio.run(get_document_text(long_doc, cursor=page["next_cursor"]))
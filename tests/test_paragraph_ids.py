@@ -0,0 +1,132 @@
+import asyncio
+import json
+
+import pytest
+
+pytest.importorskip("docx.document")
+from docx import Document
+
+from word_document_server.utils import document_cache
+from word_document_server.utils.docx_stream import iter_paragraphs
+from word_document_server.utils.extended_document_utils import get_paragraph_text
+from word_document_server.utils.paragraph_ids import (
+    PARA_ID, ensure_paragraph_ids, is_paragraph_id, resolve_paragraph
+)
+from word_document_server.tools.content_tools import add_paragraph, delete_paragraph
+from word_document_server.tools.document_tools import get_document_outline
+from word_document_server.tools.format_tools import format_text
+
+
+@pytest.fixture
+def sample_doc(tmp_path):
+    path = tmp_path / "ids.docx"
+    doc = Document()
+    for i in range(5):
+        doc.add_paragraph(f"paragraph {i}")
+    doc.save(str(path))
+    document_cache.clear_cache()
+    yield str(path)
+    document_cache.clear_cache()
+
+
+def test_ids_are_unique_and_well_formed():
+    doc = Document()
+    for i in range(200):
+        doc.add_paragraph(str(i))
+    ids = ensure_paragraph_ids(doc)
+    assert len(ids) == len(set(ids)) == len(doc.paragraphs)
+    assert all(is_paragraph_id(para_id) for para_id in ids)
+    assert ensure_paragraph_ids(doc) == ids
+
+
+def test_duplicate_ids_from_copied_paragraphs_are_replaced():
+    doc = Document()
+    doc.add_paragraph("a")._p.set(PARA_ID, "0ABCDEF0")
+    doc.add_paragraph("b")._p.set(PARA_ID, "0abcdef0")
+    ids = ensure_paragraph_ids(doc)
+    assert ids[0] == "0ABCDEF0"
+    assert ids[1] != ids[0]
+
+
+def _plain_doc(count):
+    doc = Document()
+    for i in range(count):
+        doc.add_paragraph(f"p{i}")
+    return doc
+
+
+def test_generated_ids_avoid_ids_in_cells_and_headers(tmp_path):
+    path = str(tmp_path / "taken.docx")
+    # The IDs the body paragraphs would get if nothing else held them
+    expected = ensure_paragraph_ids(_plain_doc(3))
+    doc = _plain_doc(3)
+    doc.add_table(rows=1, cols=1).cell(0, 0).paragraphs[0]._p.set(PARA_ID, expected[0])
+    doc.sections[0].header.paragraphs[0]._p.set(PARA_ID, expected[1])
+    doc.save(path)
+    document_cache.clear_cache()
+
+    ids = ensure_paragraph_ids(Document(path))
+    assert len(set(ids)) == 3 and not set(ids) & set(expected[:2])
+    assert ids[2] == expected[2]
+    # Streaming reads the other parts too and derives the same IDs
+    assert [p.para_id for p in iter_paragraphs(path) if p.index is not None] == ids
+    assert [p["id"] for p in json.loads(asyncio.run(get_document_outline(path)))["paragraphs"]] == ids
+    document_cache.clear_cache()
+
+
+def test_resolve_by_index_and_id():
+    doc = Document()
+    for i in range(3):
+        doc.add_paragraph(f"p{i}")
+    ids = ensure_paragraph_ids(doc)
+    assert resolve_paragraph(doc, 1)[0].text == "p1"
+    assert resolve_paragraph(doc, "2")[0].text == "p2"
+    assert resolve_paragraph(doc, ids[2].lower())[0].text == "p2"
+    assert resolve_paragraph(doc, 7)[0] is None
+    assert "not found" in resolve_paragraph(doc, "7FFFFFF0")[1]
+    assert resolve_paragraph(doc, "intro")[0] is None
+
+    # Lookups never assign IDs: read-only tools share the cached document
+    doc.add_paragraph("new")
+    assert resolve_paragraph(doc, "7FFFFFF0")[0] is None
+    assert doc.paragraphs[-1]._p.get(PARA_ID) is None
+
+
+def test_streamed_ids_match_outline_before_first_save(sample_doc):
+    outline = json.loads(asyncio.run(get_document_outline(sample_doc)))
+    streamed = [p.para_id for p in iter_paragraphs(sample_doc) if p.index is not None]
+    assert streamed == [p["id"] for p in outline["paragraphs"]]
+
+
+def test_ids_survive_deletes_and_reloads(sample_doc):
+    outline = json.loads(asyncio.run(get_document_outline(sample_doc)))
+    ids = [p["id"] for p in outline["paragraphs"]]
+
+    asyncio.run(delete_paragraph(sample_doc, ids[1]))
+    document_cache.clear_cache()
+    result = asyncio.run(format_text(sample_doc, ids[3], 0, 9, bold=True))
+    assert "formatted successfully" in result
+
+    doc = Document(sample_doc)
+    assert [p.text for p in doc.paragraphs] == ["paragraph 0", "paragraph 2", "paragraph 3", "paragraph 4"]
+    assert [p._p.get(PARA_ID) for p in doc.paragraphs] == [ids[0], ids[2], ids[3], ids[4]]
+    assert [r.text for r in doc.paragraphs[2].runs if r.bold] == ["paragraph"]
+
+
+@pytest.mark.parametrize("deferred", [False, True])
+def test_ids_from_the_outline_survive_edits_by_index(sample_doc, deferred):
+    document_cache.configure_write_behind(deferred)
+    try:
+        ids = [p["id"] for p in json.loads(asyncio.run(get_document_outline(sample_doc)))["paragraphs"]]
+
+        asyncio.run(delete_paragraph(sample_doc, 2))
+        assert get_paragraph_text(sample_doc, ids[4])["text"] == "paragraph 4"
+        asyncio.run(add_paragraph(sample_doc, "inserted", before=0))
+        assert get_paragraph_text(sample_doc, ids[3])["text"] == "paragraph 3"
+        assert "not found" in get_paragraph_text(sample_doc, ids[2])["error"]
+
+        outline = json.loads(asyncio.run(get_document_outline(sample_doc)))["paragraphs"]
+        assert [p["id"] for p in outline[1:]] == [ids[0], ids[1], ids[3], ids[4]]
+        assert outline[0]["id"] not in ids
+    finally:
+        document_cache.configure_write_behind(False)
@@ -0,0 +1,148 @@
+import asyncio
+import json
+
+import pytest
+
+pytest.importorskip("docx.document")
+from docx import Document
+
+from word_document_server.utils import document_cache
+from word_document_server.utils.block_index import BlockIndex, get_block_index
+from word_document_server.utils.paragraph_ids import ensure_paragraph_ids
+from word_document_server.utils.placement import placed, resolve_anchor
+from word_document_server.tools.batch_tools import apply_operations
+from word_document_server.tools.content_tools import add_heading, add_paragraph, add_table
+
+
+@pytest.fixture
+def sample_doc(tmp_path):
+    path = tmp_path / "placement.docx"
+    doc = Document()
+    doc.add_heading("Introduction", level=1)
+    doc.add_paragraph("intro text")
+    doc.add_heading("Results", level=1)
+    doc.add_paragraph("results text")
+    doc.save(str(path))
+    document_cache.clear_cache()
+    yield str(path)
+    document_cache.clear_cache()
+
+
+def _texts(path):
+    return [p.text for p in Document(path).paragraphs]
+
+
+def test_relocated_blocks_keep_the_index_consistent():
+    doc = Document()
+    for i in range(4):
+        doc.add_paragraph(f"p{i}")
+    doc.add_table(rows=1, cols=1)
+    index = get_block_index(doc)
+    anchor = index.paragraphs[1]
+    with placed(doc, anchor, after=True):
+        doc.add_table(rows=1, cols=1)
+        doc.add_paragraph("new")
+    assert get_block_index(doc) is index
+    fresh = BlockIndex(doc)
+    assert index.blocks == fresh.blocks
+    assert index.paragraphs == fresh.paragraphs
+    assert index.tables == fresh.tables
+    assert [p.text for p in doc.paragraphs] == ["p0", "p1", "new", "p2", "p3"]
+
+
+def test_anchor_resolution():
+    doc = Document()
+    doc.add_heading("Summary", level=2)
+    doc.add_paragraph("Summary")
+    ids = ensure_paragraph_ids(doc)
+    assert resolve_anchor(doc) == (None, False, "")
+    assert resolve_anchor(doc, before=1)[:2] == (doc.paragraphs[1]._p, False)
+    assert resolve_anchor(doc, after=ids[1])[:2] == (doc.paragraphs[1]._p, True)
+    assert resolve_anchor(doc, after=" Summary ")[0] is doc.paragraphs[0]._p
+    assert "not found" in resolve_anchor(doc, before="Missing")[2]
+    assert "not both" in resolve_anchor(doc, before=0, after=1)[2]
+
+
+def test_numeric_headings_and_repeated_lookups():
+    doc = Document()
+    doc.add_heading("2024", level=1)
+    doc.add_paragraph("body")
+    doc.add_heading("Outlook", level=1)
+    assert resolve_anchor(doc, after="2024")[0] is doc.paragraphs[0]._p
+    assert resolve_anchor(doc, after=2)[0] is doc.paragraphs[2]._p
+    assert "not found" in resolve_anchor(doc, after="1")[2]
+
+    # A renamed heading is noticed although the body structure did not change
+    doc.paragraphs[0].text = "2025"
+    assert resolve_anchor(doc, after="2024")[0] is None
+    assert resolve_anchor(doc, after="2025")[0] is doc.paragraphs[0]._p
+    assert resolve_anchor(doc, before="Outlook")[0] is doc.paragraphs[2]._p
+
+
+def test_positions_follow_relocations_and_removals():
+    doc = Document()
+    for i in range(6):
+        doc.add_paragraph(f"p{i}")
+    index = get_block_index(doc)
+    assert index.paragraph_position(index.paragraphs[4]) == 4
+    with placed(doc, index.paragraphs[1]):
+        doc.add_paragraph("new")
+    index.remove(index.paragraphs[3])
+    doc.add_table(rows=1, cols=1)
+    assert get_block_index(doc) is index
+    assert [index.paragraph_position(p) for p in index.paragraphs] == list(range(6))
+    assert [index.position(b) for b in index.blocks] == list(range(7))
+    assert index.table_position(index.tables[0]) == 0
+    assert [p.text for p in doc.paragraphs] == ["p0", "new", "p1", "p3", "p4", "p5"]
+
+
+def test_content_tools_insert_at_anchor(sample_doc):
+    asyncio.run(add_paragraph(sample_doc, "first", before=0))
+    asyncio.run(add_heading(sample_doc, "Method", level=1, before="Results"))
+    asyncio.run(add_table(sample_doc, 1, 1, [["cell"]], after="Method"))
+    assert _texts(sample_doc) == ["first", "Introduction", "intro text", "Method", "Results", "results text"]
+    doc = Document(sample_doc)
+    assert doc.element.body.index(doc.tables[0]._tbl) == 4
+
+    result = asyncio.run(add_paragraph(sample_doc, "lost", after="Conclusion"))
+    assert result == "Heading 'Conclusion' not found in document."
+    assert "lost" not in _texts(sample_doc)
+
+
+def test_batch_operations_accept_anchors(sample_doc):
+    result = json.loads(asyncio.run(apply_operations(sample_doc, [
+        {"type": "paragraph", "text": "more results", "after": 3},
+        {"type": "heading", "text": "Background", "level": 2, "after": "Introduction"},
+    ])))
+    assert result["applied"] == 2
+    assert _texts(sample_doc) == ["Introduction", "Background", "intro text", "Results", "results text",
+                                  "more results"]
+
+
+def test_table_of_contents_is_inserted_in_place(tmp_path):
+    from io import BytesIO
+    from benchmarks.corpus import png_bytes
+    from word_document_server.tools.content_tools import add_table_of_contents
+
+    path = str(tmp_path / "toc.docx")
+    doc = Document()
+    doc.add_heading("Chapter", level=1)
+    doc.add_paragraph().add_run("bold body").bold = True
+    doc.add_picture(BytesIO(png_bytes(1)))
+    doc.add_heading("Section", level=2)
+    doc.add_heading("Detail", level=4)
+    doc.add_table(rows=2, cols=2).cell(1, 1).text = "kept"
+    doc.save(path)
+    document_cache.clear_cache()
+
+    result = asyncio.run(add_table_of_contents(path, max_level=3))
+    document_cache.clear_cache()
+    assert result == f"Table of contents with 2 entries added to {path}"
+
+    doc = Document(path)
+    texts = [p.text for p in doc.paragraphs]
+    assert texts[:3] == ["Table of Contents", "Chapter", "    Section"]
+    assert texts[4:6] == ["Chapter", "bold body"]
+    assert doc.paragraphs[5].runs[0].bold
+    assert len(doc.inline_shapes) == 1
+    assert doc.tables[0].cell(1, 1).text == "kept"
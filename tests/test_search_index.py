@@ -0,0 +1,135 @@
+import asyncio
+import json
+import os
+
+import pytest
+
+pytest.importorskip("docx.document")
+from docx import Document
+
+from word_document_server.utils import document_cache, search_index
+from word_document_server.tools.document_tools import search_documents
+
+
+def _write(path, *paragraphs, cell=None):
+    doc = Document()
+    for text in paragraphs:
+        doc.add_paragraph(text)
+    if cell:
+        doc.add_table(rows=1, cols=2).cell(0, 1).text = cell
+    doc.save(path)
+    return path
+
+
+@pytest.fixture
+def library(tmp_path, monkeypatch):
+    monkeypatch.setenv("WORD_MCP_CACHE_DIR", str(tmp_path / "cache"))
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    _write(str(docs / "lease.docx"), "Parties", "The tenant shall indemnify the landlord.")
+    _write(str(docs / "nda.docx"), "Confidential information", "Indemnification is excluded.",
+           cell="Indemnify on request")
+    (docs / "notes.txt").write_text("indemnify")
+    document_cache.clear_cache()
+    yield str(docs)
+    document_cache.clear_cache()
+
+
+def _search(directory, query, **kwargs):
+    return json.loads(asyncio.run(search_documents(directory, query, **kwargs)))
+
+
+def test_search_returns_file_paragraph_and_snippet(library):
+    result = _search(library, "indemnify")
+    assert result["index"] == {"documents": 2, "indexed": 2, "unchanged": 0, "removed": 0,
+                               "failed": 0}
+    hits = {(os.path.basename(r["file"]), r["paragraph_index"], r.get("table_index")) for r in result["results"]}
+    assert hits == {("lease.docx", 1, None), ("nda.docx", None, 0)}
+    lease = next(r for r in result["results"] if r["file"].endswith("lease.docx"))
+    assert lease["snippet"] == "The tenant shall [indemnify] the landlord."
+    assert len(lease["id"]) == 8
+    # Table cells cannot be addressed by ID, so none is reported for them
+    assert "id" not in next(r for r in result["results"] if r["file"].endswith("nda.docx"))
+
+    assert len(_search(library, "indemnif*")["results"]) == 3
+    assert [os.path.basename(r["file"]) for r in _search(library, '"tenant shall"')["results"]] == ["lease.docx"]
+    # Not valid FTS5 syntax; searched as plain words instead
+    assert len(_search(library, 'tenant: "landlord')["results"]) == 1
+
+
+def test_index_updates_incrementally(library):
+    _search(library, "tenant")
+    assert _search(library, "tenant")["index"]["unchanged"] == 2
+
+    lease = os.path.join(library, "lease.docx")
+    _write(lease, "The lessee pays rent.")
+    os.remove(os.path.join(library, "nda.docx"))
+    result = _search(library, "tenant OR lessee")
+    assert result["index"] == {"documents": 1, "indexed": 1, "unchanged": 0, "removed": 1,
+                               "failed": 0}
+    assert [r["snippet"] for r in result["results"]] == ["The [lessee] pays rent."]
+
+    # Same content, new timestamp: hashed but not re-extracted
+    os.utime(lease, ns=(0, 0))
+    assert _search(library, "rent")["index"]["indexed"] == 0
+
+
+def test_recursive_search_and_errors(library):
+    sub = os.path.join(library, "archive")
+    os.mkdir(sub)
+    _write(os.path.join(sub, "old.docx"), "Archived indemnity clause")
+    assert _search(library, "archived")["results"] == []
+    assert len(_search(library, "archived", recursive=True)["results"]) == 1
+    assert asyncio.run(search_documents(os.path.join(library, "missing"), "x")).endswith("does not exist")
+    assert asyncio.run(search_documents(library, "  ")).startswith("Invalid parameter")
+    connection = search_index.connect()
+    try:
+        assert connection.execute("SELECT COUNT(*) FROM documents").fetchone()[0] == 3
+    finally:
+        connection.close()
+
+
+def test_unreadable_files_do_not_break_searches(library, monkeypatch):
+    broken = os.path.join(library, "broken.docx")
+    with open(broken, "wb") as f:
+        f.write(b"not a zip")
+    result = _search(library, "indemnify")
+    assert result["index"]["failed"] == 1 and result["index"]["indexed"] == 2
+    assert len(result["results"]) == 2
+
+    # Recorded by timestamp and size: not extracted again until the file changes
+    attempts = []
+    extract = search_index._extract
+    monkeypatch.setattr(search_index, "_extract", lambda path: attempts.append(path) or extract(path))
+    assert _search(library, "indemnify")["index"]["failed"] == 1
+    assert attempts == []
+
+    _write(broken, "Repaired indemnity clause")
+    result = _search(library, "repaired")
+    assert result["index"]["failed"] == 0 and len(result["results"]) == 1
+
+    # A document that becomes unreadable drops out of the results
+    with open(broken, "wb") as f:
+        f.write(b"truncated")
+    result = _search(library, "repaired")
+    assert result["index"]["failed"] == 1 and result["results"] == []
+    os.remove(broken)
+    assert _search(library, "indemnify")["index"]["failed"] == 0
+
+
+def test_unreadable_directories_and_upper_case_names(library, monkeypatch):
+    sub = os.path.join(library, "sub")
+    os.mkdir(sub)
+    _write(os.path.join(sub, "hidden.docx"), "Indemnify the agent")
+    _write(os.path.join(library, "UP.DOCX"), "Upper case indemnify")
+    scandir = os.scandir
+
+    def denied(path="."):
+        if os.path.abspath(path) == sub:
+            raise PermissionError(13, "denied")
+        return scandir(path)
+
+    monkeypatch.setattr(os, "scandir", denied)
+    result = _search(library, "indemnify", recursive=True)
+    assert result["index"]["documents"] == 3 and result["index"]["failed"] == 0
+    assert sorted(os.path.basename(r["file"]) for r in result["results"]) == ["UP.DOCX", "lease.docx", "nda.docx"]
@@ -17,12 +17,15 @@ from word_document_server.tools import (
     export_tools,
     qa_tools,
     build_tools,
+    batch_tools,
 )
 
 def test_document_tools_has_core_functions():
     assert hasattr(document_tools, 'create_document')
     assert hasattr(document_tools, 'copy_document')
     assert hasattr(document_tools, 'get_document_info')
+    assert hasattr(document_tools, 'flush_document')
+    assert hasattr(document_tools, 'get_server_stats')
 
 def test_content_tools_has_core_functions():
     assert hasattr(content_tools, 'add_paragraph')
@@ -86,4 +89,7 @@ def test_qa_tools_has_core_functions():
     assert hasattr(qa_tools, 'check_passive_voice')
 
 def test_build_tools_has_core_functions():
-    assert hasattr(build_tools, 'build_book')
\ No newline at end of file
+    assert hasattr(build_tools, 'build_book')
+
+def test_batch_tools_has_core_functions():
+    assert hasattr(batch_tools, 'apply_operations')
@@ -0,0 +1,150 @@
+import asyncio
+import json
+
+import pytest
+
+pytest.importorskip("docx.document")
+from docx import Document
+from docx.oxml.ns import qn
+
+from word_document_server.utils import document_cache
+from word_document_server.utils.text_replace import PatternMatcher, replace_many
+from word_document_server.tools.batch_tools import apply_operations
+from word_document_server.tools.content_tools import search_and_replace_many
+
+
+def test_matcher_prefers_leftmost_longest_without_overlaps():
+    matcher = PatternMatcher(["he", "she", "hers", "his", ""])
+    assert len(matcher) == 4
+    found = [(start, matcher.patterns[i]) for start, i in matcher.find_all("ushers and his")]
+    assert found == [(1, "she"), (11, "his")]
+    assert matcher.replace("ahishers", ["1", "2", "3", "4"]) == ("a43", [(1, 3), (4, 2)])
+
+
+def test_matches_agree_with_sequential_replacement_for_disjoint_patterns():
+    words = [f"term{i:03d}" for i in range(500)]
+    text = " ".join(words[::7]) + " unrelated"
+    matcher = PatternMatcher(words)
+    result, matches = matcher.replace(text, [w.upper() for w in words])
+    expected = text
+    for word in words:
+        expected = expected.replace(word, word.upper())
+    assert result == expected
+    assert len(matches) == len(words[::7])
+
+
+def test_replace_many_keeps_run_formatting_and_counts_per_pattern():
+    doc = Document()
+    paragraph = doc.add_paragraph("colour and centre, ")
+    paragraph.add_run("colour").bold = True
+    doc.add_table(rows=1, cols=1).cell(0, 0).text = "centre centre"
+    counts = replace_many(doc, {"colour": "color", "centre": "center", "absent": "x", "color": "colour"})
+    assert counts == {"colour": 2, "centre": 3}
+    assert paragraph.text == "color and center, color"
+    assert paragraph.runs[1].bold
+    assert paragraph.runs[0]._r.find(
+        "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}t").get(
+        "{http://www.w3.org/XML/1998/namespace}space") == "preserve"
+    assert doc.tables[0].cell(0, 0).text == "center center"
+
+
+def test_search_and_replace_many_tool_and_batch_operation(tmp_path):
+    path = str(tmp_path / "many.docx")
+    doc = Document()
+    doc.add_paragraph("The organisation will analyse the behaviour.")
+    doc.save(path)
+    document_cache.clear_cache()
+
+    result = asyncio.run(search_and_replace_many(path, {"organisation": "organization", "analyse": "analyze"}))
+    assert result.startswith("Replaced 2 occurrence(s) of 2 of 2 pattern(s)")
+    batch = json.loads(asyncio.run(apply_operations(path, [
+        {"type": "replace_many", "replacements": {"behaviour": "behavior"}},
+        {"type": "replace_many", "replacements": {}},
+    ])))
+    assert [r["success"] for r in batch["results"]] == [True, False]
+    assert asyncio.run(search_and_replace_many(path, {"missing": "x"})) == "No occurrences of any pattern found."
+    document_cache.clear_cache()
+    assert Document(path).paragraphs[0].text == "The organization will analyze the behavior."
+
+
+def _split_runs(paragraph, *pieces):
+    runs = []
+    for text, bold in pieces:
+        run = paragraph.add_run(text)
+        run.bold = bold
+        runs.append(run)
+    return runs
+
+
+def test_matches_spanning_runs_keep_untouched_formatting():
+    from word_document_server.utils.document_utils import find_and_replace_text
+
+    doc = Document()
+    paragraph = doc.add_paragraph()
+    _split_runs(paragraph, ("Hello Wo", False), ("rl", True), ("d and World", None))
+    assert find_and_replace_text(doc, "World", "Earth") == 2
+    assert paragraph.text == "Hello Earth and Earth"
+    # The bold run held nothing but matched text, so it is removed
+    assert [(r.text, r.bold) for r in paragraph.runs] == [("Hello Earth", False), (" and Earth", None)]
+
+    paragraph = doc.add_paragraph()
+    _split_runs(paragraph, ("one ", None), ("two", True), (" three", False))
+    paragraph.runs[1]._r.append(paragraph.runs[1]._r.makeelement(qn("w:footnoteReference")))
+    assert find_and_replace_text(doc, "one two three", "123") == 1
+    # A run with other content is kept
+    assert [(r.text, r.bold) for r in paragraph.runs] == [("123", None), ("", True)]
+
+
+def test_regex_groups_case_and_fixed_characters():
+    from word_document_server.utils.document_utils import find_and_replace_text
+
+    doc = Document()
+    paragraph = doc.add_paragraph()
+    _split_runs(paragraph, ("Version 1", False), (".2 and version 3.4", True))
+    tabbed = doc.add_paragraph("left")
+    tabbed.add_run().add_tab()
+    tabbed.add_run("right")
+
+    assert find_and_replace_text(doc, r"version (\d+)\.(\d+)", r"v\1-\2", use_regex=True, match_case=False) == 2
+    assert paragraph.text == "v1-2 and v3-4"
+    # A match may not swallow a tab; text on either side is still found
+    assert find_and_replace_text(doc, "left\tright", "x") == 0
+    assert find_and_replace_text(doc, "^", "> ", use_regex=True) == 2
+    assert tabbed.text == "> left\tright"
+
+
+def test_case_insensitive_replacement_folds_expanding_characters():
+    from word_document_server.utils.document_utils import find_and_replace_text
+
+    doc = Document()
+    paragraph = doc.add_paragraph()
+    _split_runs(paragraph, ("Über die Stra", False), ("ße und die ", True), ("STRASSE", None))
+    assert find_and_replace_text(doc, "strasse", "Weg", match_case=False) == 2
+    assert paragraph.text == "Über die Weg und die Weg"
+    assert find_and_replace_text(doc, "über", "Auf", match_case=False) == 1
+    assert paragraph.text == "Auf die Weg und die Weg"
+
+
+def test_headers_footers_and_tables_are_searched(tmp_path):
+    from word_document_server.tools.content_tools import search_and_replace
+
+    path = str(tmp_path / "parts.docx")
+    doc = Document()
+    section = doc.sections[0]
+    _split_runs(section.header.paragraphs[0], ("ACME ", None), ("Corp", True))
+    section.footer.paragraphs[0].text = "ACME Corp confidential"
+    doc.add_table(rows=1, cols=1).cell(0, 0).text = "ACME Corp"
+    doc.add_paragraph("acme corp")
+    doc.save(path)
+    document_cache.clear_cache()
+
+    result = asyncio.run(search_and_replace(path, "ACME Corp", "Initech"))
+    assert result == "Replaced 3 occurrence(s) of 'ACME Corp' with 'Initech'."
+    assert asyncio.run(search_and_replace(path, "(", "x", use_regex=True)).startswith("Invalid regular expression")
+    document_cache.clear_cache()
+
+    doc = Document(path)
+    assert doc.sections[0].header.paragraphs[0].text == "Initech"
+    assert doc.sections[0].footer.paragraphs[0].text == "Initech confidential"
+    assert doc.tables[0].cell(0, 0).text == "Initech"
+    assert doc.paragraphs[0].text == "acme corp"
@@ -4,6 +4,8 @@ Footnote and endnote functionality for Word Document Server.
 from docx import Document
 from typing import List, Tuple
 
+from word_document_server.utils.block_index import get_block_index
+
 
 def add_footnote(doc, paragraph, text):
     """
@@ -159,6 +161,7 @@ def customize_footnote_formatting(doc, footnote_refs, format_symbols, start_numb
         Number of footnotes formatted
     """
     # Update footnote references with new format
+    block_index = get_block_index(doc)
     for i, (para_idx, run_idx, _) in enumerate(footnote_refs):
         try:
             idx = i + start_number - 1
@@ -167,7 +170,7 @@ def customize_footnote_formatting(doc, footnote_refs, format_symbols, start_numb
             else:
                 symbol = str(idx + 1)  # Fall back to numbers if we run out of symbols
             
-            paragraph = doc.paragraphs[para_idx]
+            paragraph = block_index.paragraph(para_idx)
             paragraph.runs[run_idx].text = symbol
         except IndexError:
             # Skip if we can't locate the reference
@@ -183,8 +186,8 @@ def customize_footnote_formatting(doc, footnote_refs, format_symbols, start_numb
             for i in range(len(footnote_refs)):
                 try:
                     footnote_para_idx = para_idx + i + 1
-                    if footnote_para_idx < len(doc.paragraphs):
-                        para = doc.paragraphs[footnote_para_idx]
+                    if footnote_para_idx < block_index.paragraph_count:
+                        para = block_index.paragraph(footnote_para_idx)
                         
                         # Extract and preserve footnote text
                         footnote_text = para.text
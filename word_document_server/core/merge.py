@@ -0,0 +1,439 @@
+"""
+XML-level document merging for Word Document Server.
+
+Merging works in two steps so that only one source document is ever parsed at
+a time:
+
+1. :func:`prepare_source` parses a source file and reduces it to a
+   :class:`SourcePayload` of plain bytes and tuples: the serialized body, the
+   parts its relationships point to (images, embedded objects, hyperlinks),
+   the styles and numbering definitions it uses, and its footnotes and
+   endnotes. The parsed source is released as soon as the payload is built.
+2. :class:`DocumentMerger` appends payloads to the target document: body
+   elements are inserted as they are, relationship IDs, numbering IDs, note
+   IDs, bookmark IDs and drawing IDs are re-mapped to values that are free in
+   the target, and media parts are added once per distinct content (SHA-1).
+
+Payloads are picklable: :func:`merge_documents_into` builds them in the
+shared process pool, a bounded number ahead of the writer, and appends them in
+source order from a single thread.
+
+The target's own styles win over same-named source styles, as with Word's
+"use destination styles". Header and footer references of section breaks
+inside a source are dropped (those sections continue the target's headers),
+and so are comment ranges, whose comments are not copied.
+"""
+import hashlib
+import io
+import os
+import posixpath
+import re
+from collections import namedtuple
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from lxml import etree
+from docx import Document
+from docx.opc.constants import CONTENT_TYPE as CT, RELATIONSHIP_TYPE as RT
+from docx.opc.packuri import PackURI
+from docx.opc.part import Part, XmlPart
+from docx.oxml import parse_xml
+from docx.oxml.ns import qn
+
+from word_document_server.utils.concurrency import map_in_processes
+from word_document_server.utils.instrumentation import add_bytes, timed
+
+
+R_NS = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+W_NS = 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'
+WP_NS = 'http://schemas.openxmlformats.org/drawingml/2006/wordprocessingDrawing'
+
+_NSMAP = {'w': W_NS, 'wp': WP_NS}
+_R_ATTRIBUTES = etree.XPath('.//@*[namespace-uri()=$ns]')
+_STYLE_REFS = etree.XPath('.//w:pStyle/@w:val | .//w:rStyle/@w:val | .//w:tblStyle/@w:val',
+                          namespaces=_NSMAP)
+_NUM_IDS = etree.XPath('.//w:numPr/w:numId', namespaces=_NSMAP)
+_DOC_PR = etree.XPath('.//wp:docPr', namespaces=_NSMAP)
+_BOOKMARKS = etree.XPath('.//w:bookmarkStart | .//w:bookmarkEnd', namespaces=_NSMAP)
+_DROPPED = etree.XPath(
+    './/w:sectPr/w:headerReference | .//w:sectPr/w:footerReference'
+    ' | .//w:commentRangeStart | .//w:commentRangeEnd | .//w:commentReference',
+    namespaces=_NSMAP)
+
+_W_VAL = qn('w:val')
+_W_ID = qn('w:id')
+_W_STYLE_ID = qn('w:styleId')
+_W_ABSTRACT_NUM_ID = qn('w:abstractNumId')
+_W_NUM_ID = qn('w:numId')
+
+# kind: (relationship type, content type, note element tag, reference element tag)
+NOTE_KINDS = {
+    'footnotes': (RT.FOOTNOTES, CT.WML_FOOTNOTES, 'w:footnote', 'w:footnoteReference'),
+    'endnotes': (RT.ENDNOTES, CT.WML_ENDNOTES, 'w:endnote', 'w:endnoteReference'),
+}
+
+# A relationship of a source part. External targets carry the URL in
+# ``target``; internal ones carry the part's blob and how to name its copy.
+RelSpec = namedtuple('RelSpec', ['reltype', 'is_external', 'target', 'content_type', 'partname', 'sha1'])
+
+# Everything needed to append one source document, as plain picklable data.
+# ``numbering`` maps numId -> (w:num XML, w:abstractNum XML); ``notes`` maps a
+# NOTE_KINDS key -> ({note id: note XML}, {rId: RelSpec}).
+SourcePayload = namedtuple('SourcePayload', ['path', 'body', 'rels', 'styles', 'numbering', 'notes'])
+
+
+def _rel_specs(part, element) -> Dict[str, RelSpec]:
+    """Collect the relationships of ``part`` that ``element`` refers to."""
+    specs = {}
+    # Document order (not a set) so that merges are reproducible across processes
+    for rId in dict.fromkeys(_R_ATTRIBUTES(element, ns=R_NS)):
+        rel = part.rels.get(rId)
+        if rel is None:
+            continue
+        if rel.is_external:
+            specs[rId] = RelSpec(rel.reltype, True, rel.target_ref, None, None, None)
+        else:
+            target = rel.target_part
+            blob = target.blob
+            specs[rId] = RelSpec(rel.reltype, False, blob, target.content_type,
+                                 str(target.partname), hashlib.sha1(blob).hexdigest())
+    return specs
+
+
+def _style_closure(styles_element, style_ids: Iterable[str]) -> List[bytes]:
+    """Serialize the given styles and the styles they are based on or linked to."""
+    by_id = {style.get(_W_STYLE_ID): style for style in styles_element.iterchildren(qn('w:style'))}
+    pending = list(style_ids)
+    seen: Set[str] = set()
+    result = []
+    while pending:
+        style_id = pending.pop()
+        if style_id in seen or style_id not in by_id:
+            continue
+        seen.add(style_id)
+        style = by_id[style_id]
+        result.append(etree.tostring(style))
+        for tag in ('w:basedOn', 'w:next', 'w:link'):
+            ref = style.find(qn(tag))
+            if ref is not None:
+                pending.append(ref.get(_W_VAL))
+    return result
+
+
+def _numbering(part, elements) -> Dict[str, Tuple[bytes, Optional[bytes]]]:
+    num_ids = {num_id.get(_W_VAL) for element in elements for num_id in _NUM_IDS(element)}
+    num_ids.discard('0')
+    if not num_ids:
+        return {}
+    try:
+        numbering = part.part_related_by(RT.NUMBERING).element
+    except KeyError:
+        return {}
+    abstract_nums = {a.get(_W_ABSTRACT_NUM_ID): a for a in numbering.iterchildren(qn('w:abstractNum'))}
+    result = {}
+    for num in numbering.iterchildren(qn('w:num')):
+        num_id = num.get(_W_NUM_ID)
+        if num_id in num_ids:
+            ref = num.find(qn('w:abstractNumId'))
+            abstract = abstract_nums.get(ref.get(_W_VAL)) if ref is not None else None
+            result[num_id] = (etree.tostring(num),
+                              etree.tostring(abstract) if abstract is not None else None)
+    return result
+
+
+def _notes(part, body) -> Dict[str, Tuple[Dict[str, bytes], Dict[str, RelSpec]]]:
+    result = {}
+    for kind, (reltype, _, note_tag, ref_tag) in NOTE_KINDS.items():
+        ids = {ref.get(_W_ID) for ref in body.iter(qn(ref_tag))}
+        if not ids:
+            continue
+        try:
+            notes_part = part.part_related_by(reltype)
+        except KeyError:
+            continue
+        root = etree.fromstring(notes_part.blob)
+        notes = {note.get(_W_ID): note for note in root.iterchildren(qn(note_tag)) if note.get(_W_ID) in ids}
+        rels = {}
+        for note in notes.values():
+            rels.update(_rel_specs(notes_part, note))
+        result[kind] = ({note_id: etree.tostring(note) for note_id, note in notes.items()}, rels)
+    return result
+
+
+def prepare_source(path: str) -> SourcePayload:
+    """
+    Parse a source document and reduce it to what merging needs.
+
+    Args:
+        path: Path to the source .docx file
+
+    Returns:
+        SourcePayload for :meth:`DocumentMerger.append`
+    """
+    with timed("parse"):
+        doc = Document(path)
+
+    part = doc.part
+    body = doc.element.body
+    # The final section properties belong to the target document
+    sectPr = body.find(qn('w:sectPr'))
+    if sectPr is not None:
+        body.remove(sectPr)
+
+    style_ids = list(dict.fromkeys(_STYLE_REFS(body)))
+    styles = _style_closure(part.styles.element, style_ids) if style_ids else []
+    style_elements = [etree.fromstring(xml) for xml in styles]
+
+    return SourcePayload(
+        path=path,
+        body=etree.tostring(body),
+        rels=_rel_specs(part, body),
+        styles=styles,
+        numbering=_numbering(part, [body] + style_elements),
+        notes=_notes(part, body),
+    )
+
+
+def _partname_template(partname: str) -> str:
+    """'/word/media/image12.png' -> '/word/media/image%d.png'"""
+    directory, name = posixpath.split(partname)
+    stem, ext = posixpath.splitext(name)
+    return posixpath.join(directory, re.sub(r'\d*$', '', stem) + '%d' + ext)
+
+
+def _as_int(value, default: int = 0) -> int:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def _max_int(values, default: int = 0) -> int:
+    return max((_as_int(value, default) for value in values), default=default)
+
+
+class DocumentMerger:
+    """Appends source payloads to a target python-docx Document, one at a time."""
+
+    def __init__(self, doc):
+        self.doc = doc
+        self.part = doc.part
+        self.package = doc.part.package
+        self.body = doc.element.body
+        self._sectPr = self.body.find(qn('w:sectPr'))
+        self._styles = doc.styles.element
+        self._style_ids = {s.get(_W_STYLE_ID) for s in self._styles.iterchildren(qn('w:style'))}
+        self._parts_by_sha1: Dict[str, Part] = {}
+        self._notes_parts: Dict[str, XmlPart] = {}
+        self._next_doc_pr = _max_int(e.get('id') for e in _DOC_PR(self.body)) + 1
+        self._next_bookmark = _max_int(e.get(_W_ID) for e in _BOOKMARKS(self.body)) + 1
+        self.sources = 0
+
+    # -- relationships -----------------------------------------------------
+
+    def _add_part(self, spec: RelSpec) -> Part:
+        part = self._parts_by_sha1.get(spec.sha1)
+        if part is None:
+            partname = self.package.next_partname(_partname_template(spec.partname))
+            part = self._parts_by_sha1[spec.sha1] = Part(partname, spec.content_type, spec.target, self.package)
+        return part
+
+    def _relate(self, target_part, spec: RelSpec) -> str:
+        if spec.is_external:
+            return target_part.relate_to(spec.target, spec.reltype, is_external=True)
+        if spec.reltype == RT.IMAGE and target_part is self.part:
+            try:
+                # python-docx stores each distinct image (by SHA-1) only once
+                rId, _ = self.part.get_or_add_image(io.BytesIO(spec.target))
+                return rId
+            except Exception:
+                # Formats python-docx cannot read (SVG, ...) are copied as they are
+                pass
+        return target_part.relate_to(self._add_part(spec), spec.reltype)
+
+    def _remap_relationships(self, target_part, rels: Dict[str, RelSpec], element) -> None:
+        mapping = {rId: self._relate(target_part, spec) for rId, spec in rels.items()}
+        for value in _R_ATTRIBUTES(element, ns=R_NS):
+            owner = value.getparent()
+            new_rId = mapping.get(str(value))
+            if new_rId is not None:
+                owner.set(value.attrname, new_rId)
+
+    # -- styles and numbering ---------------------------------------------
+
+    def _add_styles(self, styles: List[bytes]) -> List:
+        added = []
+        for xml in styles:
+            style = parse_xml(xml)
+            if style.get(_W_STYLE_ID) in self._style_ids:
+                continue
+            self._style_ids.add(style.get(_W_STYLE_ID))
+            self._styles.append(style)
+            added.append(style)
+        return added
+
+    def _add_numbering(self, numbering: Dict[str, Tuple[bytes, Optional[bytes]]]) -> Dict[str, str]:
+        if not numbering:
+            return {}
+        target = self.part.numbering_part.element
+        next_abstract = _max_int(
+            (a.get(_W_ABSTRACT_NUM_ID) for a in target.iterchildren(qn('w:abstractNum'))), -1) + 1
+        next_num = _max_int(n.get(_W_NUM_ID) for n in target.iterchildren(qn('w:num'))) + 1
+        first_num = target.find(qn('w:num'))
+        mapping = {}
+        abstract_mapping = {}
+        for num_id, (num_xml, abstract_xml) in sorted(numbering.items(), key=lambda item: _as_int(item[0])):
+            num = parse_xml(num_xml)
+            if abstract_xml is not None:
+                abstract = parse_xml(abstract_xml)
+                old_abstract_id = abstract.get(_W_ABSTRACT_NUM_ID)
+                if old_abstract_id not in abstract_mapping:
+                    abstract_mapping[old_abstract_id] = str(next_abstract)
+                    next_abstract += 1
+                    abstract.set(_W_ABSTRACT_NUM_ID, abstract_mapping[old_abstract_id])
+                    # w:abstractNum elements must precede every w:num
+                    if first_num is not None:
+                        first_num.addprevious(abstract)
+                    else:
+                        target.append(abstract)
+                ref = num.find(qn('w:abstractNumId'))
+                if ref is not None:
+                    ref.set(_W_VAL, abstract_mapping[old_abstract_id])
+            mapping[num_id] = str(next_num)
+            num.set(_W_NUM_ID, mapping[num_id])
+            next_num += 1
+            target.append(num)
+        return mapping
+
+    # -- notes ------------------------------------------------------------
+
+    def _notes_part(self, kind: str) -> XmlPart:
+        part = self._notes_parts.get(kind)
+        if part is not None:
+            return part
+        reltype, content_type, note_tag, _ = NOTE_KINDS[kind]
+        try:
+            existing = self.part.part_related_by(reltype)
+        except KeyError:
+            existing = None
+        if isinstance(existing, XmlPart):
+            part = existing
+        else:
+            if existing is not None:
+                element = parse_xml(existing.blob)
+                partname = existing.partname
+            else:
+                # Word expects the separator notes to exist
+                element = parse_xml(
+                    f'<w:{kind} xmlns:w="{W_NS}" xmlns:r="{R_NS}">'
+                    f'<{note_tag} w:type="separator" w:id="-1"><w:p><w:r><w:separator/></w:r></w:p></{note_tag}>'
+                    f'<{note_tag} w:type="continuationSeparator" w:id="0"><w:p><w:r><w:continuationSeparator/>'
+                    f'</w:r></w:p></{note_tag}></w:{kind}>')
+                partname = PackURI(f'/word/{kind}.xml')
+            part = XmlPart(partname, content_type, element, self.package)
+            if existing is not None:
+                # Re-point the relationship at the editable part
+                for rel in list(self.part.rels.values()):
+                    if rel.reltype == reltype:
+                        self.part.rels.pop(rel.rId)
+                        self.part.rels.add_relationship(reltype, part, rel.rId)
+            else:
+                self.part.relate_to(part, reltype)
+        self._notes_parts[kind] = part
+        return part
+
+    def _add_notes(self, body, notes) -> None:
+        for kind, (note_xml, rels) in notes.items():
+            _, _, note_tag, ref_tag = NOTE_KINDS[kind]
+            part = self._notes_part(kind)
+            next_id = _max_int(n.get(_W_ID) for n in part.element.iterchildren(qn(note_tag))) + 1
+            mapping = {}
+            for note_id, xml in note_xml.items():
+                note = parse_xml(xml)
+                self._remap_relationships(part, rels, note)
+                mapping[note_id] = str(next_id)
+                note.set(_W_ID, mapping[note_id])
+                next_id += 1
+                part.element.append(note)
+            for ref in body.iter(qn(ref_tag)):
+                if ref.get(_W_ID) in mapping:
+                    ref.set(_W_ID, mapping[ref.get(_W_ID)])
+
+    # -- body -------------------------------------------------------------
+
+    def _renumber(self, body) -> None:
+        for doc_pr in _DOC_PR(body):
+            doc_pr.set('id', str(self._next_doc_pr))
+            self._next_doc_pr += 1
+        bookmark_ids = {}
+        for bookmark in _BOOKMARKS(body):
+            old_id = bookmark.get(_W_ID)
+            if old_id not in bookmark_ids:
+                bookmark_ids[old_id] = str(self._next_bookmark)
+                self._next_bookmark += 1
+            bookmark.set(_W_ID, bookmark_ids[old_id])
+
+    def append(self, payload: SourcePayload, page_break: bool = False) -> int:
+        """
+        Append the body of a prepared source to the target document.
+
+        Args:
+            payload: Result of :func:`prepare_source`
+            page_break: Add a page break before the source content
+
+        Returns:
+            Number of body blocks appended
+        """
+        body = parse_xml(payload.body)
+        for element in _DROPPED(body):
+            element.getparent().remove(element)
+
+        self._remap_relationships(self.part, payload.rels, body)
+
+        added_styles = self._add_styles(payload.styles)
+        num_mapping = self._add_numbering(payload.numbering)
+        if num_mapping:
+            for element in [body] + added_styles:
+                for num_id in _NUM_IDS(element):
+                    if num_id.get(_W_VAL) in num_mapping:
+                        num_id.set(_W_VAL, num_mapping[num_id.get(_W_VAL)])
+
+        self._add_notes(body, payload.notes)
+        self._renumber(body)
+
+        if page_break:
+            self.doc.add_page_break()
+        count = 0
+        for child in list(body):
+            if self._sectPr is not None:
+                self._sectPr.addprevious(child)
+            else:
+                self.body.append(child)
+            count += 1
+        self.sources += 1
+        return count
+
+
+def merge_documents_into(doc, source_paths: List[str], add_page_breaks: bool = True,
+                         window: Optional[int] = None) -> int:
+    """
+    Append several documents to ``doc`` in order.
+
+    Sources are parsed and prepared in the process pool (see
+    :func:`~word_document_server.utils.concurrency.map_in_processes`), with at
+    most ``window`` payloads waiting, and appended here one at a time.
+
+    Args:
+        doc: Target python-docx Document object
+        source_paths: Paths of the source documents, in order
+        add_page_breaks: Add a page break between sources
+        window: Maximum number of prepared sources held at once
+
+    Returns:
+        Number of sources merged
+    """
+    merger = DocumentMerger(doc)
+    payloads = map_in_processes(prepare_source, source_paths, window)
+    for i, payload in enumerate(payloads):
+        add_bytes(read=os.path.getsize(payload.path))
+        merger.append(payload, page_break=add_page_breaks and i > 0)
+    return merger.sources
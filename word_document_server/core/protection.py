@@ -204,7 +204,7 @@ def verify_signature(doc_path: str) -> Tuple[bool, str]:
     Returns:
         Tuple of (is_valid, message)
     """
-    from docx import Document
+    from word_document_server.utils.document_cache import load_document
     
     base_path, _ = os.path.splitext(doc_path)
     metadata_path = f"{base_path}.protection"
@@ -228,7 +228,7 @@ def verify_signature(doc_path: str) -> Tuple[bool, str]:
             return False, "Invalid signature: missing content hash"
         
         # Calculate current content hash
-        doc = Document(doc_path)
+        doc = load_document(doc_path)
         text_content = "\n".join([p.text for p in doc.paragraphs])
         current_hash = hashlib.sha256(text_content.encode()).hexdigest()
         
@@ -3,106 +3,117 @@ Main entry point for the Word Document MCP Server.
 Acts as the central controller for the MCP server that handles Word document operations.
 """
 
+import importlib
 import os
 import sys
 from mcp.server.fastmcp import FastMCP
-from word_document_server.tools import (
-    document_tools,
-    content_tools,
-    format_tools,
-    protection_tools,
-    footnote_tools,
-    extended_document_tools,
-    template_tools,
-    header_tools,
-    chapter_tools,
-    code_tools,
-    book_tools,
-    navigation_tools,
-    caption_tools,
-    export_tools,
-    qa_tools,
-    build_tools,
-)
+from word_document_server.utils.document_cache import flush_all_documents
+from word_document_server.utils.concurrency import offload
+from word_document_server.utils.instrumentation import instrument
+from word_document_server.utils.lazy_tools import lazy_tool
 
 
 
 # Initialize FastMCP server
 mcp = FastMCP("word-document-server")
 
+# Tool modules are imported on first call unless WORD_MCP_EAGER_TOOLS is set
+EAGER_TOOLS = os.environ.get("WORD_MCP_EAGER_TOOLS", "").lower() in ("1", "true", "yes", "on")
+
+
+def _register(name):
+    """Register a tool, given as "module.function" under word_document_server.tools,
+    whose blocking work runs in the worker pool and whose calls are measured."""
+    module, func_name = name.rsplit(".", 1)
+    module = f"word_document_server.tools.{module}"
+    if EAGER_TOOLS:
+        func = getattr(importlib.import_module(module), func_name)
+    else:
+        func = lazy_tool(module, func_name)
+    mcp.tool()(instrument(offload(func)))
+
+
 def register_tools():
     """Register all tools with the MCP server."""
     # Document tools (create, copy, info, etc.)
-    mcp.tool()(document_tools.create_document)
-    mcp.tool()(document_tools.copy_document)
-    mcp.tool()(document_tools.get_document_info)
-    mcp.tool()(document_tools.get_document_text)
-    mcp.tool()(document_tools.get_document_outline)
-    mcp.tool()(document_tools.list_available_documents)
+    _register("document_tools.create_document")
+    _register("document_tools.copy_document")
+    _register("document_tools.get_document_info")
+    _register("document_tools.get_document_text")
+    _register("document_tools.get_document_outline")
+    _register("document_tools.get_document_chunks")
+    _register("document_tools.list_available_documents")
+    _register("document_tools.search_documents")
+    _register("document_tools.flush_document")
+    _register("document_tools.get_server_stats")
     
     # Content tools (paragraphs, headings, tables, etc.)
-    mcp.tool()(content_tools.add_paragraph)
-    mcp.tool()(content_tools.add_heading)
-    mcp.tool()(content_tools.add_picture)
-    mcp.tool()(content_tools.add_table)
-    mcp.tool()(content_tools.add_page_break)
-    mcp.tool()(content_tools.delete_paragraph)
-    mcp.tool()(content_tools.search_and_replace)
+    _register("content_tools.add_paragraph")
+    _register("content_tools.add_heading")
+    _register("content_tools.add_picture")
+    _register("content_tools.add_table")
+    _register("content_tools.add_page_break")
+    _register("content_tools.delete_paragraph")
+    _register("content_tools.search_and_replace")
+    _register("content_tools.search_and_replace_many")
+    
+    # Batch tools (many operations, one load and one save)
+    _register("batch_tools.apply_operations")
     
     # Format tools (styling, text formatting, etc.)
-    mcp.tool()(format_tools.create_custom_style)
-    mcp.tool()(format_tools.format_text)
-    mcp.tool()(format_tools.format_table)
+    _register("format_tools.create_custom_style")
+    _register("format_tools.format_text")
+    _register("format_tools.format_table")
     
     # Protection tools
-    mcp.tool()(protection_tools.protect_document)
-    mcp.tool()(protection_tools.unprotect_document)
+    _register("protection_tools.protect_document")
+    _register("protection_tools.unprotect_document")
     
     # Footnote tools
-    mcp.tool()(footnote_tools.add_footnote_to_document)
-    mcp.tool()(footnote_tools.add_endnote_to_document)
-    mcp.tool()(footnote_tools.convert_footnotes_to_endnotes_in_document)
-    mcp.tool()(footnote_tools.customize_footnote_style)
+    _register("footnote_tools.add_footnote_to_document")
+    _register("footnote_tools.add_endnote_to_document")
+    _register("footnote_tools.convert_footnotes_to_endnotes_in_document")
+    _register("footnote_tools.customize_footnote_style")
     
     # Extended document tools
-    mcp.tool()(extended_document_tools.get_paragraph_text_from_document)
-    mcp.tool()(extended_document_tools.find_text_in_document)
-    mcp.tool()(extended_document_tools.convert_to_pdf)
+    _register("extended_document_tools.get_paragraph_text_from_document")
+    _register("extended_document_tools.find_text_in_document")
+    _register("extended_document_tools.convert_to_pdf")
     
     # Template & layout tools (Phase 1)
-    mcp.tool()(template_tools.apply_template)
-    mcp.tool()(template_tools.set_page_size)
-    mcp.tool()(template_tools.add_section_break)
+    _register("template_tools.apply_template")
+    _register("template_tools.set_page_size")
+    _register("template_tools.add_section_break")
     # Header & footer tools (Phase 2)
-    mcp.tool()(header_tools.insert_header)
-    mcp.tool()(header_tools.insert_footer)
+    _register("header_tools.insert_header")
+    _register("header_tools.insert_footer")
     # Chapter tools (Phase 2)
-    mcp.tool()(chapter_tools.new_chapter)
+    _register("chapter_tools.new_chapter")
     # Code block tools (Phase 3)
-    mcp.tool()(code_tools.add_code_block)
+    _register("code_tools.add_code_block")
     # Front/Back matter tools (Phase 4)
-    mcp.tool()(book_tools.add_title_page)
-    mcp.tool()(book_tools.add_copyright_page)
-    mcp.tool()(book_tools.add_front_matter)
+    _register("book_tools.add_title_page")
+    _register("book_tools.add_copyright_page")
+    _register("book_tools.add_front_matter")
     # Navigation tools (Phase 4)
-    mcp.tool()(navigation_tools.insert_toc_placeholder)
+    _register("navigation_tools.insert_toc_placeholder")
     # Cross-reference tools (Phase 5)
-    mcp.tool()(navigation_tools.bookmark)
-    mcp.tool()(navigation_tools.insert_hyperlink)
+    _register("navigation_tools.bookmark")
+    _register("navigation_tools.insert_hyperlink")
     # Caption and list tools (Phase 5)
-    mcp.tool()(caption_tools.insert_caption)
-    mcp.tool()(caption_tools.generate_list_of_figures)
-    mcp.tool()(caption_tools.generate_list_of_tables)
+    _register("caption_tools.insert_caption")
+    _register("caption_tools.generate_list_of_figures")
+    _register("caption_tools.generate_list_of_tables")
     # Export tools (Phase 6)
-    mcp.tool()(export_tools.to_epub)
-    mcp.tool()(export_tools.to_pdf)
-    mcp.tool()(export_tools.set_core_properties)
+    _register("export_tools.to_epub")
+    _register("export_tools.to_pdf")
+    _register("export_tools.set_core_properties")
     # QA tools (Phase 7)
-    mcp.tool()(qa_tools.extract_text)
-    mcp.tool()(qa_tools.check_sentence_length)
-    mcp.tool()(qa_tools.check_passive_voice)
+    _register("qa_tools.extract_text")
+    _register("qa_tools.check_sentence_length")
+    _register("qa_tools.check_passive_voice")
     # Build orchestrator (Phase 7)
-    mcp.tool()(build_tools.build_book)
+    _register("build_tools.build_book")
 
 
 def run_server():
@@ -110,8 +121,11 @@ def run_server():
     # Register all tools
     register_tools()
     
-    # Run the server
-    mcp.run(transport='stdio')
+    # Run the server, writing any deferred edits before exiting
+    try:
+        mcp.run(transport='stdio')
+    finally:
+        flush_all_documents()
     return mcp
 
 if __name__ == "__main__":
@@ -3,35 +3,56 @@ MCP tool implementations for the Word Document Server.
 
 This package contains the MCP tool implementations that expose functionality
 to clients through the Model Context Protocol.
+
+Tool functions are re-exported lazily: ``from word_document_server.tools
+import add_paragraph`` imports content_tools (and python-docx) only at that
+point, so importing the package itself stays cheap.
 """
+import importlib
+
+_EXPORTS = {
+    # Document tools
+    "document_tools": (
+        "create_document", "get_document_info", "get_document_text",
+        "get_document_outline", "list_available_documents",
+        "copy_document", "merge_documents", "flush_document",
+        "search_documents", "get_document_chunks",
+    ),
+    # Content tools
+    "content_tools": (
+        "add_heading", "add_paragraph", "add_table", "add_picture",
+        "add_page_break", "add_table_of_contents", "delete_paragraph",
+        "search_and_replace", "search_and_replace_many",
+    ),
+    # Batch tools
+    "batch_tools": ("apply_operations",),
+    # Format tools
+    "format_tools": ("format_text", "create_custom_style", "format_table"),
+    # Protection tools
+    "protection_tools": (
+        "protect_document", "add_restricted_editing",
+        "add_digital_signature", "verify_document",
+    ),
+    # Footnote tools
+    "footnote_tools": (
+        "add_footnote_to_document", "add_endnote_to_document",
+        "convert_footnotes_to_endnotes_in_document", "customize_footnote_style",
+    ),
+}
+
+_ORIGINS = {name: module for module, names in _EXPORTS.items() for name in names}
+
+__all__ = sorted(_ORIGINS)
+
+
+def __getattr__(name):
+    module = _ORIGINS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f"{__name__}.{module}"), name)
+    globals()[name] = value
+    return value
+
 
-# Document tools
-from word_document_server.tools.document_tools import (
-    create_document, get_document_info, get_document_text, 
-    get_document_outline, list_available_documents, 
-    copy_document, merge_documents
-)
-
-# Content tools
-from word_document_server.tools.content_tools import (
-    add_heading, add_paragraph, add_table, add_picture,
-    add_page_break, add_table_of_contents, delete_paragraph,
-    search_and_replace
-)
-
-# Format tools
-from word_document_server.tools.format_tools import (
-    format_text, create_custom_style, format_table
-)
-
-# Protection tools
-from word_document_server.tools.protection_tools import (
-    protect_document, add_restricted_editing,
-    add_digital_signature, verify_document
-)
-
-# Footnote tools
-from word_document_server.tools.footnote_tools import (
-    add_footnote_to_document, add_endnote_to_document,
-    convert_footnotes_to_endnotes_in_document, customize_footnote_style
-)
+def __dir__():
+    return sorted(set(globals()) | set(_ORIGINS))
@@ -0,0 +1,225 @@
+"""
+Batch editing tools for Word Document Server.
+
+These tools apply many content and formatting operations to a document
+with a single load and a single save.
+"""
+import os
+import re
+import json
+from typing import List, Dict, Any, Tuple
+
+from word_document_server.utils.file_utils import check_file_writeable, ensure_docx_extension
+from word_document_server.utils.document_cache import load_document, save_document, invalidate_document
+from word_document_server.utils.document_utils import find_and_replace_text
+from word_document_server.utils.text_replace import replace_many
+from word_document_server.utils.placement import resolve_anchor, placed
+from word_document_server.tools.content_tools import (
+    validate_heading_level, validate_image,
+    insert_heading, insert_paragraph, insert_table, insert_picture
+)
+from word_document_server.tools.format_tools import apply_text_format
+
+
+def _op_paragraph(doc, op: Dict[str, Any]) -> Tuple[bool, str]:
+    style = op.get('style')
+    if insert_paragraph(doc, op.get('text', ''), style):
+        return True, "Paragraph added"
+    return True, f"Style '{style}' not found, paragraph added with default style"
+
+
+def _op_heading(doc, op: Dict[str, Any]) -> Tuple[bool, str]:
+    level, error_message = validate_heading_level(op.get('level', 1))
+    if level is None:
+        return False, error_message
+    text = op.get('text', '')
+    if insert_heading(doc, text, level):
+        return True, f"Heading '{text}' (level {level}) added"
+    return True, f"Heading '{text}' added with direct formatting (style not available)"
+
+
+def _op_table(doc, op: Dict[str, Any]) -> Tuple[bool, str]:
+    try:
+        rows = int(op['rows'])
+        cols = int(op['cols'])
+    except (KeyError, ValueError, TypeError):
+        return False, "Invalid parameter: rows and cols must be integers"
+    insert_table(doc, rows, cols, op.get('data'))
+    return True, f"Table ({rows}x{cols}) added"
+
+
+def _op_picture(doc, op: Dict[str, Any]) -> Tuple[bool, str]:
+    image_path = op.get('image_path')
+    if not image_path:
+        return False, "Missing parameter: image_path"
+    abs_image_path, _, error_message = validate_image(image_path)
+    if abs_image_path is None:
+        return False, error_message
+    insert_picture(doc, abs_image_path, op.get('width'))
+    return True, f"Picture {image_path} added"
+
+
+def _op_page_break(doc, op: Dict[str, Any]) -> Tuple[bool, str]:
+    doc.add_page_break()
+    return True, "Page break added"
+
+
+def _op_format(doc, op: Dict[str, Any]) -> Tuple[bool, str]:
+    if any(key not in op for key in ('paragraph_index', 'start_pos', 'end_pos')):
+        return False, "Missing parameter: paragraph_index, start_pos and end_pos are required"
+    return apply_text_format(
+        doc, op['paragraph_index'], op['start_pos'], op['end_pos'],
+        bold=op.get('bold'), italic=op.get('italic'), underline=op.get('underline'),
+        color=op.get('color'), font_size=op.get('font_size'), font_name=op.get('font_name')
+    )
+
+
+def _op_replace(doc, op: Dict[str, Any]) -> Tuple[bool, str]:
+    find_text = op.get('find_text')
+    if not find_text:
+        return False, "Missing parameter: find_text"
+    replace_text = op.get('replace_text', '')
+    try:
+        count = find_and_replace_text(doc, find_text, replace_text,
+                                      op.get('use_regex', False), op.get('match_case', True))
+    except re.error as e:
+        return False, f"Invalid regular expression: {str(e)}"
+    if count > 0:
+        return True, f"Replaced {count} occurrence(s) of '{find_text}' with '{replace_text}'."
+    return True, f"No occurrences of '{find_text}' found."
+
+
+def _op_replace_many(doc, op: Dict[str, Any]) -> Tuple[bool, str]:
+    replacements = op.get('replacements')
+    if not isinstance(replacements, dict) or not any(replacements):
+        return False, "Missing parameter: replacements"
+    counts = replace_many(doc, replacements)
+    if counts:
+        return True, f"Replaced {sum(counts.values())} occurrence(s) of {len(counts)} pattern(s)."
+    return True, "No occurrences of any pattern found."
+
+
+# Operation type -> handler. Each handler validates its own arguments and
+# returns (success, message) without saving the document.
+OPERATIONS = {
+    'paragraph': _op_paragraph,
+    'heading': _op_heading,
+    'table': _op_table,
+    'picture': _op_picture,
+    'page_break': _op_page_break,
+    'format': _op_format,
+    'replace': _op_replace,
+    'replace_many': _op_replace_many,
+}
+
+# Operations that add content and may be given a before/after anchor
+PLACEABLE_OPERATIONS = ('paragraph', 'heading', 'table', 'picture')
+
+
+def _reapply(filename: str, applied: List[Tuple[str, Dict[str, Any]]]):
+    """
+    Discard the changes made since the batch started and apply ``applied`` again.
+
+    Used when an operation raised part-way: its partial changes cannot be told
+    apart from those of the operations that succeeded before it.
+
+    Returns:
+        The document with only the successful operations applied
+    """
+    invalidate_document(filename)
+    doc = load_document(filename)
+    for op_type, op in applied:
+        success, message = _apply(doc, op_type, op)
+        if not success:
+            raise RuntimeError(f"{op_type} could not be applied again: {message}")
+    return doc
+
+
+def _apply(doc, op_type: str, op: Dict[str, Any]) -> Tuple[bool, str]:
+    handler = OPERATIONS[op_type]
+    if op_type not in PLACEABLE_OPERATIONS:
+        return handler(doc, op)
+    anchor, place_after, error_message = resolve_anchor(doc, op.get('before'), op.get('after'))
+    if error_message:
+        return False, error_message
+    with placed(doc, anchor, place_after):
+        return handler(doc, op)
+
+
+async def apply_operations(filename: str, ops: List[Dict[str, Any]], stop_on_error: bool = False) -> str:
+    """Apply a list of editing operations to a Word document with a single load and save.
+
+    Each operation is a dict with a "type" key and the same arguments as the
+    corresponding single-shot tool, for example:
+    [
+      {"type": "heading", "text": "Results", "level": 1},
+      {"type": "paragraph", "text": "Summary", "after": "Results"},
+      {"type": "paragraph", "text": "Body text", "style": "Normal"},
+      {"type": "table", "rows": 2, "cols": 2, "data": [["a", "b"], ["c", "d"]]},
+      {"type": "picture", "image_path": "chart.png", "width": 5},
+      {"type": "page_break"},
+      {"type": "format", "paragraph_index": 0, "start_pos": 0, "end_pos": 4, "bold": true},
+      {"type": "replace", "find_text": "foo", "replace_text": "bar"},
+      {"type": "replace_many", "replacements": {"colour": "color", "centre": "center"}}
+    ]
+
+    A "format" operation's paragraph_index may also be a paragraph ID, and
+    content operations accept "before"/"after" anchors like add_paragraph.
+    An operation that fails leaves no partial change behind; the operations
+    that succeeded are saved.
+
+    Args:
+        filename: Path to the Word document
+        ops: List of operations to apply in order
+        stop_on_error: If True, stop at the first failed operation
+    """
+    filename = ensure_docx_extension(filename)
+
+    if not os.path.exists(filename):
+        return f"Document {filename} does not exist"
+
+    if not isinstance(ops, list) or not ops:
+        return "Invalid parameter: ops must be a non-empty list of operations"
+
+    # Check if file is writeable
+    is_writeable, error_message = check_file_writeable(filename)
+    if not is_writeable:
+        return f"Cannot modify document: {error_message}. Consider creating a copy first."
+
+    try:
+        doc = load_document(filename)
+        results = []
+        applied = []
+
+        for i, op in enumerate(ops):
+            op_type = op.get('type') if isinstance(op, dict) else None
+            if op_type not in OPERATIONS:
+                success, message = False, f"Unknown operation type: {op_type}. Must be one of {list(OPERATIONS.keys())}"
+            else:
+                try:
+                    success, message = _apply(doc, op_type, op)
+                except Exception as e:
+                    success, message = False, f"Failed to apply {op_type}: {str(e)}"
+                    # The operation may have changed the document before failing
+                    doc = _reapply(filename, applied)
+
+            results.append({"index": i, "type": op_type, "success": success, "message": message})
+            if success:
+                applied.append((op_type, op))
+            elif stop_on_error:
+                break
+
+        if applied:
+            save_document(doc, filename)
+
+        return json.dumps({
+            "filename": filename,
+            "applied": len(applied),
+            "failed": len(results) - len(applied),
+            "skipped": len(ops) - len(results),
+            "saved": bool(applied),
+            "results": results
+        }, indent=2)
+    except Exception as e:
+        invalidate_document(filename)
+        return f"Failed to apply operations: {str(e)}"
@@ -10,6 +10,7 @@ from typing import Optional
 from docx import Document
 
 from word_document_server.utils.file_utils import ensure_docx_extension, check_file_writeable
+from word_document_server.utils.document_cache import load_document, save_document, invalidate_document
 
 
 async def add_title_page(
@@ -57,7 +58,7 @@ async def add_title_page(
             date_par = doc.add_paragraph()
             date_par.alignment = 1
             date_par.add_run(date)
-        doc.save(filename)
+        save_document(doc, filename)
         return f"Title page created: {filename}"
     except Exception as e:
         return f"Failed to create title page: {e}"
@@ -80,13 +81,14 @@ async def add_copyright_page(
     if not writeable:
         return f"Cannot modify document: {err}"
     try:
-        doc = Document(filename)
+        doc = load_document(filename)
         doc.add_page_break()
         par = doc.add_paragraph(text)
         par.alignment = 1  # center
-        doc.save(filename)
+        save_document(doc, filename)
         return f"Copyright page appended to {filename}"
     except Exception as e:
+        invalidate_document(filename)
         return f"Failed to append copyright page: {e}"
 
 
@@ -109,11 +111,12 @@ async def add_front_matter(
     if not writeable:
         return f"Cannot modify document: {err}"
     try:
-        doc = Document(filename)
+        doc = load_document(filename)
         doc.add_page_break()
         doc.add_heading(section, level=1)
         doc.add_paragraph(text)
-        doc.save(filename)
+        save_document(doc, filename)
         return f"Front matter '{section}' added to {filename}"
     except Exception as e:
+        invalidate_document(filename)
         return f"Failed to add front matter: {e}"
\ No newline at end of file
@@ -14,6 +14,7 @@ from word_document_server.tools.book_tools import add_title_page, add_front_matt
 from word_document_server.tools.navigation_tools import insert_toc_placeholder, bookmark, insert_hyperlink
 from word_document_server.tools.caption_tools import insert_caption, generate_list_of_figures, generate_list_of_tables
 from word_document_server.tools.export_tools import to_epub, to_pdf, set_core_properties
+from word_document_server.utils.locks import tool_locks
 
 
 async def build_book(
@@ -65,8 +66,10 @@ async def build_book(
                 result = f"Unknown tool: {tool}"
             else:
                 try:
-                    # Await the async tool call
-                    res = await func(**args)
+                    # Await the async tool call, holding the same document
+                    # locks as a direct call of the tool would
+                    with tool_locks(tool, func, (), args):
+                        res = await func(**args)
                     result = res
                 except Exception as e:
                     result = f"Error running {tool}: {e}"
@@ -7,11 +7,11 @@ List of Figures/Tables based on those captions.
 import os
 import json
 
-from docx import Document
 from docx.oxml import OxmlElement
 from docx.oxml.shared import qn
 
 from word_document_server.utils.file_utils import ensure_docx_extension, check_file_writeable
+from word_document_server.utils.document_cache import load_document, save_document, invalidate_document
 
 
 async def insert_caption(
@@ -35,7 +35,7 @@ async def insert_caption(
     if not writable:
         return f"Cannot modify document: {err}"
     try:
-        doc = Document(filename)
+        doc = load_document(filename)
         # Count existing captions of this type
         count = 0
         for p in doc.paragraphs:
@@ -48,9 +48,10 @@ async def insert_caption(
             par.style = style
         except Exception:
             pass
-        doc.save(filename)
+        save_document(doc, filename)
         return f"Caption added: {caption_text}"
     except Exception as e:
+        invalidate_document(filename)
         return f"Failed to insert caption: {e}"
 
 async def generate_list_of_figures(
@@ -70,7 +71,7 @@ async def generate_list_of_figures(
     if not writable:
         return f"Cannot modify document: {err}"
     try:
-        doc = Document(filename)
+        doc = load_document(filename)
         doc.add_page_break()
         h = doc.add_paragraph('List of Figures')
         try:
@@ -81,9 +82,10 @@ async def generate_list_of_figures(
         fld = OxmlElement('w:fldSimple')
         fld.set(qn('w:instr'), 'TOC \h \z \c "Figure"')
         p._p.append(fld)
-        doc.save(filename)
+        save_document(doc, filename)
         return f"List of Figures placeholder inserted into {filename}"
     except Exception as e:
+        invalidate_document(filename)
         return f"Failed to insert List of Figures: {e}"
 
 async def generate_list_of_tables(
@@ -103,7 +105,7 @@ async def generate_list_of_tables(
     if not writable:
         return f"Cannot modify document: {err}"
     try:
-        doc = Document(filename)
+        doc = load_document(filename)
         doc.add_page_break()
         h = doc.add_paragraph('List of Tables')
         try:
@@ -114,7 +116,8 @@ async def generate_list_of_tables(
         fld = OxmlElement('w:fldSimple')
         fld.set(qn('w:instr'), 'TOC \h \z \c "Table"')
         p._p.append(fld)
-        doc.save(filename)
+        save_document(doc, filename)
         return f"List of Tables placeholder inserted into {filename}"
     except Exception as e:
+        invalidate_document(filename)
         return f"Failed to insert List of Tables: {e}"
\ No newline at end of file
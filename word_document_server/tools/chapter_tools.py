@@ -5,10 +5,10 @@ These tools manage automated chapter numbering and insertion.
 """
 import os
 
-from docx import Document
 from docx.enum.section import WD_SECTION_START
 
 from word_document_server.utils.file_utils import ensure_docx_extension, check_file_writeable
+from word_document_server.utils.document_cache import load_document, save_document, invalidate_document
 
 
 async def new_chapter(
@@ -32,7 +32,7 @@ async def new_chapter(
     if not writeable:
         return f"Cannot modify document: {err}"
     try:
-        doc = Document(filename)
+        doc = load_document(filename)
         # Determine next chapter number by counting existing headings
         count = 0
         for para in doc.paragraphs:
@@ -54,7 +54,8 @@ async def new_chapter(
         except Exception:
             para = doc.add_paragraph(heading_text)
             para.style = style
-        doc.save(filename)
+        save_document(doc, filename)
         return f"{heading_text} added to {filename}"
     except Exception as e:
+        invalidate_document(filename)
         return f"Failed to add new chapter: {e}"
\ No newline at end of file
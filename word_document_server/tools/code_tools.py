@@ -5,14 +5,15 @@ These tools insert formatted code listings (monospaced font with shading)
 as tables into Word documents.
 """
 import os
-from typing import Optional
+from typing import Optional, Union
 
-from docx import Document
 from docx.enum.style import WD_STYLE_TYPE
 from docx.oxml import OxmlElement
 from docx.oxml.shared import qn
 
 from word_document_server.utils.file_utils import ensure_docx_extension, check_file_writeable
+from word_document_server.utils.document_cache import load_document, save_document, invalidate_document
+from word_document_server.utils.placement import resolve_anchor, placed
 
 
 async def add_code_block(
@@ -20,6 +21,8 @@ async def add_code_block(
     code_text: str,
     language: Optional[str] = None,
     style: str = 'CodeBlock',
+    before: Optional[Union[int, str]] = None,
+    after: Optional[Union[int, str]] = None,
 ) -> str:
     """Insert a code block into a Word document.
 
@@ -28,6 +31,8 @@ async def add_code_block(
         code_text: The code content (can include '\n' for multiple lines)
         language: Optional language name (ignored, placeholder)
         style: Paragraph style name to apply (will be created if missing)
+        before: Optional paragraph index, paragraph ID or heading text to insert before
+        after: Optional paragraph index, paragraph ID or heading text to insert after
     """
     filename = ensure_docx_extension(filename)
     if not os.path.exists(filename):
@@ -36,7 +41,10 @@ async def add_code_block(
     if not writeable:
         return f"Cannot modify document: {err}"
     try:
-        doc = Document(filename)
+        doc = load_document(filename)
+        anchor, place_after, err = resolve_anchor(doc, before, after)
+        if err:
+            return err
         # Ensure paragraph style exists
         styles = doc.styles
         if style not in styles:
@@ -46,7 +54,8 @@ async def add_code_block(
             font.name = 'Courier New'
             font.size = None
         # Insert a one-cell table for shading
-        table = doc.add_table(rows=1, cols=1)
+        with placed(doc, anchor, place_after):
+            table = doc.add_table(rows=1, cols=1)
         cell = table.cell(0, 0)
         # Apply shading to cell
         tc = cell._tc
@@ -66,7 +75,8 @@ async def add_code_block(
                 pass
             for run in paragraph.runs:
                 run.font.name = 'Courier New'
-        doc.save(filename)
+        save_document(doc, filename)
         return f"Code block added to {filename}"
     except Exception as e:
+        invalidate_document(filename)
         return f"Failed to add code block: {e}"
\ No newline at end of file
@@ -5,34 +5,199 @@ These tools add various types of content to Word documents,
 including headings, paragraphs, tables, images, and page breaks.
 """
 import os
-from typing import List, Optional, Dict, Any
-from docx import Document
+import re
+import json
+from typing import List, Optional, Dict, Any, Tuple, Union
 from docx.shared import Inches, Pt
 
 from word_document_server.utils.file_utils import check_file_writeable, ensure_docx_extension
+from word_document_server.utils.document_cache import load_document, save_document, invalidate_document
+from word_document_server.utils.block_index import get_block_index
+from word_document_server.utils.paragraph_ids import resolve_paragraph
+from word_document_server.utils.placement import resolve_anchor, placed, heading_style_levels, paragraph_style_id
+from word_document_server.utils.docx_stream import paragraph_text
 from word_document_server.utils.document_utils import find_and_replace_text
+from word_document_server.utils.text_replace import replace_many
 from word_document_server.core.styles import ensure_heading_style, ensure_table_style
 
 
-async def add_heading(filename: str, text: str, level: int = 1) -> str:
-    """Add a heading to a Word document.
+def validate_heading_level(level) -> Tuple[Optional[int], str]:
+    """
+    Validate and normalise a heading level.
     
     Args:
-        filename: Path to the Word document
-        text: Heading text
-        level: Heading level (1-9, where 1 is the highest level)
+        level: Requested heading level (int or numeric string)
+        
+    Returns:
+        Tuple of (level, error_message); level is None when invalid
     """
-    filename = ensure_docx_extension(filename)
-    
     # Ensure level is converted to integer
     try:
         level = int(level)
     except (ValueError, TypeError):
-        return "Invalid parameter: level must be an integer between 1 and 9"
+        return None, "Invalid parameter: level must be an integer between 1 and 9"
     
     # Validate level range
     if level < 1 or level > 9:
-        return f"Invalid heading level: {level}. Level must be between 1 and 9."
+        return None, f"Invalid heading level: {level}. Level must be between 1 and 9."
+    
+    return level, ""
+
+
+def validate_image(image_path: str) -> Tuple[Optional[str], float, str]:
+    """
+    Check that an image file exists and is not empty.
+    
+    Args:
+        image_path: Path to the image file
+        
+    Returns:
+        Tuple of (absolute_path, size_in_kb, error_message); absolute_path is None when invalid
+    """
+    abs_image_path = os.path.abspath(image_path)
+    
+    # Validate image existence with improved error message
+    if not os.path.exists(abs_image_path):
+        return None, 0, f"Image file not found: {abs_image_path}"
+    
+    # Check image file size
+    try:
+        image_size = os.path.getsize(abs_image_path) / 1024  # Size in KB
+        if image_size <= 0:
+            return None, 0, f"Image file appears to be empty: {abs_image_path} (0 KB)"
+    except Exception as size_error:
+        return None, 0, f"Error checking image file: {str(size_error)}"
+    
+    return abs_image_path, image_size, ""
+
+
+def insert_heading(doc, text: str, level: int) -> bool:
+    """
+    Add a heading to a document, falling back to direct formatting.
+    
+    Args:
+        doc: Document object
+        text: Heading text
+        level: Validated heading level (1-9)
+        
+    Returns:
+        True if a heading style was used, False if direct formatting was applied
+    """
+    # Ensure heading styles exist
+    ensure_heading_style(doc)
+    
+    # Try to add heading with style
+    try:
+        doc.add_heading(text, level=level)
+        return True
+    except Exception:
+        # If style-based approach fails, use direct formatting
+        paragraph = doc.add_paragraph(text)
+        paragraph.style = doc.styles['Normal']
+        run = paragraph.runs[0]
+        run.bold = True
+        # Adjust size based on heading level
+        if level == 1:
+            run.font.size = Pt(16)
+        elif level == 2:
+            run.font.size = Pt(14)
+        else:
+            run.font.size = Pt(12)
+        return False
+
+
+def insert_paragraph(doc, text: str, style: Optional[str] = None) -> bool:
+    """
+    Add a paragraph to a document.
+    
+    Args:
+        doc: Document object
+        text: Paragraph text
+        style: Optional paragraph style name
+        
+    Returns:
+        False if the requested style does not exist and Normal was used instead
+    """
+    paragraph = doc.add_paragraph(text)
+    
+    if style:
+        try:
+            paragraph.style = style
+        except KeyError:
+            # Style doesn't exist, use normal and report it
+            paragraph.style = doc.styles['Normal']
+            return False
+    
+    return True
+
+
+def insert_table(doc, rows: int, cols: int, data: Optional[List[List[str]]] = None):
+    """
+    Add a table to a document and fill it with data.
+    
+    Args:
+        doc: Document object
+        rows: Number of rows in the table
+        cols: Number of columns in the table
+        data: Optional 2D array of data to fill the table
+        
+    Returns:
+        The created table
+    """
+    table = doc.add_table(rows=rows, cols=cols)
+    
+    # Try to set the table style
+    try:
+        table.style = 'Table Grid'
+    except KeyError:
+        # If style doesn't exist, add basic borders
+        pass
+    
+    # Fill table with data if provided
+    if data:
+        for i, row_data in enumerate(data):
+            if i >= rows:
+                break
+            for j, cell_text in enumerate(row_data):
+                if j >= cols:
+                    break
+                table.cell(i, j).text = str(cell_text)
+    
+    return table
+
+
+def insert_picture(doc, abs_image_path: str, width: Optional[float] = None) -> None:
+    """
+    Add an image to a document.
+    
+    Args:
+        doc: Document object
+        abs_image_path: Absolute path to a validated image file
+        width: Optional width in inches (proportional scaling)
+    """
+    if width:
+        doc.add_picture(abs_image_path, width=Inches(width))
+    else:
+        doc.add_picture(abs_image_path)
+
+
+async def add_heading(filename: str, text: str, level: int = 1,
+                      before: Optional[Union[int, str]] = None,
+                      after: Optional[Union[int, str]] = None) -> str:
+    """Add a heading to a Word document, at the end or next to an existing paragraph.
+    
+    Args:
+        filename: Path to the Word document
+        text: Heading text
+        level: Heading level (1-9, where 1 is the highest level)
+        before: Optional paragraph index, paragraph ID or heading text to insert before
+        after: Optional paragraph index, paragraph ID or heading text to insert after
+    """
+    filename = ensure_docx_extension(filename)
+    
+    level, error_message = validate_heading_level(level)
+    if level is None:
+        return error_message
     
     if not os.path.exists(filename):
         return f"Document {filename} does not exist"
@@ -44,43 +209,32 @@ async def add_heading(filename: str, text: str, level: int = 1) -> str:
         return f"Cannot modify document: {error_message}. Consider creating a copy first or creating a new document."
     
     try:
-        doc = Document(filename)
-        
-        # Ensure heading styles exist
-        ensure_heading_style(doc)
-        
-        # Try to add heading with style
-        try:
-            heading = doc.add_heading(text, level=level)
-            doc.save(filename)
+        doc = load_document(filename)
+        anchor, place_after, error_message = resolve_anchor(doc, before, after)
+        if error_message:
+            return error_message
+        with placed(doc, anchor, place_after):
+            styled = insert_heading(doc, text, level)
+        save_document(doc, filename)
+        if styled:
             return f"Heading '{text}' (level {level}) added to {filename}"
-        except Exception as style_error:
-            # If style-based approach fails, use direct formatting
-            paragraph = doc.add_paragraph(text)
-            paragraph.style = doc.styles['Normal']
-            run = paragraph.runs[0]
-            run.bold = True
-            # Adjust size based on heading level
-            if level == 1:
-                run.font.size = Pt(16)
-            elif level == 2:
-                run.font.size = Pt(14)
-            else:
-                run.font.size = Pt(12)
-            
-            doc.save(filename)
-            return f"Heading '{text}' added to {filename} with direct formatting (style not available)"
+        return f"Heading '{text}' added to {filename} with direct formatting (style not available)"
     except Exception as e:
+        invalidate_document(filename)
         return f"Failed to add heading: {str(e)}"
 
 
-async def add_paragraph(filename: str, text: str, style: Optional[str] = None) -> str:
-    """Add a paragraph to a Word document.
+async def add_paragraph(filename: str, text: str, style: Optional[str] = None,
+                        before: Optional[Union[int, str]] = None,
+                        after: Optional[Union[int, str]] = None) -> str:
+    """Add a paragraph to a Word document, at the end or next to an existing paragraph.
     
     Args:
         filename: Path to the Word document
         text: Paragraph text
         style: Optional paragraph style name
+        before: Optional paragraph index, paragraph ID or heading text to insert before
+        after: Optional paragraph index, paragraph ID or heading text to insert after
     """
     filename = ensure_docx_extension(filename)
     
@@ -94,32 +248,33 @@ async def add_paragraph(filename: str, text: str, style: Optional[str] = None) -
         return f"Cannot modify document: {error_message}. Consider creating a copy first or creating a new document."
     
     try:
-        doc = Document(filename)
-        paragraph = doc.add_paragraph(text)
-        
-        if style:
-            try:
-                paragraph.style = style
-            except KeyError:
-                # Style doesn't exist, use normal and report it
-                paragraph.style = doc.styles['Normal']
-                doc.save(filename)
-                return f"Style '{style}' not found, paragraph added with default style to {filename}"
-        
-        doc.save(filename)
+        doc = load_document(filename)
+        anchor, place_after, error_message = resolve_anchor(doc, before, after)
+        if error_message:
+            return error_message
+        with placed(doc, anchor, place_after):
+            style_found = insert_paragraph(doc, text, style)
+        save_document(doc, filename)
+        if not style_found:
+            return f"Style '{style}' not found, paragraph added with default style to {filename}"
         return f"Paragraph added to {filename}"
     except Exception as e:
+        invalidate_document(filename)
         return f"Failed to add paragraph: {str(e)}"
 
 
-async def add_table(filename: str, rows: int, cols: int, data: Optional[List[List[str]]] = None) -> str:
-    """Add a table to a Word document.
+async def add_table(filename: str, rows: int, cols: int, data: Optional[List[List[str]]] = None,
+                    before: Optional[Union[int, str]] = None,
+                    after: Optional[Union[int, str]] = None) -> str:
+    """Add a table to a Word document, at the end or next to an existing paragraph.
     
     Args:
         filename: Path to the Word document
         rows: Number of rows in the table
         cols: Number of columns in the table
         data: Optional 2D array of data to fill the table
+        before: Optional paragraph index, paragraph ID or heading text to insert before
+        after: Optional paragraph index, paragraph ID or heading text to insert after
     """
     filename = ensure_docx_extension(filename)
     
@@ -133,39 +288,30 @@ async def add_table(filename: str, rows: int, cols: int, data: Optional[List[Lis
         return f"Cannot modify document: {error_message}. Consider creating a copy first or creating a new document."
     
     try:
-        doc = Document(filename)
-        table = doc.add_table(rows=rows, cols=cols)
-        
-        # Try to set the table style
-        try:
-            table.style = 'Table Grid'
-        except KeyError:
-            # If style doesn't exist, add basic borders
-            pass
-        
-        # Fill table with data if provided
-        if data:
-            for i, row_data in enumerate(data):
-                if i >= rows:
-                    break
-                for j, cell_text in enumerate(row_data):
-                    if j >= cols:
-                        break
-                    table.cell(i, j).text = str(cell_text)
-        
-        doc.save(filename)
+        doc = load_document(filename)
+        anchor, place_after, error_message = resolve_anchor(doc, before, after)
+        if error_message:
+            return error_message
+        with placed(doc, anchor, place_after):
+            insert_table(doc, rows, cols, data)
+        save_document(doc, filename)
         return f"Table ({rows}x{cols}) added to {filename}"
     except Exception as e:
+        invalidate_document(filename)
         return f"Failed to add table: {str(e)}"
 
 
-async def add_picture(filename: str, image_path: str, width: Optional[float] = None) -> str:
-    """Add an image to a Word document.
+async def add_picture(filename: str, image_path: str, width: Optional[float] = None,
+                      before: Optional[Union[int, str]] = None,
+                      after: Optional[Union[int, str]] = None) -> str:
+    """Add an image to a Word document, at the end or next to an existing paragraph.
     
     Args:
         filename: Path to the Word document
         image_path: Path to the image file
         width: Optional width in inches (proportional scaling)
+        before: Optional paragraph index, paragraph ID or heading text to insert before
+        after: Optional paragraph index, paragraph ID or heading text to insert after
     """
     filename = ensure_docx_extension(filename)
     
@@ -175,19 +321,9 @@ async def add_picture(filename: str, image_path: str, width: Optional[float] = N
     
     # Get absolute paths for better diagnostics
     abs_filename = os.path.abspath(filename)
-    abs_image_path = os.path.abspath(image_path)
-    
-    # Validate image existence with improved error message
-    if not os.path.exists(abs_image_path):
-        return f"Image file not found: {abs_image_path}"
-    
-    # Check image file size
-    try:
-        image_size = os.path.getsize(abs_image_path) / 1024  # Size in KB
-        if image_size <= 0:
-            return f"Image file appears to be empty: {abs_image_path} (0 KB)"
-    except Exception as size_error:
-        return f"Error checking image file: {str(size_error)}"
+    abs_image_path, image_size, error_message = validate_image(image_path)
+    if abs_image_path is None:
+        return error_message
     
     # Check if file is writeable
     is_writeable, error_message = check_file_writeable(abs_filename)
@@ -195,23 +331,26 @@ async def add_picture(filename: str, image_path: str, width: Optional[float] = N
         return f"Cannot modify document: {error_message}. Consider creating a copy first or creating a new document."
     
     try:
-        doc = Document(abs_filename)
+        doc = load_document(abs_filename)
+        anchor, place_after, error_message = resolve_anchor(doc, before, after)
+        if error_message:
+            return error_message
         # Additional diagnostic info
         diagnostic = f"Attempting to add image ({abs_image_path}, {image_size:.2f} KB) to document ({abs_filename})"
         
         try:
-            if width:
-                doc.add_picture(abs_image_path, width=Inches(width))
-            else:
-                doc.add_picture(abs_image_path)
-            doc.save(abs_filename)
+            with placed(doc, anchor, place_after):
+                insert_picture(doc, abs_image_path, width)
+            save_document(doc, abs_filename)
             return f"Picture {image_path} added to {filename}"
         except Exception as inner_error:
+            invalidate_document(abs_filename)
             # More detailed error for the specific operation
             error_type = type(inner_error).__name__
             error_msg = str(inner_error)
             return f"Failed to add picture: {error_type} - {error_msg or 'No error details available'}\nDiagnostic info: {diagnostic}"
     except Exception as outer_error:
+        invalidate_document(abs_filename)
         # Fallback error handling
         error_type = type(outer_error).__name__
         error_msg = str(outer_error)
@@ -235,17 +374,21 @@ async def add_page_break(filename: str) -> str:
         return f"Cannot modify document: {error_message}. Consider creating a copy first."
     
     try:
-        doc = Document(filename)
+        doc = load_document(filename)
         doc.add_page_break()
-        doc.save(filename)
+        save_document(doc, filename)
         return f"Page break added to {filename}."
     except Exception as e:
+        invalidate_document(filename)
         return f"Failed to add page break: {str(e)}"
 
 
 async def add_table_of_contents(filename: str, title: str = "Table of Contents", max_level: int = 3) -> str:
     """Add a table of contents to a Word document based on heading styles.
     
+    The table of contents is inserted at the top of the document, followed by
+    a page break; the rest of the document is left untouched.
+    
     Args:
         filename: Path to the Word document
         title: Optional title for the table of contents
@@ -265,79 +408,55 @@ async def add_table_of_contents(filename: str, title: str = "Table of Contents",
         # Ensure max_level is within valid range
         max_level = max(1, min(max_level, 9))
         
-        doc = Document(filename)
+        doc = load_document(filename)
         
-        # Collect headings and their positions
+        # Collect headings and their positions; only the style of each paragraph
+        # is inspected, and text is extracted for headings alone
+        levels = heading_style_levels(doc)
+        block_index = get_block_index(doc)
         headings = []
-        for i, paragraph in enumerate(doc.paragraphs):
-            # Check if paragraph style is a heading
-            if paragraph.style and paragraph.style.name.startswith('Heading '):
-                try:
-                    # Extract heading level from style name
-                    level = int(paragraph.style.name.split(' ')[1])
-                    if level <= max_level:
-                        headings.append({
-                            'level': level,
-                            'text': paragraph.text,
-                            'position': i
-                        })
-                except (ValueError, IndexError):
-                    # Skip if heading level can't be determined
-                    pass
+        for i, p in enumerate(block_index.paragraphs):
+            level = levels.get(paragraph_style_id(p))
+            if level and level <= max_level:
+                headings.append({
+                    'level': level,
+                    'text': paragraph_text(p),
+                    'position': i
+                })
         
         if not headings:
             return f"No headings found in document {filename}. Table of contents not created."
         
-        # Create a new document with the TOC
-        toc_doc = Document()
-        
-        # Add title
-        if title:
-            toc_doc.add_heading(title, level=1)
-        
-        # Add TOC entries
-        for heading in headings:
-            # Indent based on level (using tab characters)
-            indent = '    ' * (heading['level'] - 1)
-            toc_doc.add_paragraph(f"{indent}{heading['text']}")
-        
-        # Add page break
-        toc_doc.add_page_break()
-        
-        # Get content from original document
-        for paragraph in doc.paragraphs:
-            p = toc_doc.add_paragraph(paragraph.text)
-            # Copy style if possible
-            try:
-                if paragraph.style:
-                    p.style = paragraph.style.name
-            except:
-                pass
-        
-        # Copy tables
-        for table in doc.tables:
-            # Create a new table with the same dimensions
-            new_table = toc_doc.add_table(rows=len(table.rows), cols=len(table.columns))
-            # Copy cell contents
-            for i, row in enumerate(table.rows):
-                for j, cell in enumerate(row.cells):
-                    for paragraph in cell.paragraphs:
-                        new_table.cell(i, j).text = paragraph.text
+        # Build the TOC at the end of the body, then move it to the top
+        first_block = block_index.blocks[0]
+        with placed(doc, first_block):
+            # Add title
+            if title:
+                doc.add_heading(title, level=1)
+            
+            # Add TOC entries
+            for heading in headings:
+                # Indent based on level (using tab characters)
+                indent = '    ' * (heading['level'] - 1)
+                doc.add_paragraph(f"{indent}{heading['text']}")
+            
+            # Add page break
+            doc.add_page_break()
         
-        # Save the new document with TOC
-        toc_doc.save(filename)
+        save_document(doc, filename)
         
         return f"Table of contents with {len(headings)} entries added to {filename}"
     except Exception as e:
+        invalidate_document(filename)
         return f"Failed to add table of contents: {str(e)}"
 
 
-async def delete_paragraph(filename: str, paragraph_index: int) -> str:
+async def delete_paragraph(filename: str, paragraph_index: Union[int, str]) -> str:
     """Delete a paragraph from a document.
     
     Args:
         filename: Path to the Word document
-        paragraph_index: Index of the paragraph to delete (0-based)
+        paragraph_index: Index of the paragraph to delete (0-based) or its paragraph ID (8 hex digits)
     """
     filename = ensure_docx_extension(filename)
     
@@ -350,52 +469,108 @@ async def delete_paragraph(filename: str, paragraph_index: int) -> str:
         return f"Cannot modify document: {error_message}. Consider creating a copy first."
     
     try:
-        doc = Document(filename)
+        doc = load_document(filename)
         
-        # Validate paragraph index
-        if paragraph_index < 0 or paragraph_index >= len(doc.paragraphs):
-            return f"Invalid paragraph index. Document has {len(doc.paragraphs)} paragraphs (0-{len(doc.paragraphs)-1})."
+        # Find the paragraph by index or ID
+        paragraph, error = resolve_paragraph(doc, paragraph_index)
+        if paragraph is None:
+            return error
         
-        # Delete the paragraph (by removing its content and setting it empty)
-        # Note: python-docx doesn't support true paragraph deletion, this is a workaround
-        paragraph = doc.paragraphs[paragraph_index]
-        p = paragraph._p
-        p.getparent().remove(p)
+        # Delete the paragraph element; python-docx has no API for this, so remove
+        # it from the body directly and keep the block index in step
+        get_block_index(doc).remove(paragraph._p)
         
-        doc.save(filename)
-        return f"Paragraph at index {paragraph_index} deleted successfully."
+        save_document(doc, filename)
+        return f"Paragraph {paragraph_index} deleted successfully."
     except Exception as e:
+        invalidate_document(filename)
         return f"Failed to delete paragraph: {str(e)}"
 
 
-async def search_and_replace(filename: str, find_text: str, replace_text: str) -> str:
+async def search_and_replace(filename: str, find_text: str, replace_text: str,
+                             use_regex: bool = False, match_case: bool = True) -> str:
     """Search for text and replace all occurrences.
     
+    Matches may span differently formatted runs and are found in the body,
+    tables, headers and footers. The replacement takes the formatting of the
+    text where the match starts.
+    
     Args:
         filename: Path to the Word document
-        find_text: Text to search for
-        replace_text: Text to replace with
+        find_text: Text to search for, or a regular expression if use_regex is True
+        replace_text: Text to replace with; with use_regex, \\1 or \\g<name> insert groups
+        use_regex: Treat find_text as a Python regular expression, matched within each paragraph
+        match_case: Whether to match case exactly
     """
     filename = ensure_docx_extension(filename)
     
     if not os.path.exists(filename):
         return f"Document {filename} does not exist"
     
+    if not find_text:
+        return "Invalid parameter: find_text must not be empty"
+    
     # Check if file is writeable
     is_writeable, error_message = check_file_writeable(filename)
     if not is_writeable:
         return f"Cannot modify document: {error_message}. Consider creating a copy first."
     
     try:
-        doc = Document(filename)
+        doc = load_document(filename)
         
         # Perform find and replace
-        count = find_and_replace_text(doc, find_text, replace_text)
+        count = find_and_replace_text(doc, find_text, replace_text, use_regex, match_case)
         
         if count > 0:
-            doc.save(filename)
+            save_document(doc, filename)
             return f"Replaced {count} occurrence(s) of '{find_text}' with '{replace_text}'."
         else:
             return f"No occurrences of '{find_text}' found."
+    except re.error as e:
+        return f"Invalid regular expression: {str(e)}"
+    except Exception as e:
+        invalidate_document(filename)
+        return f"Failed to search and replace: {str(e)}"
+
+
+async def search_and_replace_many(filename: str, replacements: Dict[str, str]) -> str:
+    """Replace many different texts at once, with a single load and save.
+    
+    All patterns are matched in one pass over the document, so this is much
+    faster than calling search_and_replace for each pair. Replacement text is
+    never matched again by another pattern; where patterns overlap, the
+    longest match starting earliest wins.
+    
+    Args:
+        filename: Path to the Word document
+        replacements: Mapping of text to search for to replacement text
+    """
+    filename = ensure_docx_extension(filename)
+    
+    if not os.path.exists(filename):
+        return f"Document {filename} does not exist"
+    
+    if not isinstance(replacements, dict) or not any(replacements):
+        return "Invalid parameter: replacements must be a non-empty mapping of text to find to replacement text"
+    if not all(isinstance(key, str) and isinstance(value, str) for key, value in replacements.items()):
+        return "Invalid parameter: replacements keys and values must be strings"
+    
+    # Check if file is writeable
+    is_writeable, error_message = check_file_writeable(filename)
+    if not is_writeable:
+        return f"Cannot modify document: {error_message}. Consider creating a copy first."
+    
+    try:
+        doc = load_document(filename)
+        
+        counts = replace_many(doc, replacements)
+        
+        if counts:
+            save_document(doc, filename)
+            return (f"Replaced {sum(counts.values())} occurrence(s) of {len(counts)} of "
+                    f"{len(replacements)} pattern(s): " + json.dumps(counts))
+        else:
+            return "No occurrences of any pattern found."
     except Exception as e:
+        invalidate_document(filename)
         return f"Failed to search and replace: {str(e)}"
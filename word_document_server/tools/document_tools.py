@@ -7,6 +7,15 @@ from typing import Dict, List, Optional, Any
 from docx import Document
 
 from word_document_server.utils.file_utils import check_file_writeable, ensure_docx_extension, create_document_copy
+from word_document_server.utils.document_cache import load_document, save_document, invalidate_document, flush_cached_document, dirty_paths, get_cache_stats
+from word_document_server.utils.concurrency import get_concurrency_settings
+from word_document_server.utils.instrumentation import get_tool_stats, reset_tool_stats
+from word_document_server.utils.locks import document_lock
+from word_document_server.utils import search_index
+from word_document_server.utils.document_listing import list_documents
+from word_document_server.utils.docx_stream import iter_paragraphs
+from word_document_server.utils.chunking import get_chunks
+from word_document_server.utils.pagination import page_request, text_page
 from word_document_server.utils.document_utils import get_document_properties, extract_document_text, get_document_structure
 from word_document_server.core.styles import ensure_heading_style, ensure_table_style
 
@@ -40,18 +49,24 @@ async def create_document(filename: str, title: Optional[str] = None, author: Op
         ensure_table_style(doc)
         
         # Save the document
-        doc.save(filename)
+        save_document(doc, filename)
         
         return f"Document {filename} created successfully"
     except Exception as e:
         return f"Failed to create document: {str(e)}"
 
 
-async def get_document_info(filename: str) -> str:
+async def get_document_info(filename: str, include_counts: bool = True) -> str:
     """Get information about a Word document.
     
+    Metadata is read without parsing the document body. page_count is the
+    statistic saved in the file by the application that last wrote it, and
+    is null when there is none.
+    
     Args:
         filename: Path to the Word document
+        include_counts: Count words, paragraphs and tables in the document body;
+            if False, word_count is the stored statistic and the other counts are null
     """
     filename = ensure_docx_extension(filename)
     
@@ -59,59 +74,195 @@ async def get_document_info(filename: str) -> str:
         return f"Document {filename} does not exist"
     
     try:
-        properties = get_document_properties(filename)
+        properties = get_document_properties(filename, include_counts)
         return json.dumps(properties, indent=2)
     except Exception as e:
         return f"Failed to get document info: {str(e)}"
 
 
-async def get_document_text(filename: str) -> str:
+async def get_document_text(filename: str, offset: int = 0, limit: Optional[int] = None,
+                            unit: str = "paragraphs", cursor: Optional[str] = None) -> str:
     """Extract all text from a Word document.
     
+    Large documents can be read a page at a time: pass limit (and optionally
+    offset) to get a JSON object with the text of that slice and a
+    next_cursor for the following page. Reading stops once the slice is
+    complete.
+    
     Args:
         filename: Path to the Word document
+        offset: First paragraph (or character) to return
+        limit: Maximum number of paragraphs (or characters) to return
+        unit: "paragraphs" or "characters", the unit of offset and limit
+        cursor: The next_cursor value from the previous page, used instead of offset and unit
     """
     filename = ensure_docx_extension(filename)
     
-    return extract_document_text(filename)
+    if not offset and limit is None and not cursor:
+        return extract_document_text(filename)
+    
+    if not os.path.exists(filename):
+        return f"Document {filename} does not exist"
+    
+    try:
+        unit, offset, limit = page_request("get_document_text", filename, offset, limit, unit, cursor)
+    except ValueError as e:
+        return f"Invalid parameter: {str(e)}"
+    
+    try:
+        page = text_page("get_document_text", filename,
+                         lambda: (paragraph.text for paragraph in iter_paragraphs(filename)),
+                         unit, offset, limit)
+        return json.dumps(page, indent=2)
+    except Exception as e:
+        return f"Failed to extract text: {str(e)}"
 
 
-async def get_document_outline(filename: str) -> str:
+async def get_document_outline(filename: str, offset: int = 0, limit: Optional[int] = None,
+                               cursor: Optional[str] = None) -> str:
     """Get the structure of a Word document.
     
+    With limit, only body paragraphs offset to offset + limit - 1 are listed,
+    with the tables among them, and next_cursor is included for the
+    following page.
+    
     Args:
         filename: Path to the Word document
+        offset: Index of the first paragraph to list
+        limit: Maximum number of paragraphs to list
+        cursor: The next_cursor value from the previous page, used instead of offset
     """
     filename = ensure_docx_extension(filename)
     
-    structure = get_document_structure(filename)
+    structure = get_document_structure(filename, offset, limit, cursor)
     return json.dumps(structure, indent=2)
 
 
-async def list_available_documents(directory: str = ".") -> str:
-    """List all .docx files in the specified directory.
+async def get_document_chunks(filename: str, max_tokens: int = 512) -> str:
+    """Split a Word document into chunks of at most max_tokens tokens for LLM use.
+    
+    Chunks follow the heading structure: a section that fits the budget is
+    kept whole, and larger sections are split between their paragraphs and
+    subsections. Each chunk has a stable ID derived from its content, its
+    heading path and an approximate token count. Results are cached until the
+    document changes.
+    
+    Args:
+        filename: Path to the Word document
+        max_tokens: Maximum approximate number of tokens per chunk
+    """
+    filename = ensure_docx_extension(filename)
+    
+    if not os.path.exists(filename):
+        return f"Document {filename} does not exist"
+    
+    try:
+        max_tokens = int(max_tokens)
+    except (ValueError, TypeError):
+        return "Invalid parameter: max_tokens must be an integer"
+    if max_tokens < 1:
+        return "Invalid parameter: max_tokens must be at least 1"
+    
+    try:
+        result = get_chunks(filename, max_tokens)
+        return json.dumps({
+            "filename": filename,
+            "sha1": result["sha1"],
+            "max_tokens": max_tokens,
+            "cached": result["cached"],
+            "count": len(result["chunks"]),
+            "chunks": result["chunks"]
+        }, indent=2)
+    except Exception as e:
+        return f"Failed to chunk document: {str(e)}"
+
+
+async def list_available_documents(directory: str = ".", pattern: str = "*.docx", recursive: bool = False,
+                                   sort_by: str = "name", descending: bool = False, limit: int = 100,
+                                   cursor: Optional[str] = None) -> str:
+    """List the Word documents in a directory, one page at a time.
+    
+    Each document is reported with its size, modification time, title, author
+    and stored paragraph count. Metadata is cached between calls and only
+    re-read from files that have changed.
     
     Args:
         directory: Directory to search for Word documents
+        pattern: Glob pattern for file names, matched ignoring case, e.g. "report*.docx"; a pattern containing "/" is matched against the path relative to directory
+        recursive: Whether to include subdirectories
+        sort_by: One of "name", "path", "size", "modified", "title" or "author"
+        descending: Sort in descending order
+        limit: Maximum number of documents to return
+        cursor: The next_cursor value from the previous page, to continue the listing
     """
+    if not os.path.isdir(directory):
+        return f"Directory {directory} does not exist"
+    
     try:
-        if not os.path.exists(directory):
-            return f"Directory {directory} does not exist"
-        
-        docx_files = [f for f in os.listdir(directory) if f.endswith('.docx')]
-        
-        if not docx_files:
-            return f"No Word documents found in {directory}"
-        
-        result = f"Found {len(docx_files)} Word documents in {directory}:\n"
-        for file in docx_files:
-            file_path = os.path.join(directory, file)
-            size = os.path.getsize(file_path) / 1024  # KB
-            result += f"- {file} ({size:.2f} KB)\n"
-        
-        return result
+        limit = int(limit)
+    except (ValueError, TypeError):
+        return "Invalid parameter: limit must be an integer"
+    if limit < 1:
+        return "Invalid parameter: limit must be at least 1"
+    
+    try:
+        listing = list_documents(directory, pattern or "*.docx", recursive, sort_by, descending, limit, cursor)
+    except ValueError as e:
+        return f"Invalid parameter: {str(e)}"
     except Exception as e:
         return f"Failed to list documents: {str(e)}"
+    
+    return json.dumps({
+        "directory": os.path.abspath(directory),
+        "total": listing["total"],
+        "count": len(listing["documents"]),
+        "documents": listing["documents"],
+        "next_cursor": listing["next_cursor"]
+    }, indent=2)
+
+
+async def search_documents(directory: str, query: str, max_results: int = 20, recursive: bool = False) -> str:
+    """Search the text of every Word document in a directory.
+    
+    Uses a persistent full-text index that is updated incrementally, so only
+    new or changed documents are read. Query words must all occur in a
+    paragraph; "quoted phrases", OR, NOT, NEAR and prefix* are supported.
+    Files that cannot be read are skipped and counted as "failed".
+    
+    Args:
+        directory: Directory containing the Word documents
+        query: Words or phrase to search for
+        max_results: Maximum number of matching paragraphs to return, best matches first
+        recursive: Whether to include subdirectories
+    """
+    if not os.path.isdir(directory):
+        return f"Directory {directory} does not exist"
+    
+    if not query or not query.strip():
+        return "Invalid parameter: query must not be empty"
+    
+    try:
+        max_results = int(max_results)
+    except (ValueError, TypeError):
+        return "Invalid parameter: max_results must be an integer"
+    if max_results < 1:
+        return "Invalid parameter: max_results must be at least 1"
+    
+    try:
+        connection = search_index.connect()
+        try:
+            index = search_index.update_index(connection, directory, recursive)
+            results = search_index.search(connection, directory, query, max_results, recursive)
+        finally:
+            connection.close()
+        return json.dumps({
+            "directory": os.path.abspath(directory),
+            "query": query,
+            "index": index,
+            "results": results
+        }, indent=2)
+    except Exception as e:
+        return f"Failed to search documents: {str(e)}"
 
 
 async def copy_document(source_filename: str, destination_filename: Optional[str] = None) -> str:
@@ -122,6 +273,7 @@ async def copy_document(source_filename: str, destination_filename: Optional[str
         destination_filename: Optional path for the copy. If not provided, a default name will be generated.
     """
     source_filename = ensure_docx_extension(source_filename)
+    flush_cached_document(source_filename)
     
     if destination_filename:
         destination_filename = ensure_docx_extension(destination_filename)
@@ -136,12 +288,16 @@ async def copy_document(source_filename: str, destination_filename: Optional[str
 async def merge_documents(target_filename: str, source_filenames: List[str], add_page_breaks: bool = True) -> str:
     """Merge multiple Word documents into a single document.
     
+    Body content is copied at the XML level, so images, numbering, footnotes,
+    endnotes, run formatting and styles are kept. Sources are parsed one at a
+    time.
+    
     Args:
         target_filename: Path to the target document (will be created or overwritten)
         source_filenames: List of paths to source documents to merge
         add_page_breaks: If True, add page breaks between documents
     """
-    from word_document_server.core.tables import copy_table
+    from word_document_server.core.merge import merge_documents_into
     
     target_filename = ensure_docx_extension(target_filename)
     
@@ -161,49 +317,66 @@ async def merge_documents(target_filename: str, source_filenames: List[str], add
         return f"Cannot merge documents. The following source files do not exist: {', '.join(missing_files)}"
     
     try:
+        source_paths = [ensure_docx_extension(filename) for filename in source_filenames]
+        # Sources are read from disk; write any pending edits first
+        for path in source_paths:
+            flush_cached_document(path)
+        
         # Create a new document for the merged result
         target_doc = Document()
-        
-        # Process each source document
-        for i, filename in enumerate(source_filenames):
-            doc_filename = ensure_docx_extension(filename)
-            source_doc = Document(doc_filename)
-            
-            # Add page break between documents (except before the first one)
-            if add_page_breaks and i > 0:
-                target_doc.add_page_break()
-            
-            # Copy all paragraphs
-            for paragraph in source_doc.paragraphs:
-                # Create a new paragraph with the same text and style
-                new_paragraph = target_doc.add_paragraph(paragraph.text)
-                new_paragraph.style = target_doc.styles['Normal']  # Default style
-                
-                # Try to match the style if possible
-                try:
-                    if paragraph.style and paragraph.style.name in target_doc.styles:
-                        new_paragraph.style = target_doc.styles[paragraph.style.name]
-                except:
-                    pass
-                
-                # Copy run formatting
-                for i, run in enumerate(paragraph.runs):
-                    if i < len(new_paragraph.runs):
-                        new_run = new_paragraph.runs[i]
-                        # Copy basic formatting
-                        new_run.bold = run.bold
-                        new_run.italic = run.italic
-                        new_run.underline = run.underline
-                        # Font size if specified
-                        if run.font.size:
-                            new_run.font.size = run.font.size
-            
-            # Copy all tables
-            for table in source_doc.tables:
-                copy_table(table, target_doc)
+        merge_documents_into(target_doc, source_paths, add_page_breaks)
         
         # Save the merged document
-        target_doc.save(target_filename)
+        save_document(target_doc, target_filename)
         return f"Successfully merged {len(source_filenames)} documents into {target_filename}"
     except Exception as e:
+        invalidate_document(target_filename)
         return f"Failed to merge documents: {str(e)}"
+
+
+async def flush_document(filename: Optional[str] = None) -> str:
+    """Write pending deferred edits to disk.
+
+    Only relevant when write-behind saving is enabled (WORD_MCP_DEFERRED_SAVE=1).
+    
+    Args:
+        filename: Optional path to the Word document. If not provided, all documents
+                  with pending edits are written.
+    """
+    try:
+        if filename:
+            filename = ensure_docx_extension(filename)
+            if flush_cached_document(filename):
+                return f"Pending edits written to {filename}"
+            return f"No pending edits for {filename}"
+        
+        count = 0
+        for path in dirty_paths():
+            # Wait for in-flight edits so that only complete changes are written
+            with document_lock(path):
+                if flush_cached_document(path):
+                    count += 1
+        return f"Pending edits written for {count} document(s)"
+    except Exception as e:
+        return f"Failed to flush document: {str(e)}"
+
+
+async def get_server_stats(reset: bool = False) -> str:
+    """Get per-tool call statistics, document cache statistics and concurrency settings.
+
+    For each tool this reports the number of calls, a wall-time histogram with
+    p50/p99, histograms of time spent parsing, saving, in external processes and
+    waiting for document locks, bytes read and written, and response sizes.
+    
+    Args:
+        reset: If True, clear the per-tool statistics after reporting them
+    """
+    try:
+        stats = get_tool_stats()
+        stats["cache"] = get_cache_stats()
+        stats["concurrency"] = get_concurrency_settings()
+        if reset:
+            reset_tool_stats()
+        return json.dumps(stats, indent=2)
+    except Exception as e:
+        return f"Failed to get server stats: {str(e)}"
@@ -8,9 +8,11 @@ import shutil
 import subprocess
 from typing import Optional, List, Dict
 
-from docx import Document
 
 from word_document_server.utils.file_utils import ensure_docx_extension, check_file_writeable
+from word_document_server.utils.document_cache import invalidate_document, flush_cached_document
+from word_document_server.utils.instrumentation import timed, add_bytes
+from word_document_server.utils.doc_properties import write_core_properties
 
 
 async def to_epub(
@@ -41,6 +43,8 @@ async def to_epub(
     # Check Pandoc availability
     if not shutil.which('pandoc'):
         return "Pandoc is not installed or not in PATH."
+    # Pandoc reads the file from disk, so write pending edits first
+    flush_cached_document(filename)
     # Build command
     cmd = ['pandoc', filename, '-o', output_filename]
     if toc:
@@ -49,7 +53,8 @@ async def to_epub(
         for key, value in metadata.items():
             cmd.extend(['--metadata', f'{key}={value}'])
     try:
-        subprocess.run(cmd, check=True, capture_output=True)
+        with timed("subprocess"):
+            subprocess.run(cmd, check=True, capture_output=True)
         return f"EPUB created: {output_filename}"
     except subprocess.CalledProcessError as e:
         return f"Failed to create EPUB: {e.stderr.decode().strip()}"
@@ -83,10 +88,13 @@ async def to_pdf(
     # Check Pandoc availability
     if not shutil.which('pandoc'):
         return "Pandoc is not installed or not in PATH."
+    # Pandoc reads the file from disk, so write pending edits first
+    flush_cached_document(filename)
     # Build command
     cmd = ['pandoc', filename, '-o', output_filename, '--pdf-engine', pdf_engine]
     try:
-        subprocess.run(cmd, check=True, capture_output=True)
+        with timed("subprocess"):
+            subprocess.run(cmd, check=True, capture_output=True)
         return f"PDF created: {output_filename}"
     except subprocess.CalledProcessError as e:
         return f"Failed to create PDF: {e.stderr.decode().strip()}"
@@ -103,6 +111,9 @@ async def set_core_properties(
 ) -> str:
     """Set core document properties (metadata) on a .docx file.
 
+    Only docProps/core.xml is rewritten; the document body is neither parsed
+    nor re-saved.
+
     Args:
         filename: Path to the .docx file
         title: Document title
@@ -117,17 +128,18 @@ async def set_core_properties(
     if not writable:
         return f"Cannot modify document: {err}"
     try:
-        doc = Document(filename)
-        props = doc.core_properties
-        if title is not None:
-            props.title = title
-        if author is not None:
-            props.author = author
-        if subject is not None:
-            props.subject = subject
-        if keywords is not None:
-            props.keywords = ', '.join(keywords)
-        doc.save(filename)
+        # Write out pending edits first; the cached copy is stale afterwards
+        flush_cached_document(filename)
+        with timed("save"):
+            write_core_properties(filename, {
+                'title': title,
+                'author': author,
+                'subject': subject,
+                'keywords': ', '.join(keywords) if keywords is not None else None,
+            })
+        add_bytes(written=os.path.getsize(filename))
+        invalidate_document(filename)
         return f"Metadata updated on {filename}"
     except Exception as e:
-        return f"Failed to set core properties: {e}"
\ No newline at end of file
+        invalidate_document(filename)
+        return f"Failed to set core properties: {e}"
@@ -13,24 +13,22 @@ from docx import Document
 
 from word_document_server.utils.file_utils import check_file_writeable, ensure_docx_extension
 from word_document_server.utils.extended_document_utils import get_paragraph_text, find_text
+from word_document_server.utils.document_cache import flush_cached_document
+from word_document_server.utils.instrumentation import timed
 
 
-async def get_paragraph_text_from_document(filename: str, paragraph_index: int) -> str:
+async def get_paragraph_text_from_document(filename: str, paragraph_index: Union[int, str]) -> str:
     """Get text from a specific paragraph in a Word document.
     
     Args:
         filename: Path to the Word document
-        paragraph_index: Index of the paragraph to retrieve (0-based)
+        paragraph_index: Index of the paragraph to retrieve (0-based) or its paragraph ID (8 hex digits)
     """
     filename = ensure_docx_extension(filename)
     
     if not os.path.exists(filename):
         return f"Document {filename} does not exist"
-    
-
-    if paragraph_index < 0:
-        return "Invalid parameter: paragraph_index must be a non-negative integer"
-    
+        
     try:
         result = get_paragraph_text(filename, paragraph_index)
         return json.dumps(result, indent=2)
@@ -38,26 +36,48 @@ async def get_paragraph_text_from_document(filename: str, paragraph_index: int)
         return f"Failed to get paragraph text: {str(e)}"
 
 
-async def find_text_in_document(filename: str, text_to_find: str, match_case: bool = True, whole_word: bool = False) -> str:
+async def find_text_in_document(filename: str, text_to_find: Union[str, List[str]], match_case: bool = True,
+                                whole_word: bool = False, max_results: Optional[int] = None,
+                                compact: bool = False) -> str:
     """Find occurrences of specific text in a Word document.
     
+    Several texts can be searched for in one pass by giving a list; the
+    results are then grouped per text under "results".
+    
     Args:
         filename: Path to the Word document
-        text_to_find: Text to search for in the document
+        text_to_find: Text to search for in the document, or a list of texts
         match_case: Whether to match case (True) or ignore case (False)
         whole_word: Whether to match whole words only (True) or substrings (False)
+        max_results: Stop searching after this many occurrences of each text; "truncated" is true if there were more
+        compact: Return minified columnar JSON: each matching paragraph's context is listed once in
+                 "contexts", and "occurrences" holds parallel "context" (index into contexts) and "position" lists
     """
     filename = ensure_docx_extension(filename)
     
     if not os.path.exists(filename):
         return f"Document {filename} does not exist"
     
-    if not text_to_find:
+    if isinstance(text_to_find, list):
+        if not all(isinstance(text, str) for text in text_to_find):
+            return "Invalid parameter: text_to_find must be a string or a list of strings"
+        if not text_to_find or not all(text_to_find):
+            return "Search text cannot be empty"
+    elif not text_to_find:
         return "Search text cannot be empty"
     
+    if max_results is not None:
+        try:
+            max_results = int(max_results)
+        except (ValueError, TypeError):
+            return "Invalid parameter: max_results must be an integer"
+        if max_results < 1:
+            return "Invalid parameter: max_results must be at least 1"
+    
     try:
-        
-        result = find_text(filename, text_to_find, match_case, whole_word)
+        result = find_text(filename, text_to_find, match_case, whole_word, max_results, compact)
+        if compact:
+            return json.dumps(result, ensure_ascii=False, separators=(",", ":"))
         return json.dumps(result, indent=2)
     except Exception as e:
         return f"Failed to search for text: {str(e)}"
@@ -101,6 +121,9 @@ async def convert_to_pdf(filename: str, output_filename: Optional[str] = None) -
         return f"Cannot create PDF: {error_message} (Path: {output_filename}, Dir: {output_dir})"
     
     try:
+        # External converters read the file from disk, so write pending edits first
+        flush_cached_document(filename)
+        
         # Determine platform for appropriate conversion method
         system = platform.system()
         
@@ -108,7 +131,8 @@ async def convert_to_pdf(filename: str, output_filename: Optional[str] = None) -
             # On Windows, try docx2pdf which uses Microsoft Word
             try:
                 from docx2pdf import convert
-                convert(filename, output_filename)
+                with timed("subprocess"):
+                    convert(filename, output_filename)
                 return f"Document successfully converted to PDF: {output_filename}"
             except (ImportError, Exception) as e:
                 return f"Failed to convert document to PDF: {str(e)}\nNote: docx2pdf requires Microsoft Word to be installed."
@@ -146,7 +170,8 @@ async def convert_to_pdf(filename: str, output_filename: Optional[str] = None) -
                             filename
                         ]
                         
-                        result = subprocess.run(cmd, capture_output=True, text=True, timeout=60)
+                        with timed("subprocess"):
+                            result = subprocess.run(cmd, capture_output=True, text=True, timeout=60)
                         
                         if result.returncode == 0:
                             # LibreOffice creates the PDF with the same basename
@@ -171,7 +196,8 @@ async def convert_to_pdf(filename: str, output_filename: Optional[str] = None) -
                     # If all LibreOffice attempts failed, try docx2pdf as fallback
                     try:
                         from docx2pdf import convert
-                        convert(filename, output_filename)
+                        with timed("subprocess"):
+                            convert(filename, output_filename)
                         return f"Document successfully converted to PDF: {output_filename}"
                     except (ImportError, Exception) as e:
                         error_msg = "Failed to convert document to PDF using LibreOffice or docx2pdf.\n"
@@ -5,12 +5,14 @@ These tools handle footnote and endnote functionality,
 including adding, customizing, and converting between them.
 """
 import os
-from typing import Optional
-from docx import Document
+from typing import Optional, Union
 from docx.shared import Pt
 from docx.enum.style import WD_STYLE_TYPE
 
 from word_document_server.utils.file_utils import check_file_writeable, ensure_docx_extension
+from word_document_server.utils.document_cache import load_document, save_document, invalidate_document
+from word_document_server.utils.block_index import get_block_index
+from word_document_server.utils.paragraph_ids import resolve_paragraph
 from word_document_server.core.footnotes import (
     find_footnote_references,
     get_format_symbols,
@@ -18,22 +20,16 @@ from word_document_server.core.footnotes import (
 )
 
 
-async def add_footnote_to_document(filename: str, paragraph_index: int, footnote_text: str) -> str:
+async def add_footnote_to_document(filename: str, paragraph_index: Union[int, str], footnote_text: str) -> str:
     """Add a footnote to a specific paragraph in a Word document.
     
     Args:
         filename: Path to the Word document
-        paragraph_index: Index of the paragraph to add footnote to (0-based)
+        paragraph_index: Index of the paragraph to add footnote to (0-based) or its paragraph ID (8 hex digits)
         footnote_text: Text content of the footnote
     """
     filename = ensure_docx_extension(filename)
     
-    # Ensure paragraph_index is an integer
-    try:
-        paragraph_index = int(paragraph_index)
-    except (ValueError, TypeError):
-        return "Invalid parameter: paragraph_index must be an integer"
-    
     if not os.path.exists(filename):
         return f"Document {filename} does not exist"
     
@@ -43,13 +39,12 @@ async def add_footnote_to_document(filename: str, paragraph_index: int, footnote
         return f"Cannot modify document: {error_message}. Consider creating a copy first."
     
     try:
-        doc = Document(filename)
-        
-        # Validate paragraph index
-        if paragraph_index < 0 or paragraph_index >= len(doc.paragraphs):
-            return f"Invalid paragraph index. Document has {len(doc.paragraphs)} paragraphs (0-{len(doc.paragraphs)-1})."
+        doc = load_document(filename)
         
-        paragraph = doc.paragraphs[paragraph_index]
+        # Find the paragraph by index or ID
+        paragraph, error = resolve_paragraph(doc, paragraph_index)
+        if paragraph is None:
+            return error
         
         # In python-docx, we'd use paragraph.add_footnote(), but we'll use a more robust approach
         try:
@@ -59,7 +54,7 @@ async def add_footnote_to_document(filename: str, paragraph_index: int, footnote
             # Create the footnote reference
             reference = footnote.add_footnote(footnote_text)
             
-            doc.save(filename)
+            save_document(doc, filename)
             return f"Footnote added to paragraph {paragraph_index} in {filename}"
         except AttributeError:
             # Fall back to a simpler approach if direct footnote addition fails
@@ -82,28 +77,23 @@ async def add_footnote_to_document(filename: str, paragraph_index: int, footnote
             footnote_para = doc.add_paragraph("¹ " + footnote_text)
             footnote_para.style = "Footnote Text" if "Footnote Text" in doc.styles else "Normal"
             
-            doc.save(filename)
+            save_document(doc, filename)
             return f"Footnote added to paragraph {paragraph_index} in {filename} (simplified approach)"
     except Exception as e:
+        invalidate_document(filename)
         return f"Failed to add footnote: {str(e)}"
 
 
-async def add_endnote_to_document(filename: str, paragraph_index: int, endnote_text: str) -> str:
+async def add_endnote_to_document(filename: str, paragraph_index: Union[int, str], endnote_text: str) -> str:
     """Add an endnote to a specific paragraph in a Word document.
     
     Args:
         filename: Path to the Word document
-        paragraph_index: Index of the paragraph to add endnote to (0-based)
+        paragraph_index: Index of the paragraph to add endnote to (0-based) or its paragraph ID (8 hex digits)
         endnote_text: Text content of the endnote
     """
     filename = ensure_docx_extension(filename)
     
-    # Ensure paragraph_index is an integer
-    try:
-        paragraph_index = int(paragraph_index)
-    except (ValueError, TypeError):
-        return "Invalid parameter: paragraph_index must be an integer"
-    
     if not os.path.exists(filename):
         return f"Document {filename} does not exist"
     
@@ -113,13 +103,12 @@ async def add_endnote_to_document(filename: str, paragraph_index: int, endnote_t
         return f"Cannot modify document: {error_message}. Consider creating a copy first."
     
     try:
-        doc = Document(filename)
-        
-        # Validate paragraph index
-        if paragraph_index < 0 or paragraph_index >= len(doc.paragraphs):
-            return f"Invalid paragraph index. Document has {len(doc.paragraphs)} paragraphs (0-{len(doc.paragraphs)-1})."
+        doc = load_document(filename)
         
-        paragraph = doc.paragraphs[paragraph_index]
+        # Find the paragraph by index or ID
+        paragraph, error = resolve_paragraph(doc, paragraph_index)
+        if paragraph is None:
+            return error
         
         # Add endnote reference
         last_run = paragraph.add_run()
@@ -142,9 +131,10 @@ async def add_endnote_to_document(filename: str, paragraph_index: int, endnote_t
         endnote_para = doc.add_paragraph("† " + endnote_text)
         endnote_para.style = "Endnote Text" if "Endnote Text" in doc.styles else "Normal"
         
-        doc.save(filename)
+        save_document(doc, filename)
         return f"Endnote added to paragraph {paragraph_index} in {filename}"
     except Exception as e:
+        invalidate_document(filename)
         return f"Failed to add endnote: {str(e)}"
 
 
@@ -165,7 +155,7 @@ async def convert_footnotes_to_endnotes_in_document(filename: str) -> str:
         return f"Cannot modify document: {error_message}. Consider creating a copy first."
     
     try:
-        doc = Document(filename)
+        doc = load_document(filename)
   
       
         # Find all runs that might be footnote references
@@ -206,6 +196,7 @@ async def convert_footnotes_to_endnotes_in_document(filename: str) -> str:
                 footnote_text.append(para.text)
         
         # Create endnotes based on footnote references
+        block_index = get_block_index(doc)
         for i, ref in enumerate(footnote_references):
             # Add a new endnote
             endnote_para = doc.add_paragraph()
@@ -218,17 +209,18 @@ async def convert_footnotes_to_endnotes_in_document(filename: str) -> str:
             
             # Change the footnote reference to an endnote reference
             try:
-                paragraph = doc.paragraphs[ref["paragraph_index"]]
+                paragraph = block_index.paragraph(ref["paragraph_index"])
                 paragraph.runs[ref["run_index"]].text = f"†{i+1}"
             except IndexError:
                 # Skip if we can't locate the reference
                 pass
         
         # Save the document
-        doc.save(filename)
+        save_document(doc, filename)
         
         return f"Converted {len(footnote_references)} footnotes to endnotes in {filename}"
     except Exception as e:
+        invalidate_document(filename)
         return f"Failed to convert footnotes to endnotes: {str(e)}"
 
 
@@ -255,7 +247,7 @@ async def customize_footnote_style(filename: str, numbering_format: str = "1, 2,
         return f"Cannot modify document: {error_message}. Consider creating a copy first."
     
     try:
-        doc = Document(filename)
+        doc = load_document(filename)
         
         # Create or get footnote style
         footnote_style_name = "Footnote Text"
@@ -284,8 +276,9 @@ async def customize_footnote_style(filename: str, numbering_format: str = "1, 2,
         count = customize_footnote_formatting(doc, footnote_refs, format_symbols, start_number, footnote_style)
         
         # Save the document
-        doc.save(filename)
+        save_document(doc, filename)
         
         return f"Footnote style and numbering customized in {filename}"
     except Exception as e:
+        invalidate_document(filename)
         return f"Failed to customize footnote style: {str(e)}"
@@ -7,13 +7,13 @@ These tools insert headers and footers with optional dynamic fields
 import os
 from typing import Optional, List
 
-from docx import Document
 from docx.enum.text import WD_ALIGN_PARAGRAPH
 from docx.enum.section import WD_SECTION_START
 from docx.oxml import OxmlElement
 from docx.oxml.shared import qn
 
 from word_document_server.utils.file_utils import ensure_docx_extension, check_file_writeable
+from word_document_server.utils.document_cache import load_document, save_document, invalidate_document
 
 
 async def insert_header(
@@ -37,7 +37,7 @@ async def insert_header(
     if not writeable:
         return f"Cannot modify document: {err}"
     try:
-        doc = Document(filename)
+        doc = load_document(filename)
         for section in doc.sections:
             hdr = section.header
             # Break linkage to previous header
@@ -64,9 +64,10 @@ async def insert_header(
                     fld = OxmlElement('w:fldSimple')
                     fld.set(qn('w:instr'), 'PAGE')
                     para._p.append(fld)
-        doc.save(filename)
+        save_document(doc, filename)
         return f"Header inserted into {filename}"
     except Exception as e:
+        invalidate_document(filename)
         return f"Failed to insert header: {e}"
 
 
@@ -91,7 +92,7 @@ async def insert_footer(
     if not writeable:
         return f"Cannot modify document: {err}"
     try:
-        doc = Document(filename)
+        doc = load_document(filename)
         for section in doc.sections:
             ftr = section.footer
             try:
@@ -114,7 +115,8 @@ async def insert_footer(
                     fld = OxmlElement('w:fldSimple')
                     fld.set(qn('w:instr'), 'PAGE')
                     para._p.append(fld)
-        doc.save(filename)
+        save_document(doc, filename)
         return f"Footer inserted into {filename}"
     except Exception as e:
+        invalidate_document(filename)
         return f"Failed to insert footer: {e}"
\ No newline at end of file
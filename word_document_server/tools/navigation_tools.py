@@ -5,11 +5,11 @@ These tools insert table of contents placeholders and manage cross-document navi
 """
 import os
 
-from docx import Document
 from docx.oxml import OxmlElement
 from docx.oxml.shared import qn
 
 from word_document_server.utils.file_utils import ensure_docx_extension, check_file_writeable
+from word_document_server.utils.document_cache import load_document, save_document, invalidate_document
 
 
 async def insert_toc_placeholder(
@@ -29,7 +29,7 @@ async def insert_toc_placeholder(
     if not writeable:
         return f"Cannot modify document: {err}"
     try:
-        doc = Document(filename)
+        doc = load_document(filename)
         # Insert heading for TOC
         toc_heading = doc.add_paragraph('Table of Contents')
         try:
@@ -42,9 +42,10 @@ async def insert_toc_placeholder(
         # Classic TOC field code (levels 1-3, hyperlinks, hide page numbers)
         fld.set(qn('w:instr'), r'TOC \o "1-3" \h \z \u')
         p._p.append(fld)
-        doc.save(filename)
+        save_document(doc, filename)
         return f"TOC placeholder inserted into {filename}"
     except Exception as e:
+        invalidate_document(filename)
         return f"Failed to insert TOC placeholder: {e}"
     
 async def bookmark(
@@ -64,7 +65,7 @@ async def bookmark(
     if not writable:
         return f"Cannot modify document: {err}"
     try:
-        doc = Document(filename)
+        doc = load_document(filename)
         p = doc.paragraphs[0] if doc.paragraphs else doc.add_paragraph()
         # Create bookmark start
         start = OxmlElement('w:bookmarkStart')
@@ -76,9 +77,10 @@ async def bookmark(
         # Insert elements
         p._p.insert(0, start)
         p._p.insert(1, end)
-        doc.save(filename)
+        save_document(doc, filename)
         return f"Bookmark '{bookmark_name}' added to {filename}"
     except Exception as e:
+        invalidate_document(filename)
         return f"Failed to add bookmark: {e}"
 
 async def insert_hyperlink(
@@ -100,7 +102,7 @@ async def insert_hyperlink(
     if not writable:
         return f"Cannot modify document: {err}"
     try:
-        doc = Document(filename)
+        doc = load_document(filename)
         # Append hyperlink at end of document
         p = doc.add_paragraph()
         fld = OxmlElement('w:fldSimple')
@@ -113,7 +115,8 @@ async def insert_hyperlink(
         run.append(text)
         fld.append(run)
         p._p.append(fld)
-        doc.save(filename)
+        save_document(doc, filename)
         return f"Hyperlink to '{bookmark_name}' added as '{display_text}'"
     except Exception as e:
+        invalidate_document(filename)
         return f"Failed to insert hyperlink: {e}"
\ No newline at end of file
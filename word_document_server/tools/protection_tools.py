@@ -9,10 +9,10 @@ import hashlib
 import datetime
 import io 
 from typing import List, Optional, Dict, Any
-from docx import Document
 import msoffcrypto 
 
 from word_document_server.utils.file_utils import check_file_writeable, ensure_docx_extension
+from word_document_server.utils.document_cache import load_document, save_document, invalidate_document, flush_cached_document
 
 
 
@@ -41,7 +41,8 @@ async def protect_document(filename: str, password: str) -> str:
         return f"Cannot protect document: {error_message}"
 
     try:
-        # Read the original file content
+        # Write pending edits first, then read the original file content
+        flush_cached_document(filename)
         with open(filename, "rb") as infile:
             original_data = infile.read()
 
@@ -98,6 +99,8 @@ async def add_restricted_editing(filename: str, password: str, editable_sections
         return f"Cannot protect document: {error_message}"
 
     try:
+        flush_cached_document(filename)
+        
         # Hash the password for security
         password_hash = hashlib.sha256(password.encode()).hexdigest()
 
@@ -138,7 +141,7 @@ async def add_digital_signature(filename: str, signer_name: str, reason: Optiona
         return f"Cannot add signature to document: {error_message}"
 
     try:
-        doc = Document(filename)
+        doc = load_document(filename)
 
         # Create signature info
         signature_info = create_signature_info(doc, signer_name, reason)
@@ -162,12 +165,13 @@ async def add_digital_signature(filename: str, signer_name: str, reason: Optiona
             signature_para.add_run(f"\nSignature ID: {signature_info['content_hash'][:8]}")
 
             # Save the document with the visible signature
-            doc.save(filename)
+            save_document(doc, filename)
 
             return f"Digital signature added to document {filename}"
         else:
             return f"Failed to add digital signature to document {filename}"
     except Exception as e:
+        invalidate_document(filename)
         return f"Failed to add digital signature: {str(e)}"
 
 async def verify_document(filename: str, password: Optional[str] = None) -> str:
@@ -206,7 +210,7 @@ async def verify_document(filename: str, password: Optional[str] = None) -> str:
 
                     if original_hash:
                         # Calculate current content hash
-                        doc = Document(filename)
+                        doc = load_document(filename)
                         text_content = "\n".join([p.text for p in doc.paragraphs])
                         current_hash = hashlib.sha256(text_content.encode()).hexdigest()
 
@@ -7,24 +7,49 @@ style checks like sentence length and rudimentary passive-voice detection.
 import os
 import re
 import json
-
-from docx import Document
+from typing import Optional
 
 from word_document_server.utils.file_utils import ensure_docx_extension
+from word_document_server.utils.docx_stream import iter_paragraphs
+from word_document_server.utils.pagination import page_request, text_page
+
+
+def _body_texts(filename: str):
+    # Top-level paragraphs, streamed without building the python-docx object model
+    return (p.text for p in iter_paragraphs(filename) if p.text and p.index is not None)
 
 
 async def extract_text(
     filename: str,
+    offset: int = 0,
+    limit: Optional[int] = None,
+    unit: str = "paragraphs",
+    cursor: Optional[str] = None,
 ) -> str:
-    """Extract all text from a Word document as plain text."""
+    """Extract all text from a Word document as plain text.
+
+    With limit, returns a JSON object with one slice of the text and a
+    next_cursor for the following page instead.
+
+    Args:
+        filename: Path to the Word document
+        offset: First non-empty paragraph (or character) to return
+        limit: Maximum number of paragraphs (or characters) to return
+        unit: "paragraphs" or "characters", the unit of offset and limit
+        cursor: The next_cursor value from the previous page, used instead of offset and unit
+    """
     filename = ensure_docx_extension(filename)
     if not os.path.exists(filename):
         return f"Document {filename} does not exist"
     try:
-        doc = Document(filename)
-        paragraphs = [p.text for p in doc.paragraphs if p.text]
-        text = "\n".join(paragraphs)
-        return text
+        if not offset and limit is None and not cursor:
+            return "\n".join(_body_texts(filename))
+        try:
+            unit, offset, limit = page_request("extract_text", filename, offset, limit, unit, cursor)
+        except ValueError as e:
+            return f"Invalid parameter: {e}"
+        return json.dumps(text_page("extract_text", filename, lambda: _body_texts(filename), unit, offset, limit),
+                          indent=2)
     except Exception as e:
         return f"Failed to extract text: {e}"
 
@@ -7,7 +7,6 @@ and inserting section breaks for print-ready layouts.
 import os
 from typing import Optional, Dict
 
-from docx import Document
 from docx.shared import Inches
 from docx.enum.section import WD_SECTION_START
 
@@ -16,6 +15,7 @@ from word_document_server.utils.file_utils import (
     check_file_writeable,
     create_document_copy,
 )
+from word_document_server.utils.document_cache import load_document, save_document, invalidate_document, flush_cached_document
 
 async def apply_template(template_path: str, destination_path: Optional[str] = None) -> str:
     """Create a new document based on a .docx/.dotx template.
@@ -30,6 +30,7 @@ async def apply_template(template_path: str, destination_path: Optional[str] = N
         return f"Template must be .docx or .dotx: {template_path}"
     if not os.path.exists(template_path):
         return f"Template file not found: {template_path}"
+    flush_cached_document(template_path)
 
     # Determine destination
     if destination_path:
@@ -62,7 +63,7 @@ async def set_page_size(
     if not is_writeable:
         return f"Cannot modify document: {err}"
     try:
-        doc = Document(filename)
+        doc = load_document(filename)
         for section in doc.sections:
             section.page_width = Inches(width)
             section.page_height = Inches(height)
@@ -81,9 +82,10 @@ async def set_page_size(
                     section.footer_distance = Inches(margins['footer'])
                 if 'gutter' in margins:
                     section.gutter = Inches(margins['gutter'])
-        doc.save(filename)
+        save_document(doc, filename)
         return f"Page size set to {width}x{height} inches in {filename}"
     except Exception as e:
+        invalidate_document(filename)
         return f"Failed to set page size: {str(e)}"
 
 async def add_section_break(
@@ -103,21 +105,22 @@ async def add_section_break(
     if not is_writeable:
         return f"Cannot modify document: {err}"
     types_map = {
-        'nextPage': WD_SECTION_START.NEXT_PAGE,
+        'nextPage': WD_SECTION_START.NEW_PAGE,
         'evenPage': WD_SECTION_START.EVEN_PAGE,
         'oddPage': WD_SECTION_START.ODD_PAGE,
     }
     if break_type not in types_map:
         return f"Invalid break_type: {break_type}. Must be one of {list(types_map.keys())}"
     try:
-        doc = Document(filename)
+        doc = load_document(filename)
         # Attempt to insert a real section break
         try:
             doc.add_section(types_map[break_type])
         except Exception:
             # Fallback to page break if sections unsupported
             doc.add_page_break()
-        doc.save(filename)
+        save_document(doc, filename)
         return f"Section break ({break_type}) added to {filename}"
     except Exception as e:
+        invalidate_document(filename)
         return f"Failed to add section break: {str(e)}"
\ No newline at end of file
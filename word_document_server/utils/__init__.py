@@ -2,7 +2,33 @@
 Utility functions for the Word Document Server.
 
 This package contains utility modules for file operations and document handling.
+Functions are re-exported lazily so that importing a light module such as
+``utils.locks`` does not pull in python-docx.
 """
+import importlib
 
-from word_document_server.utils.file_utils import check_file_writeable, create_document_copy, ensure_docx_extension
-from word_document_server.utils.document_utils import get_document_properties, extract_document_text, get_document_structure, find_paragraph_by_text, find_and_replace_text
+_EXPORTS = {
+    "file_utils": ("check_file_writeable", "create_document_copy", "ensure_docx_extension"),
+    "document_utils": (
+        "get_document_properties", "extract_document_text", "get_document_structure",
+        "find_paragraph_by_text", "find_and_replace_text",
+    ),
+    "document_cache": ("load_document", "save_document", "invalidate_document", "get_cache_stats"),
+}
+
+_ORIGINS = {name: module for module, names in _EXPORTS.items() for name in names}
+
+__all__ = sorted(_ORIGINS)
+
+
+def __getattr__(name):
+    module = _ORIGINS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f"{__name__}.{module}"), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_ORIGINS))
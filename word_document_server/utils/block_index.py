@@ -0,0 +1,353 @@
+"""
+Body-order index of paragraphs and tables.
+
+python-docx's ``doc.paragraphs`` builds a proxy object for every paragraph in
+the body on each access, so ``doc.paragraphs[i]`` is linear in the size of the
+document. The index here keeps the body-level ``w:p`` and ``w:tbl`` elements in
+lists, so that looking one up by position is a list access and only the
+requested proxy is created.
+
+Indexes are cached per Document object. Before use, an index checks that the
+body still has the length, first child and last block it recorded: paragraphs
+appended at the end (the common case for editing tools) are picked up
+incrementally, and any other change to those triggers a rebuild. A removal
+and an insertion in the middle of the body cancel out in that check, so
+tools that remove or move blocks themselves should do so through
+:meth:`BlockIndex.remove` and :meth:`BlockIndex.relocate`, or call
+:func:`invalidate_block_index` afterwards.
+
+``BlockIndex.version`` changes whenever the index does, so callers can cache
+information derived from it.
+
+Paragraph numbering matches ``doc.paragraphs`` (body-level paragraphs only);
+table numbering matches ``doc.tables``.
+"""
+import threading
+import weakref
+from typing import Dict, List, Optional, Union
+
+from docx.oxml.ns import qn
+from docx.table import Table
+from docx.text.paragraph import Paragraph
+
+
+_P = qn('w:p')
+_TBL = qn('w:tbl')
+
+
+class _Positions:
+    """Element-to-position map of a list, correct for its first ``valid`` entries.
+
+    Filled lazily from the watermark on; a change at some position only moves
+    the watermark back, so lookups after an insert cost no more than the
+    distance from the insert to the element looked up.
+    """
+
+    __slots__ = ('elements', 'positions', 'valid')
+
+    def __init__(self, elements: List):
+        self.elements = elements
+        self.positions: Dict[object, int] = {}
+        self.valid = 0
+
+    def find(self, element) -> int:
+        position = self.positions.get(element)
+        if position is not None and position < self.valid:
+            return position
+        elements = self.elements
+        for position in range(self.valid, len(elements)):
+            current = elements[position]
+            self.positions[current] = position
+            self.valid = position + 1
+            if current is element:
+                return position
+        raise ValueError("Element is not in the block index")
+
+    def changed_at(self, position: int) -> None:
+        self.valid = min(self.valid, position)
+
+    def discard(self, element) -> None:
+        self.positions.pop(element, None)
+
+
+class BlockIndex:
+    """Paragraph and table elements of a document body, in document order."""
+
+    def __init__(self, doc):
+        # A strong reference would keep the document (the cache key) alive forever
+        self._doc = weakref.ref(doc)
+        self._body = doc.element.body
+        self._lock = threading.RLock()
+        self.version = 0
+        self._added: Optional[List] = None
+        self._rebuild()
+
+    def _parent(self):
+        """The python-docx story object that owns body-level proxies."""
+        return self._doc()._body
+
+    # Readers holding a shared document lock may use the lists while another
+    # reader refreshes the index, so a rebuild publishes new lists in one step
+    @property
+    def blocks(self) -> List:
+        return self._lists[0]
+
+    @property
+    def paragraphs(self) -> List:
+        return self._lists[1]
+
+    @property
+    def tables(self) -> List:
+        return self._lists[2]
+
+    def _rebuild(self) -> None:
+        with self._lock:
+            blocks, paragraphs, tables = [], [], []
+            for child in self._body.iterchildren():
+                if child.tag == _P:
+                    blocks.append(child)
+                    paragraphs.append(child)
+                elif child.tag == _TBL:
+                    blocks.append(child)
+                    tables.append(child)
+            self._lists = (blocks, paragraphs, tables)
+            self._positions = (_Positions(blocks), _Positions(paragraphs), _Positions(tables))
+            self._mark_shape()
+            # Every block may be new
+            self._added = None
+            self.version += 1
+
+    def _mark_shape(self) -> None:
+        """Record what refresh() compares against."""
+        self._length = len(self._body)
+        self._head = self._body[0] if self._length else None
+        self._tail = self.blocks[-1] if self.blocks else None
+        self._after_tail = self._count_after(self._tail)
+
+    def _add(self, child) -> None:
+        if child.tag == _P:
+            self.blocks.append(child)
+            self.paragraphs.append(child)
+        elif child.tag == _TBL:
+            self.blocks.append(child)
+            self.tables.append(child)
+        else:
+            return
+        if self._added is not None:
+            self._added.append(child)
+
+    def _count_after(self, element) -> int:
+        if element is None:
+            return len(self._body)
+        return sum(1 for _ in element.itersiblings())
+
+    def _unchanged(self, length: int) -> bool:
+        if length != self._length:
+            return False
+        if not length:
+            return True
+        if self._body[0] is not self._head:
+            return False
+        # Negative indices walk from the end, past the few trailing children (w:sectPr)
+        return self._tail is None or self._body[-(self._after_tail + 1)] is self._tail
+
+    def refresh(self) -> "BlockIndex":
+        """Bring the index up to date with the body; cheap when nothing changed."""
+        with self._lock:
+            length = len(self._body)
+            if self._unchanged(length):
+                return self
+            tail = self._tail
+            if length > self._length and (tail is None or tail.getparent() is self._body) and (
+                    not self._length or self._body[0] is self._head):
+                # Blocks appended after the last known block (before w:sectPr)?
+                following = list(tail.itersiblings()) if tail is not None else list(self._body.iterchildren())
+                if len(following) - self._after_tail == length - self._length:
+                    for child in following[:len(following) - self._after_tail]:
+                        self._add(child)
+                    self._mark_shape()
+                    self.version += 1
+                    return self
+            self._rebuild()
+            return self
+
+    def position(self, element) -> int:
+        """Return the body position of a paragraph or table element (as in ``blocks``)."""
+        with self._lock:
+            return self._positions[0].find(element)
+
+    def paragraph_position(self, element) -> int:
+        """Return the index of a body-level ``w:p`` element (as in ``paragraphs``)."""
+        with self._lock:
+            return self._positions[1].find(element)
+
+    def table_position(self, element) -> int:
+        """Return the index of a top-level ``w:tbl`` element (as in ``tables``)."""
+        with self._lock:
+            return self._positions[2].find(element)
+
+    def take_added(self) -> Optional[List]:
+        """
+        Return the blocks appended since the last call and forget them.
+
+        Returns:
+            List of new paragraph and table elements, or None if the index was
+            rebuilt in the meantime, in which case any block may be new
+        """
+        with self._lock:
+            added, self._added = self._added, []
+            return added
+
+    @property
+    def paragraph_count(self) -> int:
+        return len(self.paragraphs)
+
+    @property
+    def table_count(self) -> int:
+        return len(self.tables)
+
+    def paragraph(self, index: int) -> Paragraph:
+        """Return the body-level paragraph at ``index`` (same numbering as doc.paragraphs)."""
+        element = self.paragraphs[index]
+        if element.getparent() is not self._body:
+            self._rebuild()
+            element = self.paragraphs[index]
+        return Paragraph(element, self._parent())
+
+    def table(self, index: int) -> Table:
+        """Return the top-level table at ``index`` (same numbering as doc.tables)."""
+        element = self.tables[index]
+        if element.getparent() is not self._body:
+            self._rebuild()
+            element = self.tables[index]
+        return Table(element, self._parent())
+
+    def block(self, index: int) -> Union[Paragraph, Table]:
+        """Return the paragraph or table at body position ``index``."""
+        element = self.blocks[index]
+        if element.tag == _TBL:
+            return Table(element, self._parent())
+        return Paragraph(element, self._parent())
+
+    def relocate(self, elements: List, anchor, after: bool = False) -> None:
+        """
+        Move blocks that were just appended to the body next to ``anchor``.
+
+        The index is updated in place rather than rebuilt, so inserting in the
+        middle of a document costs little more than appending.
+
+        Args:
+            elements: The most recently appended blocks, in order
+            anchor: Body-level paragraph or table element to insert next to
+            after: Insert after ``anchor`` instead of before it
+        """
+        count = len(elements)
+        if not count:
+            return
+        with self._lock:
+            self._relocate(elements, anchor, after)
+
+    def _relocate(self, elements: List, anchor, after: bool) -> None:
+        count = len(elements)
+        if self.blocks[-count:] != elements:
+            raise ValueError("Only blocks at the end of the body can be relocated")
+        del self.blocks[-count:]
+        new_paragraphs = [e for e in elements if e.tag == _P]
+        new_tables = [e for e in elements if e.tag == _TBL]
+        if new_paragraphs:
+            del self.paragraphs[-len(new_paragraphs):]
+        if new_tables:
+            del self.tables[-len(new_tables):]
+        for positions in self._positions:
+            positions.changed_at(len(positions.elements))
+
+        if after:
+            previous = anchor
+            for element in elements:
+                previous.addnext(element)
+                previous = element
+        else:
+            for element in elements:
+                anchor.addprevious(element)
+
+        block_positions, paragraph_positions, table_positions = self._positions
+        position = block_positions.find(anchor) + (1 if after else 0)
+        if new_paragraphs:
+            at = self._list_position(position, _P, paragraph_positions)
+            self.paragraphs[at:at] = new_paragraphs
+            paragraph_positions.changed_at(at)
+        if new_tables:
+            at = self._list_position(position, _TBL, table_positions)
+            self.tables[at:at] = new_tables
+            table_positions.changed_at(at)
+        self.blocks[position:position] = elements
+        block_positions.changed_at(position)
+        self._mark_shape()
+        self.version += 1
+
+    def _list_position(self, position: int, tag: str, positions: _Positions) -> int:
+        """Where a block at body ``position`` goes in the paragraph or table list."""
+        if not positions.elements:
+            return 0
+        for i in range(position - 1, -1, -1):
+            if self.blocks[i].tag == tag:
+                return positions.find(self.blocks[i]) + 1
+        return 0
+
+    def remove(self, element) -> None:
+        """Remove a body-level paragraph or table from the document and the index."""
+        with self._lock:
+            block_positions = self._positions[0]
+            list_positions = self._positions[2 if element.tag == _TBL else 1]
+            position = block_positions.find(element)
+            at = list_positions.find(element)
+            self._body.remove(element)
+            del self.blocks[position]
+            del list_positions.elements[at]
+            block_positions.changed_at(position)
+            block_positions.discard(element)
+            list_positions.changed_at(at)
+            list_positions.discard(element)
+            if self._added:
+                self._added = [e for e in self._added if e is not element]
+            self._mark_shape()
+            self.version += 1
+
+
+# Keyed by the document's root element: Document proxies compare by value and
+# are not hashable, while the root element lives exactly as long as the Document.
+_indexes: "weakref.WeakKeyDictionary[object, BlockIndex]" = weakref.WeakKeyDictionary()
+_indexes_lock = threading.Lock()
+
+
+def get_block_index(doc) -> BlockIndex:
+    """
+    Return the up-to-date block index of a python-docx Document.
+
+    Args:
+        doc: python-docx Document object
+
+    Returns:
+        BlockIndex for the document body
+    """
+    index = _indexes.get(doc.element)
+    if index is None:
+        with _indexes_lock:
+            index = _indexes.get(doc.element)
+            if index is None:
+                index = _indexes[doc.element] = BlockIndex(doc)
+                return index
+    return index.refresh()
+
+
+def invalidate_block_index(doc) -> None:
+    """Drop the cached index of ``doc``; the next lookup rebuilds it."""
+    _indexes.pop(doc.element, None)
+
+
+def get_paragraph(doc, index: int) -> Optional[Paragraph]:
+    """Return body-level paragraph ``index`` of ``doc``, or None if out of range."""
+    block_index = get_block_index(doc)
+    if index < 0 or index >= block_index.paragraph_count:
+        return None
+    return block_index.paragraph(index)
@@ -0,0 +1,357 @@
+"""
+Splitting documents into token-budgeted chunks along their heading structure.
+
+The body is streamed (see docx_stream) into a tree of sections, one per
+heading ("Title" and "Heading 1" to "Heading 9"). A section that fits in the
+budget, subsections included, becomes a single chunk; a larger one has its
+own text and its subsections packed in order, with consecutive subsections
+sharing a chunk while they fit. Only a single paragraph or table that is
+larger than the budget on its own is cut, at sentence and then word
+boundaries.
+
+Token counts are estimated at CHARS_PER_TOKEN characters per token, which is
+close for English prose with common LLM tokenizers.
+
+Each chunk's ID is derived from its heading path and text, so chunks that an
+edit did not touch keep their IDs and a client only needs to re-process the
+chunks whose IDs are new. Results are cached in ``WORD_MCP_CACHE_DIR`` by
+the SHA-1 of the file and the budget; the hash itself is only recomputed
+when the file's modification time or size changes. Each time chunks are
+computed, entries of deleted files are dropped and only the
+MAX_CACHED_BUDGETS most recently computed budgets of a version are kept.
+"""
+import hashlib
+import json
+import os
+import re
+import sqlite3
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from word_document_server.utils.document_cache import flush_cached_document
+from word_document_server.utils.docx_stream import StreamedTable, iter_body, paragraph_style_names
+from word_document_server.utils.file_utils import file_sha1, open_cache_db
+
+
+CHARS_PER_TOKEN = 4
+
+CACHE_FILENAME = "chunk-cache.sqlite3"
+
+# Budgets kept per document version; older ones are dropped when a new one is cached
+MAX_CACHED_BUDGETS = 4
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    sha1 TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS chunks (
+    sha1 TEXT NOT NULL,
+    max_tokens INTEGER NOT NULL,
+    chunks TEXT NOT NULL,
+    PRIMARY KEY (sha1, max_tokens)
+);
+"""
+
+_SENTENCE_END = re.compile(r'(?<=[.!?])\s+')
+_WHITESPACE = re.compile(r'\s+')
+
+
+def estimate_tokens(text: str) -> int:
+    """Return the approximate number of tokens in ``text``."""
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+def heading_level(style_name: Optional[str]) -> Optional[int]:
+    """Return the outline level of a paragraph style name: 0 for Title, 1-9 for headings."""
+    if not style_name:
+        return None
+    if style_name == 'Title':
+        return 0
+    if style_name.startswith('Heading '):
+        try:
+            level = int(style_name[8:])
+        except ValueError:
+            return None
+        return level if 1 <= level <= 9 else None
+    return None
+
+
+class _Block:
+    """A body paragraph or a whole table."""
+
+    __slots__ = ("text", "paragraph")
+
+    def __init__(self, text: str, paragraph: Optional[int]):
+        self.text = text
+        self.paragraph = paragraph
+
+
+class _Section:
+    """A heading with the blocks up to the next heading and its subsections."""
+
+    __slots__ = ("level", "path", "blocks", "children", "length")
+
+    def __init__(self, level: int, path: List[str]):
+        self.level = level
+        self.path = path
+        self.blocks: List[_Block] = []
+        self.children: List["_Section"] = []
+        self.length = 0
+
+
+def _table_text(cells: Dict[Tuple[int, int], List[str]]) -> str:
+    rows: Dict[int, List[str]] = {}
+    for (row, _column), texts in sorted(cells.items()):
+        rows.setdefault(row, []).append(' '.join(text for text in texts if text))
+    return '\n'.join(' | '.join(row) for _, row in sorted(rows.items()))
+
+
+def _iter_blocks(doc_path: str) -> Iterator[Tuple[_Block, Optional[int]]]:
+    """Yield (block, heading level or None) for the non-empty blocks of a document."""
+    names, default_name = paragraph_style_names(doc_path)
+    cells: Dict[Tuple[int, int], List[str]] = {}
+    for item in iter_body(doc_path):
+        if isinstance(item, StreamedTable):
+            text = _table_text(cells)
+            cells = {}
+            if text.strip(' |\n'):
+                yield _Block(text, None), None
+        elif item.table_index is not None:
+            cells.setdefault((item.row, item.column), []).append(item.text.strip())
+        elif item.text.strip():
+            name = names.get(item.style_id) if item.style_id else default_name
+            yield _Block(item.text, item.index), heading_level(name)
+
+
+def build_sections(doc_path: str) -> _Section:
+    """
+    Stream a document into a tree of sections.
+
+    Returns:
+        The root section, holding the text before the first heading, with
+        every section's ``length`` set to the characters of its subtree
+    """
+    root = _Section(-1, [])
+    stack = [root]
+    for block, level in _iter_blocks(doc_path):
+        if level is not None:
+            while stack[-1].level >= level:
+                stack.pop()
+            section = _Section(level, stack[-1].path + [block.text.strip()])
+            stack[-1].children.append(section)
+            stack.append(section)
+        stack[-1].blocks.append(block)
+
+    def measure(section: _Section) -> int:
+        parts = [len(block.text) for block in section.blocks] + [measure(child) for child in section.children]
+        section.length = sum(parts) + max(len(parts) - 1, 0)
+        return section.length
+
+    measure(root)
+    return root
+
+
+def _split_text(text: str, max_chars: int, first_chars: Optional[int] = None) -> List[str]:
+    """
+    Cut text longer than max_chars at sentence, then word, then character boundaries.
+
+    Args:
+        text: Text to cut
+        max_chars: Largest length of a piece
+        first_chars: Largest length of the first piece, if smaller than max_chars
+    """
+    pieces: List[str] = []
+    current = ''
+    limit = first_chars or max_chars
+
+    def emit(piece: str) -> None:
+        nonlocal limit
+        pieces.append(piece)
+        limit = max_chars
+
+    for sentence in _SENTENCE_END.split(text):
+        words = [sentence] if len(sentence) <= limit else _WHITESPACE.split(sentence)
+        for word in words:
+            while len(word) > limit:
+                if current:
+                    emit(current)
+                    current = ''
+                    continue
+                emit(word[:limit])
+                word = word[len(pieces[-1]):]
+            if not word:
+                continue
+            if current and len(current) + 1 + len(word) > limit:
+                emit(current)
+                current = ''
+            current = f'{current} {word}' if current else word
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+class _Packer:
+    """Accumulates blocks into chunks of at most max_chars characters."""
+
+    def __init__(self, max_chars: int):
+        self.max_chars = max_chars
+        self.chunks: List[Tuple[List[str], List[_Block]]] = []
+        self._path: Optional[List[str]] = None
+        self._blocks: List[_Block] = []
+        self._length = 0
+
+    def flush(self) -> None:
+        if self._blocks:
+            self.chunks.append((self._path, self._blocks))
+        self._path, self._blocks, self._length = None, [], 0
+
+    def add(self, path: List[str], blocks: List[_Block], length: int) -> None:
+        """Add blocks totalling ``length`` characters (at most max_chars) under ``path``."""
+        if self._blocks and self._length + 1 + length > self.max_chars:
+            self.flush()
+        if self._blocks:
+            # A chunk spanning sections is labelled with the enclosing section
+            common = 0
+            while (common < min(len(self._path), len(path))
+                   and self._path[common] == path[common]):
+                common += 1
+            self._path = self._path[:common]
+            self._length += 1 + length
+        else:
+            self._path, self._length = path, length
+        self._blocks.extend(blocks)
+
+    def add_section(self, section: _Section) -> None:
+        if section.length <= self.max_chars:
+            self.add(section.path, list(_section_blocks(section)), section.length)
+            return
+        # Chunks of a split section do not reach into its neighbours
+        self.flush()
+        for block in section.blocks:
+            if len(block.text) <= self.max_chars:
+                self.add(section.path, [block], len(block.text))
+                continue
+            # The first piece may fill up the current chunk, usually the heading
+            room = self.max_chars - self._length - 1 if self._blocks else self.max_chars
+            if room < self.max_chars // 4:
+                self.flush()
+                room = self.max_chars
+            for piece in _split_text(block.text, self.max_chars, room):
+                self.add(section.path, [_Block(piece, block.paragraph)], len(piece))
+        for child in section.children:
+            self.add_section(child)
+        self.flush()
+
+
+def _section_blocks(section: _Section) -> Iterator[_Block]:
+    yield from section.blocks
+    for child in section.children:
+        yield from _section_blocks(child)
+
+
+def chunk_sections(root: _Section, max_tokens: int) -> List[Dict[str, Any]]:
+    """
+    Pack a section tree from :func:`build_sections` into chunks.
+
+    Args:
+        root: Root section
+        max_tokens: Largest estimated token count of a chunk
+
+    Returns:
+        List of chunk dicts with id, heading_path, tokens, paragraphs (first
+        and last body paragraph index, or None for a chunk holding only a
+        table) and text
+    """
+    packer = _Packer(max_tokens * CHARS_PER_TOKEN)
+    packer.add_section(root)
+    packer.flush()
+
+    chunks = []
+    seen: Dict[str, int] = {}
+    for path, blocks in packer.chunks:
+        text = '\n'.join(block.text for block in blocks)
+        digest = hashlib.sha1('\x1f'.join(path + [text]).encode('utf-8')).hexdigest()[:16]
+        # Identical chunks (a repeated boilerplate section) are told apart by occurrence
+        seen[digest] = seen.get(digest, 0) + 1
+        chunk_id = digest if seen[digest] == 1 else f'{digest}-{seen[digest]}'
+        indices = [block.paragraph for block in blocks if block.paragraph is not None]
+        chunks.append({
+            'id': chunk_id,
+            'heading_path': path,
+            'tokens': estimate_tokens(text),
+            'paragraphs': [indices[0], indices[-1]] if indices else None,
+            'text': text,
+        })
+    return chunks
+
+
+def connect(path: Optional[str] = None) -> sqlite3.Connection:
+    """
+    Open the chunk cache, creating it if needed.
+
+    Args:
+        path: Database file; defaults to the cache in :func:`file_utils.cache_dir`
+    """
+    return open_cache_db(CACHE_FILENAME, _SCHEMA, path)
+
+
+def _file_sha1(connection: sqlite3.Connection, path: str) -> str:
+    """Return the SHA-1 of a file, reusing the stored hash while its mtime and size are unchanged."""
+    stat_result = os.stat(path)
+    row = connection.execute("SELECT mtime_ns, size, sha1 FROM files WHERE path = ?", (path,)).fetchone()
+    if row is not None and tuple(row[:2]) == (stat_result.st_mtime_ns, stat_result.st_size):
+        return row[2]
+
+    sha1 = file_sha1(path)
+    connection.execute("INSERT OR REPLACE INTO files (path, mtime_ns, size, sha1) VALUES (?, ?, ?, ?)",
+                       (path, stat_result.st_mtime_ns, stat_result.st_size, sha1))
+    if row is not None and row[2] != sha1:
+        # Drop the chunks of the previous version unless another file has the same content
+        connection.execute("DELETE FROM chunks WHERE sha1 = ? AND NOT EXISTS "
+                           "(SELECT 1 FROM files WHERE sha1 = ?)", (row[2], row[2]))
+    connection.commit()
+    return sha1
+
+
+def _prune(connection: sqlite3.Connection, sha1: str) -> None:
+    """Drop files that were deleted, chunks no file refers to and old budgets of ``sha1``."""
+    gone = [(path,) for (path,) in connection.execute("SELECT path FROM files") if not os.path.exists(path)]
+    connection.executemany("DELETE FROM files WHERE path = ?", gone)
+    connection.execute("DELETE FROM chunks WHERE sha1 NOT IN (SELECT sha1 FROM files)")
+    connection.execute("DELETE FROM chunks WHERE sha1 = ? AND rowid NOT IN "
+                       "(SELECT rowid FROM chunks WHERE sha1 = ? ORDER BY rowid DESC LIMIT ?)",
+                       (sha1, sha1, MAX_CACHED_BUDGETS))
+
+
+def get_chunks(doc_path: str, max_tokens: int) -> Dict[str, Any]:
+    """
+    Return the chunks of a document, from the cache when it is unchanged.
+
+    Args:
+        doc_path: Path to the Word document
+        max_tokens: Largest estimated token count of a chunk
+
+    Returns:
+        Dict with "sha1", "cached" and "chunks" (see :func:`chunk_sections`)
+    """
+    # Pending write-behind edits must reach the file before it is hashed
+    flush_cached_document(doc_path)
+    path = os.path.abspath(doc_path)
+    connection = connect()
+    try:
+        sha1 = _file_sha1(connection, path)
+        row = connection.execute("SELECT chunks FROM chunks WHERE sha1 = ? AND max_tokens = ?",
+                                 (sha1, max_tokens)).fetchone()
+        if row is not None:
+            return {"sha1": sha1, "cached": True, "chunks": json.loads(row[0])}
+
+        chunks = chunk_sections(build_sections(path), max_tokens)
+        connection.execute("INSERT OR REPLACE INTO chunks (sha1, max_tokens, chunks) VALUES (?, ?, ?)",
+                           (sha1, max_tokens, json.dumps(chunks, separators=(",", ":"))))
+        _prune(connection, sha1)
+        connection.commit()
+    finally:
+        connection.close()
+    return {"sha1": sha1, "cached": False, "chunks": chunks}
@@ -0,0 +1,256 @@
+"""
+Executor layer that keeps blocking document work off the asyncio event loop.
+
+Tool functions are declared ``async`` but parse, save and shell out
+synchronously. :func:`offload` wraps a tool so that each call runs in a
+bounded worker pool while the event loop keeps serving other requests.
+
+Workers are threads rather than processes: parsed documents live in the
+in-process document cache and cannot be shared across process boundaries, and
+python-docx, lxml and zlib release the GIL for much of their work. CPU-bound
+jobs that do not need the cache, such as parsing merge sources, go through
+:func:`map_in_processes` and a shared process pool instead.
+
+Configuration:
+    WORD_MCP_WORKERS: Size of the worker pool (``0`` runs tools inline on the loop)
+    WORD_MCP_TOOL_CONCURRENCY: Per-tool limits, e.g. ``convert_to_pdf=1,to_epub=2``
+    WORD_MCP_PROCESSES: Size of the process pool (``0`` or ``1`` runs such jobs in-process)
+"""
+import asyncio
+import contextlib
+import contextvars
+import functools
+import multiprocessing
+import os
+import threading
+import weakref
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Dict, Iterable, Iterator, Optional
+
+from word_document_server.utils.instrumentation import timed
+from word_document_server.utils.locks import tool_locks
+
+
+# LibreOffice refuses to run two conversions against the same user profile, so
+# PDF conversion is serialized unless configured otherwise.
+DEFAULT_TOOL_CONCURRENCY = {"convert_to_pdf": 1}
+
+
+def _default_workers() -> int:
+    return min(32, (os.cpu_count() or 1) + 4)
+
+
+def _read_workers() -> int:
+    try:
+        return max(0, int(os.environ.get("WORD_MCP_WORKERS", _default_workers())))
+    except ValueError:
+        return _default_workers()
+
+
+def _read_processes() -> int:
+    default = os.cpu_count() or 1
+    try:
+        return max(0, int(os.environ.get("WORD_MCP_PROCESSES", default)))
+    except ValueError:
+        return default
+
+
+def parse_tool_limits(spec: str) -> Dict[str, int]:
+    """Parse a ``name=limit,name=limit`` string into a dict, skipping bad items."""
+    limits = {}
+    for item in spec.split(","):
+        name, _, value = item.partition("=")
+        name = name.strip()
+        try:
+            limit = int(value)
+        except ValueError:
+            continue
+        if name and limit > 0:
+            limits[name] = limit
+    return limits
+
+
+_workers = _read_workers()
+_tool_limits = {**DEFAULT_TOOL_CONCURRENCY,
+                **parse_tool_limits(os.environ.get("WORD_MCP_TOOL_CONCURRENCY", ""))}
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+# Semaphores belong to the event loop they were first used on
+_semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Semaphore]]" = \
+    weakref.WeakKeyDictionary()
+_thread_state = threading.local()
+
+_processes = _read_processes()
+_process_pool: Optional[ProcessPoolExecutor] = None
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=_workers, thread_name_prefix="word-mcp-worker")
+        return _executor
+
+
+def _get_semaphore(name: str) -> Optional[asyncio.Semaphore]:
+    limit = _tool_limits.get(name)
+    if limit is None:
+        return None
+    per_loop = _semaphores.setdefault(asyncio.get_running_loop(), {})
+    semaphore = per_loop.get(name)
+    if semaphore is None:
+        semaphore = per_loop[name] = asyncio.Semaphore(limit)
+    return semaphore
+
+
+def _run_in_worker(name: str, func: Callable, args, kwargs):
+    """Run an async tool to completion on the worker thread's own event loop."""
+    loop = getattr(_thread_state, "loop", None)
+    if loop is None:
+        loop = _thread_state.loop = asyncio.new_event_loop()
+    with contextlib.ExitStack() as stack:
+        with timed("lock_wait"):
+            stack.enter_context(tool_locks(name, func, args, kwargs))
+        return loop.run_until_complete(func(*args, **kwargs))
+
+
+def offload(func: Callable) -> Callable:
+    """
+    Wrap an async tool function so that its body runs in the worker pool.
+
+    The call holds the document locks of its path arguments (see
+    :mod:`word_document_server.utils.locks`) while it runs. The wrapper
+    keeps the name, docstring and signature of ``func`` so that FastMCP
+    derives the same tool schema from it.
+
+    Args:
+        func: Async tool function
+
+    Returns:
+        Async function that awaits ``func`` in a worker thread
+    """
+    name = func.__name__
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        semaphore = _get_semaphore(name)
+        if semaphore is not None:
+            async with semaphore:
+                return await _dispatch(name, func, args, kwargs)
+        return await _dispatch(name, func, args, kwargs)
+
+    return wrapper
+
+
+async def _dispatch(name: str, func: Callable, args, kwargs):
+    if _workers == 0:
+        # Inline calls run one at a time on the loop, but still respect locks
+        # held by background flushes.
+        with tool_locks(name, func, args, kwargs):
+            return await func(*args, **kwargs)
+    loop = asyncio.get_running_loop()
+    # Carry context variables (per-call metrics) over to the worker thread
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(_get_executor(), context.run, _run_in_worker, name, func, args, kwargs)
+
+
+def _get_process_pool() -> ProcessPoolExecutor:
+    global _process_pool
+    with _executor_lock:
+        if _process_pool is None:
+            # Forking a process that runs worker threads can copy held locks;
+            # spawned workers start clean.
+            _process_pool = ProcessPoolExecutor(max_workers=_processes,
+                                                mp_context=multiprocessing.get_context("spawn"))
+        return _process_pool
+
+
+def _reset_process_pool() -> None:
+    global _process_pool
+    with _executor_lock:
+        old, _process_pool = _process_pool, None
+    if old is not None:
+        old.shutdown(wait=False, cancel_futures=True)
+
+
+def map_in_processes(func: Callable, items: Iterable, window: Optional[int] = None) -> Iterator:
+    """
+    Apply ``func`` to each item in the process pool, yielding results in order.
+
+    At most ``window`` items are in flight at once, so the results waiting to
+    be consumed stay bounded however many items there are. Without a process
+    pool, or if the pool breaks, items are processed in the calling thread.
+    Time spent waiting for results is recorded as the "subprocess" phase.
+
+    Args:
+        func: Picklable module-level function
+        items: Picklable arguments, one call each
+        window: Maximum number of pending calls (default: twice the pool size)
+
+    Yields:
+        func(item) for each item, in the order of ``items``
+    """
+    items = list(items)
+    if _processes <= 1 or len(items) < 2:
+        for item in items:
+            yield func(item)
+        return
+
+    window = max(1, window or 2 * _processes)
+    pool = _get_process_pool()
+    pending = deque()
+    submitted = yielded = 0
+    try:
+        while yielded < len(items):
+            while submitted < len(items) and len(pending) < window:
+                pending.append(pool.submit(func, items[submitted]))
+                submitted += 1
+            with timed("subprocess"):
+                result = pending[0].result()
+            pending.popleft()
+            yielded += 1
+            yield result
+    except BrokenProcessPool:
+        # A worker died (killed, out of memory); finish without the pool
+        _reset_process_pool()
+        for future in pending:
+            future.cancel()
+        pending.clear()
+        for item in items[yielded:]:
+            yield func(item)
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+def configure_concurrency(workers: Optional[int] = None,
+                          tool_limits: Optional[Dict[str, int]] = None,
+                          processes: Optional[int] = None) -> None:
+    """
+    Change the worker pool size, per-tool limits or process pool size at runtime.
+
+    Args:
+        workers: New pool size; 0 runs tools inline on the event loop
+        tool_limits: Mapping of tool name to maximum concurrent calls
+        processes: New process pool size; 0 or 1 runs process jobs in-process
+    """
+    global _workers, _executor, _tool_limits, _processes
+    if workers is not None:
+        with _executor_lock:
+            old, _executor = _executor, None
+            _workers = max(0, workers)
+        if old is not None:
+            old.shutdown(wait=False)
+    if tool_limits is not None:
+        _tool_limits = {name: limit for name, limit in tool_limits.items() if limit > 0}
+        _semaphores.clear()
+    if processes is not None:
+        _reset_process_pool()
+        _processes = max(0, processes)
+
+
+def get_concurrency_settings() -> Dict[str, object]:
+    """Return the current worker count, per-tool limits and process pool size."""
+    return {"workers": _workers, "tool_limits": dict(_tool_limits), "processes": _processes}
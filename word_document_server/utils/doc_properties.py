@@ -0,0 +1,237 @@
+"""
+Direct access to the document properties parts of a .docx package.
+
+Core properties (title, author, dates) live in ``docProps/core.xml`` and the
+statistics Word stores on save (pages, words) in ``docProps/app.xml``. Both
+are small, so they are read straight from the zip instead of parsing the
+main document, and core properties are updated by rewriting only
+``docProps/core.xml``; every other entry of the package is copied as is.
+"""
+import posixpath
+import zipfile
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from lxml import etree
+
+from word_document_server.utils.instrumentation import add_bytes
+from word_document_server.utils.package_writer import replace_entries
+
+
+CORE_PROPERTIES_PART = 'docProps/core.xml'
+APP_PROPERTIES_PART = 'docProps/app.xml'
+
+CP_NS = 'http://schemas.openxmlformats.org/package/2006/metadata/core-properties'
+DC_NS = 'http://purl.org/dc/elements/1.1/'
+DCTERMS_NS = 'http://purl.org/dc/terms/'
+XSI_NS = 'http://www.w3.org/2001/XMLSchema-instance'
+EP_NS = 'http://schemas.openxmlformats.org/officeDocument/2006/extended-properties'
+CT_NS = 'http://schemas.openxmlformats.org/package/2006/content-types'
+REL_NS = 'http://schemas.openxmlformats.org/package/2006/relationships'
+
+CORE_PROPERTIES_REL = 'http://schemas.openxmlformats.org/package/2006/relationships/metadata/core-properties'
+CORE_PROPERTIES_CONTENT_TYPE = 'application/vnd.openxmlformats-package.core-properties+xml'
+
+# Property name -> element in core.xml, in the order python-docx reports them
+CORE_PROPERTIES = {
+    'title': f'{{{DC_NS}}}title',
+    'author': f'{{{DC_NS}}}creator',
+    'subject': f'{{{DC_NS}}}subject',
+    'keywords': f'{{{CP_NS}}}keywords',
+    'category': f'{{{CP_NS}}}category',
+    'comments': f'{{{DC_NS}}}description',
+    'created': f'{{{DCTERMS_NS}}}created',
+    'modified': f'{{{DCTERMS_NS}}}modified',
+    'last_modified_by': f'{{{CP_NS}}}lastModifiedBy',
+    'revision': f'{{{CP_NS}}}revision',
+}
+
+# Statistics in app.xml -> property name
+APP_STATISTICS = {
+    'Pages': 'page_count',
+    'Words': 'word_count',
+    'Characters': 'character_count',
+    'Lines': 'line_count',
+    'Paragraphs': 'paragraph_count',
+}
+
+# docProps/app.xml of python-docx's default template. python-docx never
+# updates this part, so in a file it wrote these values describe nothing.
+_TEMPLATE_APP_PROPERTIES = {
+    'Application': 'Microsoft Macintosh Word',
+    'AppVersion': '14.0000',
+    'TotalTime': '0',
+    'Pages': '1',
+    'Words': '0',
+    'Characters': '0',
+    'Lines': '0',
+    'Paragraphs': '0',
+}
+
+_PARSER = etree.XMLParser(resolve_entities=False)
+
+
+def _parse_datetime(value: str) -> str:
+    """Format a W3CDTF timestamp the way str() formats python-docx's datetimes."""
+    try:
+        return str(datetime.fromisoformat(value.replace('Z', '+00:00')))
+    except ValueError:
+        return value
+
+
+def _read_xml(zf: zipfile.ZipFile, name: str):
+    try:
+        info = zf.getinfo(name)
+        root = etree.fromstring(zf.read(info), _PARSER)
+    except (KeyError, etree.XMLSyntaxError):
+        return None
+    add_bytes(read=info.compress_size)
+    return root
+
+
+def _core_part_name(zf: zipfile.ZipFile) -> Optional[str]:
+    """Return the zip member holding the core properties, following the package relationships."""
+    rels = _read_xml(zf, '_rels/.rels')
+    if rels is not None:
+        for rel in rels.iter(f'{{{REL_NS}}}Relationship'):
+            if rel.get('Type') == CORE_PROPERTIES_REL and rel.get('TargetMode') != 'External':
+                name = posixpath.normpath(rel.get('Target', '').lstrip('/'))
+                if name in zf.NameToInfo:
+                    return name
+    return CORE_PROPERTIES_PART if CORE_PROPERTIES_PART in zf.NameToInfo else None
+
+
+def read_core_properties(zf: zipfile.ZipFile) -> Dict[str, Any]:
+    """
+    Read the core properties of an open .docx package.
+
+    Args:
+        zf: Open zip file of the package
+
+    Returns:
+        Dict with title, author, subject, keywords, category, comments,
+        created, modified, last_modified_by (strings, "" when unset) and
+        revision (int, 0 when unset)
+    """
+    properties = dict.fromkeys(CORE_PROPERTIES, '')
+    properties['revision'] = 0
+    name = _core_part_name(zf)
+    root = _read_xml(zf, name) if name else None
+    if root is None:
+        return properties
+    for key, tag in CORE_PROPERTIES.items():
+        element = root.find(tag)
+        text = (element.text or '').strip() if element is not None else ''
+        if not text:
+            continue
+        if key in ('created', 'modified'):
+            properties[key] = _parse_datetime(text)
+        elif key == 'revision':
+            try:
+                properties[key] = int(text)
+            except ValueError:
+                pass
+        else:
+            properties[key] = element.text
+    return properties
+
+
+def read_app_properties(zf: zipfile.ZipFile) -> Dict[str, Any]:
+    """
+    Read the application name and statistics stored in ``docProps/app.xml``.
+
+    The statistics are those recorded by the application that last saved the
+    file; they are not recomputed and may be stale or absent. The part that
+    python-docx copies from its template is treated as absent.
+
+    Args:
+        zf: Open zip file of the package
+
+    Returns:
+        Dict with "application" and the statistics in APP_STATISTICS that are present
+    """
+    root = _read_xml(zf, APP_PROPERTIES_PART)
+    if root is None:
+        return {}
+    if all(root.findtext(f'{{{EP_NS}}}{tag}') == value for tag, value in _TEMPLATE_APP_PROPERTIES.items()):
+        return {}
+    properties = {}
+    element = root.find(f'{{{EP_NS}}}Application')
+    if element is not None and element.text:
+        properties['application'] = element.text
+    for tag, key in APP_STATISTICS.items():
+        element = root.find(f'{{{EP_NS}}}{tag}')
+        if element is not None and element.text:
+            try:
+                properties[key] = int(element.text)
+            except ValueError:
+                pass
+    return properties
+
+
+def _new_core_properties():
+    return etree.fromstring(
+        f'<cp:coreProperties xmlns:cp="{CP_NS}" xmlns:dc="{DC_NS}" xmlns:dcterms="{DCTERMS_NS}" '
+        f'xmlns:dcmitype="http://purl.org/dc/dcmitype/" xmlns:xsi="{XSI_NS}"/>'
+    )
+
+
+def _serialize(root) -> bytes:
+    return etree.tostring(root, xml_declaration=True, encoding='UTF-8', standalone=True)
+
+
+def _register_core_part(zf: zipfile.ZipFile) -> Dict[str, bytes]:
+    """Return the updated content types and package relationships for a new core part."""
+    entries = {}
+    types = _read_xml(zf, '[Content_Types].xml')
+    if types is not None:
+        part = '/' + CORE_PROPERTIES_PART
+        if not any(o.get('PartName') == part for o in types.iter(f'{{{CT_NS}}}Override')):
+            etree.SubElement(types, f'{{{CT_NS}}}Override', PartName=part,
+                             ContentType=CORE_PROPERTIES_CONTENT_TYPE)
+            entries['[Content_Types].xml'] = _serialize(types)
+    rels = _read_xml(zf, '_rels/.rels')
+    if rels is None:
+        rels = etree.fromstring(f'<Relationships xmlns="{REL_NS}"/>')
+    ids = {rel.get('Id') for rel in rels}
+    number = len(ids) + 1
+    while f'rId{number}' in ids:
+        number += 1
+    etree.SubElement(rels, f'{{{REL_NS}}}Relationship', Id=f'rId{number}', Type=CORE_PROPERTIES_REL,
+                     Target=CORE_PROPERTIES_PART)
+    entries['_rels/.rels'] = _serialize(rels)
+    return entries
+
+
+def write_core_properties(path: str, updates: Dict[str, Optional[str]]) -> Dict[str, int]:
+    """
+    Update core properties by rewriting only the core properties part.
+
+    Args:
+        path: Path to the .docx file
+        updates: Property name (a key of CORE_PROPERTIES other than the dates
+            and revision) -> new text; None values are left unchanged
+
+    Returns:
+        Dict with the number of zip entries "copied" and "rewritten"
+    """
+    entries = {}
+    with zipfile.ZipFile(path) as zf:
+        name = _core_part_name(zf)
+        root = _read_xml(zf, name) if name else None
+        if root is None:
+            if name is None:
+                name = CORE_PROPERTIES_PART
+                entries.update(_register_core_part(zf))
+            root = _new_core_properties()
+
+    for key, value in updates.items():
+        if value is None:
+            continue
+        tag = CORE_PROPERTIES[key]
+        element = root.find(tag)
+        if element is None:
+            element = etree.SubElement(root, tag)
+        element.text = value
+    entries[name] = _serialize(root)
+    return replace_entries(path, entries)
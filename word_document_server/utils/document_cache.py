@@ -0,0 +1,576 @@
+"""
+In-process document cache for Word Document Server.
+
+Parsing a .docx package is by far the most expensive step of most tool calls.
+This module keeps recently used python-docx ``Document`` objects in memory so
+that consecutive tool calls against the same file reuse the parsed tree.
+
+Entries are keyed by absolute path and validated against the file's mtime and
+size, so any change made on disk by another process is picked up on the next
+load. Eviction is least-recently-used with an approximate memory budget.
+
+In write-behind mode (``WORD_MCP_DEFERRED_SAVE=1``) :func:`save_document` only
+marks the cached document dirty. Dirty documents are written out by
+:func:`flush_cached_document`, by a background flusher once they have been idle
+for ``WORD_MCP_FLUSH_IDLE_SECONDS`` or dirty for ``WORD_MCP_MAX_DIRTY_SECONDS``,
+before eviction, and at interpreter shutdown. Each of them writes a document
+only while holding its exclusive document lock (see
+:mod:`word_document_server.utils.locks`), so a half-applied edit is never
+written out, and never while holding the cache's own lock, so that a slow save
+does not stall every other tool call.
+
+A tool that fails part-way calls :func:`invalidate_document`. For a document
+with unwritten edits, this rolls the document back to its state at the last
+:func:`save_document` instead of discarding it: when a tool loads a dirty
+document for writing, a copy of its XML parts is kept until the tool saves.
+"""
+import atexit
+import contextlib
+import copy
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from word_document_server.utils.package_writer import save_package
+from word_document_server.utils.locks import (
+    document_lock, held_lock, set_pending_edits_check, try_lock_exclusive, unlock_exclusive
+)
+from word_document_server.utils import instrumentation
+
+
+# Approximate ratio between the parsed size of a document and its size on disk.
+# .docx parts are deflate-compressed XML, and lxml trees are considerably larger
+# than the serialized XML, so a zipped size understates real memory use.
+PARSED_SIZE_FACTOR = 8
+
+# Memory budget for cached documents, configurable via WORD_MCP_CACHE_MAX_MB.
+# A value of 0 disables caching entirely.
+DEFAULT_CACHE_MAX_MB = 512
+
+# Write-behind defaults: flush after 2 seconds without further edits, and never
+# keep an edit only in memory for longer than 30 seconds.
+DEFAULT_FLUSH_IDLE_SECONDS = 2.0
+DEFAULT_MAX_DIRTY_SECONDS = 30.0
+
+# How long flush_all_documents waits for a tool that is editing a document
+FLUSH_ALL_LOCK_TIMEOUT = 10.0
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+def _read_budget() -> int:
+    max_mb = _env_float("WORD_MCP_CACHE_MAX_MB", DEFAULT_CACHE_MAX_MB)
+    return max(0, int(max_mb * 1024 * 1024))
+
+
+class _CacheEntry:
+    """A parsed document together with the file stamp it was loaded from.
+
+    ``dirty_since`` is set when the in-memory document holds edits that have not
+    been written to disk yet; ``last_edit`` is the time of the latest such edit.
+    ``snapshot`` holds the XML parts of a dirty document as of its last save,
+    while a tool may be changing it.
+    """
+
+    __slots__ = ("doc", "mtime_ns", "size", "cost", "dirty_since", "last_edit", "snapshot")
+
+    def __init__(self, doc, mtime_ns: int, size: int):
+        self.doc = doc
+        self.mtime_ns = mtime_ns
+        self.size = size
+        self.cost = size * PARSED_SIZE_FACTOR
+        self.dirty_since: Optional[float] = None
+        self.last_edit: Optional[float] = None
+        self.snapshot: Optional[list] = None
+
+
+_entries: "OrderedDict[str, _CacheEntry]" = OrderedDict()
+_lock = threading.RLock()
+_max_bytes = _read_budget()
+_current_bytes = 0
+_stats = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0, "rollbacks": 0,
+          "deferred_saves": 0, "flushes": 0, "parts_copied": 0, "parts_rewritten": 0}
+
+_deferred_save = os.environ.get("WORD_MCP_DEFERRED_SAVE", "").lower() in ("1", "true", "yes", "on")
+_flush_idle_seconds = _env_float("WORD_MCP_FLUSH_IDLE_SECONDS", DEFAULT_FLUSH_IDLE_SECONDS)
+_max_dirty_seconds = _env_float("WORD_MCP_MAX_DIRTY_SECONDS", DEFAULT_MAX_DIRTY_SECONDS)
+_flusher: Optional[threading.Thread] = None
+
+
+def _cache_key(path: str) -> str:
+    return os.path.normcase(os.path.abspath(path))
+
+
+def _drop(key: str) -> None:
+    global _current_bytes
+    entry = _entries.pop(key, None)
+    if entry is not None:
+        _current_bytes -= entry.cost
+
+
+def _save(doc, path: str) -> None:
+    """Write ``doc`` to ``path``, reusing unchanged zip entries of the existing file."""
+    with instrumentation.timed("save"):
+        counts = save_package(doc, path)
+    instrumentation.add_bytes(written=os.path.getsize(path))
+    with _lock:
+        _stats["parts_copied"] += counts["copied"]
+        _stats["parts_rewritten"] += counts["rewritten"]
+
+
+def _write(key: str, entry: _CacheEntry) -> None:
+    """Write a dirty entry to disk and refresh its file stamp.
+
+    The caller must hold the exclusive lock of the document, and not ``_lock``.
+    """
+    _save(entry.doc, key)
+    stat_result = os.stat(key)
+    with _lock:
+        entry.mtime_ns = stat_result.st_mtime_ns
+        entry.size = stat_result.st_size
+        entry.dirty_since = None
+        entry.last_edit = None
+        entry.snapshot = None
+        _stats["flushes"] += 1
+
+
+@contextlib.contextmanager
+def _write_access(key: str, timeout: float = 0) -> Iterator[bool]:
+    """
+    Hold the exclusive lock of a document while it is written, if possible.
+
+    Yields True if the current thread already holds the lock exclusively or
+    could take it within ``timeout`` seconds, False if the document is in use
+    (by another thread, or read by this one).
+    """
+    mode = held_lock(key)
+    if mode == "exclusive":
+        yield True
+        return
+    if mode == "shared" or not try_lock_exclusive(key, timeout):
+        yield False
+        return
+    try:
+        yield True
+    finally:
+        unlock_exclusive(key)
+
+
+def _over_budget(keep: Optional[str] = None) -> List[Tuple[str, _CacheEntry]]:
+    """
+    Evict clean entries, least recently used first, until the budget is respected.
+
+    Called with ``_lock`` held. Dirty entries cannot be dropped before they are
+    written, which must happen outside ``_lock``; they are returned for
+    :func:`_evict_dirty` instead.
+
+    Args:
+        keep: Key of an entry that must stay (the one just stored)
+    """
+    dirty = []
+    excess = _current_bytes - _max_bytes
+    for key, entry in list(_entries.items()):
+        if excess <= 0:
+            break
+        if key == keep:
+            continue
+        if entry.dirty_since is None:
+            _drop(key)
+            _stats["evictions"] += 1
+        else:
+            dirty.append((key, entry))
+        excess -= entry.cost
+    return dirty
+
+
+def _evict_dirty(victims: List[Tuple[str, _CacheEntry]]) -> None:
+    """Write out and drop dirty entries chosen by :func:`_over_budget`.
+
+    Documents that are in use are skipped and evicted on a later pass; so are
+    documents that fail to save, which keeps their edits in memory.
+    """
+    for key, entry in victims:
+        with _write_access(key) as writable:
+            if not writable:
+                continue
+            with _lock:
+                if _entries.get(key) is not entry:
+                    continue
+            if entry.dirty_since is not None:
+                try:
+                    _write(key, entry)
+                except Exception:
+                    continue
+            with _lock:
+                if _entries.get(key) is entry and entry.dirty_since is None:
+                    _drop(key)
+                    _stats["evictions"] += 1
+
+
+def _store(key: str, doc, stat_result: os.stat_result) -> Tuple[Optional[_CacheEntry], List]:
+    """Insert or refresh an entry and evict clean entries until the budget is respected.
+
+    Called with ``_lock`` held.
+
+    Returns:
+        Tuple of (the new entry or None if it does not fit, dirty entries to
+        pass to :func:`_evict_dirty` once ``_lock`` is released)
+    """
+    global _current_bytes
+    _drop(key)
+    entry = _CacheEntry(doc, stat_result.st_mtime_ns, stat_result.st_size)
+    if entry.cost > _max_bytes:
+        # Too large to fit in the budget at all; don't thrash the cache with it.
+        return None, []
+    _entries[key] = entry
+    _current_bytes += entry.cost
+    return entry, _over_budget(keep=key)
+
+
+def _take_snapshot(doc) -> list:
+    """Copy the XML parts of a document (body, styles, headers, notes...)."""
+    from docx.opc.part import XmlPart
+    return [(part, copy.deepcopy(part._element))
+            for part in doc.part.package.iter_parts() if isinstance(part, XmlPart)]
+
+
+def _refill(element, saved) -> None:
+    """Give ``element`` the attributes and children of ``saved``."""
+    element.attrib.clear()
+    element.attrib.update(saved.attrib)
+    element[:] = list(saved)
+
+
+def _restore_snapshot(doc, snapshot: list) -> None:
+    """Put the XML parts of ``doc`` back to a copy made by :func:`_take_snapshot`.
+
+    Root elements are refilled in place, so that objects keyed by them (the
+    block index, paragraph IDs) stay attached to the same document. So is
+    the document's ``w:body``, which python-docx's body proxy holds on to.
+    """
+    from docx.oxml.ns import qn
+    from word_document_server.utils.block_index import invalidate_block_index
+    body_tag = qn('w:body')
+    for part, saved in snapshot:
+        root = part._element
+        body = root.find(body_tag)
+        saved_body = saved.find(body_tag)
+        if body is None or saved_body is None:
+            _refill(root, saved)
+            continue
+        _refill(body, saved_body)
+        children = [body if child is saved_body else child for child in saved]
+        root.attrib.clear()
+        root.attrib.update(saved.attrib)
+        root[:] = children
+    invalidate_block_index(doc)
+
+
+def load_document(path: str):
+    """Return a parsed ``Document`` for ``path``, reusing a cached copy if valid.
+
+    The returned object is shared with other callers; tools that modify it must
+    either persist the change with :func:`save_document` or discard it with
+    :func:`invalidate_document`.
+
+    Args:
+        path: Path to an existing .docx file
+
+    Returns:
+        python-docx Document object
+    """
+    key = _cache_key(path)
+    stat_result = os.stat(path)
+    with _lock:
+        entry = _entries.get(key)
+        # Unflushed edits make the in-memory copy authoritative over the file.
+        if entry is not None and (entry.dirty_since is not None or (
+                entry.mtime_ns == stat_result.st_mtime_ns
+                and entry.size == stat_result.st_size)):
+            _entries.move_to_end(key)
+            _stats["hits"] += 1
+            instrumentation.count_cache_hit()
+            # A caller that may edit the document needs a rollback point for
+            # invalidate_document; readers hold a shared lock
+            needs_snapshot = (entry.dirty_since is not None and entry.snapshot is None
+                              and held_lock(key) != "shared")
+            if not needs_snapshot:
+                return entry.doc
+        else:
+            _stats["misses"] += 1
+            _drop(key)
+            entry = None
+
+    if entry is not None:
+        snapshot = _take_snapshot(entry.doc)
+        with _lock:
+            if entry.snapshot is None:
+                entry.snapshot = snapshot
+        return entry.doc
+
+    # Imported here so that starting the server does not pay for python-docx
+    from docx import Document
+    from word_document_server.utils.paragraph_ids import ensure_paragraph_ids
+    with instrumentation.timed("parse"):
+        doc = Document(path)
+        # Before any tool can move paragraphs around, so that IDs reported for
+        # the file stay attached to the same paragraphs
+        ensure_paragraph_ids(doc)
+    instrumentation.add_bytes(read=stat_result.st_size)
+
+    if _max_bytes > 0:
+        with _lock:
+            _, victims = _store(key, doc, stat_result)
+        _evict_dirty(victims)
+    return doc
+
+
+def save_document(doc, path: str) -> None:
+    """Save ``doc`` to ``path`` and keep the cache entry in sync with the new file.
+
+    In write-behind mode an existing file is not rewritten immediately; the
+    cached document is marked dirty and flushed later. New files are always
+    written at once so that existence checks in other tools see them.
+
+    Args:
+        doc: python-docx Document object
+        path: Destination path of the .docx file
+    """
+    # Imported here for the same reason as python-docx in load_document
+    from word_document_server.utils.paragraph_ids import assign_new_paragraph_ids
+    # Persist IDs of new paragraphs so that they stay valid across later edits
+    assign_new_paragraph_ids(doc)
+    key = _cache_key(path)
+    if _deferred_save and _max_bytes > 0 and os.path.exists(path):
+        victims = []
+        with _lock:
+            entry = _entries.get(key)
+            if entry is None or entry.doc is not doc:
+                entry, victims = _store(key, doc, os.stat(path))
+            if entry is not None:
+                now = time.monotonic()
+                if entry.dirty_since is None:
+                    entry.dirty_since = now
+                entry.last_edit = now
+                # The edit is accepted; the next one rolls back to this state
+                entry.snapshot = None
+                _stats["deferred_saves"] += 1
+                _ensure_flusher()
+        _evict_dirty(victims)
+        if entry is not None:
+            return
+    try:
+        _save(doc, path)
+    except Exception:
+        invalidate_document(path)
+        raise
+    if _max_bytes > 0:
+        stat_result = os.stat(path)
+        with _lock:
+            _, victims = _store(key, doc, stat_result)
+        _evict_dirty(victims)
+
+
+def invalidate_document(path: str) -> None:
+    """Discard changes to the cached copy of ``path`` made since it was last saved.
+
+    Tools call this when a modification failed part-way, so that the next load
+    does not see the half-applied change. A document without unwritten edits
+    is dropped and re-parsed from disk on the next load. In write-behind mode a
+    document with unwritten edits is rolled back to its state at the last
+    :func:`save_document` instead, so edits that earlier tool calls reported as
+    done are kept.
+    """
+    key = _cache_key(path)
+    with _lock:
+        entry = _entries.get(key)
+        if entry is None:
+            return
+        _stats["invalidations"] += 1
+        if entry.dirty_since is None:
+            _drop(key)
+            return
+        # Without a snapshot, nothing was loaded for writing since the last save
+        snapshot, entry.snapshot = entry.snapshot, None
+    if snapshot is not None:
+        _restore_snapshot(entry.doc, snapshot)
+        with _lock:
+            _stats["rollbacks"] += 1
+
+
+def flush_cached_document(path: str) -> bool:
+    """Write pending edits of ``path`` to disk.
+
+    Tools that read the file directly (copying, conversion, encryption,
+    streaming) call this first so that they see the latest content. The edits
+    are written under the exclusive lock of the document: the one the caller
+    holds, or one taken here if the caller holds none. Callers holding a
+    shared lock cannot write; :func:`locks.document_locks` takes the lock of
+    a document with pending edits exclusively, so they find none.
+
+    Args:
+        path: Path to the .docx file
+
+    Returns:
+        True if there were pending edits and they were written
+    """
+    key = _cache_key(path)
+    if not _has_pending_edits(key):
+        return False
+    mode = held_lock(key)
+    if mode == "shared":
+        return False
+    with contextlib.ExitStack() as stack:
+        if mode is None:
+            stack.enter_context(document_lock(key))
+        with _lock:
+            entry = _entries.get(key)
+            if entry is None or entry.dirty_since is None:
+                return False
+        _write(key, entry)
+    return True
+
+
+def _has_pending_edits(key: str) -> bool:
+    with _lock:
+        entry = _entries.get(key)
+        return entry is not None and entry.dirty_since is not None
+
+
+def flush_all_documents() -> int:
+    """Write pending edits of every cached document to disk.
+
+    Each document is written under its exclusive lock. A document that stays
+    in use for longer than ``FLUSH_ALL_LOCK_TIMEOUT`` seconds, or that the
+    calling thread is reading, is skipped and keeps its edits in memory.
+
+    Returns:
+        Number of documents written
+    """
+    flushed = 0
+    for key in dirty_paths():
+        with _write_access(key, FLUSH_ALL_LOCK_TIMEOUT) as writable:
+            if not writable:
+                continue
+            with _lock:
+                entry = _entries.get(key)
+                if entry is None or entry.dirty_since is None:
+                    continue
+            _write(key, entry)
+            flushed += 1
+    return flushed
+
+
+def dirty_paths() -> List[str]:
+    """Return the paths of cached documents with unwritten edits."""
+    with _lock:
+        return [key for key, entry in _entries.items() if entry.dirty_since is not None]
+
+
+def _flush_expired() -> None:
+    now = time.monotonic()
+    with _lock:
+        expired = [(key, entry) for key, entry in _entries.items()
+                   if entry.dirty_since is not None
+                   and (now - entry.last_edit >= _flush_idle_seconds
+                        or now - entry.dirty_since >= _max_dirty_seconds)]
+    for key, entry in expired:
+        # A tool holding the document lock may be half-way through an edit;
+        # skip the document and retry on the next tick.
+        with _write_access(key) as writable:
+            if not writable:
+                continue
+            with _lock:
+                if _entries.get(key) is not entry or entry.dirty_since is None:
+                    continue
+            try:
+                _write(key, entry)
+            except Exception:
+                # Keep the edits in memory; the next flush attempt may succeed.
+                pass
+
+
+def _flush_loop() -> None:
+    while True:
+        time.sleep(max(0.05, min(_flush_idle_seconds, _max_dirty_seconds, 1.0)))
+        _flush_expired()
+
+
+def _ensure_flusher() -> None:
+    global _flusher
+    if _flusher is None or not _flusher.is_alive():
+        _flusher = threading.Thread(target=_flush_loop, name="word-mcp-flusher", daemon=True)
+        _flusher.start()
+
+
+def configure_write_behind(enabled: bool, flush_idle_seconds: Optional[float] = None,
+                           max_dirty_seconds: Optional[float] = None) -> None:
+    """Enable or disable write-behind saving at runtime.
+
+    Disabling it flushes every pending edit first.
+
+    Args:
+        enabled: Whether save_document should defer writes
+        flush_idle_seconds: Optional idle time after which a dirty document is written
+        max_dirty_seconds: Optional upper bound on how long an edit may stay unwritten
+    """
+    global _deferred_save, _flush_idle_seconds, _max_dirty_seconds
+    if flush_idle_seconds is not None:
+        _flush_idle_seconds = flush_idle_seconds
+    if max_dirty_seconds is not None:
+        _max_dirty_seconds = max_dirty_seconds
+    if not enabled:
+        flush_all_documents()
+    _deferred_save = enabled
+
+
+def configure_cache(max_mb: float) -> None:
+    """Change the memory budget of the cache, evicting entries as needed.
+
+    Args:
+        max_mb: New budget in megabytes; 0 disables caching
+    """
+    global _max_bytes
+    with _lock:
+        _max_bytes = max(0, int(max_mb * 1024 * 1024))
+        victims = _over_budget()
+    _evict_dirty(victims)
+
+
+def clear_cache() -> None:
+    """Flush pending edits and drop every cached document.
+
+    Documents whose edits could not be written (see :func:`flush_all_documents`)
+    stay cached.
+    """
+    flush_all_documents()
+    with _lock:
+        for key, entry in list(_entries.items()):
+            if entry.dirty_since is None:
+                _drop(key)
+
+
+def get_cache_stats() -> Dict[str, Any]:
+    """Return hit/miss counters and memory usage of the document cache."""
+    with _lock:
+        lookups = _stats["hits"] + _stats["misses"]
+        return {
+            **_stats,
+            "hit_ratio": round(_stats["hits"] / lookups, 4) if lookups else 0.0,
+            "entries": len(_entries),
+            "dirty_entries": sum(1 for e in _entries.values() if e.dirty_since is not None),
+            "estimated_bytes": _current_bytes,
+            "max_bytes": _max_bytes,
+            "deferred_save": _deferred_save,
+        }
+
+
+set_pending_edits_check(_has_pending_edits)
+atexit.register(flush_all_documents)
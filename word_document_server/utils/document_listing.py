@@ -0,0 +1,314 @@
+"""
+Fast listing of the Word documents in a directory tree.
+
+Directories are walked with ``os.scandir``, which returns file types without
+a separate ``stat`` per entry. Each document's title, author and stored
+paragraph count come from its ``docProps`` parts (see doc_properties) and are
+cached in an SQLite database in ``WORD_MCP_CACHE_DIR``, keyed by inode,
+modification time and size, so they are read from the file only once per
+change. Metadata is looked up only for the documents on the requested page,
+unless the listing is sorted by a metadata field, and the rows of documents
+that were deleted are dropped whenever their directory is listed. Pending
+write-behind edits of the listed documents are written out first, so the
+metadata read from disk is current.
+
+Pages are addressed by an opaque cursor holding the sort key of the last
+document returned, so paging stays consistent when files are added or
+removed between calls.
+"""
+import base64
+import fnmatch
+import json
+import os
+import sqlite3
+import zipfile
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from word_document_server.utils.concurrency import map_in_processes
+from word_document_server.utils.doc_properties import read_app_properties, read_core_properties
+from word_document_server.utils.document_cache import dirty_paths, flush_cached_document
+from word_document_server.utils.file_utils import open_cache_db
+
+
+CACHE_FILENAME = "metadata-cache.sqlite3"
+
+SORT_FIELDS = ("name", "path", "size", "modified", "title", "author")
+
+# Sort fields that need each document's metadata rather than its directory entry
+METADATA_FIELDS = ("title", "author")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS metadata (
+    path TEXT PRIMARY KEY,
+    inode INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    title TEXT,
+    author TEXT,
+    paragraph_count INTEGER
+);
+"""
+
+
+class _Entry:
+    """A document found by the walker."""
+
+    __slots__ = ("path", "relative", "inode", "mtime_ns", "size", "metadata")
+
+    def __init__(self, path: str, relative: str, stat: os.stat_result):
+        self.path = path
+        self.relative = relative
+        self.inode = stat.st_ino
+        self.mtime_ns = stat.st_mtime_ns
+        self.size = stat.st_size
+        self.metadata: Optional[Tuple[Any, Any, Any]] = None
+
+    def sort_key(self, field: str) -> List[Any]:
+        if field == "name":
+            value: Any = os.path.basename(self.relative).lower()
+        elif field == "path":
+            value = self.relative.lower()
+        elif field == "size":
+            value = self.size
+        elif field == "modified":
+            value = self.mtime_ns
+        else:
+            value = (self.metadata[METADATA_FIELDS.index(field)] or "").lower()
+        return [value, self.relative]
+
+    def to_dict(self) -> Dict[str, Any]:
+        title, author, paragraph_count = self.metadata or (None, None, None)
+        return {
+            "path": self.relative,
+            "size": self.size,
+            "modified": datetime.fromtimestamp(self.mtime_ns / 1e9, timezone.utc).isoformat(timespec="seconds"),
+            "title": title or "",
+            "author": author or "",
+            "paragraph_count": paragraph_count,
+        }
+
+
+def connect(path: Optional[str] = None) -> sqlite3.Connection:
+    """
+    Open the metadata cache, creating it if needed.
+
+    Args:
+        path: Database file; defaults to the cache in :func:`file_utils.cache_dir`
+    """
+    return open_cache_db(CACHE_FILENAME, _SCHEMA, path)
+
+
+def _matches(relative: str, pattern: str) -> bool:
+    # Patterns with a directory part apply to the relative path, others to the name;
+    # like the .docx extension check, matching ignores case on every platform
+    if "/" not in pattern:
+        relative = relative.rsplit("/", 1)[-1]
+    return fnmatch.fnmatchcase(relative.lower(), pattern.lower())
+
+
+def flush_pending_edits(directory: str, recursive: bool = False) -> int:
+    """
+    Write the pending write-behind edits of the documents below a directory.
+
+    Readers that go to the files on disk call this first, so they see the
+    same content as the tools that read through the document cache.
+
+    Args:
+        directory: Directory about to be scanned
+        recursive: Include documents in subdirectories
+
+    Returns:
+        Number of documents written
+    """
+    root = os.path.normcase(os.path.abspath(directory))
+    prefix = os.path.join(root, "")
+    written = 0
+    for path in dirty_paths():
+        if path.startswith(prefix) and (recursive or os.path.dirname(path) == root):
+            written += flush_cached_document(path)
+    return written
+
+
+def walk_documents(directory: str, pattern: str = "*.docx", recursive: bool = False) -> Iterator[_Entry]:
+    """
+    Yield the Word documents below a directory.
+
+    Hidden directories, Office lock files (``~$``) and files that are not
+    .docx are skipped.
+
+    Args:
+        directory: Directory to scan
+        pattern: Glob matched case-insensitively against the file name, or
+            against the path relative to directory (with "/" separators) if
+            it contains "/"
+        recursive: Descend into subdirectories
+    """
+    root = os.path.abspath(directory)
+    pending = [(root, "")]
+    while pending:
+        current, prefix = pending.pop()
+        try:
+            entries = os.scandir(current)
+        except OSError:
+            continue
+        with entries:
+            for entry in entries:
+                name = entry.name
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if recursive and not name.startswith("."):
+                            pending.append((entry.path, prefix + name + "/"))
+                        continue
+                    if not name.lower().endswith(".docx") or name.startswith("~$"):
+                        continue
+                    relative = prefix + name
+                    if _matches(relative, pattern):
+                        yield _Entry(entry.path, relative, entry.stat())
+                except OSError:
+                    continue
+
+
+def _read_metadata(path: str) -> Tuple[Any, Any, Any]:
+    """Return (title, author, paragraph_count) from a document's docProps parts."""
+    try:
+        with zipfile.ZipFile(path) as zf:
+            core = read_core_properties(zf)
+            app = read_app_properties(zf)
+    except (OSError, zipfile.BadZipFile):
+        return None, None, None
+    return core["title"], core["author"], app.get("paragraph_count")
+
+
+def load_metadata(connection: sqlite3.Connection, entries: List[_Entry]) -> int:
+    """
+    Fill in the metadata of entries, reading only documents that changed.
+
+    Args:
+        connection: Connection from :func:`connect`
+        entries: Entries from :func:`walk_documents`
+
+    Returns:
+        Number of documents whose metadata had to be read
+    """
+    missing = [entry for entry in entries if entry.metadata is None]
+    stale = []
+    for start in range(0, len(missing), 500):
+        chunk = missing[start:start + 500]
+        rows = connection.execute(
+            "SELECT path, inode, mtime_ns, size, title, author, paragraph_count FROM metadata "
+            f"WHERE path IN ({','.join('?' * len(chunk))})", [entry.path for entry in chunk])
+        cached = {row[0]: row[1:] for row in rows}
+        for entry in chunk:
+            row = cached.get(entry.path)
+            if row is not None and tuple(row[:3]) == (entry.inode, entry.mtime_ns, entry.size):
+                entry.metadata = tuple(row[3:])
+            else:
+                stale.append(entry)
+
+    if stale:
+        for entry, metadata in zip(stale, map_in_processes(_read_metadata, [entry.path for entry in stale])):
+            entry.metadata = metadata
+        connection.executemany(
+            "INSERT OR REPLACE INTO metadata (path, inode, mtime_ns, size, title, author, paragraph_count) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [(entry.path, entry.inode, entry.mtime_ns, entry.size, *entry.metadata) for entry in stale])
+        connection.commit()
+    return len(stale)
+
+
+def prune_metadata(connection: sqlite3.Connection, directory: str, entries: List[_Entry]) -> int:
+    """
+    Drop the cached metadata of documents below a directory that no longer exist.
+
+    Args:
+        connection: Connection from :func:`connect`
+        directory: Directory that was scanned
+        entries: Entries from :func:`walk_documents`, which are known to exist
+
+    Returns:
+        Number of rows removed
+    """
+    root = os.path.join(os.path.abspath(directory), "")
+    escaped = root.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    seen = {entry.path for entry in entries}
+    rows = connection.execute("SELECT path FROM metadata WHERE path LIKE ? ESCAPE '\\'", (escaped + "%",))
+    gone = [(path,) for (path,) in rows if path not in seen and not os.path.exists(path)]
+    if gone:
+        connection.executemany("DELETE FROM metadata WHERE path = ?", gone)
+        connection.commit()
+    return len(gone)
+
+
+def encode_cursor(sort_by: str, descending: bool, key: List[Any]) -> str:
+    """Encode the position after a document as an opaque cursor."""
+    raw = json.dumps([sort_by, descending, key], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def decode_cursor(cursor: str, sort_by: str, descending: bool) -> List[Any]:
+    """
+    Decode a cursor from :func:`encode_cursor`.
+
+    Raises:
+        ValueError: If the cursor is malformed or was made for another sort order
+    """
+    try:
+        cursor_sort, cursor_descending, key = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except Exception:
+        raise ValueError("cursor is not valid")
+    if cursor_sort != sort_by or cursor_descending != descending:
+        raise ValueError("cursor belongs to a listing with a different sort order")
+    # The key is compared with sort keys, so it must have their types
+    value_type = int if sort_by in ("size", "modified") else str
+    if (not isinstance(key, list) or len(key) != 2 or type(key[0]) is not value_type
+            or not isinstance(key[1], str)):
+        raise ValueError("cursor is not valid")
+    return key
+
+
+def list_documents(directory: str, pattern: str = "*.docx", recursive: bool = False, sort_by: str = "name",
+                   descending: bool = False, limit: int = 100, cursor: Optional[str] = None) -> Dict[str, Any]:
+    """
+    List one page of the Word documents below a directory.
+
+    Args:
+        directory: Directory to scan
+        pattern: Glob for file names (or relative paths if it contains "/")
+        recursive: Include subdirectories
+        sort_by: One of SORT_FIELDS
+        descending: Reverse the sort order
+        limit: Maximum number of documents to return
+        cursor: next_cursor of the previous page
+
+    Returns:
+        Dict with "total", "documents" and "next_cursor" (None on the last page)
+
+    Raises:
+        ValueError: For an unknown sort field or an invalid cursor
+    """
+    if sort_by not in SORT_FIELDS:
+        raise ValueError(f"sort_by must be one of {list(SORT_FIELDS)}")
+    after = decode_cursor(cursor, sort_by, descending) if cursor else None
+
+    flush_pending_edits(directory, recursive)
+    entries = list(walk_documents(directory, pattern, recursive))
+    connection = connect()
+    try:
+        if sort_by in METADATA_FIELDS:
+            load_metadata(connection, entries)
+        keyed = sorted(((entry.sort_key(sort_by), entry) for entry in entries),
+                       key=lambda item: item[0], reverse=descending)
+        if after is not None:
+            keyed = [item for item in keyed if (item[0] < after if descending else item[0] > after)]
+        page = keyed[:limit]
+        load_metadata(connection, [entry for _, entry in page])
+        prune_metadata(connection, directory, entries)
+    finally:
+        connection.close()
+
+    return {
+        "total": len(entries),
+        "documents": [entry.to_dict() for _, entry in page],
+        "next_cursor": encode_cursor(sort_by, descending, page[-1][0]) if len(keyed) > limit else None,
+    }
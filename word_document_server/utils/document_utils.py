@@ -2,107 +2,145 @@
 Document utility functions for Word Document Server.
 """
 import json
-from typing import Dict, List, Any
-from docx import Document
+import zipfile
+from typing import Dict, List, Any, Optional
+from word_document_server.utils.document_cache import flush_cached_document
+from word_document_server.utils.doc_properties import read_app_properties, read_core_properties
+from word_document_server.utils.docx_stream import StreamedTable, iter_body, iter_paragraphs, paragraph_style_names
+from word_document_server.utils.pagination import encode_cursor, page_request
+from word_document_server.utils.text_replace import compile_pattern, pattern_finder, replace_text
 
 
-def get_document_properties(doc_path: str) -> Dict[str, Any]:
-    """Get properties of a Word document."""
+def get_document_properties(doc_path: str, include_counts: bool = True) -> Dict[str, Any]:
+    """Get properties of a Word document.
+    
+    Metadata is read from the docProps parts of the package without parsing
+    the document body, which is streamed to count words, paragraphs and
+    tables. "page_count" is the statistic stored by the application that
+    last saved the file, None if there is none (python-docx stores none).
+    Without include_counts the body is not read: "word_count" is then the
+    stored statistic too, and "paragraph_count" and "table_count" are None.
+    """
     import os
     if not os.path.exists(doc_path):
         return {"error": f"Document {doc_path} does not exist"}
     
     try:
-        doc = Document(doc_path)
-        core_props = doc.core_properties
+        # Pending write-behind edits live only in memory; make the file current first
+        flush_cached_document(doc_path)
+        with zipfile.ZipFile(doc_path) as zf:
+            properties = read_core_properties(zf)
+            statistics = read_app_properties(zf)
         
-        return {
-            "title": core_props.title or "",
-            "author": core_props.author or "",
-            "subject": core_props.subject or "",
-            "keywords": core_props.keywords or "",
-            "created": str(core_props.created) if core_props.created else "",
-            "modified": str(core_props.modified) if core_props.modified else "",
-            "last_modified_by": core_props.last_modified_by or "",
-            "revision": core_props.revision or 0,
-            "page_count": len(doc.sections),
-            "word_count": sum(len(paragraph.text.split()) for paragraph in doc.paragraphs),
-            "paragraph_count": len(doc.paragraphs),
-            "table_count": len(doc.tables)
-        }
+        properties["application"] = statistics.get("application", "")
+        properties["page_count"] = statistics.get("page_count")
+        properties["word_count"] = statistics.get("word_count")
+        properties["paragraph_count"] = None
+        properties["table_count"] = None
+        
+        if include_counts:
+            word_count = paragraph_count = table_count = 0
+            for block in iter_body(doc_path):
+                if isinstance(block, StreamedTable):
+                    table_count += 1
+                elif block.index is not None:
+                    paragraph_count += 1
+                    word_count += len(block.text.split())
+            properties.update(word_count=word_count, paragraph_count=paragraph_count,
+                              table_count=table_count)
+        
+        return properties
     except Exception as e:
         return {"error": f"Failed to get document properties: {str(e)}"}
 
 
 def extract_document_text(doc_path: str) -> str:
-    """Extract all text from a Word document."""
+    """Extract all text from a Word document, in body order.
+    
+    Paragraph and table-cell text is streamed straight from the document XML
+    without building the python-docx object model.
+    """
     import os
     if not os.path.exists(doc_path):
         return f"Document {doc_path} does not exist"
     
     try:
-        doc = Document(doc_path)
-        text = []
-        
-        for paragraph in doc.paragraphs:
-            text.append(paragraph.text)
-            
-        for table in doc.tables:
-            for row in table.rows:
-                for cell in row.cells:
-                    for paragraph in cell.paragraphs:
-                        text.append(paragraph.text)
-        
-        return "\n".join(text)
+        return "\n".join(paragraph.text for paragraph in iter_paragraphs(doc_path))
     except Exception as e:
         return f"Failed to extract text: {str(e)}"
 
 
-def get_document_structure(doc_path: str) -> Dict[str, Any]:
-    """Get the structure of a Word document."""
+def _truncate(text: str, length: int) -> str:
+    return text[:length] + ("..." if len(text) > length else "")
+
+
+def get_document_structure(doc_path: str, offset: int = 0, limit: Optional[int] = None,
+                           cursor: Optional[str] = None) -> Dict[str, Any]:
+    """Get the structure of a Word document.
+    
+    The body is streamed from the document XML. With a limit, only body
+    paragraphs [offset, offset + limit) are reported, with the tables that
+    appear among them, and reading stops at the end of that range.
+    """
     import os
     if not os.path.exists(doc_path):
         return {"error": f"Document {doc_path} does not exist"}
     
+    paginated = bool(offset or limit is not None or cursor)
+    try:
+        _, offset, limit = page_request("get_document_outline", doc_path, offset, limit, "paragraphs", cursor)
+    except ValueError as e:
+        return {"error": f"Invalid parameter: {str(e)}"}
+    
     try:
-        doc = Document(doc_path)
+        style_names, default_style = paragraph_style_names(doc_path)
         structure = {
             "paragraphs": [],
             "tables": []
         }
+        end = offset + limit if limit is not None else None
+        more = False
         
-        # Get paragraphs
-        for i, para in enumerate(doc.paragraphs):
-            structure["paragraphs"].append({
-                "index": i,
-                "text": para.text[:100] + ("..." if len(para.text) > 100 else ""),
-                "style": para.style.name if para.style else "Normal"
-            })
-        
-        # Get tables
-        for i, table in enumerate(doc.tables):
-            table_data = {
-                "index": i,
-                "rows": len(table.rows),
-                "columns": len(table.columns),
-                "preview": []
-            }
-            
-            # Get sample of table data
-            max_rows = min(3, len(table.rows))
-            for row_idx in range(max_rows):
-                row_data = []
-                max_cols = min(3, len(table.columns))
-                for col_idx in range(max_cols):
-                    try:
-                        cell_text = table.cell(row_idx, col_idx).text
-                        row_data.append(cell_text[:20] + ("..." if len(cell_text) > 20 else ""))
-                    except IndexError:
-                        row_data.append("N/A")
-                table_data["preview"].append(row_data)
-            
-            structure["tables"].append(table_data)
+        # Body paragraphs seen so far; a table belongs to the page its position falls in
+        position = 0
+        blocks = iter_body(doc_path)
+        try:
+            for block in blocks:
+                if isinstance(block, StreamedTable):
+                    if end is not None and position >= end:
+                        more = True
+                        break
+                    if position >= offset:
+                        structure["tables"].append({
+                            "index": block.index,
+                            "rows": block.rows,
+                            "columns": block.columns,
+                            "preview": [[_truncate(cell, 20) for cell in row] for row in block.preview]
+                        })
+                    continue
+                if block.index is None:
+                    continue
+                if end is not None and position >= end:
+                    more = True
+                    break
+                position += 1
+                if block.index < offset:
+                    continue
+                # The ID stays valid when other paragraphs are added or deleted
+                structure["paragraphs"].append({
+                    "index": block.index,
+                    "id": block.para_id,
+                    "text": _truncate(block.text, 100),
+                    "style": style_names.get(block.style_id) or default_style or "Normal"
+                })
+        finally:
+            # Stop parsing the rest of the document
+            blocks.close()
         
+        if paginated:
+            structure["offset"] = offset
+            structure["next_cursor"] = (encode_cursor("get_document_outline", "paragraphs", end, doc_path)
+                                        if more else None)
         return structure
     except Exception as e:
         return {"error": f"Failed to get document structure: {str(e)}"}
@@ -131,37 +169,26 @@ def find_paragraph_by_text(doc, text, partial_match=False):
     return matching_paragraphs
 
 
-def find_and_replace_text(doc, old_text, new_text):
+def find_and_replace_text(doc, old_text, new_text, use_regex=False, match_case=True):
     """
     Find and replace text throughout the document.
     
+    Matches may span runs with different formatting; the replacement takes
+    the formatting of the run where the match starts. The body, tables,
+    headers and footers are searched.
+    
     Args:
         doc: Document object
-        old_text: Text to find
-        new_text: Text to replace with
+        old_text: Text to find, or a regular expression when use_regex is set
+        new_text: Text to replace with; may refer to regex groups as \\1
+        use_regex: Treat old_text as a regular expression
+        match_case: Match case exactly
         
     Returns:
         Number of replacements made
+        
+    Raises:
+        re.error: If old_text is not a valid regular expression
     """
-    count = 0
-    
-    # Search in paragraphs
-    for para in doc.paragraphs:
-        if old_text in para.text:
-            for run in para.runs:
-                if old_text in run.text:
-                    run.text = run.text.replace(old_text, new_text)
-                    count += 1
-    
-    # Search in tables
-    for table in doc.tables:
-        for row in table.rows:
-            for cell in row.cells:
-                for para in cell.paragraphs:
-                    if old_text in para.text:
-                        for run in para.runs:
-                            if old_text in run.text:
-                                run.text = run.text.replace(old_text, new_text)
-                                count += 1
-    
-    return count
+    pattern = compile_pattern(old_text, use_regex, match_case)
+    return len(replace_text(doc, pattern_finder(pattern, new_text, use_regex)))
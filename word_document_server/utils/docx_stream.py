@@ -0,0 +1,297 @@
+"""
+Streaming read-only access to the body of a Word document.
+
+These helpers read the main document part straight from the .docx zip with
+lxml ``iterparse`` instead of building the python-docx object graph. Elements
+are cleared as soon as they have been reported, so memory use stays flat no
+matter how large the document is, and callers can stop early by simply not
+consuming the rest of the generator.
+"""
+import posixpath
+import zipfile
+from collections import namedtuple
+from typing import Dict, Iterator, Optional, Set, Tuple, Union
+
+from lxml import etree
+
+from word_document_server.utils.document_cache import flush_cached_document
+from word_document_server.utils.instrumentation import add_bytes
+from word_document_server.utils.paragraph_ids import (
+    PARA_ID, existing_paragraph_id, is_package_part, new_paragraph_id, scan_paragraph_ids
+)
+
+
+W_NS = 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'
+REL_NS = 'http://schemas.openxmlformats.org/package/2006/relationships'
+OFFICE_DOCUMENT_REL = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument'
+
+_BODY = f'{{{W_NS}}}body'
+_P = f'{{{W_NS}}}p'
+_TBL = f'{{{W_NS}}}tbl'
+_TR = f'{{{W_NS}}}tr'
+_TC = f'{{{W_NS}}}tc'
+_R = f'{{{W_NS}}}r'
+_HYPERLINK = f'{{{W_NS}}}hyperlink'
+_PPR = f'{{{W_NS}}}pPr'
+_PSTYLE = f'{{{W_NS}}}pStyle'
+_TBLGRID = f'{{{W_NS}}}tblGrid'
+_GRIDCOL = f'{{{W_NS}}}gridCol'
+_VAL = f'{{{W_NS}}}val'
+_TYPE = f'{{{W_NS}}}type'
+_STYLE = f'{{{W_NS}}}style'
+_STYLE_ID = f'{{{W_NS}}}styleId'
+_NAME = f'{{{W_NS}}}name'
+_DEFAULT = f'{{{W_NS}}}default'
+
+# Run children that contribute text, mirroring python-docx's Run.text
+_T = f'{{{W_NS}}}t'
+_TAB = f'{{{W_NS}}}tab'
+_PTAB = f'{{{W_NS}}}ptab'
+_BR = f'{{{W_NS}}}br'
+_CR = f'{{{W_NS}}}cr'
+_NO_BREAK_HYPHEN = f'{{{W_NS}}}noBreakHyphen'
+
+# Number of rows/columns captured for table previews
+PREVIEW_SIZE = 3
+
+
+# A paragraph in body order. ``index`` matches python-docx's doc.paragraphs
+# numbering and is None for paragraphs that are not direct children of the
+# body (table cells, content controls). Table paragraphs carry the index of
+# their top-level table and the row/column of their cell. ``para_id`` is the
+# paragraph ID tools accept in place of ``index`` (see paragraph_ids); other
+# paragraphs report their w14:paraId if they have one.
+StreamedParagraph = namedtuple(
+    'StreamedParagraph', ['index', 'text', 'style_id', 'table_index', 'row', 'column', 'para_id']
+)
+
+# A top-level table, reported after all of its paragraphs. ``index`` matches
+# doc.tables numbering; ``preview`` holds the text of the first 3x3 cells.
+StreamedTable = namedtuple('StreamedTable', ['index', 'rows', 'columns', 'preview'])
+
+
+def main_part_name(zf: zipfile.ZipFile) -> str:
+    """Return the zip member name of the main document part."""
+    try:
+        rels = etree.fromstring(zf.read('_rels/.rels'))
+        for rel in rels.iter(f'{{{REL_NS}}}Relationship'):
+            if rel.get('Type') == OFFICE_DOCUMENT_REL:
+                return posixpath.normpath(rel.get('Target').lstrip('/'))
+    except (KeyError, etree.XMLSyntaxError):
+        pass
+    return 'word/document.xml'
+
+
+def _run_text(r) -> str:
+    parts = []
+    for child in r:
+        tag = child.tag
+        if tag == _T:
+            parts.append(child.text or '')
+        elif tag == _TAB or tag == _PTAB:
+            parts.append('\t')
+        elif tag == _BR:
+            if child.get(_TYPE) in (None, 'textWrapping'):
+                parts.append('\n')
+        elif tag == _CR:
+            parts.append('\n')
+        elif tag == _NO_BREAK_HYPHEN:
+            parts.append('-')
+    return ''.join(parts)
+
+
+def paragraph_text(p) -> str:
+    """Return the text of a ``w:p`` element the way python-docx's Paragraph.text does."""
+    parts = []
+    for child in p:
+        if child.tag == _R:
+            parts.append(_run_text(child))
+        elif child.tag == _HYPERLINK:
+            for r in child:
+                if r.tag == _R:
+                    parts.append(_run_text(r))
+    return ''.join(parts)
+
+
+def _style_id(p):
+    pPr = p.find(_PPR)
+    if pPr is None:
+        return None
+    pStyle = pPr.find(_PSTYLE)
+    return pStyle.get(_VAL) if pStyle is not None else None
+
+
+def _release(elem) -> None:
+    """Free a processed element and everything before it at the same level."""
+    elem.clear()
+    parent = elem.getparent()
+    if parent is not None:
+        while elem.getprevious() is not None:
+            del parent[0]
+
+
+def _package_paragraph_ids(zf: zipfile.ZipFile) -> Set[str]:
+    """Read the paraIds of a package, as paragraph_ids.reserved_paragraph_ids does for a loaded document."""
+    ids: Set[str] = set()
+    for name in zf.namelist():
+        if is_package_part(name):
+            with zf.open(name) as stream:
+                ids.update(scan_paragraph_ids(stream))
+    return ids
+
+
+def iter_body(doc_path: str) -> Iterator[Union[StreamedParagraph, StreamedTable]]:
+    """
+    Stream the paragraphs and tables of a Word document in body order.
+
+    Paragraphs inside a table are yielded as they are parsed, followed by a
+    StreamedTable summary once the table is complete. Text boxes nested inside
+    paragraphs are skipped, as in python-docx.
+
+    Args:
+        doc_path: Path to the Word document
+
+    Yields:
+        StreamedParagraph and StreamedTable tuples
+    """
+    # Pending write-behind edits live only in memory; make the file current first
+    flush_cached_document(doc_path)
+
+    with zipfile.ZipFile(doc_path) as zf:
+        part_name = main_part_name(zf)
+        add_bytes(read=zf.getinfo(part_name).compress_size)
+        with zf.open(part_name) as stream:
+            context = etree.iterparse(
+                stream, events=('start', 'end'), tag=(_P, _TBL, _TR, _TC),
+                huge_tree=True, resolve_entities=False
+            )
+
+            paragraph_index = 0
+            used_ids = set()
+            # Every paraId in the package, read only once a paragraph needs a new ID
+            reserved_ids = None
+            table_index = -1
+            p_depth = 0
+            tbl_depth = 0
+            row = column = -1
+            preview = []
+
+            for event, elem in context:
+                tag = elem.tag
+                if event == 'start':
+                    if tag == _P:
+                        p_depth += 1
+                    elif p_depth:
+                        # Content of a text box anchored in a paragraph
+                        pass
+                    elif tag == _TBL:
+                        tbl_depth += 1
+                        if tbl_depth == 1:
+                            table_index += 1
+                            row = -1
+                            preview = []
+                    elif tbl_depth == 1:
+                        if tag == _TR:
+                            row += 1
+                            column = -1
+                        else:
+                            column += 1
+                    continue
+
+                if tag == _P:
+                    p_depth -= 1
+                    if p_depth > 0:
+                        # Paragraph inside a text box; its text is not part of the body flow
+                        continue
+                    at_body = elem.getparent().tag == _BODY
+                    if tbl_depth:
+                        yield StreamedParagraph(None, paragraph_text(elem), _style_id(elem),
+                                                table_index, row, column, elem.get(PARA_ID))
+                    else:
+                        if at_body:
+                            para_id = existing_paragraph_id(elem, used_ids)
+                            if para_id is None:
+                                if reserved_ids is None:
+                                    reserved_ids = _package_paragraph_ids(zf)
+                                para_id = new_paragraph_id(paragraph_index, used_ids, reserved_ids)
+                        else:
+                            para_id = elem.get(PARA_ID)
+                        yield StreamedParagraph(paragraph_index if at_body else None,
+                                                paragraph_text(elem), _style_id(elem),
+                                                None, None, None, para_id)
+                        if at_body:
+                            paragraph_index += 1
+                            _release(elem)
+                        else:
+                            elem.clear()
+                elif p_depth:
+                    # Table content inside a text box
+                    continue
+                elif tag == _TC:
+                    if tbl_depth == 1 and row < PREVIEW_SIZE and column < PREVIEW_SIZE:
+                        cell_text = '\n'.join(paragraph_text(p) for p in elem if p.tag == _P)
+                        if column == 0:
+                            preview.append([])
+                        if preview:
+                            preview[-1].append(cell_text)
+                elif tag == _TR:
+                    if tbl_depth == 1:
+                        elem.clear()
+                elif tag == _TBL:
+                    tbl_depth -= 1
+                    if tbl_depth == 0:
+                        grid = elem.find(_TBLGRID)
+                        columns = len(grid.findall(_GRIDCOL)) if grid is not None else 0
+                        yield StreamedTable(table_index, row + 1, columns, preview)
+                        if elem.getparent().tag == _BODY:
+                            _release(elem)
+
+
+def iter_paragraphs(doc_path: str) -> Iterator[StreamedParagraph]:
+    """
+    Stream every paragraph of a Word document, including table cells, in body order.
+
+    Args:
+        doc_path: Path to the Word document
+
+    Yields:
+        StreamedParagraph tuples
+    """
+    for block in iter_body(doc_path):
+        if isinstance(block, StreamedParagraph):
+            yield block
+
+
+def paragraph_style_names(doc_path: str) -> Tuple[Dict[str, str], Optional[str]]:
+    """
+    Read the names of the paragraph styles defined in a Word document.
+
+    Names are given as python-docx reports them (``Heading 1`` rather than
+    the stored ``heading 1``).
+
+    Args:
+        doc_path: Path to the Word document
+
+    Returns:
+        Tuple of (style ID -> name, name of the default paragraph style or None)
+    """
+    from docx.styles import BabelFish
+
+    names = {}
+    default = None
+    with zipfile.ZipFile(doc_path) as zf:
+        try:
+            info = zf.getinfo('word/styles.xml')
+        except KeyError:
+            return names, default
+        add_bytes(read=info.compress_size)
+        root = etree.fromstring(zf.read(info), etree.XMLParser(resolve_entities=False, huge_tree=True))
+    for style in root.iter(_STYLE):
+        if style.get(_TYPE) != 'paragraph':
+            continue
+        name = style.find(_NAME)
+        name = BabelFish.internal2ui(name.get(_VAL)) if name is not None and name.get(_VAL) else None
+        names[style.get(_STYLE_ID)] = name
+        if default is None and style.get(_DEFAULT) in ('1', 'true', 'on'):
+            default = name
+    return names, default
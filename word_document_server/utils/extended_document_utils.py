@@ -1,17 +1,21 @@
 """
 Extended document utilities for Word Document Server.
 """
-from typing import Dict, List, Any, Tuple
-from docx import Document
+from typing import Dict, List, Any, Optional, Tuple, Union
+from word_document_server.utils.document_cache import load_document
+from word_document_server.utils.block_index import get_block_index
+from word_document_server.utils.docx_stream import iter_paragraphs
+from word_document_server.utils.text_replace import compile_any, compile_pattern
+from word_document_server.utils.paragraph_ids import paragraph_id_of, resolve_paragraph
 
 
-def get_paragraph_text(doc_path: str, paragraph_index: int) -> Dict[str, Any]:
+def get_paragraph_text(doc_path: str, paragraph_index: Union[int, str]) -> Dict[str, Any]:
     """
     Get text from a specific paragraph in a Word document.
     
     Args:
         doc_path: Path to the Word document
-        paragraph_index: Index of the paragraph to extract (0-based)
+        paragraph_index: Index of the paragraph to extract (0-based) or its paragraph ID
     
     Returns:
         Dictionary with paragraph text and metadata
@@ -21,16 +25,16 @@ def get_paragraph_text(doc_path: str, paragraph_index: int) -> Dict[str, Any]:
         return {"error": f"Document {doc_path} does not exist"}
     
     try:
-        doc = Document(doc_path)
+        doc = load_document(doc_path)
         
-        # Check if paragraph index is valid
-        if paragraph_index < 0 or paragraph_index >= len(doc.paragraphs):
-            return {"error": f"Invalid paragraph index: {paragraph_index}. Document has {len(doc.paragraphs)} paragraphs."}
-        
-        paragraph = doc.paragraphs[paragraph_index]
+        # Find the paragraph by index or ID
+        paragraph, error = resolve_paragraph(doc, paragraph_index)
+        if paragraph is None:
+            return {"error": error}
         
         return {
-            "index": paragraph_index,
+            "index": get_block_index(doc).paragraph_position(paragraph._p),
+            "id": paragraph_id_of(doc, paragraph),
             "text": paragraph.text,
             "style": paragraph.style.name if paragraph.style else "Normal",
             "is_heading": paragraph.style.name.startswith("Heading") if paragraph.style else False
@@ -39,127 +43,117 @@ def get_paragraph_text(doc_path: str, paragraph_index: int) -> Dict[str, Any]:
         return {"error": f"Failed to get paragraph text: {str(e)}"}
 
 
-def find_text(doc_path: str, text_to_find: str, match_case: bool = True, whole_word: bool = False) -> Dict[str, Any]:
+CONTEXT_LENGTH = 100
+
+
+def _context(text: str) -> str:
+    return text[:CONTEXT_LENGTH] + ("..." if len(text) > CONTEXT_LENGTH else "")
+
+
+def _group(occurrences: List[Any], truncated: bool, compact: bool) -> Dict[str, Any]:
+    """Return the count, truncation flag and occurrences of one query."""
+    group: Dict[str, Any] = {"total_count": len(occurrences), "truncated": truncated}
+    if compact:
+        group["occurrences"] = {
+            "context": [context_idx for context_idx, _ in occurrences],
+            "position": [pos for _, pos in occurrences]
+        }
+    else:
+        group["occurrences"] = occurrences
+    return group
+
+
+def find_text(doc_path: str, text_to_find: Union[str, List[str]], match_case: bool = True,
+              whole_word: bool = False, max_results: Optional[int] = None, compact: bool = False) -> Dict[str, Any]:
     """
     Find all occurrences of specific text in a Word document.
     
+    The document is streamed once in body order, table cells included, and
+    the scan stops as soon as every query has max_results occurrences. Each
+    query is compiled once into a regular expression; paragraphs that none
+    of the queries can match are rejected by a single combined search.
+    
     Args:
         doc_path: Path to the Word document
-        text_to_find: Text to search for
+        text_to_find: Text to search for, or a list of texts to search for together
         match_case: Whether to perform case-sensitive search
-        whole_word: Whether to match whole words only
+        whole_word: Whether to match whole words only, i.e. not directly
+            preceded or followed by a letter, digit or underscore
+        max_results: Stop after this many occurrences of each query; None for all
+        compact: Return the columnar layout, with each matching paragraph's
+            context listed once and referenced by index
     
     Returns:
-        Dictionary with search results
+        Dictionary with search results; for a list of queries, the results of
+        each query are grouped under "results" in the order given. Positions
+        are character offsets into the paragraph text.
     """
     import os
     if not os.path.exists(doc_path):
         return {"error": f"Document {doc_path} does not exist"}
     
-    if not text_to_find:
+    queries = [text_to_find] if isinstance(text_to_find, str) else list(text_to_find)
+    if not queries or not all(queries):
         return {"error": "Search text cannot be empty"}
     
     try:
-        doc = Document(doc_path)
-        results = {
-            "query": text_to_find,
-            "match_case": match_case,
-            "whole_word": whole_word,
-            "occurrences": [],
-            "total_count": 0
-        }
+        patterns = [compile_pattern(query, False, match_case, whole_word) for query in queries]
+        if len(patterns) == 1:
+            combined = patterns[0]
+        else:
+            # A superset of the queries' matches: plain literals let re skip to candidate
+            # positions, where word-boundary lookarounds in every branch would not
+            combined = compile_any(queries, match_case)
+        occurrences: List[List[Any]] = [[] for _ in queries]
+        truncated = [False] * len(queries)
+        remaining = len(queries)
+        contexts = []
         
-        # Search in paragraphs
-        for i, para in enumerate(doc.paragraphs):
-            # Prepare text for comparison
-            para_text = para.text
-            search_text = text_to_find
-            
-            if not match_case:
-                para_text = para_text.lower()
-                search_text = search_text.lower()
-            
-            # Find all occurrences (simple implementation)
-            start_pos = 0
-            while True:
-                if whole_word:
-                    # For whole word search, we need to check word boundaries
-                    words = para_text.split()
-                    found = False
-                    for word_idx, word in enumerate(words):
-                        if (word == search_text or 
-                            (not match_case and word.lower() == search_text.lower())):
-                            results["occurrences"].append({
-                                "paragraph_index": i,
-                                "position": word_idx,
-                                "context": para.text[:100] + ("..." if len(para.text) > 100 else "")
-                            })
-                            results["total_count"] += 1
-                            found = True
-                    
-                    # Break after checking all words
-                    break
+        paragraphs = iter_paragraphs(doc_path)
+        try:
+            for para in paragraphs:
+                if para.table_index is not None:
+                    where = {"location": f"Table {para.table_index}, Row {para.row}, Column {para.column}"}
+                elif para.index is not None:
+                    where = {"paragraph_index": para.index}
                 else:
-                    # For substring search
-                    pos = para_text.find(search_text, start_pos)
-                    if pos == -1:
-                        break
-                    
-                    results["occurrences"].append({
-                        "paragraph_index": i,
-                        "position": pos,
-                        "context": para.text[:100] + ("..." if len(para.text) > 100 else "")
-                    })
-                    results["total_count"] += 1
-                    start_pos = pos + len(search_text)
-        
-        # Search in tables
-        for table_idx, table in enumerate(doc.tables):
-            for row_idx, row in enumerate(table.rows):
-                for col_idx, cell in enumerate(row.cells):
-                    for para_idx, para in enumerate(cell.paragraphs):
-                        # Prepare text for comparison
-                        para_text = para.text
-                        search_text = text_to_find
-                        
-                        if not match_case:
-                            para_text = para_text.lower()
-                            search_text = search_text.lower()
-                        
-                        # Find all occurrences (simple implementation)
-                        start_pos = 0
-                        while True:
-                            if whole_word:
-                                # For whole word search, check word boundaries
-                                words = para_text.split()
-                                found = False
-                                for word_idx, word in enumerate(words):
-                                    if (word == search_text or 
-                                        (not match_case and word.lower() == search_text.lower())):
-                                        results["occurrences"].append({
-                                            "location": f"Table {table_idx}, Row {row_idx}, Column {col_idx}",
-                                            "position": word_idx,
-                                            "context": para.text[:100] + ("..." if len(para.text) > 100 else "")
-                                        })
-                                        results["total_count"] += 1
-                                        found = True
-                                
-                                # Break after checking all words
-                                break
-                            else:
-                                # For substring search
-                                pos = para_text.find(search_text, start_pos)
-                                if pos == -1:
-                                    break
-                                
-                                results["occurrences"].append({
-                                    "location": f"Table {table_idx}, Row {row_idx}, Column {col_idx}",
-                                    "position": pos,
-                                    "context": para.text[:100] + ("..." if len(para.text) > 100 else "")
-                                })
-                                results["total_count"] += 1
-                                start_pos = pos + len(search_text)
+                    continue
+                if combined.search(para.text) is None:
+                    continue
+                
+                context_idx = None
+                for query_idx, pattern in enumerate(patterns):
+                    if truncated[query_idx]:
+                        continue
+                    found = occurrences[query_idx]
+                    for match in pattern.finditer(para.text):
+                        if max_results is not None and len(found) == max_results:
+                            truncated[query_idx] = True
+                            remaining -= 1
+                            break
+                        if compact:
+                            if context_idx is None:
+                                context_idx = len(contexts)
+                                contexts.append({**where, "text": _context(para.text)})
+                            found.append((context_idx, match.start()))
+                        else:
+                            found.append({**where, "position": match.start(), "context": _context(para.text)})
+                if remaining == 0:
+                    break
+        finally:
+            # Stop parsing the rest of the document
+            paragraphs.close()
         
+        results: Dict[str, Any] = {"match_case": match_case, "whole_word": whole_word}
+        if isinstance(text_to_find, str):
+            results = {"query": text_to_find, **results, **_group(occurrences[0], truncated[0], compact)}
+        else:
+            results["results"] = [
+                {"query": query, **_group(found, was_truncated, compact)}
+                for query, found, was_truncated in zip(queries, occurrences, truncated)
+            ]
+        if compact:
+            results["contexts"] = contexts
         return results
     except Exception as e:
         return {"error": f"Failed to search for text: {str(e)}"}
@@ -1,7 +1,9 @@
 """
 File utility functions for Word Document Server.
 """
+import hashlib
 import os
+import sqlite3
 from typing import Tuple, Optional
 import shutil
 
@@ -83,3 +85,48 @@ def ensure_docx_extension(filename: str) -> str:
     if not filename.endswith('.docx'):
         return filename + '.docx'
     return filename
+
+
+def cache_dir() -> str:
+    """
+    Return the directory for on-disk caches.
+    
+    Set by ``WORD_MCP_CACHE_DIR``; defaults to ``word-document-server`` in the
+    user's cache directory.
+    """
+    configured = os.environ.get("WORD_MCP_CACHE_DIR")
+    if configured:
+        return os.path.abspath(os.path.expanduser(configured))
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "word-document-server")
+
+
+def open_cache_db(filename: str, schema: str, path: Optional[str] = None) -> sqlite3.Connection:
+    """
+    Open an SQLite cache database, creating it and its tables if needed.
+    
+    Databases use write-ahead logging, so readers in other processes are not
+    blocked while the cache is updated.
+    
+    Args:
+        filename: Name of the database file in :func:`cache_dir`
+        schema: SQL script creating the tables (with IF NOT EXISTS)
+        path: Database file to use instead of the one in cache_dir
+    """
+    if path is None:
+        os.makedirs(cache_dir(), exist_ok=True)
+        path = os.path.join(cache_dir(), filename)
+    connection = sqlite3.connect(path, timeout=30)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+    connection.executescript(schema)
+    return connection
+
+
+def file_sha1(path: str) -> str:
+    """Return the hexadecimal SHA-1 of a file's content, read in 1 MB blocks."""
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
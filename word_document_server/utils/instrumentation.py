@@ -0,0 +1,264 @@
+"""
+Per-tool call instrumentation for Word Document Server.
+
+Every registered tool call gets a :class:`CallMetrics` record held in a
+context variable. Lower layers add to it without knowing which tool is
+running: the document cache records parse and save time and bytes moved,
+conversion tools record time spent in external processes, and the executor
+records how long the call waited for document locks. When the call finishes,
+its wall time and response size are added to per-tool histograms, which the
+``get_server_stats`` tool reports.
+
+Setting ``WORD_MCP_TRACE_FILE`` appends one JSON line per call to that file
+for offline analysis.
+"""
+import contextlib
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from typing import Any, Callable, Dict, Iterator, Optional
+
+
+# Upper bounds (milliseconds) of the latency histogram buckets; the last bucket
+# is open-ended.
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 30000, 60000)
+
+# Upper bounds (bytes) of the size histogram buckets
+SIZE_BUCKETS_BYTES = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216, 67108864)
+
+# Phases timed inside a call, in addition to its wall time
+PHASES = ("parse", "save", "subprocess", "lock_wait")
+
+
+class CallMetrics:
+    """Measurements of a single tool call."""
+
+    __slots__ = ("tool", "started", "wall", "phases", "bytes_read", "bytes_written",
+                 "response_bytes", "cache_hits", "error")
+
+    def __init__(self, tool: str):
+        self.tool = tool
+        self.started = time.time()
+        self.wall = 0.0
+        self.phases = dict.fromkeys(PHASES, 0.0)
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self.response_bytes = 0
+        self.cache_hits = 0
+        self.error: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "tool": self.tool,
+            "started": round(self.started, 6),
+            "wall_ms": round(self.wall * 1000, 3),
+            **{f"{phase}_ms": round(seconds * 1000, 3) for phase, seconds in self.phases.items()},
+            "bytes_read": self.bytes_read,
+            "bytes_written": self.bytes_written,
+            "response_bytes": self.response_bytes,
+            "cache_hits": self.cache_hits,
+            "error": self.error,
+        }
+
+
+class Histogram:
+    """Fixed-bucket histogram with count, sum and max."""
+
+    __slots__ = ("bounds", "counts", "count", "total", "max")
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket containing the q-th quantile (max for the last one)."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank and count:
+                return min(self.bounds[i], self.max) if i < len(self.bounds) else self.max
+        return self.max
+
+    def to_dict(self) -> Dict[str, Any]:
+        labels = [f"<={bound}" for bound in self.bounds] + [f">{self.bounds[-1]}"]
+        return {
+            "count": self.count,
+            "mean": round(self.total / self.count, 3) if self.count else 0.0,
+            "max": round(self.max, 3),
+            "p50": round(self.quantile(0.5), 3),
+            "p99": round(self.quantile(0.99), 3),
+            "buckets": {label: n for label, n in zip(labels, self.counts) if n},
+        }
+
+
+class _ToolStats:
+    __slots__ = ("calls", "errors", "latency", "phases", "bytes_read", "bytes_written", "response")
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.latency = Histogram(LATENCY_BUCKETS_MS)
+        self.phases = {phase: Histogram(LATENCY_BUCKETS_MS) for phase in PHASES}
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self.response = Histogram(SIZE_BUCKETS_BYTES)
+
+    def add(self, metrics: CallMetrics) -> None:
+        self.calls += 1
+        if metrics.error is not None:
+            self.errors += 1
+        self.latency.add(metrics.wall * 1000)
+        for phase, seconds in metrics.phases.items():
+            if seconds:
+                self.phases[phase].add(seconds * 1000)
+        self.bytes_read += metrics.bytes_read
+        self.bytes_written += metrics.bytes_written
+        self.response.add(metrics.response_bytes)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "latency_ms": self.latency.to_dict(),
+            **{f"{phase}_ms": hist.to_dict() for phase, hist in self.phases.items() if hist.count},
+            "bytes_read": self.bytes_read,
+            "bytes_written": self.bytes_written,
+            "response_bytes": self.response.to_dict(),
+        }
+
+
+_current: contextvars.ContextVar[Optional[CallMetrics]] = contextvars.ContextVar(
+    "word_mcp_call_metrics", default=None)
+_stats_lock = threading.Lock()
+_tool_stats: Dict[str, _ToolStats] = {}
+_started = time.time()
+
+_trace_path = os.environ.get("WORD_MCP_TRACE_FILE") or None
+_trace_lock = threading.Lock()
+
+
+def current() -> Optional[CallMetrics]:
+    """Return the metrics of the tool call running in this context, if any."""
+    return _current.get()
+
+
+def add_time(phase: str, seconds: float) -> None:
+    """Add ``seconds`` to a phase of the current call."""
+    metrics = _current.get()
+    if metrics is not None:
+        metrics.phases[phase] = metrics.phases.get(phase, 0.0) + seconds
+
+
+@contextlib.contextmanager
+def timed(phase: str) -> Iterator[None]:
+    """Time the enclosed block as part of ``phase`` of the current call."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        add_time(phase, time.perf_counter() - start)
+
+
+def add_bytes(read: int = 0, written: int = 0) -> None:
+    """Count bytes read from or written to disk by the current call."""
+    metrics = _current.get()
+    if metrics is not None:
+        metrics.bytes_read += read
+        metrics.bytes_written += written
+
+
+def count_cache_hit() -> None:
+    """Note that the current call reused a cached document."""
+    metrics = _current.get()
+    if metrics is not None:
+        metrics.cache_hits += 1
+
+
+def _finish(metrics: CallMetrics) -> None:
+    with _stats_lock:
+        stats = _tool_stats.get(metrics.tool)
+        if stats is None:
+            stats = _tool_stats[metrics.tool] = _ToolStats()
+        stats.add(metrics)
+    if _trace_path:
+        line = json.dumps(metrics.to_dict())
+        with _trace_lock:
+            try:
+                with open(_trace_path, "a", encoding="utf-8") as f:
+                    f.write(line + "\n")
+            except OSError:
+                pass
+
+
+def instrument(func: Callable) -> Callable:
+    """
+    Wrap an async tool so that every call is measured and recorded.
+
+    Args:
+        func: Async tool function (possibly already wrapped by the executor)
+
+    Returns:
+        Async function with the same name, docstring and signature
+    """
+    name = func.__name__
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        metrics = CallMetrics(name)
+        token = _current.set(metrics)
+        start = time.perf_counter()
+        try:
+            result = await func(*args, **kwargs)
+        except BaseException as e:
+            metrics.error = type(e).__name__
+            raise
+        else:
+            metrics.response_bytes = len(result.encode("utf-8")) if isinstance(result, str) else 0
+            return result
+        finally:
+            metrics.wall = time.perf_counter() - start
+            _current.reset(token)
+            _finish(metrics)
+
+    return wrapper
+
+
+def configure_trace(path: Optional[str]) -> None:
+    """Start appending call records to ``path``, or stop tracing with None."""
+    global _trace_path
+    _trace_path = path or None
+
+
+def get_tool_stats() -> Dict[str, Any]:
+    """Return per-tool call counts, latency histograms and byte counters."""
+    with _stats_lock:
+        return {
+            "uptime_seconds": round(time.time() - _started, 3),
+            "trace_file": _trace_path,
+            "tools": {name: stats.to_dict() for name, stats in sorted(_tool_stats.items())},
+        }
+
+
+def reset_tool_stats() -> None:
+    """Forget all recorded calls."""
+    global _started
+    with _stats_lock:
+        _tool_stats.clear()
+        _started = time.time()
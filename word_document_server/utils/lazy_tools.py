@@ -0,0 +1,183 @@
+"""
+Lazily imported tool functions.
+
+Importing every tool module at start-up also imports python-docx, lxml and
+msoffcrypto, which MCP clients pay for each time they spawn the server. A lazy
+tool is a lightweight async stub with the same name, docstring and signature
+as the real tool, read from the module's source text instead of by importing
+it. FastMCP builds the same schema from the stub, and the
+implementation module is imported on the first call.
+"""
+import ast
+import builtins
+import importlib
+import importlib.util
+import inspect
+import re
+import threading
+import tokenize
+import typing
+from typing import Callable, Dict, List, Tuple
+
+
+# Names available to annotations in stubs; tool signatures only use typing
+# constructs and builtins.
+_ANNOTATION_NAMESPACE = {**vars(builtins), **{name: getattr(typing, name) for name in typing.__all__}}
+
+_sources: Dict[str, List[str]] = {}
+_sources_lock = threading.Lock()
+
+
+class _Unsupported(Exception):
+    """The signature cannot be rebuilt without importing the module."""
+
+
+def _module_lines(module_name: str) -> List[str]:
+    with _sources_lock:
+        lines = _sources.get(module_name)
+        if lines is None:
+            spec = importlib.util.find_spec(module_name)
+            if spec is None or not spec.origin or not spec.origin.endswith(".py"):
+                raise _Unsupported(module_name)
+            with open(spec.origin, "r", encoding="utf-8") as f:
+                lines = _sources[module_name] = f.read().splitlines(keepends=True)
+        return lines
+
+
+def _function_header(lines: List[str], func_name: str) -> Tuple[ast.AsyncFunctionDef, int]:
+    """Parse only the ``def`` line(s) and docstring of a top-level async function.
+
+    Parsing whole tool modules costs about as much as importing python-docx, so
+    the function body is replaced by ``pass`` before handing it to ``ast``.
+    """
+    pattern = re.compile(rf"async def {re.escape(func_name)}\b")
+    start = next((i for i, line in enumerate(lines) if pattern.match(line)), None)
+    if start is None:
+        raise _Unsupported(func_name)
+
+    end, body_indent = None, None
+    depth = 0
+    after_colon = False
+    tokens = tokenize.generate_tokens(iter(lines[start:]).__next__)
+    for tok in tokens:
+        if not after_colon:
+            if tok.type == tokenize.OP and tok.string in "([{":
+                depth += 1
+            elif tok.type == tokenize.OP and tok.string in ")]}":
+                depth -= 1
+            elif tok.type == tokenize.OP and tok.string == ":" and depth == 0:
+                after_colon = True
+                end = tok.end[0]
+            continue
+        if tok.type in (tokenize.NEWLINE, tokenize.NL, tokenize.INDENT, tokenize.COMMENT):
+            continue
+        if tok.type == tokenize.STRING:
+            end = tok.end[0]
+        body_indent = tok.start[1] or 4
+        break
+    if end is None:
+        raise _Unsupported(func_name)
+
+    header = "".join(lines[start:start + end])
+    if not header.endswith("\n"):
+        header += "\n"
+    header += " " * (body_indent or 4) + "pass\n"
+    node = ast.parse(header).body[0]
+    if not isinstance(node, ast.AsyncFunctionDef):
+        raise _Unsupported(func_name)
+    return node, start
+
+
+def _evaluate(node) -> object:
+    if node is None:
+        return inspect.Parameter.empty
+    try:
+        return eval(compile(ast.Expression(node), "<annotation>", "eval"), dict(_ANNOTATION_NAMESPACE))
+    except Exception as e:
+        raise _Unsupported(ast.unparse(node)) from e
+
+
+def _literal(node) -> object:
+    try:
+        return ast.literal_eval(node)
+    except ValueError as e:
+        raise _Unsupported(ast.unparse(node)) from e
+
+
+def _signature(node: ast.AsyncFunctionDef) -> inspect.Signature:
+    args = node.args
+    params = []
+
+    positional = args.posonlyargs + args.args
+    defaults = [inspect.Parameter.empty] * (len(positional) - len(args.defaults))
+    defaults += [_literal(d) for d in args.defaults]
+    for i, (arg, default) in enumerate(zip(positional, defaults)):
+        kind = (inspect.Parameter.POSITIONAL_ONLY if i < len(args.posonlyargs)
+                else inspect.Parameter.POSITIONAL_OR_KEYWORD)
+        params.append(inspect.Parameter(arg.arg, kind, default=default,
+                                        annotation=_evaluate(arg.annotation)))
+    if args.vararg is not None:
+        params.append(inspect.Parameter(args.vararg.arg, inspect.Parameter.VAR_POSITIONAL,
+                                        annotation=_evaluate(args.vararg.annotation)))
+    for arg, default in zip(args.kwonlyargs, args.kw_defaults):
+        params.append(inspect.Parameter(
+            arg.arg, inspect.Parameter.KEYWORD_ONLY,
+            default=inspect.Parameter.empty if default is None else _literal(default),
+            annotation=_evaluate(arg.annotation)))
+    if args.kwarg is not None:
+        params.append(inspect.Parameter(args.kwarg.arg, inspect.Parameter.VAR_KEYWORD,
+                                        annotation=_evaluate(args.kwarg.annotation)))
+
+    return inspect.Signature(params, return_annotation=_evaluate(node.returns))
+
+
+def read_tool_stub(module_name: str, func_name: str) -> Tuple[inspect.Signature, str]:
+    """
+    Read the signature and docstring of an async tool without importing its module.
+
+    Args:
+        module_name: Fully qualified module name
+        func_name: Name of a top-level ``async def`` in that module
+
+    Returns:
+        (signature, docstring)
+    """
+    lines = _module_lines(module_name)
+    node, start = _function_header(lines, func_name)
+    if start > 0 and lines[start - 1].lstrip().startswith("@"):
+        # A decorator may change the signature; import the real function instead
+        raise _Unsupported(f"{module_name}.{func_name} is decorated")
+    return _signature(node), ast.get_docstring(node, clean=False)
+
+
+def _import_tool(module_name: str, func_name: str) -> Callable:
+    return getattr(importlib.import_module(module_name), func_name)
+
+
+def lazy_tool(module_name: str, func_name: str) -> Callable:
+    """
+    Return an async stub for a tool that imports its module on first call.
+
+    If the signature cannot be rebuilt from source (non-literal defaults,
+    decorators, missing source), the real function is imported and returned.
+
+    Args:
+        module_name: Fully qualified module name
+        func_name: Name of the async tool function
+
+    Returns:
+        Async callable with the tool's name, docstring and signature
+    """
+    try:
+        signature, doc = read_tool_stub(module_name, func_name)
+    except (_Unsupported, OSError, SyntaxError, tokenize.TokenError):
+        return _import_tool(module_name, func_name)
+
+    async def stub(*args, **kwargs):
+        return await _import_tool(module_name, func_name)(*args, **kwargs)
+
+    stub.__name__ = stub.__qualname__ = func_name
+    stub.__module__ = module_name
+    stub.__doc__ = doc
+    stub.__signature__ = signature
+    return stub
@@ -0,0 +1,304 @@
+"""
+Per-document read/write locks for Word Document Server.
+
+Concurrent tool calls against the same file would otherwise race: both load
+the shared cached document, both save, and one edit is lost. Locks are keyed
+by normalized absolute path, so calls on different documents never wait for
+each other. Read-only tools take a shared lock and may run side by side;
+anything that modifies a document takes an exclusive lock.
+
+When a call needs several documents (copying, merging) the locks are acquired
+in sorted key order so that two such calls cannot deadlock.
+
+Reading a document that has unwritten write-behind edits may write them out
+first (see :func:`document_cache.flush_cached_document`), so such documents
+are locked exclusively even by read-only tools.
+"""
+import contextlib
+import inspect
+import os
+import threading
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Tuple
+
+from word_document_server.utils.file_utils import ensure_docx_extension
+
+
+# Tools that only read the document named by their ``filename`` parameter
+READ_ONLY_TOOLS = frozenset({
+    "get_document_info",
+    "get_document_text",
+    "get_document_outline",
+    "get_document_chunks",
+    "get_paragraph_text_from_document",
+    "find_text_in_document",
+    "convert_to_pdf",
+    "to_epub",
+    "to_pdf",
+    "verify_document",
+    "extract_text",
+    "check_sentence_length",
+    "check_passive_voice",
+})
+
+# Path parameters that are always read, or always written, whatever the tool
+SHARED_PARAMETERS = frozenset({"source_filename", "source_filenames", "template_path"})
+EXCLUSIVE_PARAMETERS = frozenset({
+    "target_filename", "destination_filename", "destination_path", "output_filename"
+})
+
+# Parameters that tools pass through ensure_docx_extension before use
+_DOCX_PARAMETERS = frozenset({
+    "filename", "source_filename", "source_filenames", "target_filename",
+    "destination_filename", "destination_path"
+})
+
+
+class ReadWriteLock:
+    """A writer-preferring read/write lock.
+
+    Any number of readers may hold the lock at once; a writer holds it alone.
+    Waiting writers block new readers so that a steady stream of reads cannot
+    starve an edit.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer = False
+        self._waiting_writers = 0
+
+    def acquire_read(self, timeout: Optional[float] = None) -> bool:
+        with self._cond:
+            if not self._cond.wait_for(lambda: not self._writer and not self._waiting_writers, timeout):
+                return False
+            self._readers += 1
+            return True
+
+    def release_read(self) -> None:
+        with self._cond:
+            self._readers -= 1
+            if self._readers == 0:
+                self._cond.notify_all()
+
+    def acquire_write(self, timeout: Optional[float] = None) -> bool:
+        with self._cond:
+            self._waiting_writers += 1
+            acquired = self._cond.wait_for(lambda: not self._writer and self._readers == 0, timeout)
+            self._waiting_writers -= 1
+            if acquired:
+                self._writer = True
+            elif self._waiting_writers == 0:
+                # Readers held back for this writer may proceed
+                self._cond.notify_all()
+            return acquired
+
+    def release_write(self) -> None:
+        with self._cond:
+            self._writer = False
+            self._cond.notify_all()
+
+
+_registry_lock = threading.Lock()
+# key -> [lock, number of holders and waiters]; entries are dropped when unused
+_locks: Dict[str, list] = {}
+# Locks held by the current thread: key -> stack of modes (True for exclusive)
+_held = threading.local()
+# Whether a document has edits that only exist in memory; set by document_cache
+_pending_edits: Callable[[str], bool] = lambda key: False
+
+
+def set_pending_edits_check(check: Callable[[str], bool]) -> None:
+    """Register the function that tells whether a lock key has unwritten edits."""
+    global _pending_edits
+    _pending_edits = check
+
+
+def _held_modes() -> Dict[str, list]:
+    modes = getattr(_held, "modes", None)
+    if modes is None:
+        modes = _held.modes = {}
+    return modes
+
+
+def _push_held(key: str, exclusive: bool) -> None:
+    _held_modes().setdefault(key, []).append(exclusive)
+
+
+def _pop_held(key: str) -> None:
+    modes = _held_modes()
+    modes[key].pop()
+    if not modes[key]:
+        del modes[key]
+
+
+def held_lock(path: str) -> Optional[str]:
+    """Return "exclusive" or "shared" if the current thread holds the lock of ``path``, else None."""
+    modes = _held_modes().get(lock_key(path))
+    if not modes:
+        return None
+    return "exclusive" if any(modes) else "shared"
+
+
+def lock_key(path: str) -> str:
+    """Return the key under which ``path`` is locked."""
+    return os.path.normcase(os.path.abspath(path))
+
+
+def _checkout(key: str) -> ReadWriteLock:
+    with _registry_lock:
+        slot = _locks.get(key)
+        if slot is None:
+            slot = _locks[key] = [ReadWriteLock(), 0]
+        slot[1] += 1
+        return slot[0]
+
+
+def _checkin(key: str) -> None:
+    with _registry_lock:
+        slot = _locks[key]
+        slot[1] -= 1
+        if slot[1] == 0:
+            del _locks[key]
+
+
+def try_lock_exclusive(path: str, timeout: float = 0) -> bool:
+    """Take the exclusive lock of ``path`` if it becomes free within ``timeout`` seconds.
+
+    By default the lock is only taken if it is free right now. Callers that
+    succeed must release it with :func:`unlock_exclusive`.
+    """
+    key = lock_key(path)
+    lock = _checkout(key)
+    if lock.acquire_write(timeout=timeout):
+        _push_held(key, True)
+        return True
+    _checkin(key)
+    return False
+
+
+def unlock_exclusive(path: str) -> None:
+    """Release a lock taken with :func:`try_lock_exclusive`."""
+    key = lock_key(path)
+    with _registry_lock:
+        lock = _locks[key][0]
+    lock.release_write()
+    _pop_held(key)
+    _checkin(key)
+
+
+def _acquire_all(modes: Dict[str, bool]) -> list:
+    held = []
+    try:
+        for key in sorted(modes):
+            lock = _checkout(key)
+            try:
+                if modes[key]:
+                    lock.acquire_write()
+                else:
+                    lock.acquire_read()
+            except BaseException:
+                _checkin(key)
+                raise
+            held.append((key, lock, modes[key]))
+            _push_held(key, modes[key])
+    except BaseException:
+        _release_all(held)
+        raise
+    return held
+
+
+def _release_all(held: list) -> None:
+    for key, lock, is_exclusive in reversed(held):
+        if is_exclusive:
+            lock.release_write()
+        else:
+            lock.release_read()
+        _pop_held(key)
+        _checkin(key)
+
+
+@contextlib.contextmanager
+def document_locks(shared: Iterable[str] = (), exclusive: Iterable[str] = ()) -> Iterator[None]:
+    """
+    Hold shared locks on some documents and exclusive locks on others.
+
+    A path listed in both groups is locked exclusively, and so is a shared
+    path whose document has unwritten write-behind edits.
+
+    Args:
+        shared: Paths that are only read
+        exclusive: Paths that are modified or created
+    """
+    modes = {lock_key(path): False for path in shared}
+    modes.update((lock_key(path), True) for path in exclusive)
+    for key, is_exclusive in modes.items():
+        if not is_exclusive and _pending_edits(key):
+            modes[key] = True
+
+    while True:
+        held = _acquire_all(modes)
+        # A writer may have left edits behind while we were waiting
+        late = [key for key, is_exclusive in modes.items() if not is_exclusive and _pending_edits(key)]
+        if not late:
+            break
+        _release_all(held)
+        modes.update((key, True) for key in late)
+    try:
+        yield
+    finally:
+        _release_all(held)
+
+
+def document_lock(path: str, exclusive: bool = True):
+    """Context manager holding a single document lock."""
+    if exclusive:
+        return document_locks(exclusive=[path])
+    return document_locks(shared=[path])
+
+
+def _paths(name: str, value: Any) -> Iterator[str]:
+    values = value if isinstance(value, (list, tuple)) else [value]
+    for item in values:
+        if isinstance(item, str) and item:
+            yield ensure_docx_extension(item) if name in _DOCX_PARAMETERS else item
+
+
+def tool_lock_paths(tool_name: str, func: Callable, args: Tuple = (),
+                    kwargs: Optional[Dict[str, Any]] = None) -> Tuple[list, list]:
+    """
+    Work out which documents a tool call reads and which it writes.
+
+    Args:
+        tool_name: Registered name of the tool
+        func: Tool function, used to map positional arguments to parameter names
+        args: Positional arguments of the call
+        kwargs: Keyword arguments of the call
+
+    Returns:
+        (shared paths, exclusive paths)
+    """
+    try:
+        bound = inspect.signature(func).bind(*args, **(kwargs or {}))
+    except TypeError:
+        # The call itself will fail with a proper error message
+        return [], []
+
+    shared, exclusive = [], []
+    for name, value in bound.arguments.items():
+        if name == "filename":
+            target = shared if tool_name in READ_ONLY_TOOLS else exclusive
+        elif name in SHARED_PARAMETERS:
+            target = shared
+        elif name in EXCLUSIVE_PARAMETERS:
+            target = exclusive
+        else:
+            continue
+        target.extend(_paths(name, value))
+    return shared, exclusive
+
+
+def tool_locks(tool_name: str, func: Callable, args: Tuple = (),
+               kwargs: Optional[Dict[str, Any]] = None):
+    """Context manager holding the document locks a tool call needs."""
+    shared, exclusive = tool_lock_paths(tool_name, func, args, kwargs)
+    return document_locks(shared, exclusive)
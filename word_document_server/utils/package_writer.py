@@ -0,0 +1,216 @@
+"""
+Incremental .docx package writer.
+
+``Document.save`` serializes and deflates every part of the package on every
+save, including large ``word/media`` images that never change. This module
+writes the same package layout as python-docx, but any zip entry whose content
+is byte-identical to the entry already on disk is copied over in its
+compressed form instead of being recompressed. Only parts that actually
+changed (usually ``word/document.xml`` and a few small XML parts) are encoded.
+
+Unchanged parts are detected by comparing the CRC-32 and size of the new
+content against the central directory of the existing file, so no mutation
+tracking is needed in the tools themselves.
+"""
+import os
+import shutil
+import struct
+import tempfile
+import zipfile
+import zlib
+from typing import Dict, Optional, Tuple
+
+
+# Local file header: signature, versions, flags, method, time, date, crc,
+# sizes, then the lengths of the file name and extra field.
+_LOCAL_HEADER = struct.Struct('<4s2B4HL2L2H')
+_LOCAL_HEADER_SIGNATURE = b'PK\003\004'
+
+# General purpose flag bits that prevent a raw copy (encryption) or that
+# describe the source entry's layout rather than its content (data descriptor).
+_FLAG_ENCRYPTED = 0x01
+_FLAG_DATA_DESCRIPTOR = 0x08
+
+_COPYABLE_METHODS = (zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED)
+
+
+def _raw_entry(src_fp, info: zipfile.ZipInfo) -> bytes:
+    """Return the compressed bytes of ``info`` exactly as stored in the source file."""
+    src_fp.seek(info.header_offset)
+    header = _LOCAL_HEADER.unpack(src_fp.read(_LOCAL_HEADER.size))
+    if header[0] != _LOCAL_HEADER_SIGNATURE:
+        raise zipfile.BadZipFile(f"Bad local header for {info.filename}")
+    name_length, extra_length = header[-2], header[-1]
+    src_fp.seek(name_length + extra_length, os.SEEK_CUR)
+    data = src_fp.read(info.compress_size)
+    if len(data) != info.compress_size:
+        raise zipfile.BadZipFile(f"Truncated entry {info.filename}")
+    return data
+
+
+def _copy_raw(dst: zipfile.ZipFile, info: zipfile.ZipInfo, data: bytes) -> None:
+    """Append an already-compressed entry to ``dst`` without re-encoding it."""
+    zinfo = zipfile.ZipInfo(info.filename, info.date_time)
+    zinfo.compress_type = info.compress_type
+    zinfo.flag_bits = info.flag_bits & ~_FLAG_DATA_DESCRIPTOR
+    zinfo.external_attr = info.external_attr
+    zinfo.create_system = info.create_system
+    zinfo.CRC = info.CRC
+    zinfo.file_size = info.file_size
+    zinfo.compress_size = info.compress_size
+    zinfo.header_offset = dst.fp.tell()
+
+    dst.fp.write(zinfo.FileHeader())
+    dst.fp.write(data)
+    dst.filelist.append(zinfo)
+    dst.NameToInfo[zinfo.filename] = zinfo
+    dst.start_dir = dst.fp.tell()
+    dst._didModify = True
+
+
+class _PackageZipWriter:
+    """Writes zip entries, reusing unchanged compressed data from ``source``."""
+
+    def __init__(self, dst: zipfile.ZipFile, source: Optional[zipfile.ZipFile], source_fp):
+        self.dst = dst
+        self.source = source
+        self.source_fp = source_fp
+        self.copied = 0
+        self.rewritten = 0
+
+    def _reusable(self, name: str, blob: bytes) -> Optional[zipfile.ZipInfo]:
+        if self.source is None:
+            return None
+        try:
+            info = self.source.getinfo(name)
+        except KeyError:
+            return None
+        if (info.file_size != len(blob)
+                or info.compress_type not in _COPYABLE_METHODS
+                or info.flag_bits & _FLAG_ENCRYPTED):
+            return None
+        if info.CRC != zlib.crc32(blob):
+            return None
+        return info
+
+    def write(self, name: str, blob: bytes) -> None:
+        info = self._reusable(name, blob)
+        if info is not None:
+            try:
+                data = _raw_entry(self.source_fp, info)
+            except (OSError, zipfile.BadZipFile):
+                data = None
+            if data is not None:
+                _copy_raw(self.dst, info, data)
+                self.copied += 1
+                return
+        self.dst.writestr(name, blob, compress_type=zipfile.ZIP_DEFLATED)
+        self.rewritten += 1
+
+
+def _open_source(path: str) -> Tuple[Optional[zipfile.ZipFile], Optional[object]]:
+    try:
+        source_fp = open(path, 'rb')
+    except OSError:
+        return None, None
+    try:
+        return zipfile.ZipFile(source_fp), source_fp
+    except zipfile.BadZipFile:
+        source_fp.close()
+        return None, None
+
+
+def save_package(doc, path: str) -> Dict[str, int]:
+    """
+    Save a python-docx Document, copying unchanged zip entries from ``path``.
+
+    The result has the same parts, content types and relationships as
+    ``doc.save(path)``. The new package is written to a temporary file in the
+    same directory and moved into place, so a failed save never leaves a
+    truncated document behind.
+
+    Args:
+        doc: python-docx Document object
+        path: Destination path; if it is an existing .docx its entries are reused
+
+    Returns:
+        Dict with the number of entries "copied" raw and "rewritten"
+    """
+    from docx.opc.pkgwriter import _ContentTypesItem
+    from docx.opc.packuri import CONTENT_TYPES_URI, PACKAGE_URI
+
+    if not os.path.exists(path):
+        # Nothing to reuse; let python-docx create the file with default permissions
+        doc.save(path)
+        with zipfile.ZipFile(path) as written:
+            return {"copied": 0, "rewritten": len(written.infolist())}
+
+    package = doc.part.package
+    parts = list(package.iter_parts())
+    for part in parts:
+        part.before_marshal()
+
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix='.~', suffix='.docx.tmp', dir=directory)
+    source, source_fp = _open_source(path)
+    try:
+        with os.fdopen(fd, 'w+b') as tmp_file:
+            with zipfile.ZipFile(tmp_file, 'w', compression=zipfile.ZIP_DEFLATED) as dst:
+                writer = _PackageZipWriter(dst, source, source_fp)
+                writer.write(CONTENT_TYPES_URI.membername, _ContentTypesItem.from_parts(parts).blob)
+                writer.write(PACKAGE_URI.rels_uri.membername, package.rels.xml)
+                for part in parts:
+                    writer.write(part.partname.membername, part.blob)
+                    if len(part.rels):
+                        writer.write(part.partname.rels_uri.membername, part.rels.xml)
+        shutil.copymode(path, tmp_path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    finally:
+        if source is not None:
+            source.close()
+            source_fp.close()
+    os.replace(tmp_path, path)
+    return {"copied": writer.copied, "rewritten": writer.rewritten}
+
+
+def replace_entries(path: str, entries: Dict[str, bytes]) -> Dict[str, int]:
+    """
+    Rewrite a zip package with some entries replaced or added.
+
+    Every other entry is copied in its compressed form, so the cost does not
+    depend on the size of the rest of the package. As with
+    :func:`save_package`, the new file is written next to ``path`` and moved
+    into place.
+
+    Args:
+        path: Path to an existing .docx file
+        entries: Zip member name -> new content; names not in the package are appended
+
+    Returns:
+        Dict with the number of entries "copied" raw and "rewritten"
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix='.~', suffix='.docx.tmp', dir=directory)
+    pending = dict(entries)
+    copied = 0
+    try:
+        with os.fdopen(fd, 'w+b') as tmp_file, open(path, 'rb') as source_fp:
+            with zipfile.ZipFile(source_fp) as source, \
+                    zipfile.ZipFile(tmp_file, 'w', compression=zipfile.ZIP_DEFLATED) as dst:
+                for info in source.infolist():
+                    blob = pending.pop(info.filename, None)
+                    if blob is not None:
+                        dst.writestr(info.filename, blob, compress_type=zipfile.ZIP_DEFLATED)
+                    else:
+                        _copy_raw(dst, info, _raw_entry(source_fp, info))
+                        copied += 1
+                for name, blob in pending.items():
+                    dst.writestr(name, blob, compress_type=zipfile.ZIP_DEFLATED)
+        shutil.copymode(path, tmp_path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    os.replace(tmp_path, path)
+    return {"copied": copied, "rewritten": len(entries)}
@@ -0,0 +1,173 @@
+"""
+Offset/limit pagination over streamed document content.
+
+Large documents are read a page at a time: the paragraphs are streamed in
+order and the stream is abandoned as soon as the requested slice has been
+produced, so an early page costs a fraction of a full read.
+
+A cursor names the position after a page. It is bound to the tool that
+issued it and to the modification time and size of the document, so a
+cursor is rejected once the document has changed instead of silently
+pointing into different content.
+"""
+import base64
+import json
+import os
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from word_document_server.utils.document_cache import flush_cached_document
+
+
+UNITS = ("paragraphs", "characters")
+
+
+def _stamp(doc_path: str) -> Tuple[int, int]:
+    stat_result = os.stat(doc_path)
+    return stat_result.st_mtime_ns, stat_result.st_size
+
+
+def encode_cursor(kind: str, unit: str, offset: int, doc_path: str) -> str:
+    """
+    Encode the position ``offset`` in a document as an opaque cursor.
+
+    Args:
+        kind: Name of the listing the cursor belongs to, usually the tool name
+        unit: One of UNITS
+        offset: Position of the next page
+        doc_path: Path to the document being read
+    """
+    raw = json.dumps([kind, unit, offset, *_stamp(doc_path)], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def decode_cursor(cursor: str, kind: str, doc_path: str) -> Tuple[str, int]:
+    """
+    Decode a cursor from :func:`encode_cursor`.
+
+    Returns:
+        Tuple of (unit, offset)
+
+    Raises:
+        ValueError: If the cursor is malformed, belongs to another listing or
+            the document has changed since it was issued
+    """
+    try:
+        cursor_kind, unit, offset, mtime_ns, size = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except Exception:
+        raise ValueError("cursor is not valid")
+    if cursor_kind != kind or unit not in UNITS or not isinstance(offset, int):
+        raise ValueError(f"cursor was not issued by {kind}")
+    # Pending write-behind edits count as a change
+    flush_cached_document(doc_path)
+    if _stamp(doc_path) != (mtime_ns, size):
+        raise ValueError("the document has changed since the cursor was issued; start again from offset 0")
+    return unit, offset
+
+
+def page_request(kind: str, doc_path: str, offset: Any = 0, limit: Any = None, unit: str = "paragraphs",
+                 cursor: Optional[str] = None) -> Tuple[str, int, Optional[int]]:
+    """
+    Validate pagination parameters, resolving a cursor if one is given.
+
+    Returns:
+        Tuple of (unit, offset, limit); limit is None for "to the end"
+
+    Raises:
+        ValueError: With a message suitable for an "Invalid parameter" reply
+    """
+    if cursor:
+        unit, offset = decode_cursor(cursor, kind, doc_path)
+    elif unit not in UNITS:
+        raise ValueError(f"unit must be one of {list(UNITS)}")
+    try:
+        offset = int(offset or 0)
+        limit = int(limit) if limit is not None else None
+    except (ValueError, TypeError):
+        raise ValueError("offset and limit must be integers")
+    if offset < 0:
+        raise ValueError("offset must not be negative")
+    if limit is not None and limit < 1:
+        raise ValueError("limit must be at least 1")
+    return unit, offset, limit
+
+
+def slice_paragraphs(texts: Iterable[str], offset: int, limit: Optional[int]) -> Tuple[List[str], bool]:
+    """
+    Take paragraphs [offset, offset + limit) from a stream.
+
+    Returns:
+        Tuple of (paragraph texts, whether more paragraphs follow)
+    """
+    page = []
+    for position, text in enumerate(texts):
+        if position < offset:
+            continue
+        if limit is not None and len(page) == limit:
+            return page, True
+        page.append(text)
+    return page, False
+
+
+def slice_characters(texts: Iterable[str], offset: int, limit: Optional[int]) -> Tuple[str, bool]:
+    """
+    Take characters [offset, offset + limit) of the paragraphs joined by newlines.
+
+    Returns:
+        Tuple of (text, whether more text follows)
+    """
+    pieces = []
+    remaining = limit
+    position = 0
+    for i, text in enumerate(texts):
+        piece = text if i == 0 else "\n" + text
+        end = position + len(piece)
+        if end > offset:
+            if remaining == 0:
+                return "".join(pieces), True
+            start = max(0, offset - position)
+            chunk = piece[start:] if remaining is None else piece[start:start + remaining]
+            pieces.append(chunk)
+            if remaining is not None:
+                remaining -= len(chunk)
+                if remaining == 0 and start + len(chunk) < len(piece):
+                    return "".join(pieces), True
+        position = end
+    return "".join(pieces), False
+
+
+def text_page(kind: str, doc_path: str, paragraphs: Callable[[], Iterator[str]], unit: str, offset: int,
+              limit: Optional[int]) -> Dict[str, Any]:
+    """
+    Read one page of a document's text.
+
+    Args:
+        kind: Name of the listing, used for cursors
+        doc_path: Path to the document
+        paragraphs: Returns a fresh stream of paragraph texts in document order
+        unit: "paragraphs" or "characters"
+        offset: First paragraph or character to return
+        limit: Maximum number of paragraphs or characters, or None for all
+
+    Returns:
+        Dict with unit, offset, count, text and next_cursor (None on the last page)
+    """
+    stream = paragraphs()
+    try:
+        if unit == "paragraphs":
+            page, more = slice_paragraphs(stream, offset, limit)
+            text, count = "\n".join(page), len(page)
+        else:
+            text, more = slice_characters(stream, offset, limit)
+            count = len(text)
+    finally:
+        # Stop parsing the rest of the document
+        close = getattr(stream, "close", None)
+        if close is not None:
+            close()
+    return {
+        "unit": unit,
+        "offset": offset,
+        "count": count,
+        "text": text,
+        "next_cursor": encode_cursor(kind, unit, offset + count, doc_path) if more else None,
+    }
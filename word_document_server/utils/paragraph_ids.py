@@ -0,0 +1,333 @@
+"""
+Stable paragraph identifiers.
+
+Paragraph indices shift whenever a paragraph is inserted or deleted, so tools
+also accept a paragraph ID. IDs are Word's own ``w14:paraId`` attribute: an
+8-digit hexadecimal value that Word preserves across edits.
+
+Paragraphs that do not have one yet are given one as soon as the document is
+parsed (see :func:`document_cache.load_document`), before any tool can move
+them, and paragraphs added by an edit are given one when the edit is saved.
+An ID therefore stays attached to its paragraph for as long as the paragraph
+exists, whatever happens to the paragraphs around it.
+
+IDs assigned at load are derived from the paragraph's position in the file.
+The derivation is deterministic, so reading the same file twice (with or
+without the document cache, or through :mod:`docx_stream`) reports the same
+IDs, and those are the IDs that get persisted on the next save.
+
+Only body-level paragraphs (the ones numbered by ``doc.paragraphs``) are
+addressed by ID. Word requires IDs to be unique across the document, so a
+generated ID also avoids every ``w14:paraId`` already present in the
+package: table cells, headers, footers and notes included.
+"""
+import io
+import re
+import threading
+import weakref
+import zlib
+from typing import AbstractSet, BinaryIO, Dict, List, Optional, Set, Tuple, Union
+
+from docx.opc.part import XmlPart
+from docx.oxml.ns import qn
+from docx.text.paragraph import Paragraph
+from lxml import etree
+
+from word_document_server.utils.block_index import get_block_index
+
+
+W14_NS = 'http://schemas.microsoft.com/office/word/2010/wordml'
+PARA_ID = f'{{{W14_NS}}}paraId'
+
+_P = qn('w:p')
+
+# w14:paraId is an ST_LongHexNumber that must be less than 0x80000000
+_MAX_ID = 0x7FFFFFFF
+_ID_PATTERN = re.compile(r'[0-9A-Fa-f]{8}')
+# Parts whose paragraphs may carry a paraId, by file name prefix
+_STORY_PARTS = ('document', 'header', 'footer', 'footnotes', 'endnotes', 'comments')
+_ID_XPATH = etree.XPath('//@w14:paraId', namespaces={'w14': W14_NS})
+# A w14:paraId attribute in serialized XML, whatever the namespace prefix
+_ID_ATTRIBUTE = re.compile(rb'[\w.-]+:paraId\s*=\s*["\']([0-9A-Fa-f]{8})["\']')
+
+
+def is_paragraph_id(value) -> bool:
+    """Return True if ``value`` is a well-formed paragraph ID."""
+    return (isinstance(value, str) and _ID_PATTERN.fullmatch(value) is not None
+            and 0 < int(value, 16) <= _MAX_ID)
+
+
+def is_package_part(name: str) -> bool:
+    """Return True if the part or zip entry ``name`` is searched by :func:`reserved_paragraph_ids`:
+    the parts under word/ that hold paragraphs, leaving out styles, themes and settings."""
+    name = name.lstrip('/')
+    return (name.startswith('word/') and name.endswith('.xml')
+            and name.rsplit('/', 1)[-1].startswith(_STORY_PARTS))
+
+
+def scan_paragraph_ids(stream: BinaryIO) -> Set[str]:
+    """Return the upper-cased ``w14:paraId`` values in a stream of serialized XML."""
+    ids: Set[str] = set()
+    tail = b''
+    for block in iter(lambda: stream.read(1 << 20), b''):
+        # The tail of the previous block catches attributes cut in two
+        data = tail + block
+        ids.update(match.group(1).decode('ascii').upper() for match in _ID_ATTRIBUTE.finditer(data))
+        tail = data[-64:]
+    return ids
+
+
+def reserved_paragraph_ids(doc) -> Set[str]:
+    """
+    Return every ``w14:paraId`` in the parts of a document that hold paragraphs.
+
+    The same set is read from the zip by :func:`docx_stream.iter_body`, so
+    IDs generated while streaming and at load agree.
+    """
+    ids: Set[str] = set()
+    for part in doc.part.package.iter_parts():
+        if not is_package_part(str(part.partname)):
+            continue
+        if isinstance(part, XmlPart):
+            ids.update(value.upper() for value in _ID_XPATH(part.element) if _ID_PATTERN.fullmatch(value))
+        else:
+            ids.update(scan_paragraph_ids(io.BytesIO(part.blob)))
+    return ids
+
+
+def new_paragraph_id(index: int, used: Set[str], reserved: AbstractSet[str] = frozenset()) -> str:
+    """
+    Derive the ID of the body paragraph at ``index`` that has none.
+
+    Args:
+        index: Position of the paragraph among body-level paragraphs
+        used: IDs already taken by earlier paragraphs; the result is added to it
+        reserved: IDs found anywhere in the document (see
+            :func:`reserved_paragraph_ids`), which the result also avoids
+
+    Returns:
+        8-digit upper-case hexadecimal ID
+    """
+    value = zlib.crc32(b'%d' % index) & _MAX_ID
+    while True:
+        para_id = f'{value or 1:08X}'
+        if para_id not in used and para_id not in reserved:
+            used.add(para_id)
+            return para_id
+        value = (value + 1) & _MAX_ID
+
+
+def existing_paragraph_id(p, used: Set[str]) -> Optional[str]:
+    """Return the usable ``w14:paraId`` of a ``w:p`` element, registering it in ``used``.
+
+    Malformed IDs and duplicates of earlier paragraphs (left behind by copied
+    content) are treated as missing.
+    """
+    para_id = p.get(PARA_ID)
+    if para_id is None or not is_paragraph_id(para_id):
+        return None
+    para_id = para_id.upper()
+    if para_id in used:
+        return None
+    used.add(para_id)
+    return para_id
+
+
+class _IdMap:
+    __slots__ = ('elements', 'reserved')
+
+    def __init__(self, reserved: Optional[Set[str]] = None):
+        self.elements: Dict[str, object] = {}
+        # IDs in the whole document when it was last scanned; None until needed
+        self.reserved = reserved
+
+
+_maps: "weakref.WeakKeyDictionary[object, _IdMap]" = weakref.WeakKeyDictionary()
+_lock = threading.Lock()
+
+
+def _attached_owner(id_map: Optional[_IdMap], para_id: str, p, body):
+    """Return the other body paragraph that already holds ``para_id``, if any."""
+    if id_map is None:
+        return None
+    owner = id_map.elements.get(para_id)
+    if owner is None or owner is p or owner.getparent() is not body:
+        return None
+    return owner
+
+
+def ensure_paragraph_ids(doc) -> List[str]:
+    """
+    Give every body-level paragraph of ``doc`` a paragraph ID.
+
+    Existing IDs are kept. Of two paragraphs sharing an ID (copied content),
+    the one that held it before keeps it, or the first one for a document
+    seen for the first time.
+
+    Args:
+        doc: python-docx Document object
+
+    Returns:
+        List of IDs in paragraph order (same numbering as doc.paragraphs)
+    """
+    block_index = get_block_index(doc)
+    paragraphs = block_index.paragraphs
+    body = doc.element.body
+    with _lock:
+        block_index.take_added()
+        previous = _maps.get(doc.element)
+        used: Set[str] = set()
+        reserved = None
+        ids = []
+        for index, p in enumerate(paragraphs):
+            para_id = existing_paragraph_id(p, used)
+            if para_id is not None and _attached_owner(previous, para_id, p, body) is not None:
+                para_id = None
+            if para_id is None:
+                if reserved is None:
+                    reserved = reserved_paragraph_ids(doc)
+                para_id = new_paragraph_id(index, used, reserved)
+                p.set(PARA_ID, para_id)
+            elif p.get(PARA_ID) != para_id:
+                p.set(PARA_ID, para_id)
+            ids.append(para_id)
+        id_map = _IdMap(reserved)
+        id_map.elements = dict(zip(ids, paragraphs))
+        _maps[doc.element] = id_map
+    return ids
+
+
+def assign_new_paragraph_ids(doc) -> None:
+    """
+    Give paragraphs added to ``doc`` since the last call an ID.
+
+    Called when an edit is saved, with the document locked exclusively. Only
+    the paragraphs appended since then (as tracked by the block index) are
+    visited; a full pass is made only when the block index had to be rebuilt.
+
+    Args:
+        doc: python-docx Document object
+    """
+    block_index = get_block_index(doc)
+    body = doc.element.body
+    with _lock:
+        id_map = _maps.get(doc.element)
+        added = block_index.take_added() if id_map is not None else None
+        if added is not None:
+            used = set(id_map.elements)
+            for p in added:
+                if p.tag != _P or p.getparent() is not body:
+                    continue
+                para_id = p.get(PARA_ID)
+                if para_id is not None and is_paragraph_id(para_id):
+                    para_id = para_id.upper()
+                    owner = id_map.elements.get(para_id)
+                    if owner is None or owner is p or owner.getparent() is not body:
+                        if p.get(PARA_ID) != para_id:
+                            p.set(PARA_ID, para_id)
+                        id_map.elements[para_id] = p
+                        continue
+                if id_map.reserved is None:
+                    id_map.reserved = reserved_paragraph_ids(doc)
+                para_id = new_paragraph_id(len(used), used, id_map.reserved)
+                p.set(PARA_ID, para_id)
+                id_map.elements[para_id] = p
+            return
+    ensure_paragraph_ids(doc)
+
+
+def _current_map(doc) -> _IdMap:
+    """Map the IDs the body paragraphs carry right now, without changing the document."""
+    body = doc.element.body
+    used: Set[str] = set()
+    elements = {}
+    for p in get_block_index(doc).paragraphs:
+        para_id = existing_paragraph_id(p, used)
+        if para_id is not None:
+            elements[para_id] = p
+    with _lock:
+        previous = _maps.get(doc.element)
+        id_map = _IdMap(previous.reserved if previous is not None else None)
+        if previous is not None:
+            # Keep the paragraph that held an ID before when a copy now precedes it
+            for para_id, owner in previous.elements.items():
+                if owner.getparent() is body and owner.get(PARA_ID, '').upper() == para_id:
+                    elements[para_id] = owner
+        id_map.elements = elements
+        _maps[doc.element] = id_map
+    return id_map
+
+
+def find_paragraph_element(doc, para_id: str):
+    """
+    Return the body-level ``w:p`` element with the given ID, or None.
+
+    Read-only: safe to call while holding only a shared document lock.
+
+    Args:
+        doc: python-docx Document object
+        para_id: Paragraph ID (case-insensitive)
+    """
+    para_id = para_id.upper()
+    body = doc.element.body
+    id_map = _maps.get(doc.element)
+    if id_map is not None:
+        p = id_map.elements.get(para_id)
+        if p is not None and p.getparent() is body and p.get(PARA_ID, '').upper() == para_id:
+            return p
+    # Unknown or stale entry: the body changed since the map was built
+    return _current_map(doc).elements.get(para_id)
+
+
+def paragraph_ref(value) -> Union[int, str]:
+    """
+    Interpret a paragraph reference given to a tool.
+
+    Numbers (and strings of up to 7 digits) are indices; 8-digit hexadecimal
+    strings are paragraph IDs.
+
+    Raises:
+        ValueError: if the value is neither
+    """
+    if isinstance(value, bool):
+        raise ValueError(value)
+    if isinstance(value, str):
+        value = value.strip()
+        if is_paragraph_id(value):
+            return value.upper()
+    return int(value)
+
+
+def resolve_paragraph(doc, ref) -> Tuple[Optional[Paragraph], str]:
+    """
+    Find a body-level paragraph by index or paragraph ID.
+
+    Args:
+        doc: python-docx Document object
+        ref: Index of the paragraph (0-based) or its paragraph ID
+
+    Returns:
+        Tuple of (paragraph, error message); paragraph is None on error
+    """
+    try:
+        ref = paragraph_ref(ref)
+    except (ValueError, TypeError):
+        return None, "Invalid parameter: paragraph_index must be an integer or a paragraph ID"
+
+    if isinstance(ref, str):
+        p = find_paragraph_element(doc, ref)
+        if p is None:
+            return None, f"Paragraph ID {ref} not found in document."
+        return Paragraph(p, doc._body), ""
+
+    block_index = get_block_index(doc)
+    paragraph_count = block_index.paragraph_count
+    if ref < 0 or ref >= paragraph_count:
+        return None, f"Invalid paragraph index. Document has {paragraph_count} paragraphs (0-{paragraph_count-1})."
+    return block_index.paragraph(ref), ""
+
+
+def paragraph_id_of(doc, paragraph) -> Optional[str]:
+    """Return the ID of a body-level paragraph, or None if it has not been given one yet."""
+    para_id = paragraph._p.get(PARA_ID)
+    return para_id.upper() if para_id is not None and is_paragraph_id(para_id) else None
@@ -0,0 +1,172 @@
+"""
+Placement of new content relative to an existing paragraph.
+
+Content tools append to the end of the body through python-docx. When a
+``before`` or ``after`` anchor is given, the blocks a tool appended are moved
+next to the anchor paragraph afterwards, and the block index is updated in
+place, so inserting in the middle of a document costs about the same as
+appending.
+
+An anchor is a body-level paragraph given by index (an int), paragraph ID or
+the text of a heading. A string is never read as an index, so a heading such
+as "2024" can be used as an anchor.
+"""
+import contextlib
+import weakref
+from typing import Dict, Iterator, Optional, Tuple, Union
+
+from docx.enum.style import WD_STYLE_TYPE
+from docx.oxml.ns import qn
+
+from word_document_server.utils.block_index import get_block_index
+from word_document_server.utils.docx_stream import paragraph_text
+from word_document_server.utils.paragraph_ids import find_paragraph_element, is_paragraph_id
+
+
+_PPR = qn('w:pPr')
+_PSTYLE = qn('w:pStyle')
+_VAL = qn('w:val')
+
+
+def heading_style_levels(doc) -> Dict[str, int]:
+    """
+    Map the style IDs of the document's heading styles to their level.
+
+    "Heading 1" to "Heading 9" map to 1-9 and "Title" to 0.
+
+    Args:
+        doc: python-docx Document object
+    """
+    levels = {}
+    for style in doc.styles:
+        if style.type != WD_STYLE_TYPE.PARAGRAPH or not style.name:
+            continue
+        if style.name == 'Title':
+            levels[style.style_id] = 0
+        elif style.name.startswith('Heading '):
+            try:
+                levels[style.style_id] = int(style.name.split(' ')[1])
+            except (ValueError, IndexError):
+                pass
+    return levels
+
+
+def paragraph_style_id(p) -> Optional[str]:
+    """Return the style ID set on a ``w:p`` element, without building a proxy."""
+    pPr = p.find(_PPR)
+    if pPr is None:
+        return None
+    pStyle = pPr.find(_PSTYLE)
+    return pStyle.get(_VAL) if pStyle is not None else None
+
+
+# Heading text -> first body-level heading element with that text, per document
+_headings: "weakref.WeakKeyDictionary[object, Dict[str, object]]" = weakref.WeakKeyDictionary()
+
+
+def _is_heading(p, body, levels: Dict[str, int], text: str) -> bool:
+    return (p.getparent() is body and paragraph_style_id(p) in levels
+            and paragraph_text(p).strip() == text)
+
+
+def find_heading_element(doc, text: str):
+    """
+    Return the first body-level heading paragraph whose text is ``text``.
+
+    Headings are looked up in a map that is built once per document and
+    reused while its entries still hold; an entry is checked on use, and the
+    map is rebuilt when the heading is missing or no longer matches. If
+    several headings share a text, the first one at the time the map was
+    built is returned.
+
+    Args:
+        doc: python-docx Document object
+        text: Heading text, compared after stripping surrounding whitespace
+
+    Returns:
+        The ``w:p`` element, or None
+    """
+    text = text.strip()
+    levels = heading_style_levels(doc)
+    body = doc.element.body
+    headings = _headings.get(doc.element)
+    if headings is not None:
+        p = headings.get(text)
+        if p is not None and _is_heading(p, body, levels, text):
+            return p
+
+    # Only paragraphs with a heading (or Title) style have their text extracted
+    headings = {}
+    for p in get_block_index(doc).paragraphs:
+        if paragraph_style_id(p) in levels:
+            headings.setdefault(paragraph_text(p).strip(), p)
+    _headings[doc.element] = headings
+    return headings.get(text)
+
+
+def resolve_anchor(doc, before: Optional[Union[int, str]] = None,
+                   after: Optional[Union[int, str]] = None) -> Tuple[Optional[object], bool, str]:
+    """
+    Find the paragraph that new content should be placed next to.
+
+    Args:
+        doc: python-docx Document object
+        before: Paragraph index, paragraph ID or heading text to insert before
+        after: Paragraph index, paragraph ID or heading text to insert after
+
+    Returns:
+        Tuple of (anchor element, insert_after, error message). The anchor is
+        None with an empty message when content should simply be appended.
+    """
+    if before is not None and after is not None:
+        return None, False, "Invalid parameter: specify either before or after, not both"
+    ref = before if before is not None else after
+    if ref is None:
+        return None, False, ""
+    place_after = after is not None
+
+    if isinstance(ref, int) and not isinstance(ref, bool):
+        block_index = get_block_index(doc)
+        paragraph_count = block_index.paragraph_count
+        if ref < 0 or ref >= paragraph_count:
+            return None, False, f"Invalid paragraph index. Document has {paragraph_count} paragraphs (0-{paragraph_count-1})."
+        return block_index.paragraphs[ref], place_after, ""
+
+    if not isinstance(ref, str) or not ref.strip():
+        return None, False, "Invalid parameter: anchor must be a paragraph index, paragraph ID or heading text"
+    ref = ref.strip()
+    if is_paragraph_id(ref):
+        anchor = find_paragraph_element(doc, ref)
+        if anchor is not None:
+            return anchor, place_after, ""
+        # Could still be a heading such as "20242025"
+        anchor = find_heading_element(doc, ref)
+        if anchor is None:
+            return None, False, f"Paragraph ID {ref.upper()} not found in document."
+        return anchor, place_after, ""
+
+    anchor = find_heading_element(doc, ref)
+    if anchor is None:
+        return None, False, f"Heading '{ref}' not found in document."
+    return anchor, place_after, ""
+
+
+@contextlib.contextmanager
+def placed(doc, anchor, after: bool = False) -> Iterator[None]:
+    """
+    Move whatever the enclosed block appends to the body next to ``anchor``.
+
+    With no anchor the appended content stays at the end of the document.
+
+    Args:
+        doc: python-docx Document object
+        anchor: Element returned by :func:`resolve_anchor`, or None
+        after: Insert after the anchor instead of before it
+    """
+    if anchor is None:
+        yield
+        return
+    appended_from = len(get_block_index(doc).blocks)
+    yield
+    block_index = get_block_index(doc)
+    block_index.relocate(block_index.blocks[appended_from:], anchor, after)
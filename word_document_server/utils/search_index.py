@@ -0,0 +1,257 @@
+"""
+Persistent full-text index over directories of Word documents.
+
+Paragraph text is streamed straight from ``word/document.xml`` (see
+docx_stream) into an SQLite FTS5 table kept in ``WORD_MCP_CACHE_DIR``, so a
+search across thousands of documents is a single index query instead of a
+scan of every file.
+
+The index is brought up to date before each search. Documents are found by
+document_listing.walk_documents, so a search covers the same files as
+list_available_documents, and unreadable subdirectories are skipped. A file
+whose modification time and size are unchanged is skipped after one
+``stat``; one whose content hash is unchanged only has its timestamp
+refreshed; anything else is re-extracted, in worker processes when there
+are several, and its rows replaced. Documents that have disappeared are dropped. Files that cannot be
+read as documents (corrupt, not a zip, still being written) are recorded as
+failed with their timestamp and size, and only retried once those change.
+"""
+import os
+import sqlite3
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from word_document_server.utils.concurrency import map_in_processes
+from word_document_server.utils.document_listing import flush_pending_edits, walk_documents
+from word_document_server.utils.file_utils import file_sha1, open_cache_db
+from word_document_server.utils.instrumentation import add_bytes, timed
+
+
+# Index rows of one document occupy a block of FTS rowids, so they can be
+# deleted by range without scanning the table
+ROWS_PER_DOCUMENT = 1 << 24
+
+INDEX_FILENAME = "search-index.sqlite3"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    directory TEXT NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    sha1 TEXT NOT NULL,
+    paragraph_count INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS documents_directory ON documents (directory);
+CREATE TABLE IF NOT EXISTS failures (
+    path TEXT PRIMARY KEY,
+    directory TEXT NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS failures_directory ON failures (directory);
+CREATE VIRTUAL TABLE IF NOT EXISTS paragraphs USING fts5 (
+    text,
+    paragraph_index UNINDEXED,
+    table_index UNINDEXED,
+    row UNINDEXED,
+    column UNINDEXED,
+    para_id UNINDEXED,
+    tokenize = 'unicode61 remove_diacritics 2',
+    prefix = '2 3 4'
+);
+"""
+
+# Serializes index updates within the process; readers are not blocked
+_update_lock = threading.Lock()
+
+
+def connect(path: Optional[str] = None) -> sqlite3.Connection:
+    """
+    Open the index database, creating it if needed.
+
+    Args:
+        path: Database file; defaults to the index in :func:`file_utils.cache_dir`
+    """
+    return open_cache_db(INDEX_FILENAME, _SCHEMA, path)
+
+
+def _extract(path: str) -> Optional[List[Tuple[Any, ...]]]:
+    """Return the index rows of a document, one per non-empty paragraph, or None if it cannot be read."""
+    from word_document_server.utils.docx_stream import iter_paragraphs
+
+    try:
+        return [(p.text, p.index, p.table_index, p.row, p.column, p.para_id)
+                for p in iter_paragraphs(path) if p.text.strip()]
+    except Exception:
+        # Whatever is wrong with the file (not a zip, no document part,
+        # malformed XML), it must not fail searches over the whole directory
+        return None
+
+
+def _delete_rows(connection: sqlite3.Connection, document_id: int) -> None:
+    first = document_id * ROWS_PER_DOCUMENT
+    connection.execute("DELETE FROM paragraphs WHERE rowid >= ? AND rowid < ?",
+                       (first, first + ROWS_PER_DOCUMENT))
+
+
+def update_index(connection: sqlite3.Connection, directory: str, recursive: bool = False) -> Dict[str, int]:
+    """
+    Bring the index for a directory up to date.
+
+    Args:
+        connection: Connection from :func:`connect`
+        directory: Directory containing .docx files
+        recursive: Include subdirectories
+
+    Returns:
+        Counts of "documents" in the directory and of documents "indexed"
+        (new or changed), "unchanged", "removed" and "failed" (files that
+        cannot be read; they are left out of search results)
+    """
+    directory = os.path.abspath(directory)
+    with _update_lock:
+        where = "directory = ?" + (" OR directory LIKE ? ESCAPE '\\'" if recursive else "")
+        escaped = directory.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        params = (directory, os.path.join(escaped, "%")) if recursive else (directory,)
+        known = {}
+        for path, document_id, mtime_ns, size, sha1 in connection.execute(
+                f"SELECT path, id, mtime_ns, size, sha1 FROM documents WHERE {where}", params):
+            known[path] = (document_id, mtime_ns, size, sha1)
+        failures = {path: (mtime_ns, size) for path, mtime_ns, size in connection.execute(
+            f"SELECT path, mtime_ns, size FROM failures WHERE {where}", params)}
+
+        stale = []
+        unchanged = 0
+        failed = 0
+        seen = set()
+        # Pending write-behind edits live only in memory; make the files current first
+        flush_pending_edits(directory, recursive)
+        for entry in walk_documents(directory, recursive=recursive):
+            path = entry.path
+            seen.add(path)
+            if failures.get(path) == (entry.mtime_ns, entry.size):
+                failed += 1
+                continue
+            previous = known.get(path)
+            if previous and previous[1:3] == (entry.mtime_ns, entry.size):
+                unchanged += 1
+                continue
+            try:
+                sha1 = file_sha1(path)
+            except OSError:
+                # Vanished or unreadable since the directory was listed
+                failed += 1
+                continue
+            add_bytes(read=entry.size)
+            if previous and previous[3] == sha1:
+                connection.execute("UPDATE documents SET mtime_ns = ?, size = ? WHERE id = ?",
+                                   (entry.mtime_ns, entry.size, previous[0]))
+                unchanged += 1
+                continue
+            stale.append((path, entry, sha1, previous[0] if previous else None))
+
+        removed = [known[path][0] for path in known if path not in seen]
+        for document_id in removed:
+            _delete_rows(connection, document_id)
+            connection.execute("DELETE FROM documents WHERE id = ?", (document_id,))
+        connection.executemany("DELETE FROM failures WHERE path = ?",
+                               ((path,) for path in failures if path not in seen))
+
+        indexed = 0
+        with timed("parse"):
+            results = map_in_processes(_extract, [path for path, _, _, _ in stale])
+            for (path, entry, sha1, document_id), rows in zip(stale, results):
+                if rows is None:
+                    # The previous content is gone; so are its search results
+                    if document_id is not None:
+                        _delete_rows(connection, document_id)
+                        connection.execute("DELETE FROM documents WHERE id = ?", (document_id,))
+                    connection.execute(
+                        "INSERT OR REPLACE INTO failures (path, directory, mtime_ns, size) VALUES (?, ?, ?, ?)",
+                        (path, os.path.dirname(path), entry.mtime_ns, entry.size))
+                    failed += 1
+                    continue
+                if path in failures:
+                    connection.execute("DELETE FROM failures WHERE path = ?", (path,))
+                if document_id is None:
+                    document_id = connection.execute(
+                        "INSERT INTO documents (path, directory, mtime_ns, size, sha1, paragraph_count) "
+                        "VALUES (?, ?, ?, ?, ?, 0)",
+                        (path, os.path.dirname(path), entry.mtime_ns, entry.size, sha1)).lastrowid
+                else:
+                    _delete_rows(connection, document_id)
+                rows = rows[:ROWS_PER_DOCUMENT]
+                first = document_id * ROWS_PER_DOCUMENT
+                connection.executemany(
+                    "INSERT INTO paragraphs (rowid, text, paragraph_index, table_index, row, column, para_id) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    ((first + i, *row) for i, row in enumerate(rows)))
+                connection.execute(
+                    "UPDATE documents SET mtime_ns = ?, size = ?, sha1 = ?, paragraph_count = ? WHERE id = ?",
+                    (entry.mtime_ns, entry.size, sha1, len(rows), document_id))
+                indexed += 1
+        connection.commit()
+
+    return {"documents": len(seen), "indexed": indexed, "unchanged": unchanged, "removed": len(removed),
+            "failed": failed}
+
+
+def _quote_terms(query: str) -> str:
+    """Turn free text into an FTS5 query that matches all of its words."""
+    return " ".join('"' + term.replace('"', '""') + '"' for term in query.split())
+
+
+def search(connection: sqlite3.Connection, directory: str, query: str, max_results: int = 20,
+           recursive: bool = False) -> List[Dict[str, Any]]:
+    """
+    Search the indexed paragraphs of a directory, best matches first.
+
+    The query uses FTS5 syntax (phrases in double quotes, OR, NOT, NEAR,
+    prefix*); text that is not valid FTS5 syntax is searched as plain words
+    that must all occur.
+
+    Args:
+        connection: Connection from :func:`connect`
+        directory: Directory whose documents are searched
+        query: Search query
+        max_results: Maximum number of paragraphs to return
+        recursive: Include subdirectories
+
+    Returns:
+        List of dicts with file, paragraph_index, table position and a
+        snippet with matched terms in [brackets]. Body-level paragraphs also
+        have the "id" that tools accept in place of paragraph_index
+    """
+    directory = os.path.abspath(directory)
+    where = "d.directory = ?"
+    params: List[Any] = [directory]
+    if recursive:
+        escaped = directory.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        where = "(d.directory = ? OR d.directory LIKE ? ESCAPE '\\')"
+        params.append(os.path.join(escaped, "%"))
+    sql = (
+        "SELECT d.path, p.paragraph_index, p.para_id, p.table_index, p.row, p.column, "
+        "snippet(paragraphs, 0, '[', ']', '...', 16) "
+        "FROM paragraphs p JOIN documents d ON d.id = p.rowid / ? "
+        f"WHERE paragraphs MATCH ? AND {where} ORDER BY rank LIMIT ?"
+    )
+    try:
+        rows = connection.execute(sql, (ROWS_PER_DOCUMENT, query, *params, max_results)).fetchall()
+    except sqlite3.OperationalError:
+        quoted = _quote_terms(query)
+        if not quoted:
+            return []
+        rows = connection.execute(sql, (ROWS_PER_DOCUMENT, quoted, *params, max_results)).fetchall()
+
+    results = []
+    for path, paragraph_index, para_id, table_index, row, column, snippet in rows:
+        result = {"file": path, "paragraph_index": paragraph_index, "snippet": snippet}
+        if paragraph_index is not None:
+            # Only body-level paragraphs can be addressed by ID
+            result["id"] = para_id
+        if table_index is not None:
+            result.update(table_index=table_index, row=row, column=column)
+        results.append(result)
+    return results
@@ -0,0 +1,451 @@
+"""
+Search and replace for Word documents.
+
+Text is matched against whole paragraphs, not single runs: each paragraph's
+text is assembled once together with a map from offsets to the ``w:t``
+elements that hold them, so a match may span runs with different formatting.
+Only the runs a match touches are rewritten; the replacement takes the
+formatting of the run where the match starts. The body (with tables),
+headers and footers are covered.
+
+Many find/replace pairs can be applied in a single pass: the patterns are
+compiled into an Aho-Corasick automaton, so each paragraph is scanned once
+however many patterns there are, instead of once per pattern.
+"""
+import re
+from bisect import bisect_right
+from collections import deque
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from docx.opc.constants import RELATIONSHIP_TYPE as RT
+from docx.oxml.ns import qn
+
+
+_P = qn('w:p')
+_R = qn('w:r')
+_RPR = qn('w:rPr')
+_T = qn('w:t')
+_SDT_CONTENT = qn('w:sdtContent')
+_TYPE = qn('w:type')
+_XML_SPACE = '{http://www.w3.org/XML/1998/namespace}space'
+
+# Run children that stand for a fixed character in the paragraph text, as in
+# docx_stream.paragraph_text. A match may not include one.
+_FIXED = {qn('w:tab'): '\t', qn('w:ptab'): '\t', qn('w:cr'): '\n', qn('w:noBreakHyphen'): '-'}
+_BR = qn('w:br')
+
+# Inline elements whose runs belong to the enclosing paragraph
+_RUN_CONTAINERS = {qn('w:hyperlink'), qn('w:ins'), qn('w:smartTag'), qn('w:fldSimple'), qn('w:sdt'),
+                   _SDT_CONTENT}
+
+# A match is a tuple (start, end, replacement, ...) over a paragraph's text;
+# anything after the replacement is passed through to the caller untouched.
+Finder = Callable[[str], Iterable[Tuple[Any, ...]]]
+
+
+class PatternMatcher:
+    """
+    Aho-Corasick automaton over a fixed set of literal patterns.
+
+    Matches are reported leftmost-longest and never overlap, so the result
+    does not depend on the order in which the patterns were given.
+    """
+
+    def __init__(self, patterns: Iterable[str]):
+        self.patterns: List[str] = []
+        # Per node: transitions, failure link and the patterns ending there
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[int]] = [[]]
+
+        for pattern in dict.fromkeys(patterns):
+            if not pattern:
+                continue
+            node = 0
+            for char in pattern:
+                next_node = self._goto[node].get(char)
+                if next_node is None:
+                    next_node = len(self._goto)
+                    self._goto[node][char] = next_node
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                node = next_node
+            self._out[node].append(len(self.patterns))
+            self.patterns.append(pattern)
+
+        # Breadth-first pass to set failure links and merge outputs
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(char, 0)
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+
+    def __len__(self) -> int:
+        return len(self.patterns)
+
+    def find_all(self, text: str) -> List[Tuple[int, int]]:
+        """
+        Find non-overlapping matches in text.
+
+        Args:
+            text: Text to scan
+
+        Returns:
+            List of (start, pattern index) tuples in text order
+        """
+        goto, fail, out, patterns = self._goto, self._fail, self._out, self.patterns
+        candidates = []
+        node = 0
+        for end, char in enumerate(text, 1):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            for index in out[node]:
+                candidates.append((end - len(patterns[index]), -len(patterns[index]), index))
+        if not candidates:
+            return []
+
+        candidates.sort()
+        matches = []
+        position = 0
+        for start, negative_length, index in candidates:
+            if start >= position:
+                matches.append((start, index))
+                position = start - negative_length
+        return matches
+
+    def replace(self, text: str, replacements: List[str]) -> Tuple[str, List[Tuple[int, int]]]:
+        """
+        Replace every match in text.
+
+        Args:
+            text: Text to rewrite
+            replacements: Replacement for each pattern, by pattern index
+
+        Returns:
+            Tuple of (new text, matches)
+        """
+        matches = self.find_all(text)
+        if not matches:
+            return text, matches
+        pieces = []
+        position = 0
+        for start, index in matches:
+            pieces.append(text[position:start])
+            pieces.append(replacements[index])
+            position = start + len(self.patterns[index])
+        pieces.append(text[position:])
+        return ''.join(pieces), matches
+
+
+def set_text_node(t, text: str) -> None:
+    """Set the text of a ``w:t`` element, preserving surrounding whitespace."""
+    t.text = text
+    if text != text.strip():
+        t.set(_XML_SPACE, 'preserve')
+
+
+def _fold(text: str) -> Tuple[str, Optional[List[int]]]:
+    """
+    Case fold text.
+
+    Returns:
+        Tuple of (folded text, offsets). offsets maps each position in the
+        folded text, plus its end, to the position in text it came from; it
+        is None when folding kept every character's length, so positions
+        are unchanged.
+    """
+    folded = text.casefold()
+    if len(folded) == len(text):
+        # No character expands ("ß" to "ss"), and none ever shrinks
+        return folded, None
+    offsets = []
+    for position, char in enumerate(text):
+        offsets.extend([position] * len(char.casefold()))
+    offsets.append(len(text))
+    return folded, offsets
+
+
+class _FoldedMatch:
+    """Span of a :class:`FoldedPattern` match in the original text."""
+
+    __slots__ = ("_start", "_end")
+
+    def __init__(self, start: int, end: int):
+        self._start = start
+        self._end = end
+
+    def start(self) -> int:
+        return self._start
+
+    def end(self) -> int:
+        return self._end
+
+
+class FoldedPattern:
+    """
+    Literal pattern matched without regard to case, using full case folding.
+
+    re.IGNORECASE only maps single characters, so "STRASSE" would not match
+    "Straße". The pattern is compiled from the case folded query and run
+    over the case folded text; match positions are mapped back to the
+    original text. A match that would begin or end inside the expansion of
+    one character is skipped.
+    """
+
+    def __init__(self, regex: "re.Pattern"):
+        self.regex = regex
+
+    def finditer(self, text: str) -> Iterator[Any]:
+        """Yield the matches in text, as objects with start() and end()."""
+        if text.isascii():
+            # Case folding ASCII is lowercasing, which IGNORECASE already covers
+            yield from self.regex.finditer(text)
+            return
+        folded, offsets = _fold(text)
+        if offsets is None:
+            yield from self.regex.finditer(folded)
+            return
+        for match in self.regex.finditer(folded):
+            start, end = match.start(), match.end()
+            if ((start and offsets[start - 1] == offsets[start])
+                    or (end and end < len(folded) and offsets[end - 1] == offsets[end])):
+                continue
+            yield _FoldedMatch(offsets[start], offsets[end])
+
+    def search(self, text: str) -> Optional[Any]:
+        """Return the first match in text, or None."""
+        return next(self.finditer(text), None)
+
+
+def _remove_text_node(t) -> None:
+    """Remove a ``w:t`` element, and its run if nothing but run properties is left."""
+    r = t.getparent()
+    r.remove(t)
+    if r.tag == _R and all(child.tag == _RPR for child in r):
+        r.getparent().remove(r)
+
+
+def compile_pattern(find_text: str, use_regex: bool = False, match_case: bool = True,
+                    whole_word: bool = False) -> Union["re.Pattern", FoldedPattern]:
+    """
+    Compile the text to search for.
+
+    Args:
+        find_text: Literal text, or a regular expression when use_regex is set
+        use_regex: Treat find_text as a Python regular expression
+        match_case: Match case exactly; otherwise literal text is matched
+            with full case folding (see FoldedPattern), and a regular
+            expression with re.IGNORECASE, which maps single characters only
+        whole_word: Only match where the text is not directly preceded or
+            followed by a Unicode word character, so punctuation next to a
+            word does not prevent a match
+
+    Returns:
+        A compiled pattern; either kind provides search() and finditer(),
+        whose matches provide start() and end()
+
+    Raises:
+        re.error: If find_text is not a valid regular expression
+    """
+    if use_regex:
+        pattern = find_text
+    elif match_case:
+        pattern = re.escape(find_text)
+    else:
+        pattern = re.escape(find_text.casefold())
+    if whole_word:
+        # Lookarounds rather than \b, which fails next to a query's own punctuation ("C++")
+        pattern = rf'(?<!\w)(?:{pattern})(?!\w)'
+    if match_case:
+        return re.compile(pattern)
+    regex = re.compile(pattern, re.IGNORECASE)
+    return regex if use_regex else FoldedPattern(regex)
+
+
+def compile_any(queries: Iterable[str], match_case: bool = True) -> Union["re.Pattern", FoldedPattern]:
+    """
+    Compile a pattern matching any of several literal queries, with the case
+    handling of :func:`compile_pattern`.
+    """
+    if match_case:
+        return re.compile("|".join(re.escape(query) for query in queries))
+    return FoldedPattern(re.compile("|".join(re.escape(query.casefold()) for query in queries), re.IGNORECASE))
+
+
+def pattern_finder(pattern: Union["re.Pattern", FoldedPattern], replace_text: str, use_regex: bool = False) -> Finder:
+    """
+    Build a finder for :func:`replace_text` from a compiled pattern.
+
+    With use_regex, group references such as ``\\1`` or ``\\g<name>`` in
+    replace_text are expanded for each match.
+    """
+    def find(text):
+        for match in pattern.finditer(text):
+            yield match.start(), match.end(), match.expand(replace_text) if use_regex else replace_text
+    return find
+
+
+def _iter_runs(parent) -> Iterator[Any]:
+    for child in parent:
+        if child.tag == _R:
+            yield child
+        elif child.tag in _RUN_CONTAINERS:
+            yield from _iter_runs(child)
+
+
+def paragraph_segments(p) -> Tuple[str, List[Tuple[int, int, Optional[Any]]]]:
+    """
+    Assemble the text of a ``w:p`` element with its offset map.
+
+    Args:
+        p: ``w:p`` element
+
+    Returns:
+        Tuple of (text, segments). Each segment is (start, end, element)
+        where element is the ``w:t`` holding text[start:end], or None for a
+        tab, break or other fixed character.
+    """
+    parts = []
+    segments = []
+    position = 0
+    for r in _iter_runs(p):
+        for child in r:
+            tag = child.tag
+            if tag == _T:
+                text = child.text or ''
+                element = child
+            elif tag in _FIXED:
+                text = _FIXED[tag]
+                element = None
+            elif tag == _BR and child.get(_TYPE) in (None, 'textWrapping'):
+                text = '\n'
+                element = None
+            else:
+                continue
+            if text:
+                parts.append(text)
+                segments.append((position, position + len(text), element))
+                position += len(text)
+    return ''.join(parts), segments
+
+
+def rewrite_paragraph(segments: List[Tuple[int, int, Optional[Any]]],
+                      matches: Iterable[Tuple[Any, ...]]) -> List[Tuple[Any, ...]]:
+    """
+    Apply matches to the ``w:t`` elements of one paragraph.
+
+    Matches must be in text order and must not overlap. A match that would
+    remove a tab or break is skipped. Runs left without content by a match
+    that spans them are removed.
+
+    Args:
+        segments: Offset map from :func:`paragraph_segments`
+        matches: (start, end, replacement, ...) tuples
+
+    Returns:
+        The matches that were applied, in text order
+    """
+    starts = [segment[0] for segment in segments]
+    applied = []
+    # Work from the end so the offsets of earlier matches stay valid
+    for match in reversed(list(matches)):
+        start, end, replacement = match[0], match[1], match[2]
+        first = bisect_right(starts, start) - 1
+        # An empty match inserts into the segment it falls in, or the one it ends
+        last = bisect_right(starts, end - 1) - 1 if end > start else first
+        if first < 0 or any(segments[i][2] is None for i in range(first, last + 1)):
+            continue
+
+        first_start, _, first_t = segments[first]
+        last_start, _, last_t = segments[last]
+        head = first_t.text[:start - first_start]
+        tail = last_t.text[end - last_start:]
+        if first == last:
+            set_text_node(first_t, head + replacement + tail)
+        else:
+            set_text_node(first_t, head + replacement)
+            for i in range(first + 1, last):
+                _remove_text_node(segments[i][2])
+            if tail:
+                set_text_node(last_t, tail)
+            else:
+                _remove_text_node(last_t)
+        applied.append(match)
+    applied.reverse()
+    return applied
+
+
+def text_parts(doc) -> List[Any]:
+    """Return the root elements searched by :func:`replace_text`: the body,
+    then each header and footer part once."""
+    roots = [doc.element.body]
+    for rel in doc.part.rels.values():
+        if not rel.is_external and rel.reltype in (RT.HEADER, RT.FOOTER):
+            roots.append(rel.target_part.element)
+    return roots
+
+
+def replace_text(doc, finder: Finder) -> List[Tuple[Any, ...]]:
+    """
+    Replace text across runs in the body, tables, headers and footers.
+
+    Args:
+        doc: Document object
+        finder: Callable returning the non-overlapping matches in a
+            paragraph's text, as (start, end, replacement, ...) tuples in
+            text order
+
+    Returns:
+        All matches that were applied
+    """
+    applied = []
+    for root in text_parts(doc):
+        # Nested paragraphs (text boxes) come after their container, whose
+        # text does not include theirs
+        for p in root.iter(_P):
+            text, segments = paragraph_segments(p)
+            if not text:
+                continue
+            matches = list(finder(text))
+            if matches:
+                applied.extend(rewrite_paragraph(segments, matches))
+    return applied
+
+
+def replace_many(doc, replacements: Dict[str, str]) -> Dict[str, int]:
+    """
+    Apply many find/replace pairs in one pass.
+
+    Every paragraph is scanned once with all patterns at the same time.
+    Replacements are made against the original text, so one replacement is
+    never matched by another pattern. Matches may span runs, as with
+    :func:`replace_text`.
+
+    Args:
+        doc: Document object
+        replacements: Mapping of text to find to replacement text
+
+    Returns:
+        Number of occurrences replaced, per pattern that was found
+    """
+    matcher = PatternMatcher(replacements)
+    if not len(matcher):
+        return {}
+    patterns = matcher.patterns
+    targets = [replacements[pattern] for pattern in patterns]
+
+    def find(text):
+        for start, index in matcher.find_all(text):
+            yield start, start + len(patterns[index]), targets[index], index
+
+    counts = [0] * len(matcher)
+    for match in replace_text(doc, find):
+        counts[match[3]] += 1
+    return {pattern: count for pattern, count in zip(patterns, counts) if count}